@@ -6,6 +6,7 @@ GlobaLeaks-Fork mit Multi-Tenant-Support, HinSchG-Compliance
 und BSI-Grundschutz konformer Sicherheitsarchitektur.
 """
 
+import atexit
 import os
 import logging
 from datetime import timedelta
@@ -18,6 +19,7 @@ from flask_limiter.util import get_remote_address
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker, scoped_session
 from celery import Celery
+from celery.schedules import crontab
 import structlog
 import redis
 
@@ -95,6 +97,14 @@ def configure_redis(app: Flask) -> redis.Redis:
     return redis_client
 
 
+def configure_audit(app: Flask) -> None:
+    """Puffer fuer Audit-Eintraege ohne eigene Transaktion (siehe audit_writer)."""
+    from app.services.audit_writer import AuditBuffer
+
+    app.audit_buffer = AuditBuffer(app.engine, app.redis)
+    atexit.register(app.audit_buffer.close)
+
+
 def configure_celery(app: Flask) -> Celery:
     """Konfiguriert Celery fuer asynchrone Tasks."""
     celery_app.conf.update(
@@ -110,19 +120,73 @@ def configure_celery(app: Flask) -> Celery:
         task_soft_time_limit=240,
         worker_max_tasks_per_child=1000,
         broker_connection_retry_on_startup=True,
+        imports=(
+            "app.tasks.deadline_alerts",
+            "app.services.audit_partitions",
+            "app.services.audit_chain",
+            "app.services.cold_archive",
+        ),
         beat_schedule={
+            "dispatch-deadline-events": {
+                "task": "app.services.deadline_scheduler.dispatch_due_deadlines",
+                "schedule": timedelta(minutes=1),
+            },
+            "drain-notification-outbox": {
+                "task": "app.services.outbox.drain_outbox",
+                "schedule": timedelta(seconds=15),
+            },
             "check-hinschg-fristen": {
                 "task": "app.services.hinschg_compliance.check_fristen_task",
-                "schedule": timedelta(hours=1),
+                "schedule": timedelta(days=1),
+            },
+            "daily-deadline-alerts": {
+                "task": "app.tasks.deadline_alerts.send_deadline_alerts",
+                "schedule": crontab(hour=8, minute=0),
             },
             "cleanup-expired-sessions": {
                 "task": "app.services.audit.cleanup_expired_sessions",
                 "schedule": timedelta(hours=6),
             },
+            "drain-audit-fallback": {
+                "task": "app.services.audit_writer.drain_audit_fallback",
+                "schedule": timedelta(minutes=1),
+            },
+            "seal-audit-chains": {
+                "task": "app.services.audit_chain.seal_audit_chains",
+                "schedule": timedelta(minutes=1),
+            },
+            "checkpoint-audit-chains": {
+                "task": "app.services.audit_chain.checkpoint_audit_chains",
+                "schedule": timedelta(hours=1),
+            },
+            "verify-audit-chains": {
+                "task": "app.services.audit_chain.verify_audit_chains",
+                "schedule": crontab(hour=4, minute=0),
+            },
+            "maintain-audit-partitions": {
+                "task": "app.services.audit_partitions.maintain_audit_partitions",
+                "schedule": crontab(hour=1, minute=45),
+            },
+            "archive-cold-data": {
+                "task": "app.services.cold_archive.archive_cold_data",
+                "schedule": crontab(hour=2, minute=45),
+            },
             "generate-audit-report": {
                 "task": "app.services.audit.generate_daily_report",
                 "schedule": timedelta(days=1),
             },
+            "reconcile-analytics-rollups": {
+                "task": "app.services.analytics_rollup.reconcile_rollups",
+                "schedule": crontab(hour=2, minute=15),
+            },
+            "cleanup-exports": {
+                "task": "app.services.export.cleanup_exports",
+                "schedule": timedelta(hours=1),
+            },
+            "rebuild-case-workloads": {
+                "task": "app.services.case_assignment.rebuild_workloads",
+                "schedule": crontab(hour=3, minute=30),
+            },
         },
     )
 
@@ -147,6 +211,8 @@ def register_blueprints(app: Flask) -> None:
     from app.api.webhooks import webhooks_bp
     from app.api.analytics import analytics_bp
     from app.api.ombudsperson import ombudsperson_bp
+    from app.api.search import search_bp
+    from app.api.exports import exports_bp
 
     api_prefix = "/api/v1"
 
@@ -158,6 +224,8 @@ def register_blueprints(app: Flask) -> None:
     app.register_blueprint(webhooks_bp, url_prefix=f"{api_prefix}/webhooks")
     app.register_blueprint(analytics_bp, url_prefix=f"{api_prefix}/analytics")
     app.register_blueprint(ombudsperson_bp, url_prefix=f"{api_prefix}/ombudsperson")
+    app.register_blueprint(search_bp, url_prefix=f"{api_prefix}/search")
+    app.register_blueprint(exports_bp, url_prefix=f"{api_prefix}/exports")
 
 
 def register_error_handlers(app: Flask) -> None:
@@ -231,6 +299,9 @@ def create_app(config_override: dict | None = None) -> Flask:
         # Upload
         MAX_CONTENT_LENGTH=int(os.environ.get("MAX_UPLOAD_SIZE_MB", "50")) * 1024 * 1024,
         UPLOAD_FOLDER=os.environ.get("UPLOAD_FOLDER", "/app/uploads"),
+        # Export (Hintergrund-Jobs)
+        EXPORT_FOLDER=os.environ.get("EXPORT_FOLDER", "/app/exports"),
+        ARCHIVE_FOLDER=os.environ.get("ARCHIVE_FOLDER", "/app/archive"),
         # HinSchG
         HINSCHG_EINGANGSBESTAETIGUNG_TAGE=int(
             os.environ.get("HINSCHG_EINGANGSBESTAETIGUNG_TAGE", "7")
@@ -281,6 +352,9 @@ def create_app(config_override: dict | None = None) -> Flask:
     # Redis
     configure_redis(app)
 
+    # Audit-Puffer
+    configure_audit(app)
+
     # Celery
     configure_celery(app)
 
@@ -12,6 +12,8 @@ import structlog
 
 from app.models.user import User, UserRole
 from app.models.audit_log import AuditLog, AuditAction
+from app.models.hinweis import HinweisKategorie
+from app.services.case_assignment import refresh_workload
 
 log = structlog.get_logger()
 admin_bp = Blueprint("admin", __name__)
@@ -26,6 +28,13 @@ def require_admin():
     return True
 
 
+def _parse_skills(value) -> list[str]:
+    """Validiert assignment_skills (Liste von HinweisKategorie-Werten)."""
+    if not isinstance(value, list):
+        raise ValueError("assignment_skills muss eine Liste sein")
+    return sorted({HinweisKategorie(v).value for v in value})
+
+
 @admin_bp.route("/users", methods=["GET"])
 @jwt_required()
 def list_users():
@@ -52,6 +61,7 @@ def list_users():
                     "name": u.full_name,
                     "role": u.role.value,
                     "department": u.department,
+                    "assignment_skills": u.assignment_skills or [],
                     "is_active": u.is_active,
                     "mfa_enabled": u.mfa_enabled,
                     "last_login_at": u.last_login_at.isoformat() if u.last_login_at else None,
@@ -77,7 +87,8 @@ def create_user():
             "first_name": "Max",
             "last_name": "Mustermann",
             "role": "fallbearbeiter",
-            "department": "Compliance"
+            "department": "Compliance",
+            "assignment_skills": ["korruption", "betrug"]  (optional)
         }
     """
     if not require_admin():
@@ -110,6 +121,14 @@ def create_user():
             "valid_roles": [r.value for r in UserRole],
         }), 400
 
+    try:
+        skills = _parse_skills(data.get("assignment_skills", []))
+    except ValueError:
+        return jsonify({
+            "error": "Ungueltige assignment_skills",
+            "valid_skills": [k.value for k in HinweisKategorie],
+        }), 400
+
     claims = get_jwt()
     tenant_id = uuid.UUID(claims.get("tenant_id"))
     session = current_app.Session()
@@ -133,6 +152,7 @@ def create_user():
             department=data.get("department"),
             position=data.get("position"),
             phone=data.get("phone"),
+            assignment_skills=skills,
             must_change_password=data.get("must_change_password", True),
         )
 
@@ -152,6 +172,9 @@ def create_user():
 
         session.commit()
 
+        if role == UserRole.FALLBEARBEITER:
+            refresh_workload(session, tenant_id)
+
         log.info("user_created", email=user.email, role=role.value)
 
         return jsonify({
@@ -189,7 +212,7 @@ def update_user(user_id: str):
 
         updatable = [
             "first_name", "last_name", "department", "position",
-            "phone", "is_active", "role",
+            "phone", "is_active", "role", "assignment_skills",
         ]
 
         changes = {}
@@ -199,6 +222,8 @@ def update_user(user_id: str):
                 new_value = data[field]
                 if field == "role":
                     new_value = UserRole(new_value)
+                elif field == "assignment_skills":
+                    new_value = _parse_skills(new_value)
                 if str(old_value) != str(new_value):
                     setattr(user, field, new_value)
                     changes[field] = {"old": str(old_value), "new": str(new_value)}
@@ -220,8 +245,17 @@ def update_user(user_id: str):
             session.add(audit)
 
         session.commit()
+
+        # Zuweisungspools betreffen nur Rolle, Status, Abteilung und Kompetenzen
+        if changes.keys() & {"role", "is_active", "department", "assignment_skills"}:
+            refresh_workload(session, user.tenant_id)
+
         return jsonify({"message": "Benutzer aktualisiert", "changes": changes}), 200
 
+    except ValueError as e:
+        session.rollback()
+        return jsonify({"error": f"Ungueltiger Wert: {e}"}), 400
+
     except Exception as e:
         session.rollback()
         log.error("user_update_failed", error=str(e))
@@ -5,12 +5,17 @@ Keine personenbezogenen Daten - nur anonymisierte Statistiken.
 HinSchG-konform: Schwellenwert min. 3 Meldungen pro Kategorie.
 """
 
-from flask import Blueprint, jsonify, current_app
-from sqlalchemy import func, extract, text
-from datetime import datetime, timedelta
+import uuid
+from datetime import datetime
 
-from app.models.hinweis import Hinweis, HinweisStatus, HinweisKategorie
-from app.models.case import Case, CaseStatus
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt
+import structlog
+
+from app.services.analytics_dashboard import get_dashboard
+from app.services.processing_times import METRICS, parse_range, processing_time_percentiles
+
+log = structlog.get_logger()
 
 analytics_bp = Blueprint("analytics", __name__)
 
@@ -21,150 +26,28 @@ def get_session():
 
 
 @analytics_bp.route("/dashboard", methods=["GET"])
+@jwt_required()
 def get_dashboard_analytics():
     """
-    Aggregierte Compliance-Daten fuer das Dashboard.
+    Aggregierte Compliance-Daten des eigenen Mandanten fuer das Dashboard.
     Vollstaendig anonymisiert - keine personenbezogenen Daten.
     Schwellenwert: min. 3 Meldungen pro Kategorie (Anonymisierungsschutz).
+
+    Alle Kennzahlen kommen aus einer SQL-Anweisung und werden pro Mandant
+    kurz in Redis gecacht (siehe app.services.analytics_dashboard).
     """
+    claims = get_jwt()
+    if claims.get("role") not in ("admin", "ombudsperson", "fallbearbeiter"):
+        return jsonify({"error": "Keine Berechtigung"}), 403
+
+    tenant_id = uuid.UUID(claims.get("tenant_id"))
     session = get_session()
 
     try:
-        now = datetime.utcnow()
-        twelve_months_ago = now - timedelta(days=365)
-
-        # === Meldungsvolumen letzte 12 Monate ===
-        monthly_rows = session.query(
-            extract("year", Hinweis.eingegangen_am).label("year"),
-            extract("month", Hinweis.eingegangen_am).label("month"),
-            func.count(Hinweis.id).label("count"),
-        ).filter(
-            Hinweis.eingegangen_am >= twelve_months_ago
-        ).group_by(
-            extract("year", Hinweis.eingegangen_am),
-            extract("month", Hinweis.eingegangen_am),
-        ).order_by(
-            extract("year", Hinweis.eingegangen_am),
-            extract("month", Hinweis.eingegangen_am),
-        ).all()
-
-        monthly_volume = [
-            {"year": int(r.year), "month": int(r.month), "count": r.count}
-            for r in monthly_rows
-        ]
-
-        # === Kategorie-Verteilung (Schwellenwert: min. 3 Meldungen) ===
-        kategorie_rows = session.query(
-            Hinweis.kategorie,
-            func.count(Hinweis.id).label("count"),
-        ).group_by(
-            Hinweis.kategorie
-        ).having(
-            func.count(Hinweis.id) >= 3
-        ).order_by(
-            func.count(Hinweis.id).desc()
-        ).all()
-
-        # Lesbare Kategorienamen (DE)
-        kategorie_labels = {
-            "korruption": "Korruption",
-            "betrug": "Betrug",
-            "geldwaesche": "Geldwaesche",
-            "steuerhinterziehung": "Steuerhinterziehung",
-            "umweltverstoss": "Umweltverstoss",
-            "verbraucherschutz": "Verbraucherschutz",
-            "datenschutz": "Datenschutz",
-            "diskriminierung": "Diskriminierung",
-            "arbeitssicherheit": "Arbeitssicherheit",
-            "produktsicherheit": "Produktsicherheit",
-            "lebensmittelsicherheit": "Lebensmittelsicherheit",
-            "vergaberecht": "Vergaberecht",
-            "wettbewerbsrecht": "Wettbewerbsrecht",
-            "finanzdienstleistungen": "Finanzdienstleistungen",
-            "kernsicherheit": "Kernsicherheit",
-            "tiergesundheit": "Tiergesundheit",
-            "sonstiges": "Sonstiges",
-        }
-
-        categories = [
-            {
-                "name": kategorie_labels.get(
-                    r.kategorie.value if hasattr(r.kategorie, "value") else r.kategorie,
-                    r.kategorie.value if hasattr(r.kategorie, "value") else r.kategorie,
-                ),
-                "count": r.count,
-            }
-            for r in kategorie_rows
-        ]
-
-        # === HinweisStatus-Verteilung ===
-        status_rows = session.query(
-            Hinweis.status,
-            func.count(Hinweis.id).label("count"),
-        ).group_by(Hinweis.status).all()
-
-        status_labels = {
-            "eingegangen": "Eingegangen",
-            "eingangsbestaetigung": "Best. versendet",
-            "in_pruefung": "In Pruefung",
-            "in_bearbeitung": "In Bearbeitung",
-            "rueckmeldung": "Rueckmeldung",
-            "abgeschlossen": "Abgeschlossen",
-            "abgelehnt": "Abgelehnt",
-            "weitergeleitet": "Weitergeleitet",
-        }
-
-        statuses = [
-            {
-                "status": status_labels.get(
-                    r.status.value if hasattr(r.status, "value") else r.status,
-                    r.status.value if hasattr(r.status, "value") else r.status,
-                ),
-                "count": r.count,
-            }
-            for r in status_rows
-        ]
-
-        # === HinSchG-Fristeneinhaltung ===
-        # Zaehlt Meldungen, bei denen die Fristen eingehalten wurden
-        total_hinweise = session.query(func.count(Hinweis.id)).scalar() or 0
-
-        # Fristgerecht: Eingangsbestaetigung gesendet ODER noch innerhalb der Frist
-        fristgerecht = session.query(func.count(Hinweis.id)).filter(
-            (Hinweis.eingangsbestaetigung_gesendet_am.isnot(None)) |
-            (Hinweis.eingangsbestaetigung_frist > now)
-        ).scalar() or 0
-
-        compliance_rate = round((fristgerecht / total_hinweise) * 100, 1) if total_hinweise > 0 else 100.0
-
-        # === Ueberfaellige Fristen (fuer KPI) ===
-        ueberfaellige_eingangsbestaetigung = session.query(func.count(Hinweis.id)).filter(
-            Hinweis.eingangsbestaetigung_gesendet_am.is_(None),
-            Hinweis.eingangsbestaetigung_frist < now,
-        ).scalar() or 0
-
-        ueberfaellige_rueckmeldung = session.query(func.count(Hinweis.id)).filter(
-            Hinweis.rueckmeldung_gesendet_am.is_(None),
-            Hinweis.rueckmeldung_frist < now,
-            ~Hinweis.status.in_([HinweisStatus.ABGESCHLOSSEN, HinweisStatus.ABGELEHNT]),
-        ).scalar() or 0
-
-        return jsonify(
-            {
-                "monthly_volume": monthly_volume,
-                "categories": categories,
-                "statuses": statuses,
-                "compliance_rate": compliance_rate,
-                "total_cases": total_hinweise,
-                "ueberfaellige_fristen": {
-                    "eingangsbestaetigung": ueberfaellige_eingangsbestaetigung,
-                    "rueckmeldung": ueberfaellige_rueckmeldung,
-                },
-                "generated_at": now.isoformat() + "Z",
-            }
-        )
+        return jsonify(get_dashboard(session, current_app.redis, tenant_id))
 
     except Exception as exc:
+        session.rollback()
         current_app.logger.error(f"Analytics-Fehler: {exc}")
         # Bei Datenbankfehler: leere Struktur zurueckgeben (kein 500er)
         return jsonify(
@@ -184,3 +67,51 @@ def get_dashboard_analytics():
         ), 200  # 200 damit Frontend nicht abstuerzt
     finally:
         session.close()
+
+
+@analytics_bp.route("/processing-times", methods=["GET"])
+@jwt_required()
+def get_processing_times():
+    """
+    Perzentile (p50/p90/p99) der Bearbeitungszeit in Stunden je Kategorie und Monat.
+
+    Query-Parameter:
+        metric:    ack (Eingang -> Eingangsbestaetigung) | resolve (Fall -> Abschluss)
+        from, to:  Zeitraum des Startzeitpunkts (ISO-Datum; from inklusiv, to exklusiv;
+                   Standard: letzte 365 Tage)
+
+    Gruppen mit weniger als 3 Werten werden nicht ausgewiesen.
+    """
+    claims = get_jwt()
+    if claims.get("role") not in ("admin", "ombudsperson", "fallbearbeiter"):
+        return jsonify({"error": "Keine Berechtigung"}), 403
+
+    metric = request.args.get("metric", "ack")
+    if metric not in METRICS:
+        return jsonify({"error": f"Ungueltige Metrik: {metric}", "valid_metrics": list(METRICS)}), 400
+    try:
+        start, end = parse_range(request.args.get("from"), request.args.get("to"))
+    except ValueError as e:
+        return jsonify({"error": f"Ungueltiger Zeitraum: {e}"}), 400
+
+    tenant_id = uuid.UUID(claims.get("tenant_id"))
+    session = get_session()
+
+    try:
+        result = processing_time_percentiles(
+            session, current_app.redis, tenant_id, metric, start, end,
+        )
+        return jsonify({
+            "metric": metric,
+            "unit": "hours",
+            "from": start.isoformat(),
+            "to": end.isoformat(),
+            **result,
+        }), 200
+
+    except Exception as e:
+        session.rollback()
+        log.error("processing_times_failed", metric=metric, error=str(e))
+        return jsonify({"error": "Fehler beim Laden der Bearbeitungszeiten"}), 500
+    finally:
+        session.close()
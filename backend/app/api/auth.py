@@ -20,7 +20,8 @@ import pyotp
 import structlog
 
 from app.models.user import User, UserRole
-from app.models.audit_log import AuditLog, AuditAction
+from app.models.audit_log import AuditAction
+from app.services.audit_writer import enqueue_audit, record_audit
 
 log = structlog.get_logger()
 auth_bp = Blueprint("auth", __name__)
@@ -38,28 +39,19 @@ def get_tenant_id() -> str:
     return request.environ.get("TENANT_ID", "default")
 
 
-def log_audit(action: AuditAction, user_id=None, success=True, details=None):
-    """Erstellt einen Audit-Log-Eintrag."""
-    session = current_app.Session()
-    try:
-        audit = AuditLog(
-            tenant_id=None,  # Wird spaeter aufgeloest
-            user_id=user_id,
-            action=action,
-            ip_address=request.remote_addr,
-            user_agent=request.headers.get("User-Agent", "")[:500],
-            request_method=request.method,
-            request_path=request.path,
-            success=success,
-            details=details or {},
-        )
-        session.add(audit)
-        session.commit()
-    except Exception as e:
-        log.error("audit_log_failed", error=str(e))
-        session.rollback()
-    finally:
-        session.close()
+def log_audit(action: AuditAction, user_id=None, success=True, details=None,
+              tenant_id=None, session=None):
+    """
+    Erstellt einen Audit-Log-Eintrag.
+
+    Mit session in derselben Transaktion wie die Aenderung am Benutzer,
+    sonst (fehlgeschlagene Logins, Logout) ueber den Audit-Puffer.
+    """
+    fields = dict(tenant_id=tenant_id, user_id=user_id, success=success, details=details)
+    if session is not None:
+        record_audit(session, action, **fields)
+    else:
+        enqueue_audit(action, **fields)
 
 
 @auth_bp.route("/login", methods=["POST"])
@@ -106,6 +98,7 @@ def login():
             log_audit(
                 AuditAction.LOGIN_FAILED,
                 user_id=user.id,
+                tenant_id=user.tenant_id,
                 details={"reason": "account_locked"},
             )
             return jsonify({
@@ -125,15 +118,19 @@ def login():
                 log_audit(
                     AuditAction.ACCOUNT_LOCKED,
                     user_id=user.id,
+                    tenant_id=user.tenant_id,
                     details={"failed_attempts": user.failed_login_attempts},
+                    session=session,
                 )
 
-            session.commit()
             log_audit(
                 AuditAction.LOGIN_FAILED,
                 user_id=user.id,
+                tenant_id=user.tenant_id,
                 details={"reason": "wrong_password"},
+                session=session,
             )
+            session.commit()
             return jsonify({"error": "Ungueltige Anmeldedaten"}), 401
 
         # Passwort-Hash bei Bedarf aktualisieren (Rehash)
@@ -153,6 +150,7 @@ def login():
                 log_audit(
                     AuditAction.LOGIN_FAILED,
                     user_id=user.id,
+                    tenant_id=user.tenant_id,
                     details={"reason": "invalid_mfa"},
                 )
                 return jsonify({"error": "Ungueltiger MFA-Code"}), 401
@@ -162,6 +160,8 @@ def login():
         user.locked_until = None
         user.last_login_at = datetime.now(timezone.utc)
         user.last_login_ip = request.remote_addr
+        log_audit(AuditAction.LOGIN_SUCCESS, user_id=user.id, tenant_id=user.tenant_id,
+                  session=session)
         session.commit()
 
         # JWT-Tokens erstellen
@@ -179,8 +179,6 @@ def login():
             additional_claims=additional_claims,
         )
 
-        log_audit(AuditAction.LOGIN_SUCCESS, user_id=user.id)
-
         return jsonify({
             "access_token": access_token,
             "refresh_token": refresh_token,
@@ -224,7 +222,8 @@ def refresh():
 @jwt_required()
 def logout():
     """Benutzer-Logout. Invalidiert den aktuellen Token."""
-    jti = get_jwt()["jti"]
+    claims = get_jwt()
+    jti = claims["jti"]
     user_id = get_jwt_identity()
 
     # Token in Redis-Blocklist speichern
@@ -237,7 +236,12 @@ def logout():
     except Exception as e:
         log.warning("redis_blocklist_error", error=str(e))
 
-    log_audit(AuditAction.LOGOUT, user_id=uuid.UUID(user_id))
+    tenant_id = claims.get("tenant_id")
+    log_audit(
+        AuditAction.LOGOUT,
+        user_id=uuid.UUID(user_id),
+        tenant_id=uuid.UUID(tenant_id) if tenant_id else None,
+    )
     return jsonify({"message": "Erfolgreich abgemeldet"}), 200
 
 
@@ -305,10 +309,11 @@ def verify_mfa():
         user = session.query(User).get(uuid.UUID(user_id))
         user.mfa_enabled = True
         user.mfa_secret = secret  # In Produktion verschluesselt speichern!
+        log_audit(AuditAction.MFA_ENABLED, user_id=user.id, tenant_id=user.tenant_id,
+                  session=session)
         session.commit()
 
         current_app.redis.delete(f"mfa_setup:{user_id}")
-        log_audit(AuditAction.MFA_ENABLED, user_id=user.id)
 
         return jsonify({"message": "MFA erfolgreich aktiviert"}), 200
     except Exception as e:
@@ -6,20 +6,37 @@ D4: /forward-to-ombudsperson, /recommendation (Ombudsperson-Workflow)
 """
 
 import uuid
-from datetime import datetime, timezone
+from datetime import datetime, timezone, timedelta
+from typing import Optional
 
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
+from sqlalchemy import insert
+from sqlalchemy.orm import selectinload
 import structlog
 
 from app.models.case import Case, CaseStatus, CaseEvent, OmbudspersonEmpfehlung
 from app.models.hinweis import Hinweis, HinweisStatus
 from app.models.audit_log import AuditLog, AuditAction
-from app.services.deadline_service import get_case_deadline_status, get_deadline_summary
+from app.services.analytics_rollup import record_status_change
+from app.services.case_assignment import CaseAssignmentEngine, track_workload
+from app.services.case_timeline import DEFAULT_PAGE_SIZE, get_case_timeline
+from app.services.cold_archive import read_archived_case_events
+from app.services.deadline_scheduler import schedule_deadlines
+from app.services.encryption import EncryptionService
+from app.services.notification import NotificationService
+from app.services.search_index import index_safely
+from app.services.workflow import CompiledWorkflow, get_workflow
+from app.services.deadline_service import (
+    get_case_deadline_status, get_deadline_summary_sql, WARNING_DAYS,
+)
 
 log = structlog.get_logger()
 cases_bp = Blueprint("cases", __name__)
 
+# Obergrenze fuer POST /cases/bulk (eine Transaktion, Zeilensperren)
+MAX_BULK_OPERATIONS = 1000
+
 
 def _deadline_status_dict(case) -> dict:
     """Hilfsfunktion: DeadlineStatus als Dict fuer JSON-Response."""
@@ -53,6 +70,8 @@ def _case_to_dict(c: Case, include_deadline: bool = True) -> dict:
         # D3: Fristen-Felder
         "acknowledged_at": c.acknowledged_at.isoformat() if c.acknowledged_at else None,
         "resolved_at": c.resolved_at.isoformat() if c.resolved_at else None,
+        "next_deadline_at": c.next_deadline_at.isoformat() if c.next_deadline_at else None,
+        "next_deadline_type": c.next_deadline_type,
         # D4: Ombudsperson-Felder
         "forwarded_to_ombudsperson_at": (
             c.forwarded_to_ombudsperson_at.isoformat()
@@ -69,6 +88,36 @@ def _case_to_dict(c: Case, include_deadline: bool = True) -> dict:
     return result
 
 
+def _apply_status_change(case: Case, new_status: CaseStatus, now: datetime,
+                         workflow: CompiledWorkflow) -> None:
+    """Setzt den neuen Status inkl. Nebenwirkungen des Mandanten-Workflows."""
+    case.previous_status = case.status.value
+    case.status = new_status
+    workflow.apply_side_effects(case, new_status.value, now)
+    case.refresh_next_deadline()
+
+
+def _pick_assignee(session, tenant_id: uuid.UUID, hinweis: Hinweis,
+                   department: Optional[str] = None, exclude=()) -> Optional[uuid.UUID]:
+    """
+    Waehlt per Auslastung eine/n Fallbearbeiter/in fuer einen Fall.
+    Mitarbeitende der betroffenen Abteilung werden wegen Interessenkonflikt
+    ausgeschlossen. Bei Redis-Fehlern bleibt der Fall unzugewiesen.
+    """
+    try:
+        picked = CaseAssignmentEngine(current_app.redis).pick(
+            session, tenant_id,
+            kategorie=hinweis.kategorie.value if hinweis.kategorie else None,
+            department=department,
+            exclude_department=hinweis.betroffene_abteilung,
+            exclude_user_ids=exclude,
+        )
+    except Exception as e:
+        log.warning("case_auto_assign_failed", error=str(e))
+        return None
+    return uuid.UUID(picked) if picked else None
+
+
 # ==========================================================
 # BESTEHENDE ENDPUNKTE (erweitert)
 # ==========================================================
@@ -83,7 +132,9 @@ def create_case():
         {
             "hinweis_id": "uuid",
             "titel": "Falltitel",
-            "assignee_id": "uuid"  (optional)
+            "assignee_id": "uuid",  (optional)
+            "auto_assign": true,    (optional, statt assignee_id)
+            "department": "..."     (optional, Abteilungsfilter fuer auto_assign)
         }
     """
     claims = get_jwt()
@@ -127,16 +178,26 @@ def create_case():
             status=CaseStatus.OFFEN,
         )
 
+        assignee_id = None
         if data.get("assignee_id"):
-            case.assignee_id = uuid.UUID(data["assignee_id"])
+            assignee_id = uuid.UUID(data["assignee_id"])
+        elif data.get("auto_assign"):
+            assignee_id = _pick_assignee(session, tenant_id, hinweis, data.get("department"))
+
+        if assignee_id:
+            case.assignee_id = assignee_id
             case.status = CaseStatus.ZUGEWIESEN
             case.assigned_at = datetime.now(timezone.utc)
 
         session.add(case)
         session.flush()
+        case.refresh_next_deadline()
 
+        old_hinweis_status = hinweis.status
         hinweis.status = HinweisStatus.IN_BEARBEITUNG
+        hinweis.refresh_next_deadline()
         session.add(hinweis)
+        record_status_change(session, hinweis, old_hinweis_status)
 
         event = CaseEvent(
             case_id=case.id,
@@ -158,7 +219,11 @@ def create_case():
         )
         session.add(audit)
 
+        index_safely(session, tenant_id, "case", case.id, case.titel)
+
         session.commit()
+        schedule_deadlines(hinweis=hinweis, case=case)
+        track_workload(tenant_id, (None, None), (case.assignee_id, case.status))
         log.info("case_created", case_number=case_number, hinweis_ref=hinweis.reference_code)
 
         return jsonify({
@@ -168,6 +233,7 @@ def create_case():
                 "case_number": case_number,
                 "status": case.status.value,
                 "hinweis_reference": hinweis.reference_code,
+                "assignee_id": str(case.assignee_id) if case.assignee_id else None,
                 "deadline_status": _deadline_status_dict(case),
             },
         }), 201
@@ -203,29 +269,38 @@ def list_cases():
         if status:
             query = query.filter(Case.status == CaseStatus(status))
 
-        # D3: Filter fuer Fristenampel
+        # D3: Filter fuer Fristenampel (Range-Scan auf ix_cases_tenant_next_deadline_open)
         deadline_filter = request.args.get("deadline_filter")
+        now = datetime.now(timezone.utc)
         if deadline_filter == "urgent":
-            # Nur Faelle die noch nicht resolved sind
-            query = query.filter(Case.resolved_at.is_(None))
+            # Offene Faelle mit Frist innerhalb der Warnstufe (gelb oder rot)
+            query = query.filter(
+                Case.resolved_at.is_(None),
+                Case.next_deadline_at < now + timedelta(days=WARNING_DAYS + 1),
+            )
+        elif deadline_filter == "overdue":
+            query = query.filter(
+                Case.resolved_at.is_(None),
+                Case.next_deadline_at < now,
+            )
 
         # D4: Filter fuer Ombudsperson-weitergeleitet
         ombudsperson_filter = request.args.get("ombudsperson_filter")
         if ombudsperson_filter == "forwarded":
             query = query.filter(Case.forwarded_to_ombudsperson_at.isnot(None))
 
-        query = query.order_by(Case.updated_at.desc())
+        if request.args.get("sort") == "urgency":
+            query = query.order_by(Case.next_deadline_at.asc().nullslast(), Case.id)
+        else:
+            query = query.order_by(Case.updated_at.desc())
 
         page = int(request.args.get("page", 1))
         per_page = min(int(request.args.get("per_page", 25)), 100)
         total = query.count()
         cases = query.offset((page - 1) * per_page).limit(per_page).all()
 
-        # D3: Deadline-Summary fuer alle sichtbaren Faelle (ungepaginiert)
-        all_cases_for_summary = session.query(Case).filter(
-            Case.tenant_id == uuid.UUID(tenant_id)
-        ).all()
-        deadline_summary = get_deadline_summary(all_cases_for_summary)
+        # D3: Deadline-Summary fuer alle Faelle des Tenants (ungepaginiert, SQL-Aggregat)
+        deadline_summary = get_deadline_summary_sql(session, uuid.UUID(tenant_id))
 
         return jsonify({
             "items": [_case_to_dict(c) for c in cases],
@@ -278,20 +353,21 @@ def update_case_status(case_id: str):
         if str(case.tenant_id) != claims.get("tenant_id"):
             return jsonify({"error": "Keine Berechtigung"}), 403
 
-        if not case.can_transition_to(new_status):
+        workflow = get_workflow(session, case.tenant_id)
+        if not case.can_transition_to(new_status, workflow):
             return jsonify({
                 "error": f"Uebergang von {case.status.value} nach {new_status.value} nicht erlaubt",
+                "allowed": workflow.targets(case.status.value),
+            }), 400
+        missing = workflow.missing_fields(new_status.value, data)
+        if missing:
+            return jsonify({
+                "error": f"Pflichtfelder fuer Status {new_status.value} fehlen",
+                "missing_fields": missing,
             }), 400
 
         old_status = case.status
-        case.previous_status = old_status.value
-        case.status = new_status
-
-        if new_status == CaseStatus.ABGESCHLOSSEN:
-            case.closed_at = datetime.now(timezone.utc)
-        elif new_status == CaseStatus.ESKALIERT:
-            case.eskaliert = True
-            case.eskaliert_am = datetime.now(timezone.utc)
+        _apply_status_change(case, new_status, datetime.now(timezone.utc), workflow)
 
         event = CaseEvent(
             case_id=case.id,
@@ -315,6 +391,7 @@ def update_case_status(case_id: str):
         session.add(audit)
 
         session.commit()
+        track_workload(case.tenant_id, (case.assignee_id, old_status), (case.assignee_id, new_status))
         log.info("case_status_changed", case_number=case.case_number,
                  old=old_status.value, new=new_status.value)
 
@@ -353,7 +430,7 @@ def assign_case(case_id: str):
         if not case:
             return jsonify({"error": "Fall nicht gefunden"}), 404
 
-        old_assignee = case.assignee_id
+        old_assignee, old_status = case.assignee_id, case.status
         case.assignee_id = uuid.UUID(data["assignee_id"])
         case.assigned_at = datetime.now(timezone.utc)
 
@@ -380,6 +457,7 @@ def assign_case(case_id: str):
         session.add(audit)
 
         session.commit()
+        track_workload(case.tenant_id, (old_assignee, old_status), (case.assignee_id, case.status))
         return jsonify({"message": "Fall erfolgreich zugewiesen"}), 200
 
     except Exception as e:
@@ -390,6 +468,385 @@ def assign_case(case_id: str):
         session.close()
 
 
+@cases_bp.route("/<case_id>/auto-assign", methods=["POST"])
+@jwt_required()
+def auto_assign_case(case_id: str):
+    """
+    Fall automatisch der/dem am geringsten ausgelasteten Fallbearbeiter/in zuweisen.
+
+    Beruecksichtigt Kategorie-Kompetenzen und schliesst die betroffene Abteilung
+    aus. Die/der bisherige Bearbeiter/in wird bei einer Neuzuweisung uebergangen.
+
+    Request Body (optional):
+        {"department": "Compliance"}
+    """
+    claims = get_jwt()
+    if claims.get("role") not in ("admin", "ombudsperson"):
+        return jsonify({"error": "Nur Ombudspersonen und Admins koennen Faelle zuweisen"}), 403
+
+    data = request.get_json(silent=True) or {}
+    user_id = uuid.UUID(get_jwt_identity())
+    session = current_app.Session()
+
+    try:
+        case = session.query(Case).options(selectinload(Case.hinweis)).filter(
+            Case.id == uuid.UUID(case_id)
+        ).first()
+        if not case:
+            return jsonify({"error": "Fall nicht gefunden"}), 404
+
+        if str(case.tenant_id) != claims.get("tenant_id"):
+            return jsonify({"error": "Keine Berechtigung"}), 403
+
+        old_assignee, old_status = case.assignee_id, case.status
+        assignee_id = _pick_assignee(
+            session, case.tenant_id, case.hinweis, data.get("department"),
+            exclude=(old_assignee,) if old_assignee else (),
+        )
+        if assignee_id is None:
+            return jsonify({"error": "Keine geeignete Fallbearbeitung verfuegbar"}), 409
+
+        case.assignee_id = assignee_id
+        case.assigned_at = datetime.now(timezone.utc)
+        if case.status == CaseStatus.OFFEN:
+            case.status = CaseStatus.ZUGEWIESEN
+
+        event = CaseEvent(
+            case_id=case.id,
+            user_id=user_id,
+            event_type="assignment",
+            description=f"Fall automatisch zugewiesen an {assignee_id}",
+            metadata_json={
+                "old_assignee": str(old_assignee) if old_assignee else None,
+                "auto": True,
+            },
+        )
+        session.add(event)
+
+        audit = AuditLog(
+            tenant_id=case.tenant_id,
+            user_id=user_id,
+            action=AuditAction.CASE_ASSIGNED,
+            resource_type="case",
+            resource_id=str(case.id),
+            ip_address=request.remote_addr,
+            description=f"Fall {case.case_number} automatisch zugewiesen",
+        )
+        session.add(audit)
+
+        session.commit()
+        track_workload(case.tenant_id, (old_assignee, old_status), (case.assignee_id, case.status))
+        log.info("case_auto_assigned", case_number=case.case_number, assignee_id=str(assignee_id))
+
+        return jsonify({
+            "message": "Fall erfolgreich zugewiesen",
+            "assignee_id": str(assignee_id),
+        }), 200
+
+    except Exception as e:
+        session.rollback()
+        log.error("case_auto_assignment_failed", error=str(e))
+        return jsonify({"error": "Fehler bei der Zuweisung"}), 500
+    finally:
+        session.close()
+
+
+def _apply_bulk_operation(session, case: Case, op: dict, role: str, user_id: uuid.UUID,
+                          now: datetime, notification: NotificationService,
+                          workflow: CompiledWorkflow):
+    """
+    Wendet eine Einzeloperation aus POST /cases/bulk auf einen gesperrten Fall an.
+
+    Returns:
+        (Fehlermeldung oder None, Event-Zeile, Audit-Zeile)
+    """
+    action = op.get("action")
+
+    if action == "assign":
+        if role not in ("admin", "ombudsperson"):
+            return "Nur Ombudspersonen und Admins koennen Faelle zuweisen", None, None
+        try:
+            assignee_id = uuid.UUID(str(op.get("assignee_id")))
+        except ValueError:
+            return "assignee_id ist erforderlich", None, None
+        old_assignee = case.assignee_id
+        case.assignee_id = assignee_id
+        case.assigned_at = now
+        if case.status == CaseStatus.OFFEN:
+            case.status = CaseStatus.ZUGEWIESEN
+        return None, {
+            "event_type": "assignment",
+            "description": f"Fall zugewiesen an {assignee_id}",
+            "metadata_json": {"old_assignee": str(old_assignee) if old_assignee else None},
+        }, {
+            "action": AuditAction.CASE_ASSIGNED,
+        }
+
+    if action == "status":
+        try:
+            new_status = CaseStatus(op.get("status"))
+        except ValueError:
+            return f"Ungueltiger Status: {op.get('status')}", None, None
+        if not case.can_transition_to(new_status, workflow):
+            return (
+                f"Uebergang von {case.status.value} nach {new_status.value} nicht erlaubt",
+                None, None,
+            )
+        missing = workflow.missing_fields(new_status.value, op)
+        if missing:
+            return f"Pflichtfelder fehlen: {', '.join(missing)}", None, None
+        old_status = case.status
+        _apply_status_change(case, new_status, now, workflow)
+        return None, {
+            "event_type": "status_change",
+            "old_status": old_status.value,
+            "new_status": new_status.value,
+            "description": op.get(
+                "kommentar", f"Status geaendert: {old_status.value} -> {new_status.value}"
+            ),
+        }, {
+            "action": AuditAction.CASE_STATUS_CHANGED,
+            "changes": {"status": {"old": old_status.value, "new": new_status.value}},
+        }
+
+    if action == "acknowledge":
+        if case.acknowledged_at is not None:
+            return "Eingangsbestaetigung wurde bereits gesendet", None, None
+        case.acknowledged_at = now
+        case.refresh_next_deadline()
+        if case.hinweis is not None:
+            case.hinweis.mark_eingangsbestaetigung_gesendet(now)
+            notification.send_eingangsbestaetigung(session, case.hinweis, case.hinweis.tenant)
+        return None, {
+            "event_type": "acknowledged",
+            "description": "Eingangsbestaetigung an Melder versendet (HinSchG §17 Abs. 1)",
+        }, {
+            "action": AuditAction.EINGANGSBESTAETIGUNG_SENT,
+            "description": f"Eingangsbestaetigung fuer Fall {case.case_number} versendet",
+        }
+
+    return f"Unbekannte Aktion: {action}", None, None
+
+
+@cases_bp.route("/bulk", methods=["POST"])
+@jwt_required()
+def bulk_case_operations():
+    """
+    Mehrere Fallaktionen in einer Transaktion.
+
+    Alle Zielfaelle werden mit einer IN-Abfrage geladen und gesperrt,
+    Events und Audit-Eintraege gesammelt eingefuegt, am Ende wird einmal
+    committet. Ungueltige Einzeloperationen werden uebersprungen und im
+    Ergebnis gemeldet.
+
+    Request Body:
+        {
+            "operations": [
+                {"case_id": "uuid", "action": "assign", "assignee_id": "uuid"},
+                {"case_id": "uuid", "action": "status", "status": "in_ermittlung",
+                 "kommentar": "optional"},
+                {"case_id": "uuid", "action": "acknowledge"}
+            ]
+        }
+    """
+    claims = get_jwt()
+    role = claims.get("role")
+    if role not in ("admin", "ombudsperson", "fallbearbeiter"):
+        return jsonify({"error": "Keine Berechtigung"}), 403
+
+    data = request.get_json() or {}
+    operations = data.get("operations")
+    if not isinstance(operations, list) or not operations:
+        return jsonify({"error": "operations ist erforderlich"}), 400
+    if len(operations) > MAX_BULK_OPERATIONS:
+        return jsonify({
+            "error": f"Maximal {MAX_BULK_OPERATIONS} Operationen pro Anfrage",
+        }), 400
+
+    user_id = uuid.UUID(get_jwt_identity())
+    tenant_id = uuid.UUID(claims.get("tenant_id"))
+    session = current_app.Session()
+
+    results = [None] * len(operations)
+    case_ids = set()
+    for i, op in enumerate(operations):
+        try:
+            case_ids.add(uuid.UUID(str(op.get("case_id"))))
+        except (ValueError, AttributeError):
+            results[i] = {"index": i, "success": False, "error": "Ungueltige case_id"}
+
+    try:
+        query = session.query(Case).filter(
+            Case.id.in_(case_ids),
+            Case.tenant_id == tenant_id,
+        )
+        if any(isinstance(op, dict) and op.get("action") == "acknowledge" for op in operations):
+            query = query.options(selectinload(Case.hinweis))
+        # Feste Sperrreihenfolge vermeidet Deadlocks zwischen parallelen Bulk-Requests
+        cases = {
+            c.id: c for c in query.order_by(Case.id).with_for_update(of=Case).all()
+        }
+
+        now = datetime.now(timezone.utc)
+        notification = NotificationService()
+        workflow = get_workflow(session, tenant_id)
+        event_rows = []
+        audit_rows = []
+        acknowledged = []
+        # Zustand (assignee_id, status) vor der ersten Aenderung je Fall
+        before = {c.id: (c.assignee_id, c.status) for c in cases.values()}
+
+        for i, op in enumerate(operations):
+            if results[i] is not None:
+                continue
+            case = cases.get(uuid.UUID(str(op["case_id"])))
+            if case is None:
+                error = "Fall nicht gefunden"
+            else:
+                error, event_row, audit_row = _apply_bulk_operation(
+                    session, case, op, role, user_id, now, notification, workflow,
+                )
+
+            if error:
+                results[i] = {
+                    "index": i, "case_id": str(op["case_id"]), "success": False, "error": error,
+                }
+                continue
+
+            event_rows.append({"case_id": case.id, "user_id": user_id, **event_row})
+            audit_rows.append({"resource_id": str(case.id), **audit_row})
+            if op.get("action") == "acknowledge":
+                acknowledged.append(case)
+            results[i] = {"index": i, "case_id": str(case.id), "success": True}
+
+        # Geaenderte Faelle schreiben, dann Events/Audit gesammelt (executemany)
+        session.flush()
+        if event_rows:
+            session.execute(insert(CaseEvent), event_rows)
+        if audit_rows:
+            session.execute(insert(AuditLog), [
+                {
+                    "tenant_id": tenant_id,
+                    "user_id": user_id,
+                    "resource_type": "case",
+                    "ip_address": request.remote_addr,
+                    **row,
+                }
+                for row in audit_rows
+            ])
+
+        session.commit()
+        for case in acknowledged:
+            schedule_deadlines(hinweis=case.hinweis, case=case)
+        for case in cases.values():
+            track_workload(tenant_id, before[case.id], (case.assignee_id, case.status))
+
+        succeeded = sum(1 for r in results if r["success"])
+        log.info(
+            "case_bulk_operations",
+            total=len(operations), succeeded=succeeded, failed=len(operations) - succeeded,
+        )
+
+        return jsonify({
+            "results": results,
+            "succeeded": succeeded,
+            "failed": len(operations) - succeeded,
+        }), 200
+
+    except Exception as e:
+        session.rollback()
+        log.error("case_bulk_operations_failed", error=str(e))
+        return jsonify({"error": "Fehler bei der Sammelbearbeitung"}), 500
+    finally:
+        session.close()
+
+
+@cases_bp.route("/<case_id>/events", methods=["GET"])
+@jwt_required()
+def list_case_events(case_id: str):
+    """
+    Timeline eines Falls (neueste zuerst, Keyset-Paginierung).
+
+    Query-Parameter:
+        event_type: Kommagetrennte Ereignistypen (optional)
+        visibility: all (Default) | external | melder
+        cursor: next_cursor der vorherigen Seite
+        limit: Seitengroesse (Default 50, max. 200)
+        include_confidential: true = verschluesselte Beschreibung entschluesselt mitliefern
+
+    Ins Cold Archive ausgelagerte Ereignisse folgen nach den uebrigen
+    (Feld "archived": true).
+    """
+    claims = get_jwt()
+    role = claims.get("role")
+    if role not in ("admin", "ombudsperson", "fallbearbeiter"):
+        return jsonify({"error": "Keine Berechtigung"}), 403
+
+    session = current_app.Session()
+    try:
+        case = session.query(
+            Case.id, Case.tenant_id, Case.assignee_id
+        ).filter(Case.id == uuid.UUID(case_id)).first()
+        if not case:
+            return jsonify({"error": "Fall nicht gefunden"}), 404
+
+        if str(case.tenant_id) != claims.get("tenant_id"):
+            return jsonify({"error": "Keine Berechtigung"}), 403
+        if role == "fallbearbeiter" and str(case.assignee_id) != get_jwt_identity():
+            return jsonify({"error": "Keine Berechtigung"}), 403
+
+        event_types = [t for t in request.args.get("event_type", "").split(",") if t]
+        include_confidential = request.args.get("include_confidential") == "true"
+        try:
+            events, next_cursor = get_case_timeline(
+                session,
+                case.id,
+                event_types=event_types or None,
+                visibility=request.args.get("visibility", "all"),
+                cursor=request.args.get("cursor"),
+                limit=int(request.args.get("limit", DEFAULT_PAGE_SIZE)),
+                include_encrypted=include_confidential,
+                read_archived=lambda: read_archived_case_events(session, case),
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        encryption = (
+            EncryptionService(current_app.config["ENCRYPTION_MASTER_KEY"])
+            if include_confidential else None
+        )
+        items = []
+        for e in events:
+            item = {
+                "id": str(e.id),
+                "event_type": e.event_type,
+                "user_id": str(e.user_id) if e.user_id else None,
+                "old_status": e.old_status,
+                "new_status": e.new_status,
+                "description": e.description,
+                "metadata": e.metadata_json or {},
+                "is_internal": e.is_internal,
+                "is_visible_to_melder": e.is_visible_to_melder,
+                "created_at": e.created_at.isoformat(),
+            }
+            if getattr(e, "archived", False):
+                item["archived"] = True
+            if encryption is not None:
+                item["description_confidential"] = (
+                    encryption.decrypt(e.description_encrypted)
+                    if e.description_encrypted else None
+                )
+            items.append(item)
+
+        return jsonify({"items": items, "next_cursor": next_cursor}), 200
+
+    except Exception as e:
+        log.error("list_case_events_failed", error=str(e))
+        return jsonify({"error": "Fehler beim Laden der Timeline"}), 500
+    finally:
+        session.close()
+
+
 # ==========================================================
 # D3: FRISTENAMPEL - NEUE ENDPUNKTE
 # ==========================================================
@@ -427,6 +884,7 @@ def acknowledge_case(case_id: str):
 
         now = datetime.now(timezone.utc)
         case.acknowledged_at = now
+        case.refresh_next_deadline()
 
         # Case-Event dokumentieren
         event = CaseEvent(
@@ -449,7 +907,16 @@ def acknowledge_case(case_id: str):
         )
         session.add(audit)
 
+        # E-Mail an den Melder in derselben Transaktion (Outbox); schliesst
+        # die Frist der Meldung
+        if case.hinweis is not None:
+            case.hinweis.mark_eingangsbestaetigung_gesendet(now)
+            NotificationService().send_eingangsbestaetigung(
+                session, case.hinweis, case.hinweis.tenant,
+            )
+
         session.commit()
+        schedule_deadlines(hinweis=case.hinweis, case=case)
 
         ds = get_case_deadline_status(case)
         log.info("case_acknowledged", case_number=case.case_number,
@@ -503,6 +970,7 @@ def resolve_case(case_id: str):
         data = request.get_json() or {}
         now = datetime.now(timezone.utc)
         case.resolved_at = now
+        case.refresh_next_deadline()
 
         event = CaseEvent(
             case_id=case.id,
@@ -526,7 +994,18 @@ def resolve_case(case_id: str):
         )
         session.add(audit)
 
+        if case.hinweis is not None:
+            case.hinweis.mark_rueckmeldung_gesendet(now)
+            NotificationService().send_rueckmeldung(
+                session, case.hinweis, case.hinweis.tenant,
+                rueckmeldung_text=(
+                    "Die Bearbeitung Ihrer Meldung ist abgeschlossen. Weitere Informationen "
+                    "finden Sie im Meldeportal."
+                ),
+            )
+
         session.commit()
+        schedule_deadlines(hinweis=case.hinweis, case=case)
 
         log.info("case_resolved", case_number=case.case_number)
 
@@ -556,11 +1035,7 @@ def get_deadline_summary_endpoint():
 
     session = current_app.Session()
     try:
-        cases = session.query(Case).filter(
-            Case.tenant_id == uuid.UUID(tenant_id)
-        ).all()
-
-        summary = get_deadline_summary(cases)
+        summary = get_deadline_summary_sql(session, uuid.UUID(tenant_id))
         return jsonify(summary), 200
 
     except Exception as e:
@@ -0,0 +1,247 @@
+"""
+aitema|Hinweis - Export API
+Streaming-Export von Faellen und Meldungen (Berechtigung export_data).
+"""
+
+import os
+import uuid
+
+from flask import (
+    Blueprint, Response, request, jsonify, current_app, send_file, stream_with_context,
+)
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
+import structlog
+
+from app.models.user import User
+from app.services.bi_export import (
+    FACT_FORMATS, audit_facts_export, current_watermark, facts_filename, parse_since,
+    stream_facts,
+)
+from app.services.encryption import EncryptionService
+from app.services.export import (
+    EXPORT_SYNC_MAX_ROWS, FORMATS, ExportSpec, audit_export, count_rows,
+    create_export_job, export_path, get_export_job, stream_export, validate_spec,
+)
+
+log = structlog.get_logger()
+exports_bp = Blueprint("exports", __name__)
+
+
+def _can_export(session) -> bool:
+    """Prueft die Berechtigung export_data des aktuellen Benutzers."""
+    user = session.query(User).get(uuid.UUID(get_jwt_identity()))
+    return bool(user and user.is_active and user.has_permission("export_data"))
+
+
+def _export(resource: str):
+    """
+    Gemeinsame Logik fuer /cases und /hinweise.
+
+    Query-Parameter:
+        format:          csv | xlsx | ndjson (Standard csv)
+        status:          Statusfilter (optional)
+        from, to:        Zeitraum (ISO-Datum; from inklusiv, to exklusiv)
+        include_content: true = verschluesselte Inhalte entschluesselt mitexportieren
+        async:           true = immer als Hintergrund-Job
+    """
+    claims = get_jwt()
+    user_id = get_jwt_identity()
+    spec = ExportSpec(
+        resource=resource,
+        tenant_id=claims.get("tenant_id"),
+        fmt=request.args.get("format", "csv"),
+        status=request.args.get("status"),
+        date_from=request.args.get("from"),
+        date_to=request.args.get("to"),
+        include_content=request.args.get("include_content", "false").lower() == "true",
+    )
+    try:
+        validate_spec(spec)
+    except ValueError as e:
+        return jsonify({"error": f"Ungueltige Exportparameter: {e}"}), 400
+
+    session = current_app.Session()
+    streaming = False
+
+    try:
+        if not _can_export(session):
+            return jsonify({"error": "Keine Berechtigung"}), 403
+
+        run_async = request.args.get("async", "false").lower() == "true"
+        if not run_async and count_rows(session, spec) > EXPORT_SYNC_MAX_ROWS:
+            run_async = True
+
+        if run_async:
+            job_id = create_export_job(current_app.redis, spec, user_id)
+            audit_export(session, spec, user_id, request.remote_addr, job_id=job_id)
+            session.commit()
+            log.info("export_job_created", job_id=job_id, resource=resource, format=spec.fmt)
+            return jsonify({
+                "message": "Export wird im Hintergrund erstellt",
+                "job_id": job_id,
+                "status_url": f"/api/v1/exports/jobs/{job_id}",
+            }), 202
+
+        # Audit vor dem Streamen festschreiben
+        audit_export(session, spec, user_id, request.remote_addr)
+        session.commit()
+        log.info("export_streamed", resource=resource, format=spec.fmt)
+
+        encryption = (
+            EncryptionService(current_app.config["ENCRYPTION_MASTER_KEY"])
+            if spec.include_content else None
+        )
+
+        def generate():
+            try:
+                yield from stream_export(session, spec, encryption)
+            finally:
+                session.close()
+
+        streaming = True
+        return Response(
+            stream_with_context(generate()),
+            mimetype=FORMATS[spec.fmt][0],
+            headers={
+                "Content-Disposition": f'attachment; filename="{spec.filename()}"',
+                "Cache-Control": "no-store",
+            },
+        )
+
+    except Exception as e:
+        session.rollback()
+        log.error("export_failed", resource=resource, error=str(e))
+        return jsonify({"error": "Fehler beim Export"}), 500
+    finally:
+        if not streaming:
+            session.close()
+
+
+@exports_bp.route("/cases", methods=["GET"])
+@jwt_required()
+def export_cases():
+    """Faelle exportieren (Parameter siehe _export)."""
+    return _export("cases")
+
+
+@exports_bp.route("/hinweise", methods=["GET"])
+@jwt_required()
+def export_hinweise():
+    """Meldungen exportieren, ohne Melder-Kontaktdaten (Parameter siehe _export)."""
+    return _export("hinweise")
+
+
+@exports_bp.route("/facts", methods=["GET"])
+@jwt_required()
+def export_facts():
+    """
+    Anonymisierte Faktentabelle fuer BI-Werkzeuge (Parquet oder Arrow IPC).
+
+    Query-Parameter:
+        format:  parquet | arrow (Standard parquet)
+        since:   Wasserzeichen des letzten Exports (inkrementell, optional)
+
+    Das neue Wasserzeichen steht im Header X-Export-Watermark und in den
+    Schema-Metadaten der Datei.
+    """
+    fmt = request.args.get("format", "parquet")
+    if fmt not in FACT_FORMATS:
+        return jsonify({"error": f"Ungueltiges Format: {fmt}", "valid_formats": list(FACT_FORMATS)}), 400
+    try:
+        since = parse_since(request.args.get("since"))
+    except ValueError:
+        return jsonify({"error": "Ungueltiges Wasserzeichen (since)"}), 400
+
+    tenant_id = uuid.UUID(get_jwt().get("tenant_id"))
+    session = current_app.Session()
+    streaming = False
+
+    try:
+        if not _can_export(session):
+            return jsonify({"error": "Keine Berechtigung"}), 403
+
+        watermark = current_watermark(session, tenant_id)
+        audit_facts_export(
+            session, tenant_id, get_jwt_identity(), request.remote_addr, fmt, since, watermark,
+        )
+        session.commit()
+        log.info("facts_export_streamed", format=fmt, incremental=since is not None)
+
+        def generate():
+            try:
+                yield from stream_facts(session, tenant_id, fmt, since, watermark)
+            finally:
+                session.close()
+
+        streaming = True
+        return Response(
+            stream_with_context(generate()),
+            mimetype=FACT_FORMATS[fmt][0],
+            headers={
+                "Content-Disposition": f'attachment; filename="{facts_filename(fmt)}"',
+                "Cache-Control": "no-store",
+                "X-Export-Watermark": watermark.isoformat() if watermark else "",
+            },
+        )
+
+    except Exception as e:
+        session.rollback()
+        log.error("facts_export_failed", format=fmt, error=str(e))
+        return jsonify({"error": "Fehler beim Export"}), 500
+    finally:
+        if not streaming:
+            session.close()
+
+
+def _own_job(job_id: str):
+    """Job nur fuer die anfordernde Person im selben Mandanten."""
+    job = get_export_job(current_app.redis, job_id)
+    if not job:
+        return None
+    if job["user_id"] != get_jwt_identity() or job["tenant_id"] != get_jwt().get("tenant_id"):
+        return None
+    return job
+
+
+@exports_bp.route("/jobs/<job_id>", methods=["GET"])
+@jwt_required()
+def export_job_status(job_id: str):
+    """Status eines Export-Jobs."""
+    job = _own_job(job_id)
+    if not job:
+        return jsonify({"error": "Export nicht gefunden"}), 404
+
+    result = {
+        "job_id": job_id,
+        "status": job["status"],
+        "created_at": job.get("created_at"),
+        "finished_at": job.get("finished_at"),
+        "rows": int(job["rows"]) if job.get("rows") else None,
+    }
+    if job["status"] == "done":
+        result["download_url"] = f"/api/v1/exports/jobs/{job_id}/download"
+    if job["status"] == "failed":
+        result["error"] = job.get("error")
+    return jsonify(result), 200
+
+
+@exports_bp.route("/jobs/<job_id>/download", methods=["GET"])
+@jwt_required()
+def export_job_download(job_id: str):
+    """Fertige Exportdatei herunterladen."""
+    job = _own_job(job_id)
+    if not job or job["status"] != "done":
+        return jsonify({"error": "Export nicht gefunden"}), 404
+
+    path = export_path(job_id, job["filename"])
+    if not os.path.exists(path):
+        return jsonify({"error": "Exportdatei ist abgelaufen"}), 410
+
+    fmt = job["filename"].rsplit(".", 1)[-1]
+    return send_file(
+        path,
+        mimetype=FORMATS[fmt][0],
+        as_attachment=True,
+        download_name=job["filename"],
+        max_age=0,
+    )
@@ -15,14 +15,26 @@ from datetime import datetime, timezone
 
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
+from sqlalchemy import func, select
+from sqlalchemy.orm import contains_eager
 import structlog
 
 from app.models.case import Case, CaseStatus, CaseEvent, OmbudspersonEmpfehlung
+from app.models.hinweis import Hinweis
 from app.models.audit_log import AuditLog, AuditAction
+from app.services.case_timeline import get_case_timeline
+from app.services.workflow import get_workflow
 
 log = structlog.get_logger()
 ombudsperson_bp = Blueprint("ombudsperson", __name__)
 
+# Fuer die Ombudsperson sichtbare Ereignistypen der Fall-Timeline
+OMBUDSPERSON_EVENT_TYPES = (
+    "case_created", "status_change", "acknowledged",
+    "forwarded_to_ombudsperson", "ombudsperson_recommendation",
+    "resolved",
+)
+
 
 def _require_ombudsperson(claims: dict):
     """Prueft ob der aktuelle Nutzer Ombudsperson oder Admin ist."""
@@ -33,6 +45,15 @@ def _require_ombudsperson(claims: dict):
     return True
 
 
+# Von _mask_hinweis_for_ombudsperson gelesene Spalten (Listenabfrage laedt nur diese)
+MASKED_HINWEIS_COLUMNS = (
+    Hinweis.id, Hinweis.reference_code, Hinweis.titel, Hinweis.kategorie,
+    Hinweis.prioritaet, Hinweis.status, Hinweis.betroffene_abteilung,
+    Hinweis.zeitraum_von, Hinweis.zeitraum_bis, Hinweis.schaetzung_schaden,
+    Hinweis.compliance_relevant, Hinweis.eingegangen_am, Hinweis.is_anonymous,
+)
+
+
 def _mask_hinweis_for_ombudsperson(hinweis) -> dict:
     """
     Maskiert Identitaetsdaten des Melders fuer die Ombudsperson-View.
@@ -107,28 +128,62 @@ def list_ombudsperson_cases():
     if not _require_ombudsperson(claims):
         return jsonify({"error": "Nur Ombudspersonen haben Zugriff auf diese Ressource"}), 403
 
-    tenant_id = claims.get("tenant_id")
+    tenant_id = uuid.UUID(claims.get("tenant_id"))
     session = current_app.Session()
 
     try:
-        query = session.query(Case).filter(
-            Case.tenant_id == uuid.UUID(tenant_id),
+        page = int(request.args.get("page", 1))
+        per_page = min(int(request.args.get("per_page", 25)), 100)
+
+        # Eine Abfrage: innen alle weitergeleiteten Faelle mit pending_review als
+        # FILTER-Fensteraggregat (unabhaengig vom reviewed-Filter), aussen Filter,
+        # Gesamtzahl per count(*) OVER (), Seite und maskierte Hinweis-Spalten per JOIN
+        forwarded = select(
+            Case.id,
+            func.count().filter(
+                Case.ombudsperson_recommendation.is_(None)
+            ).over().label("pending_review"),
+        ).where(
+            Case.tenant_id == tenant_id,
             Case.forwarded_to_ombudsperson_at.isnot(None),
+        ).subquery()
+
+        stmt = select(
+            Case, forwarded.c.pending_review, func.count().over().label("total"),
+        ).join(
+            forwarded, forwarded.c.id == Case.id
+        ).outerjoin(
+            Case.hinweis
+        ).options(
+            contains_eager(Case.hinweis).load_only(*MASKED_HINWEIS_COLUMNS, raiseload=True)
         )
 
         # Filter: Empfehlung bereits abgegeben oder nicht
-        reviewed = request.args.get("reviewed")
-        if reviewed == "true":
-            query = query.filter(Case.ombudsperson_recommendation.isnot(None))
-        elif reviewed == "false":
-            query = query.filter(Case.ombudsperson_recommendation.is_(None))
-
-        query = query.order_by(Case.forwarded_to_ombudsperson_at.desc())
-
-        page = int(request.args.get("page", 1))
-        per_page = min(int(request.args.get("per_page", 25)), 100)
-        total = query.count()
-        cases = query.offset((page - 1) * per_page).limit(per_page).all()
+        reviewed = {
+            "true": Case.ombudsperson_recommendation.isnot(None),
+            "false": Case.ombudsperson_recommendation.is_(None),
+        }.get(request.args.get("reviewed"))
+        if reviewed is not None:
+            stmt = stmt.where(reviewed)
+
+        rows = session.execute(
+            stmt.order_by(Case.forwarded_to_ombudsperson_at.desc(), Case.id)
+            .offset((page - 1) * per_page).limit(per_page)
+        ).all()
+
+        if rows:
+            cases = [row.Case for row in rows]
+            total, pending_review = rows[0].total, rows[0].pending_review
+        else:
+            # Leere Seite (hinter der letzten): Zaehler in einer Aggregat-Abfrage
+            cases = []
+            total, pending_review = session.execute(select(
+                func.count() if reviewed is None else func.count().filter(reviewed),
+                func.count().filter(Case.ombudsperson_recommendation.is_(None)),
+            ).where(
+                Case.tenant_id == tenant_id,
+                Case.forwarded_to_ombudsperson_at.isnot(None),
+            )).one()
 
         return jsonify({
             "items": [_case_for_ombudsperson(c) for c in cases],
@@ -138,11 +193,7 @@ def list_ombudsperson_cases():
                 "total": total,
                 "pages": (total + per_page - 1) // per_page,
             },
-            "pending_review": session.query(Case).filter(
-                Case.tenant_id == uuid.UUID(tenant_id),
-                Case.forwarded_to_ombudsperson_at.isnot(None),
-                Case.ombudsperson_recommendation.is_(None),
-            ).count(),
+            "pending_review": pending_review,
         }), 200
 
     except Exception as e:
@@ -178,27 +229,30 @@ def get_ombudsperson_case(case_id: str):
                 "error": "Dieser Fall wurde nicht an die Ombudsperson weitergeleitet"
             }), 403
 
-        # Events fuer Ombudsperson (nur nicht-interne oder weiterleitungs-Events)
+        # Events fuer Ombudsperson (nur Workflow-Events, Filter und Paginierung in SQL)
+        try:
+            events, next_cursor = get_case_timeline(
+                session,
+                case.id,
+                event_types=OMBUDSPERSON_EVENT_TYPES,
+                cursor=request.args.get("events_cursor"),
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         visible_events = [
             {
                 "id": str(e.id),
                 "event_type": e.event_type,
-                "description": e.description if e.event_type not in (
-                    "note_added",
-                ) else "[intern]",
+                "description": e.description,
                 "created_at": e.created_at.isoformat(),
             }
-            for e in case.events
-            if e.event_type in (
-                "case_created", "status_change", "acknowledged",
-                "forwarded_to_ombudsperson", "ombudsperson_recommendation",
-                "resolved",
-            )
+            for e in events
         ]
 
         return jsonify({
             "case": _case_for_ombudsperson(case),
             "events": visible_events,
+            "events_next_cursor": next_cursor,
         }), 200
 
     except Exception as e:
@@ -280,7 +334,9 @@ def submit_recommendation(case_id: str):
         if recommendation == OmbudspersonEmpfehlung.ESKALIEREN.value:
             case.eskaliert = True
             case.eskaliert_am = now
-            if case.can_transition_to(CaseStatus.ESKALIERT):
+            if case.can_transition_to(
+                CaseStatus.ESKALIERT, get_workflow(session, case.tenant_id)
+            ):
                 case.previous_status = case.status.value
                 case.status = CaseStatus.ESKALIERT
 
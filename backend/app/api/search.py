@@ -0,0 +1,120 @@
+"""
+aitema|Hinweis - Search API
+Volltextsuche ueber Meldungen und Faelle (verschluesselter Index).
+"""
+
+import uuid
+
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
+import structlog
+
+from app.models.case import Case
+from app.models.hinweis import Hinweis
+from app.services.search_index import RESOURCE_TYPES, reindex_tenant, search
+
+log = structlog.get_logger()
+search_bp = Blueprint("search", __name__)
+
+
+@search_bp.route("/", methods=["GET"])
+@jwt_required()
+def search_documents():
+    """
+    Meldungen und Faelle durchsuchen.
+
+    Query-Parameter:
+        q:     Suchanfrage, z.B. "korruption vergabe", "betrug OR untreue", "korrup*"
+        type:  hinweis | case (optional)
+        limit: max. Treffer (Standard 50, max. 200)
+
+    Fallbearbeiter/innen sehen nur Treffer zu ihnen zugewiesenen Faellen.
+    """
+    claims = get_jwt()
+    role = claims.get("role")
+    if role not in ("admin", "ombudsperson", "fallbearbeiter"):
+        return jsonify({"error": "Keine Berechtigung"}), 403
+
+    query = request.args.get("q", "").strip()
+    if not query:
+        return jsonify({"error": "Suchanfrage (q) ist erforderlich"}), 400
+
+    resource_type = request.args.get("type")
+    if resource_type and resource_type not in RESOURCE_TYPES:
+        return jsonify({
+            "error": f"Ungueltiger Typ: {resource_type}",
+            "valid_types": list(RESOURCE_TYPES),
+        }), 400
+
+    tenant_id = uuid.UUID(claims.get("tenant_id"))
+    session = current_app.Session()
+
+    try:
+        hits = search(
+            session, tenant_id, query, resource_type=resource_type,
+            limit=request.args.get("limit", 50, type=int),
+            assignee_id=uuid.UUID(get_jwt_identity()) if role == "fallbearbeiter" else None,
+        )
+        hinweis_ids = [rid for rtype, rid in hits if rtype == "hinweis"]
+        case_ids = [rid for rtype, rid in hits if rtype == "case"]
+
+        hinweise = session.query(
+            Hinweis.id, Hinweis.reference_code, Hinweis.titel, Hinweis.status,
+            Hinweis.kategorie, Hinweis.eingegangen_am,
+        ).filter(
+            Hinweis.id.in_(hinweis_ids), Hinweis.tenant_id == tenant_id
+        ).all() if hinweis_ids else []
+
+        cases = session.query(
+            Case.id, Case.hinweis_id, Case.case_number, Case.titel, Case.status,
+            Case.opened_at,
+        ).filter(
+            Case.id.in_(case_ids), Case.tenant_id == tenant_id
+        ).all() if case_ids else []
+
+        items = [
+            {
+                "type": "hinweis",
+                "id": str(h.id),
+                "reference_code": h.reference_code,
+                "titel": h.titel,
+                "status": h.status.value,
+                "kategorie": h.kategorie.value,
+                "date": h.eingegangen_am.isoformat() if h.eingegangen_am else None,
+            }
+            for h in hinweise
+        ] + [
+            {
+                "type": "case",
+                "id": str(c.id),
+                "case_number": c.case_number,
+                "titel": c.titel,
+                "status": c.status.value,
+                "date": c.opened_at.isoformat() if c.opened_at else None,
+            }
+            for c in cases
+        ]
+        items.sort(key=lambda i: i["date"] or "", reverse=True)
+
+        return jsonify({"items": items, "total": len(items)}), 200
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        log.error("search_failed", error=str(e))
+        return jsonify({"error": "Fehler bei der Suche"}), 500
+    finally:
+        session.close()
+
+
+@search_bp.route("/reindex", methods=["POST"])
+@jwt_required()
+def reindex():
+    """Suchindex des eigenen Mandanten im Hintergrund neu aufbauen (nur Admin)."""
+    claims = get_jwt()
+    if claims.get("role") != "admin":
+        return jsonify({"error": "Keine Berechtigung"}), 403
+
+    reindex_tenant.delay(claims.get("tenant_id"))
+    log.info("search_reindex_requested", tenant_id=claims.get("tenant_id"))
+    return jsonify({"message": "Neuindizierung gestartet"}), 202
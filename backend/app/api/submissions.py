@@ -17,6 +17,10 @@ from app.models.hinweis import (
 from app.models.audit_log import AuditLog, AuditAction
 from app.services.encryption import EncryptionService
 from app.services.hinschg_compliance import HinSchGComplianceService
+from app.services.deadline_scheduler import schedule_deadlines
+from app.services.search_index import index_safely
+from app.services.analytics_rollup import record_submission
+from app.services.audit_writer import enqueue_audit
 
 log = structlog.get_logger()
 submissions_bp = Blueprint("submissions", __name__)
@@ -157,6 +161,7 @@ def create_submission():
             ip_hash=ip_hash,
             tags=data.get("tags", []),
         )
+        hinweis.refresh_next_deadline()
 
         session.add(hinweis)
         session.flush()  # ID generieren
@@ -173,7 +178,16 @@ def create_submission():
         )
         session.add(audit)
 
+        record_submission(session, hinweis)
+
+        # Suchindex (nur HMAC-Token-Hashes, in derselben Transaktion)
+        index_safely(
+            session, hinweis.tenant_id, "hinweis", hinweis.id,
+            titel, beschreibung, hinweis.betroffene_abteilung,
+        )
+
         session.commit()
+        schedule_deadlines(hinweis=hinweis)
 
         log.info(
             "submission_created",
@@ -267,14 +281,23 @@ def list_submissions():
         if kategorie:
             query = query.filter(Hinweis.kategorie == HinweisKategorie(kategorie))
 
+        # Fristen-Filter (Range-Scan auf ix_hinweise_tenant_next_deadline_open)
+        frist = request.args.get("frist")
+        now = datetime.now(timezone.utc)
+        if frist == "ueberfaellig":
+            query = query.filter(Hinweis.next_deadline_at < now)
+        elif frist == "bald_faellig":
+            tage = int(request.args.get("frist_tage", 14))
+            query = query.filter(Hinweis.next_deadline_at < now + timedelta(days=tage))
+
         # Sortierung
         sort = request.args.get("sort", "eingegangen_am")
         order = request.args.get("order", "desc")
         sort_column = getattr(Hinweis, sort, Hinweis.eingegangen_am)
         if order == "desc":
-            query = query.order_by(sort_column.desc())
+            query = query.order_by(sort_column.desc().nullslast())
         else:
-            query = query.order_by(sort_column.asc())
+            query = query.order_by(sort_column.asc().nullslast())
 
         # Pagination
         page = int(request.args.get("page", 1))
@@ -296,6 +319,10 @@ def list_submissions():
                     "tage_seit_eingang": h.tage_seit_eingang,
                     "eingangsbestaetigung_ueberfaellig": h.eingangsbestaetigung_ueberfaellig,
                     "rueckmeldung_ueberfaellig": h.rueckmeldung_ueberfaellig,
+                    "next_deadline_at": (
+                        h.next_deadline_at.isoformat() if h.next_deadline_at else None
+                    ),
+                    "next_deadline_type": h.next_deadline_type,
                 }
                 for h in hinweise
             ],
@@ -335,17 +362,14 @@ def get_submission(submission_id: str):
         if str(hinweis.tenant_id) != claims.get("tenant_id"):
             return jsonify({"error": "Keine Berechtigung"}), 403
 
-        # Audit-Log fuer Zugriff
-        audit = AuditLog(
+        # Audit-Log fuer Zugriff (reiner Lesezugriff, kein eigener Commit)
+        enqueue_audit(
+            AuditAction.SUBMISSION_VIEWED,
             tenant_id=hinweis.tenant_id,
             user_id=uuid.UUID(get_jwt_identity()),
-            action=AuditAction.SUBMISSION_VIEWED,
             resource_type="hinweis",
             resource_id=str(hinweis.id),
-            ip_address=request.remote_addr,
         )
-        session.add(audit)
-        session.commit()
 
         # Verschluesselte Felder entschluesseln
         response = {
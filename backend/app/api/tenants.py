@@ -12,7 +12,9 @@ import structlog
 
 from app.models.tenant import Tenant
 from app.models.audit_log import AuditLog, AuditAction
+from app.services.fleet_stats import platform_stats
 from app.services.tenant_manager import TenantManager
+from app.services.workflow import DEFAULT_WORKFLOW, compile_workflow, invalidate_workflow
 
 log = structlog.get_logger()
 tenants_bp = Blueprint("tenants", __name__)
@@ -49,6 +51,44 @@ def list_tenants():
         session.close()
 
 
+@tenants_bp.route("/stats", methods=["GET"])
+@jwt_required()
+def fleet_stats():
+    """
+    Plattformweite Kennzahlen ueber alle aktiven Mandanten (nur System-Admins).
+
+    Im database- und schema-Modus wird jede Tenant-Ablage parallel abgefragt;
+    nicht erreichbare Tenants stehen unter meta.failed (partial = true).
+    """
+    claims = get_jwt()
+    if claims.get("role") != "admin":
+        return jsonify({"error": "Nur Administratoren haben Zugriff"}), 403
+
+    session = current_app.Session()
+    try:
+        result = platform_stats(current_app, session)
+        log.info(
+            "fleet_stats_loaded", targets=result.targets,
+            failed=len(result.failed), duration_ms=result.duration_ms,
+        )
+        return jsonify({
+            **result.totals,
+            "meta": {
+                "targets": result.targets,
+                "succeeded": result.succeeded,
+                "failed": result.failed,
+                "partial": result.partial,
+                "duration_ms": result.duration_ms,
+            },
+        }), 200
+
+    except Exception as e:
+        log.error("fleet_stats_failed", error=str(e))
+        return jsonify({"error": "Fehler beim Laden der Statistiken"}), 500
+    finally:
+        session.close()
+
+
 @tenants_bp.route("/", methods=["POST"])
 @jwt_required()
 def create_tenant():
@@ -232,3 +272,92 @@ def update_tenant(tenant_id: str):
         return jsonify({"error": "Fehler beim Aktualisieren"}), 500
     finally:
         session.close()
+
+
+@tenants_bp.route("/<tenant_id>/workflow", methods=["GET"])
+@jwt_required()
+def get_tenant_workflow(tenant_id: str):
+    """Fall-Workflow des Mandanten (Standard, falls nicht konfiguriert)."""
+    claims = get_jwt()
+    if claims.get("role") != "admin":
+        return jsonify({"error": "Nur Administratoren haben Zugriff"}), 403
+
+    session = current_app.Session()
+    try:
+        tenant = session.query(Tenant).get(uuid.UUID(tenant_id))
+        if not tenant:
+            return jsonify({"error": "Mandant nicht gefunden"}), 404
+
+        workflow = (tenant.config or {}).get("workflow")
+        return jsonify({
+            "workflow": workflow or DEFAULT_WORKFLOW,
+            "is_default": not workflow,
+        }), 200
+
+    except Exception as e:
+        log.error("tenant_workflow_get_failed", error=str(e))
+        return jsonify({"error": "Fehler beim Laden des Workflows"}), 500
+    finally:
+        session.close()
+
+
+@tenants_bp.route("/<tenant_id>/workflow", methods=["PUT"])
+@jwt_required()
+def update_tenant_workflow(tenant_id: str):
+    """
+    Fall-Workflow des Mandanten setzen.
+
+    Request Body:
+        {"workflow": {"transitions": {...}, "required_fields": {...}, "side_effects": {...}}}
+        oder {"workflow": null} fuer den Standard-Workflow
+    """
+    claims = get_jwt()
+    if claims.get("role") != "admin":
+        return jsonify({"error": "Nur Administratoren koennen Mandanten bearbeiten"}), 403
+
+    data = request.get_json() or {}
+    workflow = data.get("workflow")
+    if workflow is not None:
+        try:
+            compile_workflow(workflow)
+        except ValueError as e:
+            return jsonify({"error": f"Ungueltiger Workflow: {e}"}), 400
+
+    session = current_app.Session()
+    try:
+        tenant = session.query(Tenant).get(uuid.UUID(tenant_id))
+        if not tenant:
+            return jsonify({"error": "Mandant nicht gefunden"}), 404
+
+        config = dict(tenant.config or {})
+        old_workflow = config.get("workflow")
+        if workflow is None:
+            config.pop("workflow", None)
+        else:
+            config["workflow"] = workflow
+        # Neues Dict zuweisen, damit die JSON-Spalte als geaendert gilt
+        tenant.config = config
+
+        audit = AuditLog(
+            tenant_id=tenant.id,
+            user_id=uuid.UUID(get_jwt_identity()),
+            action=AuditAction.TENANT_UPDATED,
+            resource_type="tenant",
+            resource_id=str(tenant.id),
+            ip_address=request.remote_addr,
+            changes={"workflow": {"old": old_workflow, "new": workflow}},
+        )
+        session.add(audit)
+
+        session.commit()
+        invalidate_workflow(tenant.id)
+        log.info("tenant_workflow_updated", tenant_id=str(tenant.id))
+
+        return jsonify({"message": "Workflow aktualisiert"}), 200
+
+    except Exception as e:
+        session.rollback()
+        log.error("tenant_workflow_update_failed", error=str(e))
+        return jsonify({"error": "Fehler beim Aktualisieren"}), 500
+    finally:
+        session.close()
@@ -28,8 +28,12 @@ from app.models.tenant import Tenant
 from app.models.user import User, UserRole
 from app.models.hinweis import Hinweis, HinweisKategorie, HinweisPrioritaet, HinweisStatus
 from app.models.case import Case, CaseStatus, CaseEvent, OmbudspersonEmpfehlung
-from app.models.audit_log import AuditLog, AuditAction
+from app.models.audit_log import AuditLog, AuditAction, AuditChainHead, AuditCheckpoint
 from app.models.attachment import Attachment
+from app.models.outbox import OutboxMessage, OutboxStatus
+from app.models.search_index import SearchPosting
+from app.models.analytics import HinweisDailyRollup
+from app.models.archive import ArchiveSegment
 
 __all__ = [
     "Base",
@@ -46,5 +50,12 @@ __all__ = [
     "OmbudspersonEmpfehlung",
     "AuditLog",
     "AuditAction",
+    "AuditChainHead",
+    "AuditCheckpoint",
     "Attachment",
+    "OutboxMessage",
+    "OutboxStatus",
+    "SearchPosting",
+    "HinweisDailyRollup",
+    "ArchiveSegment",
 ]
@@ -0,0 +1,42 @@
+"""
+aitema|Hinweis - Analytics Rollup Model
+Tagesaggregate der Meldungen fuer das Dashboard.
+"""
+
+import uuid
+from datetime import date
+
+from sqlalchemy import String, Integer, Date, ForeignKey, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.models import Base
+
+
+class HinweisDailyRollup(Base):
+    """
+    Anzahl Meldungen je Mandant x Eingangstag (UTC) x Kategorie x aktuellem Status.
+
+    Wird bei Eingang und Statuswechsel inkrementell gepflegt
+    (app.services.analytics_rollup) und naechtlich aus hinweise abgeglichen.
+    Das Dashboard liest nur diese Tabelle; der Aufwand haengt von der Anzahl
+    der Tage ab, nicht von der Anzahl der Meldungen.
+    """
+
+    __tablename__ = "hinweis_daily_rollup"
+
+    tenant_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("tenants.id", ondelete="CASCADE"), primary_key=True
+    )
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    kategorie: Mapped[str] = mapped_column(String(50), primary_key=True)   # HinweisKategorie-Wert
+    status: Mapped[str] = mapped_column(String(50), primary_key=True)      # HinweisStatus-Wert
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        # Zeitraumabfragen ueber alle Mandanten (naechtlicher Abgleich, Dashboard)
+        Index("ix_hinweis_daily_rollup_day", "day"),
+    )
+
+    def __repr__(self) -> str:
+        return f"<HinweisDailyRollup {self.day} {self.kategorie}/{self.status}: {self.count}>"
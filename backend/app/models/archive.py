@@ -0,0 +1,58 @@
+"""
+aitema|Hinweis - Archiv-Segmente
+Index der ausgelagerten Audit- und Fallereignis-Daten (Cold Archive).
+"""
+
+import uuid
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import String, Integer, BigInteger, DateTime, Index, func, text
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.dialects.postgresql import UUID, ARRAY
+
+from app.models import Base
+
+
+class ArchiveSegment(Base):
+    """
+    Eine unveraenderliche, komprimierte und verschluesselte NDJSON-Datei
+    mit Zeilen aus audit_logs oder case_events (app.services.cold_archive).
+
+    Zeitraum, Mandant und Ressourcen-IDs bilden den Index: Lesezugriffe
+    oeffnen nur Segmente, die zur Anfrage passen. Audit-Segmente fuehren
+    zusaetzlich ihren chain_seq-Bereich (fuer die Kettenpruefung).
+    """
+
+    __tablename__ = "archive_segments"
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+    )
+    kind: Mapped[str] = mapped_column(String(30), nullable=False)  # "audit_logs" | "case_events"
+    tenant_id: Mapped[Optional[uuid.UUID]] = mapped_column(UUID(as_uuid=True))
+
+    time_from: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    time_to: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    resource_ids: Mapped[list] = mapped_column(ARRAY(String(36)), nullable=False, default=list)
+    seq_from: Mapped[Optional[int]] = mapped_column(BigInteger)  # nur audit_logs
+    seq_to: Mapped[Optional[int]] = mapped_column(BigInteger)
+
+    path: Mapped[str] = mapped_column(String(500), nullable=False)  # relativ zu ARCHIVE_FOLDER
+    row_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    size_bytes: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    sha256: Mapped[str] = mapped_column(String(64), nullable=False)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+    __table_args__ = (
+        Index("ix_archive_segments_lookup", "kind", "tenant_id", "time_from", "time_to"),
+        Index("ix_archive_segments_resources", "resource_ids", postgresql_using="gin"),
+        Index("ix_archive_segments_chain", "tenant_id", "seq_from", "seq_to",
+              postgresql_where=text("kind = 'audit_logs'")),
+    )
+
+    def __repr__(self) -> str:
+        return f"<ArchiveSegment {self.kind} {self.time_from:%Y-%m-%d}..{self.time_to:%Y-%m-%d}>"
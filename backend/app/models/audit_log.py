@@ -9,11 +9,11 @@ from datetime import datetime
 from typing import Optional
 
 from sqlalchemy import (
-    String, DateTime, Text, Enum, ForeignKey,
-    func, Index
+    BigInteger, String, DateTime, Text, Enum, ForeignKey,
+    func, Index, event, text
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy.dialects.postgresql import UUID, JSON, INET
+from sqlalchemy.dialects.postgresql import UUID, JSONB, INET
 
 from app.models import Base
 
@@ -79,6 +79,13 @@ class AuditLog(Base):
 
     Eintraege koennen NICHT geaendert oder geloescht werden
     (nur INSERT, kein UPDATE/DELETE auf Applikationsebene).
+
+    Monatlich nach created_at partitioniert (siehe audit_partitions);
+    der Primaerschluessel enthaelt deshalb created_at.
+
+    Manipulationserkennung: Jeder Eintrag wird nachtraeglich in eine
+    Hashkette pro Mandant eingereiht (chain_seq, chain_hash; siehe
+    audit_chain). Bis dahin sind beide Felder NULL.
     """
 
     __tablename__ = "audit_logs"
@@ -104,9 +111,9 @@ class AuditLog(Base):
 
     # Details
     description: Mapped[Optional[str]] = mapped_column(Text)
-    details: Mapped[Optional[dict]] = mapped_column(JSON, default=dict)
+    details: Mapped[Optional[dict]] = mapped_column(JSONB, default=dict)
     changes: Mapped[Optional[dict]] = mapped_column(
-        JSON
+        JSONB
     )  # {"field": {"old": "...", "new": "..."}}
 
     # Request-Kontext
@@ -120,11 +127,15 @@ class AuditLog(Base):
     success: Mapped[bool] = mapped_column(default=True)
     error_message: Mapped[Optional[str]] = mapped_column(Text)
 
-    # Zeitstempel (unveraenderlich)
+    # Zeitstempel (unveraenderlich, Partitionsschluessel)
     created_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), server_default=func.now(), nullable=False
+        DateTime(timezone=True), primary_key=True, server_default=func.now(), nullable=False
     )
 
+    # Hashkette (gesetzt beim Versiegeln)
+    chain_seq: Mapped[Optional[int]] = mapped_column(BigInteger)
+    chain_hash: Mapped[Optional[str]] = mapped_column(String(64))
+
     # Beziehungen (nur Lese-Referenzen)
     tenant: Mapped[Optional["Tenant"]] = relationship("Tenant", viewonly=True)
     user: Mapped[Optional["User"]] = relationship("User", viewonly=True)
@@ -135,7 +146,76 @@ class AuditLog(Base):
         Index("ix_audit_logs_resource", "resource_type", "resource_id"),
         Index("ix_audit_logs_created", "created_at"),
         Index("ix_audit_logs_tenant_created", "tenant_id", "created_at"),
+        Index("ix_audit_logs_tenant_chain", "tenant_id", "chain_seq"),
+        # Filter auf Detail-Schluessel (details @> '{"reason": ...}')
+        Index(
+            "ix_audit_logs_details", "details",
+            postgresql_using="gin", postgresql_ops={"details": "jsonb_path_ops"},
+        ),
+        # Noch nicht versiegelte Eintraege
+        Index(
+            "ix_audit_logs_unsealed", "tenant_id", "created_at",
+            postgresql_where=text("chain_hash IS NULL"),
+        ),
+        {"postgresql_partition_by": "RANGE (created_at)"},
     )
 
     def __repr__(self) -> str:
         return f"<AuditLog(action={self.action.value!r}, user={self.user_id!r})>"
+
+
+
+class AuditChainHead(Base):
+    """
+    Letztes versiegeltes Glied je Hashkette.
+
+    Die Zeile wird beim Versiegeln gesperrt (eine Sperre pro Kette,
+    keine globale Sperre).
+    """
+
+    __tablename__ = "audit_chain_heads"
+
+    chain_key: Mapped[str] = mapped_column(String(36), primary_key=True)  # Tenant-ID oder "global"
+    last_seq: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    last_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+
+class AuditCheckpoint(Base):
+    """
+    Signierter Merkle-Checkpoint ueber die Glieder seq_from..seq_to einer Kette.
+    Ausgangspunkt fuer die Pruefung beliebiger Zeitraeume.
+    """
+
+    __tablename__ = "audit_checkpoints"
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+    )
+    chain_key: Mapped[str] = mapped_column(String(36), nullable=False)
+    seq_from: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    seq_to: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    last_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    merkle_root: Mapped[str] = mapped_column(String(64), nullable=False)
+    signature: Mapped[str] = mapped_column(String(64), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+    __table_args__ = (
+        Index("ix_audit_checkpoints_chain_seq", "chain_key", "seq_to", unique=True),
+    )
+
+    def __repr__(self) -> str:
+        return f"<AuditCheckpoint {self.chain_key} {self.seq_from}..{self.seq_to}>"
+
+@event.listens_for(AuditLog.__table__, "after_create")
+def _create_audit_partitions(target, connection, **kw):
+    """Partitionen fuer den laufenden und die naechsten Monate (create_all)."""
+    if connection.dialect.name != "postgresql":
+        return
+    from app.services.audit_partitions import ensure_partitions
+
+    ensure_partitions(connection, schema=target.schema)
@@ -12,10 +12,10 @@ from typing import Optional, List
 
 from sqlalchemy import (
     String, Boolean, DateTime, Text, Integer, Enum, ForeignKey,
-    func, Index
+    func, Index, text
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy.dialects.postgresql import UUID, JSON
+from sqlalchemy.dialects.postgresql import UUID, JSONB
 
 from app.models import Base
 
@@ -69,10 +69,12 @@ class CaseEvent(Base):
 
     # Beschreibung (verschluesselt fuer sensible Inhalte)
     description: Mapped[Optional[str]] = mapped_column(Text)
-    description_encrypted: Mapped[Optional[str]] = mapped_column(Text)
+    description_encrypted: Mapped[Optional[str]] = mapped_column(
+        Text, deferred=True
+    )  # Nur auf Anfrage geladen (siehe services/case_timeline.py)
 
     # Metadaten
-    metadata_json: Mapped[Optional[dict]] = mapped_column(JSON, default=dict)
+    metadata_json: Mapped[Optional[dict]] = mapped_column(JSONB, default=dict)
     is_internal: Mapped[bool] = mapped_column(Boolean, default=True)
     is_visible_to_melder: Mapped[bool] = mapped_column(Boolean, default=False)
 
@@ -85,8 +87,14 @@ class CaseEvent(Base):
     user: Mapped[Optional["User"]] = relationship("User")
 
     __table_args__ = (
-        Index("ix_case_events_case_id", "case_id"),
+        # Timeline: Keyset-Paginierung pro Fall (deckt auch Abfragen nur auf case_id ab)
+        Index("ix_case_events_case_created_id", "case_id", "created_at", "id"),
         Index("ix_case_events_created", "created_at"),
+        # Filter auf Metadaten (metadata_json @> '{...}')
+        Index(
+            "ix_case_events_metadata", "metadata_json",
+            postgresql_using="gin", postgresql_ops={"metadata_json": "jsonb_path_ops"},
+        ),
     )
 
     def __repr__(self) -> str:
@@ -170,6 +178,20 @@ class Case(Base):
     resolved_at: Mapped[Optional[datetime]] = mapped_column(
         DateTime(timezone=True), nullable=True
     )  # Abschluss-Rueckmeldung an den Melder versendet
+    # Materialisierte naechste Frist (Endpunkte + DB-Trigger cases_set_next_deadline)
+    next_deadline_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    next_deadline_type: Mapped[Optional[str]] = mapped_column(
+        String(10), nullable=True
+    )  # 'ack', 'resolve' oder NULL wenn abgeschlossen
+    # Zuletzt benachrichtigte Warnstufe (Dispatcher meldet nur Stufenwechsel)
+    notified_deadline_type: Mapped[Optional[str]] = mapped_column(
+        String(10), nullable=True
+    )
+    notified_warnstufe: Mapped[Optional[str]] = mapped_column(
+        String(20), nullable=True
+    )  # 'warnung', 'ueberfaellig'
 
     # ==========================================================
     # D4: Ombudsperson-Rolle - Weiterleitungsworkflow
@@ -218,6 +240,7 @@ class Case(Base):
     ombudsperson_reviewer: Mapped[Optional["User"]] = relationship(
         "User", foreign_keys=[ombudsperson_reviewed_by]
     )
+    # Ungepaginiert - fuer Anzeigen services/case_timeline.get_case_timeline() nutzen
     events: Mapped[List["CaseEvent"]] = relationship(
         "CaseEvent", back_populates="case", cascade="all, delete-orphan",
         order_by="CaseEvent.created_at.desc()"
@@ -227,8 +250,22 @@ class Case(Base):
         Index("ix_cases_tenant_status", "tenant_id", "status"),
         Index("ix_cases_assignee", "assignee_id"),
         Index("ix_cases_case_number", "case_number"),
-        Index("ix_cases_forwarded_ombudsperson", "forwarded_to_ombudsperson_at"),
+        # Ombudsperson-Liste: weitergeleitete Faelle pro Mandant, neueste zuerst
+        Index(
+            "ix_cases_tenant_forwarded", "tenant_id", text("forwarded_to_ombudsperson_at DESC"),
+            postgresql_where=text("forwarded_to_ombudsperson_at IS NOT NULL"),
+        ),
         Index("ix_cases_acknowledged", "acknowledged_at"),
+        Index(
+            "ix_cases_tenant_next_deadline_open", "tenant_id", "next_deadline_at",
+            postgresql_where=text("resolved_at IS NULL"),
+        ),
+        # Bearbeitungszeiten: nur abgeschlossene Faelle, Index-Only-Scan
+        Index(
+            "ix_cases_tenant_created_resolved", "tenant_id", "created_at",
+            postgresql_include=["resolved_at", "hinweis_id"],
+            postgresql_where=text("resolved_at IS NOT NULL"),
+        ),
     )
 
     def __repr__(self) -> str:
@@ -251,31 +288,29 @@ class Case(Base):
         delta = datetime.now(self.opened_at.tzinfo) - self.opened_at
         return delta.days
 
-    def can_transition_to(self, new_status: CaseStatus) -> bool:
-        """Prueft ob ein Statusuebergang erlaubt ist."""
-        allowed_transitions = {
-            CaseStatus.OFFEN: {CaseStatus.ZUGEWIESEN, CaseStatus.EINGESTELLT},
-            CaseStatus.ZUGEWIESEN: {
-                CaseStatus.IN_ERMITTLUNG, CaseStatus.EINGESTELLT, CaseStatus.OFFEN
-            },
-            CaseStatus.IN_ERMITTLUNG: {
-                CaseStatus.STELLUNGNAHME, CaseStatus.MASSNAHMEN,
-                CaseStatus.ABGESCHLOSSEN, CaseStatus.EINGESTELLT,
-                CaseStatus.ESKALIERT,
-            },
-            CaseStatus.STELLUNGNAHME: {
-                CaseStatus.IN_ERMITTLUNG, CaseStatus.MASSNAHMEN,
-                CaseStatus.ABGESCHLOSSEN, CaseStatus.ESKALIERT,
-            },
-            CaseStatus.MASSNAHMEN: {
-                CaseStatus.UMSETZUNG, CaseStatus.ABGESCHLOSSEN, CaseStatus.ESKALIERT,
-            },
-            CaseStatus.UMSETZUNG: {CaseStatus.ABGESCHLOSSEN, CaseStatus.MASSNAHMEN},
-            CaseStatus.ABGESCHLOSSEN: set(),  # Endstatus
-            CaseStatus.EINGESTELLT: {CaseStatus.OFFEN},  # Kann wiedereroeffnet werden
-            CaseStatus.ESKALIERT: {CaseStatus.IN_ERMITTLUNG, CaseStatus.ABGESCHLOSSEN},
-        }
-        return new_status in allowed_transitions.get(self.status, set())
+    def refresh_next_deadline(self) -> None:
+        """Aktualisiert next_deadline_at/next_deadline_type aus den Fristfeldern."""
+        from app.services.deadline_service import compute_next_deadline
+
+        previous = (self.next_deadline_at, self.next_deadline_type)
+        self.next_deadline_at, self.next_deadline_type = compute_next_deadline(
+            self.created_at, self.acknowledged_at, self.resolved_at
+        )
+        if (self.next_deadline_at, self.next_deadline_type) != previous:
+            self.notified_deadline_type, self.notified_warnstufe = None, None
+
+    def can_transition_to(self, new_status: CaseStatus, workflow=None) -> bool:
+        """
+        Prueft ob ein Statusuebergang erlaubt ist.
+
+        Args:
+            new_status: Zielstatus
+            workflow: Workflow des Mandanten (services.workflow.get_workflow);
+                      ohne Angabe gilt der Standard-Workflow
+        """
+        from app.services.workflow import DEFAULT_COMPILED
+
+        return (workflow or DEFAULT_COMPILED).can_transition(self.status.value, new_status.value)
 
     @property
     def is_forwarded_to_ombudsperson(self) -> bool:
@@ -11,7 +11,7 @@ from typing import Optional, List
 
 from sqlalchemy import (
     String, Boolean, DateTime, Text, Integer, Enum, ForeignKey,
-    func, Index, CheckConstraint
+    func, Index, CheckConstraint, text
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import UUID, JSON, ARRAY
@@ -152,6 +152,17 @@ class Hinweis(Base):
         DateTime(timezone=True)
     )
 
+    # Materialisierte naechste Frist (Endpunkte + DB-Trigger hinweise_set_next_deadline)
+    next_deadline_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+    next_deadline_type: Mapped[Optional[str]] = mapped_column(
+        String(10)
+    )  # 'ack', 'resolve' oder NULL wenn erledigt/abgeschlossen
+    # Zuletzt benachrichtigte Warnstufe (Dispatcher meldet nur Stufenwechsel)
+    notified_deadline_type: Mapped[Optional[str]] = mapped_column(String(10))
+    notified_warnstufe: Mapped[Optional[str]] = mapped_column(
+        String(20)
+    )  # 'warnung', 'kritisch', 'ueberfaellig'
+
     # Aufbewahrungsfrist (Paragraf 11 Abs. 5: 3 Jahre nach Abschluss)
     aufbewahrung_bis: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
     loeschung_geplant_am: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
@@ -196,6 +207,16 @@ class Hinweis(Base):
         Index("ix_hinweise_rueckmeldung_frist", "rueckmeldung_frist"),
         Index("ix_hinweise_access_code", "access_code"),
         Index("ix_hinweise_reference_code", "reference_code"),
+        Index(
+            "ix_hinweise_tenant_next_deadline_open", "tenant_id", "next_deadline_at",
+            postgresql_where=text("next_deadline_at IS NOT NULL"),
+        ),
+        # Bearbeitungszeiten: nur bestaetigte Meldungen, Index-Only-Scan
+        Index(
+            "ix_hinweise_tenant_eingegangen_ack", "tenant_id", "eingegangen_am",
+            postgresql_include=["eingangsbestaetigung_gesendet_am", "kategorie"],
+            postgresql_where=text("eingangsbestaetigung_gesendet_am IS NOT NULL"),
+        ),
         CheckConstraint(
             "eingangsbestaetigung_frist > eingegangen_am",
             name="ck_eingangsbestaetigung_nach_eingang",
@@ -212,6 +233,42 @@ class Hinweis(Base):
         random_part = secrets.token_hex(2).upper()
         return f"HW-{year}-{random_part}"
 
+    def mark_eingangsbestaetigung_gesendet(self, at: datetime) -> None:
+        """Eingangsbestaetigung versendet: schliesst die 7-Tage-Frist."""
+        if self.eingangsbestaetigung_gesendet_am is None:
+            self.eingangsbestaetigung_gesendet_am = at
+        self.refresh_next_deadline()
+
+    def mark_rueckmeldung_gesendet(self, at: datetime) -> None:
+        """Rueckmeldung versendet: schliesst die 3-Monats-Frist."""
+        if self.eingangsbestaetigung_gesendet_am is None:
+            # Eine Rueckmeldung bestaetigt zugleich den Eingang
+            self.eingangsbestaetigung_gesendet_am = at
+        if self.rueckmeldung_gesendet_am is None:
+            self.rueckmeldung_gesendet_am = at
+        self.refresh_next_deadline()
+
+    def refresh_next_deadline(self) -> None:
+        """
+        Aktualisiert next_deadline_at/next_deadline_type.
+        Gleiche Regeln wie der DB-Trigger hinweise_set_next_deadline.
+        Aendert sich die Frist, wird die benachrichtigte Warnstufe zurueckgesetzt.
+        """
+        previous = (self.next_deadline_at, self.next_deadline_type)
+        if self.status in (HinweisStatus.ABGESCHLOSSEN, HinweisStatus.ABGELEHNT):
+            self.next_deadline_at, self.next_deadline_type = None, None
+        elif self.eingangsbestaetigung_gesendet_am is None:
+            self.next_deadline_at = self.eingangsbestaetigung_frist
+            self.next_deadline_type = "ack"
+        elif self.rueckmeldung_gesendet_am is None:
+            self.next_deadline_at = self.rueckmeldung_frist
+            self.next_deadline_type = "resolve"
+        else:
+            self.next_deadline_at, self.next_deadline_type = None, None
+
+        if (self.next_deadline_at, self.next_deadline_type) != previous:
+            self.notified_deadline_type, self.notified_warnstufe = None, None
+
     @property
     def eingangsbestaetigung_ueberfaellig(self) -> bool:
         """Prueft ob die 7-Tage-Frist fuer die Eingangsbestaetigung ueberschritten ist."""
@@ -0,0 +1,82 @@
+"""
+aitema|Hinweis - Notification Outbox Model
+Transaktionale Warteschlange fuer ausgehende Benachrichtigungen.
+"""
+
+import uuid
+import enum
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import (
+    String, DateTime, Text, Integer, Enum, ForeignKey,
+    func, Index, text
+)
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.models import Base
+
+
+class OutboxStatus(str, enum.Enum):
+    """Versandstatus eines Outbox-Eintrags."""
+    PENDING = "pending"        # Wartet auf Versand (ggf. nach Backoff)
+    SENDING = "sending"        # Von einem Drainer beansprucht (Lease bis locked_until)
+    SENT = "sent"
+    FAILED = "failed"          # Max. Versuche erreicht
+
+
+class OutboxMessage(Base):
+    """
+    Ausgehende Benachrichtigung.
+
+    Wird in derselben Transaktion wie die fachliche Aenderung geschrieben
+    (z.B. Eingangsbestaetigung, Fristwarnung) und asynchron vom Drainer
+    versendet. Empfaenger und Inhalt liegen verschluesselt vor und werden
+    nach erfolgreichem Versand entfernt.
+    """
+
+    __tablename__ = "notification_outbox"
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+    )
+    tenant_id: Mapped[Optional[uuid.UUID]] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=True
+    )
+
+    channel: Mapped[str] = mapped_column(String(20), default="email")
+    event_type: Mapped[str] = mapped_column(
+        String(50), nullable=False
+    )  # "eingangsbestaetigung", "rueckmeldung", "frist_warnung", ...
+    resource_type: Mapped[Optional[str]] = mapped_column(String(50))
+    resource_id: Mapped[Optional[str]] = mapped_column(String(255))
+
+    # Verschluesselte Nutzdaten (JSON: to, subject, body_text, body_html)
+    payload_encrypted: Mapped[Optional[str]] = mapped_column(Text)
+
+    status: Mapped[OutboxStatus] = mapped_column(
+        Enum(OutboxStatus), default=OutboxStatus.PENDING, nullable=False
+    )
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    next_attempt_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    locked_until: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+    last_error: Mapped[Optional[str]] = mapped_column(Text)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+    sent_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+
+    __table_args__ = (
+        # Drainer-Abfrage: nur offene Eintraege, nach Faelligkeit
+        Index(
+            "ix_outbox_due", "next_attempt_at",
+            postgresql_where=text("status IN ('PENDING', 'SENDING')"),
+        ),
+    )
+
+    def __repr__(self) -> str:
+        return f"<OutboxMessage {self.event_type} {self.status.value}>"
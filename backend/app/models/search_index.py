@@ -0,0 +1,40 @@
+"""
+aitema|Hinweis - Suchindex Model
+Invertierter Index ueber verschluesselte Inhalte (nur HMAC-Token-Hashes).
+"""
+
+import uuid
+
+from sqlalchemy import String, ForeignKey, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.models import Base
+
+
+class SearchPosting(Base):
+    """
+    Ein Eintrag der Posting-Liste eines Tokens.
+
+    Der Primaerschluessel (tenant_id, token_hash, resource_type, resource_id)
+    haelt die Posting-Liste jedes Tokens sortiert zusammen. Gespeichert wird
+    nur der HMAC des Tokens mit einem mandantenspezifischen Schluessel -
+    weder Klartext noch Ciphertext des Dokuments.
+    """
+
+    __tablename__ = "search_postings"
+
+    tenant_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("tenants.id", ondelete="CASCADE"), primary_key=True
+    )
+    token_hash: Mapped[str] = mapped_column(String(32), primary_key=True)
+    resource_type: Mapped[str] = mapped_column(String(20), primary_key=True)  # "hinweis", "case"
+    resource_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+
+    __table_args__ = (
+        # Neuindizierung: alle Postings eines Dokuments entfernen
+        Index("ix_search_postings_resource", "resource_type", "resource_id"),
+    )
+
+    def __repr__(self) -> str:
+        return f"<SearchPosting {self.resource_type}:{self.resource_id}>"
@@ -12,7 +12,7 @@ from sqlalchemy import (
     func, Index
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import UUID, JSONB
 
 from app.models import Base
 
@@ -58,7 +58,7 @@ class Tenant(Base):
     database_schema: Mapped[Optional[str]] = mapped_column(String(100))
 
     # Konfiguration
-    config: Mapped[Optional[dict]] = mapped_column(JSON, default=dict)
+    config: Mapped[Optional[dict]] = mapped_column(JSONB, default=dict)
     custom_branding: Mapped[Optional[dict]] = mapped_column(
         JSON, default=dict
     )  # Logo, Farben, Texte
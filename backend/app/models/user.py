@@ -63,6 +63,10 @@ class User(Base):
     department: Mapped[Optional[str]] = mapped_column(String(100))
     position: Mapped[Optional[str]] = mapped_column(String(100))
 
+    # Automatische Fallzuweisung: Kategorien (HinweisKategorie-Werte), fuer die
+    # der/die Fallbearbeiter/in bevorzugt eingesetzt wird
+    assignment_skills: Mapped[Optional[list]] = mapped_column(JSON, default=list)
+
     # MFA
     mfa_enabled: Mapped[bool] = mapped_column(Boolean, default=False)
     mfa_secret: Mapped[Optional[str]] = mapped_column(String(255))
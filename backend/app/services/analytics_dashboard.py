@@ -0,0 +1,323 @@
+"""
+aitema|Hinweis - Analytics Dashboard
+Mandantenbezogene Dashboard-KPIs aus einer einzigen SQL-Anweisung, in Redis gecacht.
+
+Berechnung (compute_dashboard): ein Statement mit CTEs ueber hinweis_daily_rollup
+(Volumen, Kategorien, Status) und den ueberfaelligen Fristen aus hinweise
+(FILTER auf next_deadline_type). Die Monatsreihe kommt aus generate_series und
+ist damit lueckenlos (Monate ohne Meldungen mit 0). Alle Aufschluesselungen sind
+k-anonym (app.services.k_anonymity): kleine Kategorien und Status werden zu
+"Weitere" zusammengefasst, Monate mit 1-2 Meldungen ohne Zahl (null) geliefert.
+
+Cache (get_dashboard): ein JSON-Eintrag je Mandant
+
+    analytics_dashboard:<tenant>         {"computed_at": <epoch>, "data": {...}}
+    analytics_dashboard:<tenant>:lock    Token der berechnenden Instanz
+
+Frisch (< DASHBOARD_FRESH_SECONDS):   direkt ausliefern
+Veraltet (< DASHBOARD_STALE_SECONDS): veralteten Stand ausliefern, genau eine
+                                      Instanz stoesst die Neuberechnung an
+Fehlend:                              genau eine Instanz berechnet, die anderen
+                                      warten kurz auf deren Ergebnis
+"""
+
+import json
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
+
+from flask import current_app
+from celery import shared_task
+from redis import RedisError
+from sqlalchemy import (
+    DateTime, String, case, cast, func, literal, literal_column, null, select, union_all,
+)
+import structlog
+
+from app.models.analytics import HinweisDailyRollup
+from app.models.hinweis import Hinweis
+from app.services.k_anonymity import k_anonymous
+
+log = structlog.get_logger()
+
+DASHBOARD_FRESH_SECONDS = 60
+DASHBOARD_STALE_SECONDS = 15 * 60
+DASHBOARD_LOCK_SECONDS = 30
+DASHBOARD_WAIT_SECONDS = 3.0
+DASHBOARD_POLL_SECONDS = 0.1
+
+# Anzahl Monate der Volumenreihe (inkl. laufendem Monat)
+DASHBOARD_MONTHS = 12
+
+# Sammelzeile fuer zusammengefasste kleine Gruppen
+WEITERE_LABEL = "Weitere"
+
+# Lesbare Kategorienamen (DE)
+KATEGORIE_LABELS = {
+    "korruption": "Korruption",
+    "betrug": "Betrug",
+    "geldwaesche": "Geldwaesche",
+    "steuerhinterziehung": "Steuerhinterziehung",
+    "umweltverstoss": "Umweltverstoss",
+    "verbraucherschutz": "Verbraucherschutz",
+    "datenschutz": "Datenschutz",
+    "diskriminierung": "Diskriminierung",
+    "arbeitssicherheit": "Arbeitssicherheit",
+    "produktsicherheit": "Produktsicherheit",
+    "lebensmittelsicherheit": "Lebensmittelsicherheit",
+    "vergaberecht": "Vergaberecht",
+    "wettbewerbsrecht": "Wettbewerbsrecht",
+    "finanzdienstleistungen": "Finanzdienstleistungen",
+    "kernsicherheit": "Kernsicherheit",
+    "tiergesundheit": "Tiergesundheit",
+    "sonstiges": "Sonstiges",
+}
+
+STATUS_LABELS = {
+    "eingegangen": "Eingegangen",
+    "eingangsbestaetigung": "Best. versendet",
+    "in_pruefung": "In Pruefung",
+    "in_bearbeitung": "In Bearbeitung",
+    "rueckmeldung": "Rueckmeldung",
+    "abgeschlossen": "Abgeschlossen",
+    "abgelehnt": "Abgelehnt",
+    "weitergeleitet": "Weitergeleitet",
+}
+
+
+def _cache_key(tenant_id) -> str:
+    return f"analytics_dashboard:{tenant_id}"
+
+
+def _lock_key(tenant_id) -> str:
+    return f"analytics_dashboard:{tenant_id}:lock"
+
+
+def month_starts(now: datetime, months: int = DASHBOARD_MONTHS) -> tuple[datetime, datetime]:
+    """Erster und letzter Monatsanfang der Volumenreihe (naiv, UTC)."""
+    index = now.year * 12 + now.month - 1
+    first = index - (months - 1)
+    return (
+        datetime(first // 12, first % 12 + 1, 1),
+        datetime(now.year, now.month, 1),
+    )
+
+
+# ----------------------------------------------------------
+# Berechnung
+# ----------------------------------------------------------
+
+def _section(name: str):
+    return cast(literal(name), String).label("section")
+
+
+def monthly_cells(base, month, measure):
+    """
+    Maskierte Monatszellen (month, n, suppressed).
+
+    total_cases weist die Gesamtzahl aus; ohne Komplementaerunterdrueckung
+    liesse sich ein einzelner maskierter Monat als Differenz aus Gesamtzahl
+    und sichtbaren Monaten zurueckrechnen.
+    """
+    return k_anonymous(
+        base, {"month": month}, measure=measure, mode="mask", name="month_cells",
+    )
+
+
+def dashboard_statement(tenant_id, now: datetime):
+    """
+    Eine Anweisung fuer alle KPIs, Zeilen der Form (section, key, count):
+
+        month     YYYY-MM           Meldungen im Monat (lueckenlos; NULL = unterdrueckt)
+        kategorie <kategorie>|NULL  Meldungen je Kategorie (NULL = zusammengefasst)
+        status    <status>|NULL     Meldungen je Status (Summe = Gesamtzahl)
+        overdue   ack | resolve     ueberschrittene Eingangsbestaetigungs-/Rueckmeldefrist
+    """
+    first_month, last_month = month_starts(now)
+    rollup = select().select_from(HinweisDailyRollup).where(
+        HinweisDailyRollup.tenant_id == tenant_id
+    )
+    total = func.sum(HinweisDailyRollup.count)
+    month_of_day = func.date_trunc("month", cast(HinweisDailyRollup.day, DateTime))
+
+    months = select(
+        func.generate_series(
+            cast(literal(first_month), DateTime),
+            cast(literal(last_month), DateTime),
+            literal_column("interval '1 month'"),
+        ).label("month"),
+    ).cte("months")
+
+    monthly = monthly_cells(
+        rollup.where(HinweisDailyRollup.day >= first_month.date()), month_of_day, total,
+    ).cte("monthly")
+    kategorien = k_anonymous(
+        rollup, {"key": HinweisDailyRollup.kategorie}, measure=total, mode="bucket",
+        name="kategorie_cells",
+    ).cte("kategorien")
+    statuses = k_anonymous(
+        rollup, {"key": HinweisDailyRollup.status}, measure=total, mode="bucket",
+        name="status_cells",
+    ).cte("statuses")
+
+    overdue = select(
+        func.count().filter(Hinweis.next_deadline_type == "ack").label("ack"),
+        func.count().filter(Hinweis.next_deadline_type == "resolve").label("resolve"),
+    ).where(
+        Hinweis.tenant_id == tenant_id,
+        Hinweis.next_deadline_at < now,
+    ).cte("overdue")
+
+    return union_all(
+        select(
+            _section("month"),
+            func.to_char(months.c.month, "YYYY-MM").label("key"),
+            case(
+                (monthly.c.suppressed, null()), else_=func.coalesce(monthly.c.n, 0),
+            ).label("count"),
+        ).select_from(
+            months.outerjoin(monthly, monthly.c.month == months.c.month)
+        ),
+        select(_section("kategorie"), kategorien.c.key, kategorien.c.n),
+        select(_section("status"), statuses.c.key, statuses.c.n),
+        select(_section("overdue"), cast(literal("ack"), String), overdue.c.ack),
+        select(_section("overdue"), cast(literal("resolve"), String), overdue.c.resolve),
+    )
+
+
+def compute_dashboard(session, tenant_id, now: Optional[datetime] = None) -> dict:
+    """Dashboard-Daten eines Mandanten (eine Datenbankabfrage)."""
+    now = now or datetime.now(timezone.utc)
+    monthly, categories, statuses, overdue = [], [], [], {"ack": 0, "resolve": 0}
+
+    for row in session.execute(dashboard_statement(tenant_id, now)):
+        if row.section == "month":
+            year, month = row.key.split("-")
+            count = int(row.count) if row.count is not None else None
+            monthly.append({"year": int(year), "month": int(month), "count": count})
+        elif row.section == "kategorie":
+            name = KATEGORIE_LABELS.get(row.key, row.key) if row.key else WEITERE_LABEL
+            categories.append({"name": name, "count": int(row.count)})
+        elif row.section == "status":
+            name = STATUS_LABELS.get(row.key, row.key) if row.key else WEITERE_LABEL
+            statuses.append({"status": name, "count": int(row.count)})
+        else:
+            overdue[row.key] = int(row.count or 0)
+
+    # Sammelzeile jeweils zuletzt
+    monthly.sort(key=lambda m: (m["year"], m["month"]))
+    categories.sort(key=lambda c: (c["name"] == WEITERE_LABEL, -c["count"]))
+    statuses.sort(key=lambda s: s["status"] == WEITERE_LABEL)
+
+    # Fristgerecht: Eingangsbestaetigung gesendet ODER noch innerhalb der Frist
+    total = sum(s["count"] for s in statuses)
+    compliance_rate = round((total - overdue["ack"]) / total * 100, 1) if total > 0 else 100.0
+
+    return {
+        "monthly_volume": monthly,
+        "categories": categories,
+        "statuses": statuses,
+        "compliance_rate": compliance_rate,
+        "total_cases": total,
+        "ueberfaellige_fristen": {
+            "eingangsbestaetigung": overdue["ack"],
+            "rueckmeldung": overdue["resolve"],
+        },
+        "generated_at": now.replace(tzinfo=None).isoformat() + "Z",
+    }
+
+
+# ----------------------------------------------------------
+# Cache
+# ----------------------------------------------------------
+
+def _store(redis_client, tenant_id, data: dict) -> None:
+    redis_client.set(
+        _cache_key(tenant_id),
+        json.dumps({"computed_at": time.time(), "data": data}),
+        ex=DASHBOARD_STALE_SECONDS,
+    )
+
+
+def _load(redis_client, tenant_id) -> Optional[dict]:
+    raw = redis_client.get(_cache_key(tenant_id))
+    return json.loads(raw) if raw else None
+
+
+def _acquire(redis_client, tenant_id) -> Optional[str]:
+    token = uuid.uuid4().hex
+    if redis_client.set(_lock_key(tenant_id), token, nx=True, ex=DASHBOARD_LOCK_SECONDS):
+        return token
+    return None
+
+
+def _release(redis_client, tenant_id, token: str) -> None:
+    # Nur die eigene Sperre freigeben (nach Ablauf kann sie einer anderen Instanz gehoeren)
+    if redis_client.get(_lock_key(tenant_id)) == token:
+        redis_client.delete(_lock_key(tenant_id))
+
+
+def refresh_dashboard_cache(session, redis_client, tenant_id, token: str) -> dict:
+    """Berechnet das Dashboard neu, legt es ab und gibt die Sperre frei."""
+    try:
+        data = compute_dashboard(session, tenant_id)
+        _store(redis_client, tenant_id, data)
+        return data
+    finally:
+        _release(redis_client, tenant_id, token)
+
+
+def get_dashboard(session, redis_client, tenant_id) -> dict:
+    """
+    Dashboard-Daten eines Mandanten aus dem Cache (Stale-While-Revalidate).
+
+    Bei nicht erreichbarem Redis wird direkt berechnet.
+    """
+    try:
+        entry = _load(redis_client, tenant_id)
+        if entry:
+            if time.time() - entry["computed_at"] >= DASHBOARD_FRESH_SECONDS:
+                token = _acquire(redis_client, tenant_id)
+                if token:
+                    _revalidate(session, redis_client, tenant_id, token)
+            return entry["data"]
+
+        token = _acquire(redis_client, tenant_id)
+        if token:
+            return refresh_dashboard_cache(session, redis_client, tenant_id, token)
+
+        # Eine andere Instanz berechnet gerade: kurz auf deren Ergebnis warten
+        deadline = time.monotonic() + DASHBOARD_WAIT_SECONDS
+        while time.monotonic() < deadline:
+            time.sleep(DASHBOARD_POLL_SECONDS)
+            entry = _load(redis_client, tenant_id)
+            if entry:
+                return entry["data"]
+        log.warning("analytics_dashboard_wait_timeout", tenant_id=str(tenant_id))
+    except RedisError as e:
+        log.warning("analytics_dashboard_cache_unavailable", error=str(e))
+
+    return compute_dashboard(session, tenant_id)
+
+
+def _revalidate(session, redis_client, tenant_id, token: str) -> None:
+    """Neuberechnung im Hintergrund; ohne Celery-Broker im laufenden Request."""
+    try:
+        refresh_dashboard.delay(str(tenant_id), token)
+    except Exception as e:
+        log.warning("analytics_dashboard_enqueue_failed", error=str(e))
+        refresh_dashboard_cache(session, redis_client, tenant_id, token)
+
+
+@shared_task(name="app.services.analytics_dashboard.refresh_dashboard")
+def refresh_dashboard(tenant_id: str, token: str):
+    """Celery-Task: Dashboard-Cache eines Mandanten neu berechnen."""
+    session = current_app.Session()
+    try:
+        refresh_dashboard_cache(session, current_app.redis, uuid.UUID(tenant_id), token)
+        log.info("analytics_dashboard_refreshed", tenant_id=tenant_id)
+    except Exception as e:
+        log.error("analytics_dashboard_refresh_failed", tenant_id=tenant_id, error=str(e))
+    finally:
+        session.close()
@@ -0,0 +1,131 @@
+"""
+aitema|Hinweis - Analytics Rollups
+Inkrementelle Pflege der Tagesaggregate (hinweis_daily_rollup).
+
+Eingang einer Meldung:   +1 auf (Mandant, Eingangstag, Kategorie, Status)
+Statuswechsel:           -1 auf alten Status, +1 auf neuen Status (gleicher Tag)
+
+Die Aenderungen laufen als Upsert in derselben Transaktion wie die fachliche
+Aenderung. Der naechtliche Abgleich baut die Aggregate pro Mandant aus hinweise
+neu auf und korrigiert so Abweichungen (z.B. durch direkte SQL-Aenderungen).
+"""
+
+from datetime import date, datetime, timezone
+from typing import Optional
+
+from flask import current_app
+from celery import shared_task
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+import structlog
+
+from app.models.analytics import HinweisDailyRollup
+from app.models.hinweis import Hinweis, HinweisStatus
+
+log = structlog.get_logger()
+
+# Tagesgrenzen der Aggregate (Python und SQL muessen uebereinstimmen)
+ROLLUP_TIMEZONE = "UTC"
+
+
+def rollup_day(eingegangen_am: Optional[datetime]) -> date:
+    """Eingangstag einer Meldung in ROLLUP_TIMEZONE."""
+    if eingegangen_am is None:
+        return datetime.now(timezone.utc).date()
+    if eingegangen_am.tzinfo is None:
+        eingegangen_am = eingegangen_am.replace(tzinfo=timezone.utc)
+    return eingegangen_am.astimezone(timezone.utc).date()
+
+
+def _sql_day(column):
+    return func.date(func.timezone(ROLLUP_TIMEZONE, column))
+
+
+def _bump(session, rows: list[dict]) -> None:
+    """Upsert: count += delta je Schluessel."""
+    stmt = pg_insert(HinweisDailyRollup).values(rows)
+    session.execute(stmt.on_conflict_do_update(
+        index_elements=["tenant_id", "day", "kategorie", "status"],
+        set_={"count": HinweisDailyRollup.count + stmt.excluded.count},
+    ))
+
+
+def _key(hinweis, status: HinweisStatus) -> dict:
+    return {
+        "tenant_id": hinweis.tenant_id,
+        "day": rollup_day(hinweis.eingegangen_am),
+        "kategorie": hinweis.kategorie.value,
+        "status": status.value,
+    }
+
+
+def record_submission(session, hinweis) -> None:
+    """Neue Meldung zaehlen (vor dem Commit aufrufen)."""
+    _bump(session, [{**_key(hinweis, hinweis.status), "count": 1}])
+
+
+def record_status_change(session, hinweis, old_status: HinweisStatus) -> None:
+    """Statuswechsel einer Meldung umbuchen (vor dem Commit aufrufen)."""
+    if old_status == hinweis.status:
+        return
+    _bump(session, [
+        {**_key(hinweis, old_status), "count": -1},
+        {**_key(hinweis, hinweis.status), "count": 1},
+    ])
+
+
+def reconcile_tenant(session, tenant_id) -> int:
+    """
+    Baut die Aggregate eines Mandanten aus hinweise neu auf (ohne Commit).
+
+    Returns:
+        Anzahl der Aggregatzeilen
+    """
+    # Blockiert inkrementelle Upserts bis zum Commit; laufende Transaktionen
+    # mit Upserts werden vorher abgeschlossen und sind damit in hinweise sichtbar
+    session.execute(text(
+        f"LOCK TABLE {HinweisDailyRollup.__tablename__} IN SHARE ROW EXCLUSIVE MODE"
+    ))
+    session.execute(delete(HinweisDailyRollup).where(HinweisDailyRollup.tenant_id == tenant_id))
+    day = _sql_day(Hinweis.eingegangen_am)
+    source = select(
+        day.label("day"),
+        Hinweis.kategorie,
+        Hinweis.status,
+        func.count().label("count"),
+    ).where(Hinweis.tenant_id == tenant_id).group_by(day, Hinweis.kategorie, Hinweis.status)
+
+    rows = [
+        {
+            "tenant_id": tenant_id,
+            "day": r.day,
+            "kategorie": r.kategorie.value,
+            "status": r.status.value,
+            "count": r.count,
+        }
+        for r in session.execute(source)
+    ]
+    if rows:
+        session.execute(pg_insert(HinweisDailyRollup), rows)
+    return len(rows)
+
+
+@shared_task(name="app.services.analytics_rollup.reconcile_rollups")
+def reconcile_rollups():
+    """Celery-Task: Naechtlicher Abgleich der Aggregate, eine Transaktion pro Mandant."""
+    from app.models.tenant import Tenant
+
+    session = current_app.Session()
+    try:
+        tenant_ids = [t for (t,) in session.query(Tenant.id)]
+        for tenant_id in tenant_ids:
+            try:
+                reconcile_tenant(session, tenant_id)
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                log.error("analytics_rollup_reconcile_failed",
+                          tenant_id=str(tenant_id), error=str(e))
+        log.info("analytics_rollups_reconciled", tenants=len(tenant_ids))
+    finally:
+        session.close()
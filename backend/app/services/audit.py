@@ -7,14 +7,19 @@ import uuid
 from datetime import datetime, timezone, timedelta
 from typing import Optional
 
-from flask import request, current_app
+from flask import current_app
 from celery import shared_task
 import structlog
 
 from app.models.audit_log import AuditLog, AuditAction
+from app.services.audit_writer import enqueue_audit, record_audit
+from app.services.cold_archive import AUDIT_KIND, count_archived, read_archived
 
 log = structlog.get_logger()
 
+# Standardzeitraum des Audit-Trails ohne from_date
+AUDIT_TRAIL_DEFAULT_DAYS = 365
+
 
 class AuditService:
     """
@@ -40,10 +45,14 @@ class AuditService:
         changes: Optional[dict] = None,
         success: bool = True,
         error_message: Optional[str] = None,
+        session=None,
     ) -> None:
         """
         Erstellt einen Audit-Log-Eintrag.
 
+        Mit session wird der Eintrag Teil der laufenden Transaktion (Commit
+        durch den Aufrufer), ohne session geht er ueber den Audit-Puffer.
+
         Args:
             action: Art der Aktion (AuditAction Enum)
             tenant_id: Mandanten-ID
@@ -55,60 +64,31 @@ class AuditService:
             changes: Geaenderte Felder mit alten/neuen Werten
             success: Ob die Aktion erfolgreich war
             error_message: Fehlermeldung bei Misserfolg
+            session: Session des Requests (optional)
         """
-        session = current_app.Session()
-        try:
-            # Request-Kontext erfassen
-            ip_address = None
-            user_agent = None
-            request_method = None
-            request_path = None
-            request_id = None
-
-            try:
-                ip_address = request.remote_addr
-                user_agent = request.headers.get("User-Agent", "")[:500]
-                request_method = request.method
-                request_path = request.path
-                request_id = request.headers.get("X-Request-ID")
-            except RuntimeError:
-                # Kein Request-Kontext (z.B. in Celery-Tasks)
-                pass
-
-            audit_entry = AuditLog(
-                tenant_id=tenant_id,
-                user_id=user_id,
-                action=action,
-                resource_type=resource_type,
-                resource_id=resource_id,
-                description=description,
-                details=details or {},
-                changes=changes,
-                ip_address=ip_address,
-                user_agent=user_agent,
-                request_method=request_method,
-                request_path=request_path,
-                request_id=request_id,
-                success=success,
-                error_message=error_message,
-            )
-
-            session.add(audit_entry)
-            session.commit()
-
-            log.info(
-                "audit_logged",
-                action=action.value,
-                resource_type=resource_type,
-                resource_id=resource_id,
-                success=success,
-            )
+        fields = dict(
+            tenant_id=tenant_id,
+            user_id=user_id,
+            resource_type=resource_type,
+            resource_id=resource_id,
+            description=description,
+            details=details,
+            changes=changes,
+            success=success,
+            error_message=error_message,
+        )
+        if session is not None:
+            record_audit(session, action, **fields)
+        else:
+            enqueue_audit(action, **fields)
 
-        except Exception as e:
-            log.error("audit_log_failed", error=str(e), action=action.value)
-            session.rollback()
-        finally:
-            session.close()
+        log.info(
+            "audit_logged",
+            action=action.value,
+            resource_type=resource_type,
+            resource_id=resource_id,
+            success=success,
+        )
 
     @staticmethod
     def get_audit_trail(
@@ -117,6 +97,7 @@ class AuditService:
         resource_id: Optional[str] = None,
         user_id: Optional[uuid.UUID] = None,
         action: Optional[AuditAction] = None,
+        details: Optional[dict] = None,
         from_date: Optional[datetime] = None,
         to_date: Optional[datetime] = None,
         page: int = 1,
@@ -125,13 +106,31 @@ class AuditService:
         """
         Ruft den Audit-Trail ab mit Filtermoeglichkeiten.
 
+        Der Zeitraum ist immer begrenzt (Standard: die letzten
+        AUDIT_TRAIL_DEFAULT_DAYS Tage), damit nur die betroffenen
+        Monats-Partitionen gelesen werden. Ins Cold Archive ausgelagerte
+        Eintraege werden transparent angehaengt; sie sind immer aelter als
+        alle Eintraege in der Datenbank und folgen daher nach ihnen.
+        Segmente werden nur gelesen, wenn die Seite ins Archiv reicht. Sonst
+        stammt total aus dem Segment-Index: ohne Filter ggf. als Obergrenze,
+        mit Filtern als Untergrenze (nur Datenbank); total_exact zeigt an,
+        ob total genau ist.
+
+        details filtert per JSONB-Containment (details @> ...), z.B.
+        {"reason": "wrong_password"}; das nutzt ix_audit_logs_details.
+
         Returns:
-            Dict mit items und pagination
+            Dict mit items, pagination und dem verwendeten Zeitraum
         """
+        to_date = to_date or datetime.now(timezone.utc)
+        from_date = from_date or to_date - timedelta(days=AUDIT_TRAIL_DEFAULT_DAYS)
+
         session = current_app.Session()
         try:
             query = session.query(AuditLog).filter(
-                AuditLog.tenant_id == tenant_id
+                AuditLog.tenant_id == tenant_id,
+                AuditLog.created_at >= from_date,
+                AuditLog.created_at <= to_date,
             )
 
             if resource_type:
@@ -142,41 +141,109 @@ class AuditService:
                 query = query.filter(AuditLog.user_id == user_id)
             if action:
                 query = query.filter(AuditLog.action == action)
-            if from_date:
-                query = query.filter(AuditLog.created_at >= from_date)
-            if to_date:
-                query = query.filter(AuditLog.created_at <= to_date)
-
+            if details:
+                query = query.filter(AuditLog.details.contains(details))
             query = query.order_by(AuditLog.created_at.desc())
-            total = query.count()
-            items = query.offset((page - 1) * per_page).limit(per_page).all()
+            offset = (page - 1) * per_page
+            hot_total = query.count()
+            items = [
+                _trail_item(entry) for entry in query.offset(offset).limit(per_page).all()
+            ]
+
+            if offset + per_page > hot_total:
+                # Seite reicht ins Archiv: nur dann Segmente lesen
+                archived = read_archived(
+                    session, AUDIT_KIND, tenant_id, from_date, to_date,
+                    resource_id=resource_id,
+                    predicate=_archive_predicate(
+                        resource_type, resource_id, user_id, action, details,
+                    ),
+                )
+                start = max(offset - hot_total, 0)
+                items += [
+                    {**_archived_trail_item(row), "archived": True}
+                    for row in archived[start:start + per_page - len(items)]
+                ]
+                total, total_exact = hot_total + len(archived), True
+            else:
+                archived_total, total_exact = count_archived(
+                    session, AUDIT_KIND, tenant_id, from_date, to_date,
+                )
+                if any((resource_type, resource_id, user_id, action, details)):
+                    # Treffer im Archiv unbekannt: Untergrenze
+                    total, total_exact = hot_total, archived_total == 0
+                else:
+                    total = hot_total + archived_total
 
             return {
-                "items": [
-                    {
-                        "id": str(entry.id),
-                        "action": entry.action.value,
-                        "resource_type": entry.resource_type,
-                        "resource_id": entry.resource_id,
-                        "user_id": str(entry.user_id) if entry.user_id else None,
-                        "description": entry.description,
-                        "success": entry.success,
-                        "ip_address": str(entry.ip_address) if entry.ip_address else None,
-                        "created_at": entry.created_at.isoformat(),
-                    }
-                    for entry in items
-                ],
+                "items": items,
                 "pagination": {
                     "page": page,
                     "per_page": per_page,
                     "total": total,
+                    "total_exact": total_exact,
                     "pages": (total + per_page - 1) // per_page,
                 },
+                "range": {
+                    "from": from_date.isoformat(),
+                    "to": to_date.isoformat(),
+                },
             }
         finally:
             session.close()
 
 
+def _trail_item(entry: AuditLog) -> dict:
+    return {
+        "id": str(entry.id),
+        "action": entry.action.value,
+        "resource_type": entry.resource_type,
+        "resource_id": entry.resource_id,
+        "user_id": str(entry.user_id) if entry.user_id else None,
+        "description": entry.description,
+        "success": entry.success,
+        "ip_address": str(entry.ip_address) if entry.ip_address else None,
+        "created_at": entry.created_at.isoformat(),
+    }
+
+
+def _archived_trail_item(row: dict) -> dict:
+    """Archivzeile (JSON-Werte, siehe cold_archive) im Format von _trail_item."""
+    return {key: row.get(key) for key in (
+        "id", "action", "resource_type", "resource_id", "user_id",
+        "description", "success", "ip_address", "created_at",
+    )}
+
+
+def _json_contains(document, fragment) -> bool:
+    """Semantik von JSONB @> fuer bereits geladene Werte."""
+    if isinstance(fragment, dict):
+        return isinstance(document, dict) and all(
+            key in document and _json_contains(document[key], value)
+            for key, value in fragment.items()
+        )
+    if isinstance(fragment, list):
+        if not isinstance(document, list):
+            return False
+        return all(any(_json_contains(item, value) for item in document) for value in fragment)
+    return document == fragment
+
+
+def _archive_predicate(resource_type, resource_id, user_id, action, details=None):
+    """Filter des Audit-Trails fuer archivierte Zeilen."""
+    expected = {
+        "resource_type": resource_type,
+        "resource_id": resource_id,
+        "user_id": str(user_id) if user_id else None,
+        "action": action.value if action else None,
+    }
+    expected = {key: value for key, value in expected.items() if value}
+    return lambda row: (
+        all(row.get(key) == value for key, value in expected.items())
+        and (not details or _json_contains(row.get("details"), details))
+    )
+
+
 @shared_task(name="app.services.audit.cleanup_expired_sessions")
 def cleanup_expired_sessions():
     """Bereinigt abgelaufene Sessions aus Redis."""
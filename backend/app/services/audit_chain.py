@@ -0,0 +1,511 @@
+"""
+aitema|Hinweis - Audit-Hashkette
+Manipulationserkennung fuer audit_logs.
+
+Jeder Eintrag erhaelt je Mandant (Kette "global" fuer Eintraege ohne Mandant)
+eine fortlaufende Nummer chain_seq und
+
+    chain_hash = sha256(vorheriger chain_hash || kanonischer Eintrag)
+
+Eintraege werden ohne Hash geschrieben und anschliessend in Batches
+versiegelt: direkt nach jedem Flush des Audit-Puffers und minuetlich fuer
+Eintraege aus Request-Transaktionen. Gesperrt wird dabei nur der Kopf der
+jeweiligen Kette (audit_chain_heads), nicht jeder Insert.
+
+Stuendlich wird je Kette ein Checkpoint gespeichert: Merkle-Wurzel ueber die
+neuen Glieder, letzter Hash und eine HMAC-Signatur (Schluessel aus dem
+Master-Key). verify_chain() prueft einen Zeitraum ab dem naechstgelegenen
+Checkpoint davor - Aufwand proportional zum Zeitraum, nicht zur Kettenlaenge.
+
+Erkannt werden geaenderte Eintraege (Hash), geloeschte (Luecke in chain_seq),
+eingefuegte (doppelte Nummer) und neu berechnete Kettenabschnitte
+(Checkpoint-Signatur bzw. -Wurzel).
+"""
+
+import enum
+import hashlib
+import heapq
+import hmac
+import json
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Mapping, Optional
+
+from flask import current_app
+from celery import shared_task
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+import structlog
+
+from app.models.audit_log import AuditLog, AuditChainHead, AuditCheckpoint
+from app.services.encryption import EncryptionService
+
+log = structlog.get_logger()
+
+GENESIS_HASH = "0" * 64
+GLOBAL_CHAIN = "global"
+
+AUDIT_SEAL_BATCH_SIZE = 1000
+AUDIT_VERIFY_BATCH_SIZE = 5000
+
+# Zeitraum der taeglichen Pruefung (mit Ueberlappung)
+AUDIT_VERIFY_WINDOW = timedelta(days=2)
+
+# Max. einzeln aufgefuehrte Fehler je Pruefung
+MAX_REPORTED_ERRORS = 100
+
+_CHECKPOINT_CONTEXT = "audit-checkpoint"
+
+_audit = AuditLog.__table__
+_heads = AuditChainHead.__table__
+_checkpoints = AuditCheckpoint.__table__
+
+# Inhalt, der in den Hash eingeht (alles ausser den Kettenfeldern selbst)
+CHAINED_COLUMNS = (
+    "id", "tenant_id", "user_id", "action", "resource_type", "resource_id",
+    "description", "details", "changes", "ip_address", "user_agent",
+    "request_method", "request_path", "request_id", "success", "error_message",
+    "created_at",
+)
+
+
+def chain_key(tenant_id) -> str:
+    return str(tenant_id) if tenant_id else GLOBAL_CHAIN
+
+
+def _in_chain(key: str):
+    if key == GLOBAL_CHAIN:
+        return _audit.c.tenant_id.is_(None)
+    return _audit.c.tenant_id == uuid.UUID(key)
+
+
+def _canonical_value(value):
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.astimezone(timezone.utc).isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+
+def canonical_entry(entry: Mapping, seq: int) -> bytes:
+    """Deterministische Darstellung eines Eintrags (sortiertes JSON)."""
+    values = {column: _canonical_value(entry[column]) for column in CHAINED_COLUMNS}
+    values["chain_seq"] = seq
+    return json.dumps(values, sort_keys=True, separators=(",", ":"), default=str).encode()
+
+
+def entry_hash(prev_hash: str, entry: Mapping, seq: int) -> str:
+    return hashlib.sha256(prev_hash.encode() + canonical_entry(entry, seq)).hexdigest()
+
+
+def merkle_root(hashes: list[str]) -> str:
+    """Merkle-Wurzel ueber Hex-Hashes (ungerade Ebenen: letzten Knoten doppeln)."""
+    if not hashes:
+        return GENESIS_HASH
+    level = [bytes.fromhex(h) for h in hashes]
+    while len(level) > 1:
+        if len(level) % 2:
+            level.append(level[-1])
+        level = [
+            hashlib.sha256(level[i] + level[i + 1]).digest()
+            for i in range(0, len(level), 2)
+        ]
+    return level[0].hex()
+
+
+class CheckpointSigner:
+    """HMAC-Signatur fuer Checkpoints (Schluessel per HKDF aus dem Master-Key)."""
+
+    def __init__(self, encryption: EncryptionService):
+        self._key = encryption.derive_search_key(_CHECKPOINT_CONTEXT)
+
+    def sign(self, key: str, seq_from: int, seq_to: int, last_hash: str, root: str) -> str:
+        message = f"{key}|{seq_from}|{seq_to}|{last_hash}|{root}".encode()
+        return hmac.new(self._key, message, hashlib.sha256).hexdigest()
+
+    def verify(self, checkpoint: Mapping) -> bool:
+        expected = self.sign(
+            checkpoint["chain_key"], checkpoint["seq_from"], checkpoint["seq_to"],
+            checkpoint["last_hash"], checkpoint["merkle_root"],
+        )
+        return hmac.compare_digest(expected, checkpoint["signature"])
+
+
+def _signer() -> CheckpointSigner:
+    return CheckpointSigner(EncryptionService(current_app.config["ENCRYPTION_MASTER_KEY"]))
+
+
+# ----------------------------------------------------------
+# Versiegeln
+# ----------------------------------------------------------
+
+def pending_chains(conn) -> list[str]:
+    """Ketten mit noch nicht versiegelten Eintraegen."""
+    rows = conn.execute(
+        select(_audit.c.tenant_id).where(_audit.c.chain_hash.is_(None)).distinct()
+    )
+    return [chain_key(tenant_id) for (tenant_id,) in rows]
+
+
+def _lock_head(conn, key: str) -> tuple[int, str]:
+    conn.execute(
+        insert(_heads).values(chain_key=key, last_seq=0, last_hash=GENESIS_HASH)
+        .on_conflict_do_nothing(index_elements=["chain_key"])
+    )
+    row = conn.execute(
+        select(_heads.c.last_seq, _heads.c.last_hash)
+        .where(_heads.c.chain_key == key)
+        .with_for_update()
+    ).one()
+    return row.last_seq, row.last_hash
+
+
+def seal_chain(conn, key: str, batch_size: int = AUDIT_SEAL_BATCH_SIZE) -> int:
+    """
+    Versiegelt bis zu batch_size Eintraege einer Kette (Reihenfolge created_at, id).
+    Aufruf innerhalb einer Transaktion; der Kettenkopf bleibt bis zum Commit gesperrt.
+
+    Returns:
+        Anzahl versiegelter Eintraege
+    """
+    seq, prev = _lock_head(conn, key)
+    rows = conn.execute(
+        select(*[_audit.c[column] for column in CHAINED_COLUMNS])
+        .where(_in_chain(key), _audit.c.chain_hash.is_(None))
+        .order_by(_audit.c.created_at, _audit.c.id)
+        .limit(batch_size)
+    ).mappings().all()
+    if not rows:
+        return 0
+
+    updates = []
+    for row in rows:
+        seq += 1
+        prev = entry_hash(prev, row, seq)
+        updates.append({"_id": row["id"], "_created_at": row["created_at"],
+                        "_seq": seq, "_hash": prev})
+
+    conn.execute(
+        update(_audit)
+        .where(_audit.c.id == bindparam("_id"), _audit.c.created_at == bindparam("_created_at"))
+        .values(chain_seq=bindparam("_seq"), chain_hash=bindparam("_hash")),
+        updates,
+    )
+    conn.execute(
+        update(_heads).where(_heads.c.chain_key == key)
+        .values(last_seq=seq, last_hash=prev, updated_at=func.now())
+    )
+    return len(rows)
+
+
+def seal_pending(engine, keys: Optional[Iterable[str]] = None,
+                 batch_size: int = AUDIT_SEAL_BATCH_SIZE) -> int:
+    """Versiegelt alle offenen Eintraege (eine Transaktion pro Batch und Kette)."""
+    if keys is None:
+        with engine.connect() as conn:
+            keys = pending_chains(conn)
+
+    sealed = 0
+    for key in keys:
+        while True:
+            with engine.begin() as conn:
+                count = seal_chain(conn, key, batch_size)
+            sealed += count
+            if count < batch_size:
+                break
+    return sealed
+
+
+# ----------------------------------------------------------
+# Checkpoints
+# ----------------------------------------------------------
+
+def create_checkpoint(conn, key: str, signer: CheckpointSigner) -> Optional[dict]:
+    """
+    Checkpoint ueber alle seit dem letzten Checkpoint versiegelten Glieder.
+
+    Returns:
+        Checkpoint-Werte oder None (nichts Neues bzw. Luecke in der Kette)
+    """
+    head = conn.execute(
+        select(_heads.c.last_seq, _heads.c.last_hash).where(_heads.c.chain_key == key)
+    ).one_or_none()
+    last_to = conn.execute(
+        select(func.coalesce(func.max(_checkpoints.c.seq_to), 0))
+        .where(_checkpoints.c.chain_key == key)
+    ).scalar()
+    if head is None or head.last_seq <= last_to:
+        return None
+
+    hashes = conn.execute(
+        select(_audit.c.chain_hash)
+        .where(_in_chain(key), _audit.c.chain_seq > last_to, _audit.c.chain_seq <= head.last_seq)
+        .order_by(_audit.c.chain_seq)
+    ).scalars().all()
+    if len(hashes) != head.last_seq - last_to:
+        log.error("audit_checkpoint_gap", chain=key, expected=head.last_seq - last_to,
+                  found=len(hashes))
+        return None
+
+    root = merkle_root(hashes)
+    checkpoint = {
+        "chain_key": key,
+        "seq_from": last_to + 1,
+        "seq_to": head.last_seq,
+        "last_hash": head.last_hash,
+        "merkle_root": root,
+    }
+    checkpoint["signature"] = signer.sign(
+        key, checkpoint["seq_from"], checkpoint["seq_to"], head.last_hash, root,
+    )
+    conn.execute(
+        insert(_checkpoints).values(id=uuid.uuid4(), **checkpoint)
+        .on_conflict_do_nothing(index_elements=["chain_key", "seq_to"])
+    )
+    return checkpoint
+
+
+# ----------------------------------------------------------
+# Pruefung
+# ----------------------------------------------------------
+
+@dataclass
+class ChainVerification:
+    """Ergebnis einer Kettenpruefung."""
+    chain_key: str
+    first_seq: Optional[int] = None
+    last_seq: Optional[int] = None
+    checked: int = 0
+    checkpoints: int = 0
+    error_count: int = 0
+    errors: list[dict] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return self.error_count == 0
+
+    def fail(self, reason: str, seq: Optional[int] = None, entry_id=None) -> None:
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({
+                "reason": reason,
+                "seq": seq,
+                "id": str(entry_id) if entry_id else None,
+            })
+
+
+def _seq_bounds(conn, key: str, start: Optional[datetime], end: Optional[datetime]):
+    """Kleinste und groesste chain_seq im Zeitraum (nutzt Partition Pruning)."""
+    stmt = select(func.min(_audit.c.chain_seq), func.max(_audit.c.chain_seq)).where(
+        _in_chain(key), _audit.c.chain_seq.isnot(None),
+    )
+    if start is not None:
+        stmt = stmt.where(_audit.c.created_at >= start)
+    if end is not None:
+        stmt = stmt.where(_audit.c.created_at <= end)
+    return conn.execute(stmt).one()
+
+
+def verify_chain(conn, key: str, signer: CheckpointSigner,
+                 start: Optional[datetime] = None, end: Optional[datetime] = None,
+                 batch_size: int = AUDIT_VERIFY_BATCH_SIZE, archive=None) -> ChainVerification:
+    """
+    Prueft die Glieder einer Kette, die im Zeitraum [start, end] angelegt wurden.
+
+    Beginnt beim letzten Checkpoint vor dem Zeitraum (sonst am Kettenanfang)
+    und prueft unterwegs alle Checkpoints im Zeitraum. Ohne end wird bis zum
+    Kettenkopf geprueft; am Ende fehlende Glieder werden dann erkannt.
+
+    archive (cold_archive.ArchivedChain) liefert die Glieder ausgelagerter
+    Monate; ohne archive erscheinen sie als fehlend.
+    """
+    result = ChainVerification(chain_key=key)
+    seq_lo, seq_hi = _seq_bounds(conn, key, start, end)
+    if archive is not None:
+        archived_lo, archived_hi = archive.seq_bounds(key, start, end)
+        seq_lo = min(filter(None, (seq_lo, archived_lo)), default=None)
+        seq_hi = max(filter(None, (seq_hi, archived_hi)), default=None)
+    if end is None:
+        head = conn.execute(
+            select(_heads.c.last_seq).where(_heads.c.chain_key == key)
+        ).scalar()
+        seq_hi = max(seq_hi or 0, head or 0) or None
+        seq_lo = seq_lo or seq_hi
+    if seq_hi is None:
+        return result
+    if start is None:
+        seq_lo = 1
+
+    anchor = conn.execute(
+        select(_checkpoints)
+        .where(_checkpoints.c.chain_key == key, _checkpoints.c.seq_to < seq_lo)
+        .order_by(_checkpoints.c.seq_to.desc())
+        .limit(1)
+    ).mappings().one_or_none()
+    if anchor is not None:
+        if not signer.verify(anchor):
+            result.fail("checkpoint_signature", seq=anchor["seq_to"])
+        prev, expected = anchor["last_hash"], anchor["seq_to"] + 1
+    else:
+        prev, expected = GENESIS_HASH, 1
+    result.first_seq, result.last_seq = expected, seq_hi
+
+    checkpoints = conn.execute(
+        select(_checkpoints)
+        .where(_checkpoints.c.chain_key == key,
+               _checkpoints.c.seq_from >= expected,
+               _checkpoints.c.seq_to <= seq_hi)
+        .order_by(_checkpoints.c.seq_to)
+    ).mappings().all()
+    rows = conn.execute(
+        select(*[_audit.c[column] for column in CHAINED_COLUMNS],
+               _audit.c.chain_seq, _audit.c.chain_hash)
+        .where(_in_chain(key), _audit.c.chain_seq >= expected, _audit.c.chain_seq <= seq_hi)
+        .order_by(_audit.c.chain_seq)
+        .execution_options(yield_per=batch_size)
+    ).mappings()
+    links = rows
+    if archive is not None:
+        links = heapq.merge(
+            archive.rows(key, expected, seq_hi), rows, key=lambda row: row["chain_seq"],
+        )
+    try:
+        check_links(result, signer, links, prev, expected, seq_hi, checkpoints)
+    finally:
+        rows.close()
+    return result
+
+
+def check_links(result: ChainVerification, signer: CheckpointSigner, rows: Iterable[Mapping],
+                prev: str, expected: int, seq_hi: int, checkpoints: Iterable[Mapping]) -> None:
+    """
+    Prueft nach chain_seq sortierte Glieder ab expected (Vorgaenger-Hash prev)
+    bis seq_hi und die darin liegenden Checkpoints.
+    """
+    pending = deque(checkpoints)
+    window: list[str] = []
+    for row in rows:
+        seq = row["chain_seq"]
+        if seq < expected:
+            result.fail("duplicate", seq=seq, entry_id=row["id"])
+            continue
+        while expected < seq:
+            result.fail("missing", seq=expected)
+            expected += 1
+
+        if entry_hash(prev, row, seq) != row["chain_hash"]:
+            result.fail("hash_mismatch", seq=seq, entry_id=row["id"])
+        # Mit dem gespeicherten Hash weiter, damit nur das betroffene Glied auffaellt
+        prev = row["chain_hash"]
+        expected = seq + 1
+        result.checked += 1
+
+        while pending and seq > pending[0]["seq_to"]:
+            # Letztes Glied des Checkpoints fehlt (bereits als missing gemeldet)
+            result.fail("checkpoint_unverified", seq=pending.popleft()["seq_to"])
+            window = []
+        if pending and pending[0]["seq_from"] <= seq:
+            window.append(row["chain_hash"])
+            if seq == pending[0]["seq_to"]:
+                _check_checkpoint(result, signer, pending.popleft(), window, prev)
+                window = []
+
+    while expected <= seq_hi:
+        result.fail("missing", seq=expected)
+        expected += 1
+    for checkpoint in pending:
+        result.fail("checkpoint_unverified", seq=checkpoint["seq_to"])
+
+
+def _check_checkpoint(result: ChainVerification, signer: CheckpointSigner,
+                      checkpoint: Mapping, window: list[str], last_hash: str) -> None:
+    result.checkpoints += 1
+    if not signer.verify(checkpoint):
+        result.fail("checkpoint_signature", seq=checkpoint["seq_to"])
+    elif checkpoint["last_hash"] != last_hash:
+        result.fail("checkpoint_last_hash", seq=checkpoint["seq_to"])
+    elif (len(window) != checkpoint["seq_to"] - checkpoint["seq_from"] + 1
+          or merkle_root(window) != checkpoint["merkle_root"]):
+        result.fail("checkpoint_merkle_root", seq=checkpoint["seq_to"])
+
+
+def _chain_keys(conn) -> list[str]:
+    return list(conn.execute(select(_heads.c.chain_key).order_by(_heads.c.chain_key)).scalars())
+
+
+# ----------------------------------------------------------
+# Tasks
+# ----------------------------------------------------------
+
+@shared_task(name="app.services.audit_chain.seal_audit_chains")
+def seal_audit_chains():
+    """Celery-Task: Versiegelt Eintraege, die nicht ueber den Puffer kamen."""
+    try:
+        sealed = seal_pending(current_app.engine)
+    except SQLAlchemyError as e:
+        log.error("audit_chain_seal_failed", error=str(e)[:200])
+        return {"sealed": 0}
+    if sealed:
+        log.info("audit_chain_sealed", count=sealed)
+    return {"sealed": sealed}
+
+
+@shared_task(name="app.services.audit_chain.checkpoint_audit_chains")
+def checkpoint_audit_chains():
+    """Celery-Task: Signierte Checkpoints fuer alle Ketten mit neuen Gliedern."""
+    signer = _signer()
+    created = 0
+    with current_app.engine.connect() as conn:
+        keys = _chain_keys(conn)
+    for key in keys:
+        try:
+            with current_app.engine.begin() as conn:
+                if create_checkpoint(conn, key, signer):
+                    created += 1
+        except SQLAlchemyError as e:
+            log.error("audit_checkpoint_failed", chain=key, error=str(e)[:200])
+    log.info("audit_checkpoints_created", count=created)
+    return {"created": created}
+
+
+@shared_task(name="app.services.audit_chain.verify_audit_chains")
+def verify_audit_chains(start: Optional[str] = None, end: Optional[str] = None,
+                        chain: Optional[str] = None):
+    """
+    Celery-Task: Prueft die Hashketten.
+    Ohne Argumente taeglich die letzten AUDIT_VERIFY_WINDOW bis zum Kettenkopf;
+    start/end (ISO) und chain fuer Pruefungen beliebiger Zeitraeume.
+    """
+    from app.services.cold_archive import ArchivedChain
+
+    signer = _signer()
+    encryption = EncryptionService(current_app.config["ENCRYPTION_MASTER_KEY"])
+    since = (
+        datetime.fromisoformat(start) if start
+        else datetime.now(timezone.utc) - AUDIT_VERIFY_WINDOW
+    )
+    until = datetime.fromisoformat(end) if end else None
+
+    summary = {}
+    with current_app.engine.connect() as conn:
+        archive = ArchivedChain(conn, current_app.config["ARCHIVE_FOLDER"], encryption)
+        for key in [chain] if chain else _chain_keys(conn):
+            result = verify_chain(conn, key, signer, since, until, archive=archive)
+            summary[key] = {
+                "ok": result.ok,
+                "checked": result.checked,
+                "checkpoints": result.checkpoints,
+                "errors": result.errors,
+            }
+            if result.ok:
+                log.info("audit_chain_verified", chain=key, checked=result.checked,
+                         checkpoints=result.checkpoints)
+            else:
+                log.critical("audit_chain_tampered", chain=key, error_count=result.error_count,
+                             errors=result.errors[:10])
+    return summary
@@ -0,0 +1,207 @@
+"""
+aitema|Hinweis - Audit-Log-Partitionen
+Monatliche Range-Partitionen fuer audit_logs und Aufbewahrung.
+
+audit_logs ist nach created_at (UTC-Monate) partitioniert; jede Partition
+heisst audit_logs_pYYYY_MM. Indizes existieren je Partition und bleiben damit
+klein, Abfragen mit Zeitgrenzen lesen nur die betroffenen Monate.
+
+maintain_audit_partitions() laeuft taeglich und
+
+    - legt die Partitionen fuer den laufenden und die naechsten
+      AUDIT_PARTITIONS_AHEAD Monate an (es gibt keine DEFAULT-Partition;
+      ohne passende Partition schlaegt ein Insert fehl),
+    - haengt Partitionen, die vollstaendig aelter als AUDIT_RETENTION_MONTHS
+      sind, ab und verschiebt sie in ein Archiv-Schema (archive) oder
+      loescht sie (drop). Einzelne Eintraege werden nie geloescht.
+
+Im database- und schema-Modus wird jede Tenant-Ablage mitgepflegt.
+"""
+
+import os
+import re
+from datetime import date, datetime, timezone
+from typing import Optional
+
+from flask import current_app
+from celery import shared_task
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+import structlog
+
+from app.services.fleet_stats import MASTER_TARGET, fleet_targets
+
+log = structlog.get_logger()
+
+AUDIT_TABLE = "audit_logs"
+AUDIT_PARTITIONS_AHEAD = 3
+
+# 0 = unbegrenzt aufbewahren
+AUDIT_RETENTION_MONTHS = int(os.environ.get("AUDIT_RETENTION_MONTHS", "36"))
+AUDIT_RETENTION_MODE = os.environ.get("AUDIT_RETENTION_MODE", "archive")
+RETENTION_MODES = ("archive", "drop")
+
+AUDIT_ARCHIVE_SCHEMA = "audit_archive"
+
+_PARTITION_NAME = re.compile(r"^audit_logs_p(\d{4})_(\d{2})$")
+
+
+def month_start(value) -> date:
+    """Erster Tag des (UTC-)Monats."""
+    if isinstance(value, datetime) and value.tzinfo:
+        value = value.astimezone(timezone.utc)
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{AUDIT_TABLE}_p{month.year:04d}_{month.month:02d}"
+
+
+def partition_month(name: str) -> Optional[date]:
+    """Monat aus dem Partitionsnamen (None bei fremden Tabellen)."""
+    match = _PARTITION_NAME.match(name)
+    return date(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+
+def archive_schema(schema: Optional[str]) -> str:
+    """Archiv-Schema je Ablage (Tenant-Schemas getrennt, gleiche Partitionsnamen)."""
+    return f"{schema}_archive" if schema else AUDIT_ARCHIVE_SCHEMA
+
+
+def _qualified(conn, name: str, schema: Optional[str]) -> str:
+    quote = conn.dialect.identifier_preparer.quote
+    return f"{quote(schema)}.{quote(name)}" if schema else quote(name)
+
+
+def partition_ddl(conn, month: date, schema: Optional[str] = None) -> str:
+    """CREATE TABLE ... PARTITION OF fuer einen Monat (Grenzen in UTC)."""
+    return (
+        f"CREATE TABLE IF NOT EXISTS {_qualified(conn, partition_name(month), schema)} "
+        f"PARTITION OF {_qualified(conn, AUDIT_TABLE, schema)} "
+        f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') "
+        f"TO ('{add_months(month, 1).isoformat()} 00:00:00+00')"
+    )
+
+
+def existing_partitions(conn, schema: Optional[str] = None) -> dict[date, str]:
+    """Angehaengte Monats-Partitionen {Monat: Name}."""
+    rows = conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "JOIN pg_namespace n ON n.oid = p.relnamespace "
+        "WHERE p.relname = :table AND n.nspname = coalesce(:schema, current_schema())"
+    ), {"table": AUDIT_TABLE, "schema": schema})
+    partitions = {}
+    for (name,) in rows:
+        month = partition_month(name)
+        if month is not None:
+            partitions[month] = name
+    return partitions
+
+
+def ensure_partitions(conn, schema: Optional[str] = None, now: Optional[datetime] = None,
+                      ahead: int = AUDIT_PARTITIONS_AHEAD) -> list[str]:
+    """
+    Legt fehlende Partitionen vom laufenden Monat bis ahead Monate voraus an.
+
+    Returns:
+        Namen der neu angelegten Partitionen
+    """
+    current = month_start(now or datetime.now(timezone.utc))
+    existing = existing_partitions(conn, schema)
+    created = []
+    for offset in range(ahead + 1):
+        month = add_months(current, offset)
+        if month in existing:
+            continue
+        conn.execute(text(partition_ddl(conn, month, schema)))
+        created.append(partition_name(month))
+    if created:
+        log.info("audit_partitions_created", schema=schema, partitions=created)
+    return created
+
+
+def expired_months(months, now: datetime, retention_months: int) -> list[date]:
+    """Monate, deren Partition vollstaendig vor dem Aufbewahrungszeitraum liegt."""
+    if retention_months <= 0:
+        return []
+    cutoff = add_months(month_start(now), -retention_months)
+    return sorted(month for month in months if add_months(month, 1) <= cutoff)
+
+
+def apply_retention(conn, schema: Optional[str] = None, now: Optional[datetime] = None,
+                    retention_months: int = AUDIT_RETENTION_MONTHS,
+                    mode: str = AUDIT_RETENTION_MODE) -> list[str]:
+    """
+    Haengt abgelaufene Partitionen ab und archiviert bzw. loescht sie.
+
+    Returns:
+        Namen der entfernten Partitionen
+
+    Raises:
+        ValueError: Bei unbekanntem Modus
+    """
+    if mode not in RETENTION_MODES:
+        raise ValueError(f"Unbekannter Aufbewahrungsmodus: {mode}")
+
+    partitions = existing_partitions(conn, schema)
+    removed = []
+    for month in expired_months(partitions, now or datetime.now(timezone.utc), retention_months):
+        retire_partition(conn, partitions[month], schema, mode)
+        removed.append(partitions[month])
+    return removed
+
+
+def retire_partition(conn, name: str, schema: Optional[str] = None, mode: str = "drop") -> None:
+    """Haengt eine Partition ab und verschiebt (archive) oder loescht (drop) sie."""
+    qualified = _qualified(conn, name, schema)
+    conn.execute(text(
+        f"ALTER TABLE {_qualified(conn, AUDIT_TABLE, schema)} DETACH PARTITION {qualified}"
+    ))
+    if mode == "drop":
+        conn.execute(text(f"DROP TABLE {qualified}"))
+    else:
+        target = conn.dialect.identifier_preparer.quote(archive_schema(schema))
+        conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {target}"))
+        conn.execute(text(f"ALTER TABLE {qualified} SET SCHEMA {target}"))
+    log.info("audit_partition_retired", schema=schema, partition=name, mode=mode)
+
+
+def maintenance_targets(app, session) -> list[tuple]:
+    """(Name, Engine, Schema) fuer die Master-Datenbank und alle Tenant-Ablagen."""
+    targets = [(MASTER_TARGET, app.engine, None)]
+    for target in fleet_targets(app, session):
+        if target.name == MASTER_TARGET:
+            continue
+        translate = target.engine.get_execution_options().get("schema_translate_map") or {}
+        targets.append((target.name, target.engine, translate.get(None)))
+    return targets
+
+
+@shared_task(name="app.services.audit_partitions.maintain_audit_partitions")
+def maintain_audit_partitions():
+    """Celery-Task: Partitionen vorausanlegen und Aufbewahrung anwenden."""
+    session = current_app.Session()
+    try:
+        targets = maintenance_targets(current_app, session)
+    finally:
+        session.close()
+
+    summary = {}
+    for name, engine, schema in targets:
+        try:
+            with engine.begin() as conn:
+                summary[name] = {
+                    "created": ensure_partitions(conn, schema),
+                    "retired": apply_retention(conn, schema),
+                }
+        except SQLAlchemyError as e:
+            log.error("audit_partition_maintenance_failed", target=name, error=str(e)[:200])
+            summary[name] = {"error": str(e)[:200]}
+    return summary
@@ -0,0 +1,390 @@
+"""
+aitema|Hinweis - Audit-Writer
+Gebuendeltes Schreiben von Audit-Log-Eintraegen.
+
+Zwei Wege:
+
+    record_audit()   Eintrag in der Unit of Work des Requests; wird mit der
+                     fachlichen Aenderung committet (kein eigener Commit).
+    enqueue_audit()  Ereignisse ohne eigene Transaktion (fehlgeschlagene
+                     Logins, Lesezugriffe, Logout) gehen in einen
+                     prozesslokalen Puffer.
+
+Der Puffer wird von einem Hintergrund-Thread geleert, sobald
+AUDIT_BUFFER_MAX_ROWS Eintraege anliegen oder spaetestens nach
+AUDIT_BUFFER_MAX_SECONDS - als ein mehrzeiliges INSERT pro Flush. Ist die
+Datenbank nicht erreichbar, landen die Eintraege in der Redis-Liste
+AUDIT_FALLBACK_KEY; drain_audit_fallback() schreibt sie nach. Faellt auch
+Redis aus, bleiben sie im Puffer (begrenzt auf AUDIT_BUFFER_MAX_PENDING) und
+werden beim naechsten Flush erneut versucht.
+
+Nur Verbindungsfehler (OperationalError/InterfaceError) gelten als
+"Datenbank nicht erreichbar". Scheitert ein Batch an einzelnen Zeilen
+(DataError, IntegrityError, ...), wird er halbiert, bis die fehlerhaften
+Zeilen feststehen; diese landen in AUDIT_DEAD_LETTER_KEY, der Rest wird
+geschrieben. So blockiert eine kaputte Zeile weder den Puffer noch die
+Fallback-Liste.
+
+IDs und Zeitstempel werden beim Erfassen vergeben; Inserts sind ueber
+ON CONFLICT (id, created_at) DO NOTHING idempotent, doppelte Zustellung
+ist harmlos.
+"""
+
+import json
+import os
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
+
+from flask import current_app, request
+from celery import shared_task
+from redis import RedisError
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import InterfaceError, OperationalError, SQLAlchemyError
+import structlog
+
+from app.models.audit_log import AuditLog, AuditAction
+from app.services.audit_chain import chain_key, seal_pending
+
+log = structlog.get_logger()
+
+AUDIT_BUFFER_MAX_ROWS = int(os.environ.get("AUDIT_BUFFER_MAX_ROWS", "200"))
+AUDIT_BUFFER_MAX_SECONDS = float(os.environ.get("AUDIT_BUFFER_MAX_SECONDS", "2"))
+AUDIT_BUFFER_MAX_PENDING = int(os.environ.get("AUDIT_BUFFER_MAX_PENDING", "50000"))
+
+AUDIT_FALLBACK_KEY = "audit_buffer:pending"
+AUDIT_DEAD_LETTER_KEY = "audit_buffer:dead"
+AUDIT_DRAIN_LOCK_KEY = "audit_buffer:drain_lock"
+AUDIT_DRAIN_LOCK_SECONDS = 240
+
+# Max. Batches pro Task-Lauf (begrenzt die Laufzeit unter task_time_limit)
+MAX_BATCHES_PER_RUN = 50
+
+# Fehler, bei denen die Datenbank als nicht erreichbar gilt
+_UNAVAILABLE = (OperationalError, InterfaceError)
+
+
+def _clip(value: Optional[str], column: str) -> Optional[str]:
+    """Kuerzt Client-Werte auf die Spaltenbreite (sonst DataError beim Insert)."""
+    if value is None:
+        return None
+    return value[:AuditLog.__table__.c[column].type.length]
+
+
+def _request_context() -> dict:
+    try:
+        return {
+            "ip_address": request.remote_addr,
+            "user_agent": _clip(request.headers.get("User-Agent", ""), "user_agent"),
+            "request_method": _clip(request.method, "request_method"),
+            "request_path": _clip(request.path, "request_path"),
+            "request_id": _clip(request.headers.get("X-Request-ID"), "request_id"),
+        }
+    except RuntimeError:
+        # Kein Request-Kontext (z.B. in Celery-Tasks)
+        return {
+            "ip_address": None,
+            "user_agent": None,
+            "request_method": None,
+            "request_path": None,
+            "request_id": None,
+        }
+
+
+def audit_row(
+    action: AuditAction,
+    tenant_id=None,
+    user_id=None,
+    resource_type: Optional[str] = None,
+    resource_id: Optional[str] = None,
+    description: Optional[str] = None,
+    details: Optional[dict] = None,
+    changes: Optional[dict] = None,
+    success: bool = True,
+    error_message: Optional[str] = None,
+    ip_address: Optional[str] = None,
+) -> dict:
+    """
+    Vollstaendige Spaltenwerte eines Audit-Eintrags inkl. Request-Kontext.
+    Eine explizit uebergebene ip_address hat Vorrang vor request.remote_addr.
+    """
+    context = _request_context()
+    if ip_address is not None:
+        context["ip_address"] = ip_address
+    return {
+        "id": uuid.uuid4(),
+        "tenant_id": tenant_id,
+        "user_id": user_id,
+        "action": action,
+        "resource_type": resource_type,
+        "resource_id": resource_id,
+        "description": description,
+        "details": details or {},
+        "changes": changes,
+        "success": success,
+        "error_message": error_message,
+        "created_at": datetime.now(timezone.utc),
+        **context,
+    }
+
+
+def record_audit(session, action: AuditAction, **fields) -> AuditLog:
+    """Audit-Eintrag in der Transaktion des Aufrufers (ohne Commit)."""
+    entry = AuditLog(**audit_row(action, **fields))
+    session.add(entry)
+    return entry
+
+
+def enqueue_audit(action: AuditAction, **fields) -> None:
+    """Audit-Eintrag ueber den Puffer der App (ohne eigene Transaktion)."""
+    try:
+        current_app.audit_buffer.add(audit_row(action, **fields))
+    except Exception as e:
+        log.error("audit_enqueue_failed", error=str(e), action=action.value)
+
+
+# ----------------------------------------------------------
+# Serialisierung (Redis-Fallback)
+# ----------------------------------------------------------
+
+_UUID_FIELDS = ("id", "tenant_id", "user_id")
+
+
+def serialize_row(row: dict) -> str:
+    data = dict(row)
+    for key in _UUID_FIELDS:
+        if data[key] is not None:
+            data[key] = str(data[key])
+    data["action"] = data["action"].value
+    data["created_at"] = data["created_at"].isoformat()
+    if data["ip_address"] is not None:
+        data["ip_address"] = str(data["ip_address"])
+    return json.dumps(data)
+
+
+def deserialize_row(raw: str) -> dict:
+    data = json.loads(raw)
+    for key in _UUID_FIELDS:
+        if data[key] is not None:
+            data[key] = uuid.UUID(data[key])
+    data["action"] = AuditAction(data["action"])
+    data["created_at"] = datetime.fromisoformat(data["created_at"])
+    return data
+
+
+def write_rows(engine, rows: list[dict]) -> None:
+    """Ein Statement fuer alle Zeilen (insertmanyvalues -> mehrzeiliges INSERT)."""
+    stmt = insert(AuditLog.__table__).on_conflict_do_nothing(
+        index_elements=["id", "created_at"],
+    )
+    with engine.begin() as conn:
+        conn.execute(stmt, rows)
+
+
+def write_batch(engine, rows: list[dict]) -> list[dict]:
+    """
+    Schreibt rows; Zeilen, an denen das Insert scheitert, werden per
+    Halbierung isoliert und nicht geschrieben.
+
+    Returns:
+        Die fehlerhaften Zeilen
+
+    Raises:
+        OperationalError, InterfaceError: Datenbank nicht erreichbar
+    """
+    try:
+        write_rows(engine, rows)
+        return []
+    except _UNAVAILABLE:
+        raise
+    except SQLAlchemyError as e:
+        if len(rows) == 1:
+            log.error("audit_row_rejected", error=str(e)[:200], id=str(rows[0].get("id")))
+            return rows
+    middle = len(rows) // 2
+    return write_batch(engine, rows[:middle]) + write_batch(engine, rows[middle:])
+
+
+def dead_letter(redis_client, entries: list[str]) -> None:
+    """Legt nicht schreibbare Eintraege (serialisiert) zur manuellen Pruefung ab."""
+    try:
+        redis_client.rpush(AUDIT_DEAD_LETTER_KEY, *entries)
+        log.error("audit_rows_dead_lettered", count=len(entries))
+    except RedisError as e:
+        # Letzte Sicherung: vollstaendige Eintraege im Anwendungslog
+        log.critical("audit_dead_letter_unavailable", error=str(e), events=entries)
+
+
+class AuditBuffer:
+    """
+    Prozesslokaler Puffer fuer Audit-Eintraege.
+
+    Der Flush-Thread startet beim ersten Eintrag (auch nach einem Fork neu,
+    z.B. bei Gunicorn mit preload_app). Nach jedem Flush werden die
+    betroffenen Hashketten versiegelt (seal=False schaltet das ab).
+    """
+
+    def __init__(self, engine, redis_client,
+                 max_rows: int = AUDIT_BUFFER_MAX_ROWS,
+                 max_seconds: float = AUDIT_BUFFER_MAX_SECONDS,
+                 max_pending: int = AUDIT_BUFFER_MAX_PENDING,
+                 seal: bool = True):
+        self.engine = engine
+        self.redis = redis_client
+        self.max_rows = max_rows
+        self.max_seconds = max_seconds
+        self.max_pending = max_pending
+        self.seal = seal
+        self._reset()
+
+    def _reset(self) -> None:
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._rows: list[dict] = []
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _ensure_flusher(self) -> None:
+        if self._pid != os.getpid():
+            # Eintraege des Elternprozesses gehoeren dem Elternprozess
+            self._reset()
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._run, name="audit-buffer", daemon=True,
+            )
+            self._thread.start()
+
+    def add(self, row: dict) -> None:
+        with self._lock:
+            self._ensure_flusher()
+            self._rows.append(row)
+            full = len(self._rows) >= self.max_rows
+        if full:
+            self._wakeup.set()
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.max_seconds)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                log.error("audit_buffer_flush_error", error=str(e))
+
+    def flush(self) -> int:
+        """
+        Schreibt alle gepufferten Eintraege (Datenbank, sonst Redis).
+
+        Returns:
+            Anzahl gesicherter Eintraege
+        """
+        with self._flush_lock:
+            with self._lock:
+                rows, self._rows = self._rows, []
+            if not rows:
+                return 0
+
+            try:
+                rejected = write_batch(self.engine, rows)
+            except _UNAVAILABLE as e:
+                log.warning("audit_buffer_db_unavailable", error=str(e)[:200], count=len(rows))
+            else:
+                if rejected:
+                    dead_letter(self.redis, [serialize_row(r) for r in rejected])
+                    rejected_ids = {r["id"] for r in rejected}
+                    rows = [r for r in rows if r["id"] not in rejected_ids]
+                log.info("audit_buffer_flushed", count=len(rows))
+                if self.seal and rows:
+                    self._seal(rows)
+                return len(rows)
+
+            try:
+                self.redis.rpush(AUDIT_FALLBACK_KEY, *[serialize_row(r) for r in rows])
+                log.warning("audit_buffer_spilled", count=len(rows))
+                return len(rows)
+            except RedisError as e:
+                log.error("audit_buffer_fallback_unavailable", error=str(e), count=len(rows))
+
+            self._requeue(rows)
+            return 0
+
+    def _seal(self, rows: list[dict]) -> None:
+        # Kein Fehler des Flushs: offene Eintraege versiegelt spaeter seal_audit_chains
+        try:
+            seal_pending(self.engine, {chain_key(r["tenant_id"]) for r in rows})
+        except SQLAlchemyError as e:
+            log.warning("audit_buffer_seal_failed", error=str(e)[:200])
+
+    def _requeue(self, rows: list[dict]) -> None:
+        with self._lock:
+            self._rows[:0] = rows
+            overflow = len(self._rows) - self.max_pending
+            if overflow > 0:
+                dropped, self._rows = self._rows[:overflow], self._rows[overflow:]
+                # Letzte Sicherung: vollstaendige Eintraege im Anwendungslog
+                log.critical(
+                    "audit_buffer_overflow",
+                    count=len(dropped),
+                    events=[serialize_row(r) for r in dropped],
+                )
+
+    def close(self) -> None:
+        """Stoppt den Flush-Thread und schreibt den Rest (atexit)."""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.max_seconds + 5)
+        if self._pid == os.getpid():
+            self.flush()
+
+
+@shared_task(name="app.services.audit_writer.drain_audit_fallback")
+def drain_audit_fallback():
+    """
+    Celery-Task: Schreibt nach Redis ausgelagerte Audit-Eintraege in die Datenbank.
+    Ein Lock verhindert parallele Drainer; Eintraege werden erst nach dem
+    Commit aus der Liste entfernt. Nicht lesbare oder nicht schreibbare
+    Eintraege wandern in die Dead-Letter-Liste, damit sie die Liste nicht
+    blockieren.
+    """
+    redis_client = current_app.redis
+    lock_token = uuid.uuid4().hex
+    if not redis_client.set(AUDIT_DRAIN_LOCK_KEY, lock_token, nx=True,
+                            ex=AUDIT_DRAIN_LOCK_SECONDS):
+        return {"drained": 0, "skipped": True}
+
+    drained = 0
+    try:
+        for _ in range(MAX_BATCHES_PER_RUN):
+            raw = redis_client.lrange(AUDIT_FALLBACK_KEY, 0, AUDIT_BUFFER_MAX_ROWS - 1)
+            if not raw:
+                break
+            rows, dead = [], []
+            for entry in raw:
+                try:
+                    rows.append(deserialize_row(entry))
+                except (ValueError, KeyError, TypeError):
+                    dead.append(entry)
+            try:
+                rejected = write_batch(current_app.engine, rows) if rows else []
+            except _UNAVAILABLE as e:
+                log.warning("audit_fallback_drain_failed", error=str(e)[:200])
+                break
+            dead += [serialize_row(r) for r in rejected]
+            if dead:
+                dead_letter(redis_client, dead)
+            redis_client.ltrim(AUDIT_FALLBACK_KEY, len(raw), -1)
+            drained += len(raw) - len(dead)
+    finally:
+        if redis_client.get(AUDIT_DRAIN_LOCK_KEY) == lock_token:
+            redis_client.delete(AUDIT_DRAIN_LOCK_KEY)
+
+    if drained:
+        log.info("audit_fallback_drained", count=drained)
+    return {"drained": drained, "skipped": False}
@@ -0,0 +1,249 @@
+"""
+aitema|Hinweis - BI-Export
+Anonymisierte Faktentabelle (eine Zeile pro Meldung) als Parquet oder Arrow IPC.
+
+Spalten: pseudonyme fact_id, Kategorie, Status, Eingangswoche, Dauern und
+Fristeinhaltung - keine Identitaets- oder Inhaltsfelder. Quasi-Identifikatoren
+sind (kategorie, eingang_woche); Klassen mit weniger als FACT_K_ANONYMITY
+Meldungen werden unterdrueckt (k-Anonymitaet).
+
+Inkrementell: since=<Wasserzeichen> liefert nur Klassen, in denen sich seit
+dem Wasserzeichen etwas geaendert hat (komplette Klassen, damit Zeilen, die erst
+durch neue Meldungen die Schwelle erreichen, nachgeliefert werden). updated_at
+ist der Start der aendernden Transaktion; was erst nach dem Lesen des
+Wasserzeichens committet, kann aelter sein. Deshalb wird ab
+since - FACT_WATERMARK_OVERLAP exportiert - doppelt gelieferte Klassen sind
+vollstaendig und ersetzen sich. Geloeschte Meldungen erscheinen inkrementell
+nicht - dafuer regelmaessig voll exportieren.
+
+Zeilen kommen ueber einen serverseitigen Cursor und werden in Row Groups bzw.
+Record Batches von FACT_BATCH_SIZE Zeilen geschrieben. pyarrow wird erst beim
+Export importiert (grosser Import, nur fuer diesen Endpunkt benoetigt).
+"""
+
+import hashlib
+import hmac
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, Optional
+
+from flask import current_app
+from sqlalchemy import Date, cast, func, select
+
+from app.models.audit_log import AuditLog, AuditAction
+from app.models.case import Case
+from app.models.hinweis import Hinweis
+from app.services.analytics_rollup import ROLLUP_TIMEZONE
+from app.services.encryption import EncryptionService
+from app.services.export import ChunkSink
+from app.services.k_anonymity import MIN_GROUP_SIZE
+
+FACT_FORMATS = {
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+}
+
+FACT_BATCH_SIZE = 10_000
+FACT_K_ANONYMITY = MIN_GROUP_SIZE
+
+# Laenger laufende Transaktionen werden beim naechsten inkrementellen Export
+# nur erfasst, wenn sie innerhalb dieser Spanne committen
+FACT_WATERMARK_OVERLAP = timedelta(minutes=15)
+
+
+def fact_schema(watermark: Optional[datetime] = None):
+    """Arrow-Schema der Faktentabelle (Wasserzeichen als Metadatum)."""
+    import pyarrow as pa
+
+    return pa.schema(
+        [
+            ("fact_id", pa.string()),
+            ("kategorie", pa.string()),
+            ("status", pa.string()),
+            ("case_status", pa.string()),
+            ("eingang_woche", pa.date32()),
+            ("ack_hours", pa.float64()),
+            ("resolve_hours", pa.float64()),
+            ("ack_fristgerecht", pa.bool_()),
+        ],
+        metadata={"watermark": watermark.isoformat() if watermark else ""},
+    )
+
+
+class FactPseudonymizer:
+    """Stabile, nicht umkehrbare fact_id je Meldung (HMAC, mandantenspezifisch)."""
+
+    def __init__(self, encryption: EncryptionService, tenant_id):
+        self._key = encryption.derive_search_key(f"bi-facts:{tenant_id}")
+
+    def __call__(self, hinweis_id) -> str:
+        return hmac.new(self._key, str(hinweis_id).encode(), hashlib.sha256).hexdigest()[:32]
+
+
+def parse_since(value: Optional[str]) -> Optional[datetime]:
+    """
+    Wasserzeichen aus ISO-Zeitstempel (ohne Zeitzone = UTC).
+
+    Raises:
+        ValueError: Bei ungueltigem Zeitstempel
+    """
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _changed_at():
+    # greatest() ignoriert NULL (Meldung ohne Fall)
+    return func.greatest(Hinweis.updated_at, Case.updated_at)
+
+
+def current_watermark(session, tenant_id) -> Optional[datetime]:
+    """Letzte Aenderung im Mandanten; vor dem Export lesen und mitliefern."""
+    return session.execute(
+        select(func.max(_changed_at()))
+        .select_from(Hinweis)
+        .outerjoin(Case, Case.hinweis_id == Hinweis.id)
+        .where(Hinweis.tenant_id == tenant_id)
+    ).scalar()
+
+
+def build_fact_query(tenant_id, since: Optional[datetime] = None):
+    """Fakten mit k-Anonymitaets-Schwelle je (kategorie, eingang_woche)."""
+    woche = cast(
+        func.date_trunc("week", func.timezone(ROLLUP_TIMEZONE, Hinweis.eingegangen_am)), Date,
+    )
+    klasse = (Hinweis.kategorie, woche)
+    facts = select(
+        Hinweis.id,
+        Hinweis.kategorie,
+        Hinweis.status,
+        Case.status.label("case_status"),
+        woche.label("eingang_woche"),
+        (func.extract("epoch", Hinweis.eingangsbestaetigung_gesendet_am - Hinweis.eingegangen_am)
+         / 3600.0).label("ack_hours"),
+        (func.extract("epoch", Case.resolved_at - Case.created_at) / 3600.0).label("resolve_hours"),
+        (Hinweis.eingangsbestaetigung_gesendet_am <= Hinweis.eingangsbestaetigung_frist)
+        .label("ack_fristgerecht"),
+        func.count().over(partition_by=klasse).label("klasse_n"),
+        func.max(_changed_at()).over(partition_by=klasse).label("klasse_changed_at"),
+    ).select_from(Hinweis).outerjoin(
+        Case, Case.hinweis_id == Hinweis.id,
+    ).where(Hinweis.tenant_id == tenant_id).subquery("facts")
+
+    stmt = select(
+        facts.c.id, facts.c.kategorie, facts.c.status, facts.c.case_status,
+        facts.c.eingang_woche, facts.c.ack_hours, facts.c.resolve_hours,
+        facts.c.ack_fristgerecht,
+    ).where(facts.c.klasse_n >= FACT_K_ANONYMITY)
+    if since is not None:
+        stmt = stmt.where(facts.c.klasse_changed_at > since - FACT_WATERMARK_OVERLAP)
+    return stmt
+
+
+def _round(value) -> Optional[float]:
+    return round(float(value), 2) if value is not None else None
+
+
+def iter_fact_batches(session, tenant_id, pseudonymize: FactPseudonymizer,
+                      since: Optional[datetime] = None) -> Iterator[list[tuple]]:
+    """Faktenzeilen in Batches von FACT_BATCH_SIZE (serverseitiger Cursor)."""
+    result = session.execute(
+        build_fact_query(tenant_id, since).execution_options(yield_per=FACT_BATCH_SIZE)
+    )
+    try:
+        for batch in result.partitions():
+            yield [
+                (
+                    pseudonymize(r.id),
+                    r.kategorie.value,
+                    r.status.value,
+                    r.case_status.value if r.case_status else None,
+                    r.eingang_woche,
+                    _round(r.ack_hours),
+                    _round(r.resolve_hours),
+                    r.ack_fristgerecht,
+                )
+                for r in batch
+            ]
+    finally:
+        result.close()
+
+
+# ----------------------------------------------------------
+# Spaltenformate (Generatoren von bytes)
+# ----------------------------------------------------------
+
+def _record_batch(schema, rows: list[tuple]):
+    import pyarrow as pa
+
+    columns = list(zip(*rows))
+    return pa.record_batch(
+        [pa.array(col, type=field.type) for col, field in zip(columns, schema)],
+        schema=schema,
+    )
+
+
+def write_parquet(schema, batches: Iterator[list[tuple]]) -> Iterator[bytes]:
+    """Parquet mit einer Row Group pro Batch; Footer am Ende, kein Seek noetig."""
+    import pyarrow.parquet as pq
+
+    sink = ChunkSink()
+    with pq.ParquetWriter(sink, schema, compression="zstd") as writer:
+        for rows in batches:
+            writer.write_batch(_record_batch(schema, rows))
+            yield sink.take()
+    yield sink.take()
+
+
+def write_arrow(schema, batches: Iterator[list[tuple]]) -> Iterator[bytes]:
+    """Arrow IPC Streaming-Format, ein Record Batch pro Batch."""
+    import pyarrow as pa
+
+    sink = ChunkSink()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        for rows in batches:
+            writer.write_batch(_record_batch(schema, rows))
+            yield sink.take()
+    yield sink.take()
+
+
+FACT_WRITERS = {
+    "parquet": write_parquet,
+    "arrow": write_arrow,
+}
+
+
+def stream_facts(session, tenant_id, fmt: str, since: Optional[datetime],
+                 watermark: Optional[datetime]) -> Iterator[bytes]:
+    """Faktentabelle als Folge von Byte-Chunks."""
+    pseudonymize = FactPseudonymizer(
+        EncryptionService(current_app.config["ENCRYPTION_MASTER_KEY"]), tenant_id,
+    )
+    return FACT_WRITERS[fmt](
+        fact_schema(watermark), iter_fact_batches(session, tenant_id, pseudonymize, since),
+    )
+
+
+def facts_filename(fmt: str) -> str:
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
+    return f"facts-{stamp}.{FACT_FORMATS[fmt][1]}"
+
+
+def audit_facts_export(session, tenant_id, user_id, ip_address: Optional[str], fmt: str,
+                       since: Optional[datetime], watermark: Optional[datetime]) -> None:
+    """DATA_EXPORTED-Eintrag (ohne Commit)."""
+    session.add(AuditLog(
+        tenant_id=tenant_id,
+        user_id=uuid.UUID(str(user_id)),
+        action=AuditAction.DATA_EXPORTED,
+        resource_type="facts",
+        ip_address=ip_address,
+        description=f"BI-Export Fakten als {fmt.upper()}",
+        details={
+            "format": fmt,
+            "since": since.isoformat() if since else None,
+            "watermark": watermark.isoformat() if watermark else None,
+            "k_anonymity": FACT_K_ANONYMITY,
+        },
+    ))
@@ -0,0 +1,220 @@
+"""
+aitema|Hinweis - Automatische Fallzuweisung
+Zuweisung an die/den Fallbearbeiter/in mit der geringsten Auslastung.
+
+Pro Mandant liegt in Redis ein Sorted Set je Bewerberpool
+(Member = User-ID, Score = Anzahl offener Faelle):
+
+    case_workload:<tenant>:all                 alle aktiven Fallbearbeiter/innen
+    case_workload:<tenant>:kategorie:<wert>    Fallbearbeiter/innen mit dieser Kategorie-Kompetenz
+
+Dazu ein Hash case_workload:<tenant>:meta (User-ID -> {"department", "pools"}).
+Die Zaehler werden bei Zuweisung, Abschluss und Wiedereroeffnung angepasst
+(track_workload) und taeglich aus der Datenbank neu aufgebaut. Die Auswahl
+liest die Pools aufsteigend in kleinen Fenstern und prueft nur die Kandidaten
+des Fensters auf Interessenkonflikte - keine COUNT-Abfragen pro Request.
+"""
+
+import json
+from typing import Optional
+
+from flask import current_app
+from celery import shared_task
+from sqlalchemy import func
+import structlog
+
+from app.models.case import Case, CaseStatus
+from app.models.user import User, UserRole
+
+log = structlog.get_logger()
+
+# Status, in denen ein Fall nicht mehr zur Auslastung zaehlt
+CLOSED_STATUSES = (CaseStatus.ABGESCHLOSSEN, CaseStatus.EINGESTELLT)
+
+# Kandidaten pro Redis-Abfrage bei der Auswahl
+CANDIDATE_WINDOW = 10
+
+
+def _key(tenant_id, pool: str = "all") -> str:
+    return f"case_workload:{tenant_id}:{pool}"
+
+
+def _meta_key(tenant_id) -> str:
+    return f"case_workload:{tenant_id}:meta"
+
+
+def is_open(status: Optional[CaseStatus]) -> bool:
+    """True wenn ein Fall in diesem Status zur Auslastung zaehlt."""
+    return status is not None and status not in CLOSED_STATUSES
+
+
+def _same_department(a: Optional[str], b: Optional[str]) -> bool:
+    return bool(a and b and a.strip().lower() == b.strip().lower())
+
+
+class CaseAssignmentEngine:
+    """Pflegt die Auslastungszaehler und waehlt Bearbeiter/innen aus."""
+
+    def __init__(self, redis_client):
+        self.redis = redis_client
+
+    def rebuild(self, session, tenant_id) -> int:
+        """
+        Baut alle Pools eines Mandanten aus der Datenbank neu auf.
+        Zwei Abfragen: aktive Fallbearbeiter/innen und offene Faelle je Bearbeiter/in.
+
+        Returns:
+            Anzahl der Fallbearbeiter/innen
+        """
+        users = session.query(
+            User.id, User.department, User.assignment_skills
+        ).filter(
+            User.tenant_id == tenant_id,
+            User.role == UserRole.FALLBEARBEITER,
+            User.is_active.is_(True),
+        ).all()
+
+        counts = dict(session.query(
+            Case.assignee_id, func.count(Case.id)
+        ).filter(
+            Case.tenant_id == tenant_id,
+            Case.assignee_id.isnot(None),
+            Case.status.notin_(CLOSED_STATUSES),
+        ).group_by(Case.assignee_id).all())
+
+        pools: dict[str, dict] = {"all": {}}
+        meta = {}
+        for user_id, department, skills in users:
+            uid = str(user_id)
+            score = counts.get(user_id, 0)
+            user_pools = ["all"] + [f"kategorie:{k}" for k in (skills or [])]
+            for pool in user_pools:
+                pools.setdefault(pool, {})[uid] = score
+            meta[uid] = json.dumps({"department": department, "pools": user_pools})
+
+        old_pools = set()
+        for raw in self.redis.hvals(_meta_key(tenant_id)):
+            old_pools.update(json.loads(raw)["pools"])
+
+        pipe = self.redis.pipeline(transaction=True)
+        for pool in old_pools | set(pools):
+            pipe.delete(_key(tenant_id, pool))
+        pipe.delete(_meta_key(tenant_id))
+        for pool, members in pools.items():
+            if members:
+                pipe.zadd(_key(tenant_id, pool), members)
+        if meta:
+            pipe.hset(_meta_key(tenant_id), mapping=meta)
+        pipe.execute()
+        return len(users)
+
+    def _ensure(self, session, tenant_id) -> None:
+        """Baut die Pools auf, falls sie (z.B. nach Redis-Neustart) fehlen."""
+        if not self.redis.exists(_meta_key(tenant_id)):
+            self.rebuild(session, tenant_id)
+
+    def adjust(self, tenant_id, user_id, delta: int) -> None:
+        """Aendert die Auslastung einer/eines Bearbeiter/in in allen ihren Pools."""
+        raw = self.redis.hget(_meta_key(tenant_id), str(user_id))
+        if raw is None:
+            return  # Kein/e aktive/r Fallbearbeiter/in
+        pipe = self.redis.pipeline(transaction=True)
+        for pool in json.loads(raw)["pools"]:
+            pipe.zincrby(_key(tenant_id, pool), delta, str(user_id))
+        pipe.execute()
+
+    def pick(
+        self,
+        session,
+        tenant_id,
+        kategorie: Optional[str] = None,
+        department: Optional[str] = None,
+        exclude_department: Optional[str] = None,
+        exclude_user_ids: tuple = (),
+    ) -> Optional[str]:
+        """
+        Waehlt die/den am geringsten ausgelastete/n geeignete/n Fallbearbeiter/in.
+
+        Args:
+            kategorie: Kategorie-Kompetenz (faellt auf alle zurueck, wenn niemand sie hat)
+            department: Nur Bearbeiter/innen dieser Abteilung
+            exclude_department: Interessenkonflikt - betroffene Abteilung ausschliessen
+            exclude_user_ids: Zusaetzlich auszuschliessende User-IDs
+
+        Returns:
+            User-ID als String oder None
+        """
+        self._ensure(session, tenant_id)
+        key = _key(tenant_id)
+        if kategorie and self.redis.exists(_key(tenant_id, f"kategorie:{kategorie}")):
+            key = _key(tenant_id, f"kategorie:{kategorie}")
+
+        excluded = {str(u) for u in exclude_user_ids}
+        offset = 0
+        while True:
+            candidates = self.redis.zrange(key, offset, offset + CANDIDATE_WINDOW - 1)
+            if not candidates:
+                return None
+            metas = self.redis.hmget(_meta_key(tenant_id), candidates)
+            for user_id, raw in zip(candidates, metas):
+                if raw is None or user_id in excluded:
+                    continue
+                user_department = json.loads(raw)["department"]
+                if exclude_department and _same_department(user_department, exclude_department):
+                    continue
+                if department and not _same_department(user_department, department):
+                    continue
+                return user_id
+            offset += CANDIDATE_WINDOW
+
+
+def track_workload(tenant_id, before: tuple, after: tuple) -> None:
+    """
+    Passt die Zaehler nach einer Aenderung an (aus Request-Handlern, nach dem Commit).
+
+    Args:
+        before / after: (assignee_id, status) vor bzw. nach der Aenderung
+
+    Redis-Fehler werden nur geloggt; der taegliche Neuaufbau korrigiert Abweichungen.
+    """
+    old_assignee, old_status = before
+    new_assignee, new_status = after
+    was_counted = old_assignee is not None and is_open(old_status)
+    is_counted = new_assignee is not None and is_open(new_status)
+    if was_counted and is_counted and old_assignee == new_assignee:
+        return
+
+    try:
+        engine = CaseAssignmentEngine(current_app.redis)
+        if was_counted:
+            engine.adjust(tenant_id, old_assignee, -1)
+        if is_counted:
+            engine.adjust(tenant_id, new_assignee, 1)
+    except Exception as e:
+        log.warning("case_workload_update_failed", error=str(e))
+
+
+def refresh_workload(session, tenant_id) -> None:
+    """Baut die Pools nach Benutzeraenderungen neu auf (Fehler werden nur geloggt)."""
+    try:
+        CaseAssignmentEngine(current_app.redis).rebuild(session, tenant_id)
+    except Exception as e:
+        log.warning("case_workload_rebuild_failed", error=str(e))
+
+
+@shared_task(name="app.services.case_assignment.rebuild_workloads")
+def rebuild_workloads():
+    """Celery-Task: Taeglicher Neuaufbau der Auslastungszaehler aller Mandanten."""
+    from app.models.tenant import Tenant
+
+    session = current_app.Session()
+    engine = CaseAssignmentEngine(current_app.redis)
+    try:
+        tenant_ids = [t for (t,) in session.query(Tenant.id).filter(Tenant.is_active.is_(True))]
+        for tenant_id in tenant_ids:
+            engine.rebuild(session, tenant_id)
+        log.info("case_workloads_rebuilt", tenants=len(tenant_ids))
+    except Exception as e:
+        log.error("case_workloads_rebuild_failed", error=str(e))
+    finally:
+        session.close()
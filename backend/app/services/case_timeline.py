@@ -0,0 +1,162 @@
+"""
+aitema|Hinweis - Fall-Timeline
+Seitenweises Laden der Ereignisse eines Falls.
+
+Keyset-Paginierung ueber (created_at, id) absteigend auf dem Index
+ix_case_events_case_created_id (case_id, created_at, id): jede Seite kostet
+unabhaengig vom Alter des Falls gleich viel. Filter auf Ereignistyp und
+Sichtbarkeit laufen in SQL; description_encrypted wird nur auf Anfrage geladen.
+
+Ereignisse abgeschlossener Faelle, die ins Cold Archive ausgelagert wurden,
+folgen nach den Ereignissen in der Datenbank (sie sind immer aelter, weil ein
+Fall nur vollstaendig archiviert wird). Gelesen werden sie erst, wenn die
+Datenbank die Seite nicht mehr fuellt; derselbe Cursor blaettert weiter.
+"""
+
+import base64
+import uuid
+from datetime import datetime
+from typing import Callable, Iterable, Optional, Sequence
+
+from sqlalchemy import tuple_
+from sqlalchemy.orm import undefer
+
+from app.models.case import CaseEvent
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Sichtbarkeitsstufen fuer den Timeline-Filter
+VISIBILITY_ALL = "all"
+VISIBILITY_EXTERNAL = "external"   # nur nicht-interne Ereignisse
+VISIBILITY_MELDER = "melder"       # nur fuer den Melder sichtbare Ereignisse
+VISIBILITIES = (VISIBILITY_ALL, VISIBILITY_EXTERNAL, VISIBILITY_MELDER)
+
+
+def encode_cursor(event: CaseEvent) -> str:
+    """Cursor fuer die Seite nach diesem Ereignis."""
+    raw = f"{event.created_at.isoformat()}|{event.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    """
+    Dekodiert einen Cursor.
+
+    Raises:
+        ValueError: Bei ungueltigem Cursor
+    """
+    try:
+        created_at, event_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), uuid.UUID(event_id)
+    except Exception as e:
+        raise ValueError("Ungueltiger Cursor") from e
+
+
+def _archived_event(row: dict) -> CaseEvent:
+    """Archivzeile (JSON-Werte, siehe cold_archive) als nicht gespeichertes CaseEvent."""
+    event = CaseEvent(
+        id=uuid.UUID(row["id"]),
+        case_id=uuid.UUID(row["case_id"]),
+        user_id=uuid.UUID(row["user_id"]) if row.get("user_id") else None,
+        event_type=row["event_type"],
+        old_status=row.get("old_status"),
+        new_status=row.get("new_status"),
+        description=row.get("description"),
+        description_encrypted=row.get("description_encrypted"),
+        metadata_json=row.get("metadata_json"),
+        is_internal=row.get("is_internal"),
+        is_visible_to_melder=row.get("is_visible_to_melder"),
+        created_at=datetime.fromisoformat(row["created_at"]),
+    )
+    event.archived = True
+    return event
+
+
+def archived_events(
+    rows: Iterable[dict],
+    event_types: Optional[Sequence[str]] = None,
+    visibility: str = VISIBILITY_ALL,
+    before: Optional[tuple[datetime, uuid.UUID]] = None,
+) -> list[CaseEvent]:
+    """Archivierte Ereignisse mit denselben Filtern wie in SQL, neueste zuerst."""
+    events = []
+    for event in map(_archived_event, rows):
+        if event_types and event.event_type not in event_types:
+            continue
+        if visibility == VISIBILITY_EXTERNAL and event.is_internal:
+            continue
+        if visibility == VISIBILITY_MELDER and not event.is_visible_to_melder:
+            continue
+        if before is not None and (event.created_at, event.id) >= before:
+            continue
+        events.append(event)
+    events.sort(key=lambda e: (e.created_at, e.id), reverse=True)
+    return events
+
+
+def get_case_timeline(
+    session,
+    case_id: uuid.UUID,
+    event_types: Optional[Sequence[str]] = None,
+    visibility: str = VISIBILITY_ALL,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    include_encrypted: bool = False,
+    read_archived: Optional[Callable[[], Iterable[dict]]] = None,
+) -> tuple[list[CaseEvent], Optional[str]]:
+    """
+    Laedt eine Seite der Fall-Timeline (neueste zuerst).
+
+    Args:
+        session: SQLAlchemy-Session
+        case_id: Fall-ID
+        event_types: Nur diese Ereignistypen (None = alle)
+        visibility: 'all', 'external' oder 'melder'
+        cursor: next_cursor der vorherigen Seite
+        limit: Seitengroesse (max. MAX_PAGE_SIZE)
+        include_encrypted: description_encrypted mitladen
+        read_archived: Liefert die archivierten Ereignisse des Falls
+            (z.B. cold_archive.read_archived_case_events); diese werden mit
+            archived = True angehaengt
+
+    Returns:
+        (Ereignisse, next_cursor oder None auf der letzten Seite)
+
+    Raises:
+        ValueError: Bei ungueltigem Cursor oder Sichtbarkeitsfilter
+    """
+    if visibility not in VISIBILITIES:
+        raise ValueError(f"Ungueltige Sichtbarkeit: {visibility}")
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    query = session.query(CaseEvent).filter(CaseEvent.case_id == case_id)
+
+    if event_types:
+        query = query.filter(CaseEvent.event_type.in_(list(event_types)))
+    if visibility == VISIBILITY_EXTERNAL:
+        query = query.filter(CaseEvent.is_internal.is_(False))
+    elif visibility == VISIBILITY_MELDER:
+        query = query.filter(CaseEvent.is_visible_to_melder.is_(True))
+
+    before = decode_cursor(cursor) if cursor else None
+    if before is not None:
+        query = query.filter(tuple_(CaseEvent.created_at, CaseEvent.id) < tuple_(*before))
+
+    if include_encrypted:
+        query = query.options(undefer(CaseEvent.description_encrypted))
+
+    events = query.order_by(
+        CaseEvent.created_at.desc(), CaseEvent.id.desc()
+    ).limit(limit + 1).all()
+
+    if len(events) <= limit and read_archived is not None:
+        events += archived_events(
+            read_archived(), event_types, visibility, before,
+        )[:limit + 1 - len(events)]
+
+    next_cursor = None
+    if len(events) > limit:
+        events = events[:limit]
+        next_cursor = encode_cursor(events[-1])
+    return events, next_cursor
@@ -0,0 +1,575 @@
+"""
+aitema|Hinweis - Cold Archive
+Lagert alte audit_logs- und case_events-Zeilen in unveraenderliche Segmente aus.
+
+Ein Segment ist eine NDJSON-Datei (eine Zeile pro Datensatz), mit zstd
+komprimiert und mit AES-256-GCM verschluesselt (Schluessel per HKDF je
+Mandant, Segment-ID als AAD). Dateien werden einmal geschrieben, danach
+schreibgeschuetzt; die SHA-256-Pruefsumme steht im Index (archive_segments)
+und wird bei jedem Lesen geprueft.
+
+archive_cold_data() laeuft taeglich und
+
+    - archiviert ganze Monats-Partitionen von audit_logs, die vollstaendig
+      aelter als COLD_ARCHIVE_AFTER_MONTHS sind (aufsteigend; ein Monat mit
+      noch nicht versiegelten Eintraegen haelt die Archivierung an, damit
+      archivierte Eintraege immer aelter als alle Eintraege in der Datenbank
+      sind),
+    - archiviert die Ereignisse von Faellen, die vor dieser Grenze
+      abgeschlossen oder eingestellt wurden,
+    - loescht bei AUDIT_RETENTION_MODE=drop Segmente, die vollstaendig aelter
+      als AUDIT_RETENTION_MONTHS sind.
+
+Segment-Index und Entfernen der Zeilen (DETACH/DROP der Partition bzw.
+DELETE der Ereignisse) laufen in einer Transaktion. Schlaegt sie fehl,
+bleiben hoechstens unreferenzierte Dateien zurueck, nie verlorene Zeilen.
+
+get_audit_trail() und die Fall-Timeline (read_archived_case_events()) lesen
+archivierte Zeilen transparent ueber read_archived(); geoeffnet werden nur Segmente, deren Zeitraum, Mandant und
+Ressourcen-IDs zur Anfrage passen. Audit-Segmente fuehren zusaetzlich den
+Bereich ihrer chain_seq im Index, damit verify_chain() archivierte
+Kettenglieder ueber ArchivedChain mitprueft.
+"""
+
+import enum
+import hashlib
+import heapq
+import itertools
+import json
+import os
+import uuid
+from datetime import date, datetime, timezone
+from typing import Callable, Iterable, Iterator, Optional
+
+from flask import current_app
+from celery import shared_task
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from sqlalchemy import delete, func, insert, or_, select
+from sqlalchemy.exc import SQLAlchemyError
+import structlog
+
+from app.models.archive import ArchiveSegment
+from app.models.audit_log import AuditLog
+from app.models.case import Case, CaseEvent, CaseStatus
+from app.services.audit_chain import GLOBAL_CHAIN
+from app.services.audit_partitions import (
+    AUDIT_RETENTION_MODE,
+    AUDIT_RETENTION_MONTHS,
+    add_months,
+    existing_partitions,
+    maintenance_targets,
+    month_start,
+    retire_partition,
+)
+from app.services.encryption import EncryptionService
+
+log = structlog.get_logger()
+
+AUDIT_KIND = "audit_logs"
+CASE_EVENTS_KIND = "case_events"
+
+COLD_ARCHIVE_AFTER_MONTHS = int(os.environ.get("COLD_ARCHIVE_AFTER_MONTHS", "12"))
+SEGMENT_MAX_ROWS = 50_000
+SEGMENT_ZSTD_LEVEL = 10
+DELETE_BATCH_SIZE = 5_000
+
+SEGMENT_MAGIC = b"AHSEG1"
+_NONCE_SIZE = 12
+
+CLOSED_CASE_STATUSES = (CaseStatus.ABGESCHLOSSEN, CaseStatus.EINGESTELLT)
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError as e:  # pragma: no cover - abhaengig von der Installation
+        raise RuntimeError("Cold Archive benoetigt zstandard") from e
+    return zstandard
+
+
+# ----------------------------------------------------------
+# Segmentformat
+# ----------------------------------------------------------
+
+def segment_key(encryption: EncryptionService, tenant_id) -> bytes:
+    """AES-Schluessel fuer die Segmente eines Mandanten (None = mandantenlos)."""
+    return encryption.derive_search_key(f"cold-archive:{tenant_id or 'global'}")
+
+
+def _json_value(value):
+    if value is None or isinstance(value, (str, int, float, bool, dict, list)):
+        return value
+    if isinstance(value, datetime):
+        return value.astimezone(timezone.utc).isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    return str(value)  # UUID, INET
+
+
+def encode_segment(rows: Iterable[dict], key: bytes, segment_id: uuid.UUID) -> bytes:
+    """Zeilen -> NDJSON -> zstd -> AES-GCM (Magic + Nonce + Chiffrat)."""
+    ndjson = b"".join(
+        json.dumps(
+            {k: _json_value(v) for k, v in row.items()},
+            ensure_ascii=False, separators=(",", ":"), sort_keys=True,
+        ).encode("utf-8") + b"\n"
+        for row in rows
+    )
+    compressed = _zstd().ZstdCompressor(level=SEGMENT_ZSTD_LEVEL).compress(ndjson)
+    nonce = os.urandom(_NONCE_SIZE)
+    return SEGMENT_MAGIC + nonce + AESGCM(key).encrypt(nonce, compressed, segment_id.bytes)
+
+
+def decode_segment(data: bytes, key: bytes, segment_id: uuid.UUID) -> list[dict]:
+    """
+    Umkehrung von encode_segment.
+
+    Raises:
+        ValueError: Bei fremdem Dateiformat
+        cryptography.exceptions.InvalidTag: Bei falschem Schluessel oder
+            veraendertem Inhalt
+    """
+    if not data.startswith(SEGMENT_MAGIC):
+        raise ValueError("Kein Archiv-Segment")
+    offset = len(SEGMENT_MAGIC)
+    nonce = data[offset:offset + _NONCE_SIZE]
+    compressed = AESGCM(key).decrypt(nonce, data[offset + _NONCE_SIZE:], segment_id.bytes)
+    ndjson = _zstd().ZstdDecompressor().decompress(compressed)
+    return [json.loads(line) for line in ndjson.splitlines() if line]
+
+
+def segment_path(kind: str, tenant_id, month: date, segment_id: uuid.UUID) -> str:
+    """Ablagepfad relativ zu ARCHIVE_FOLDER."""
+    return os.path.join(
+        kind, str(tenant_id or "global"), f"{month.year:04d}-{month.month:02d}",
+        f"{segment_id}.ndjson.zst.enc",
+    )
+
+
+def _write_immutable(folder: str, relative: str, data: bytes) -> None:
+    """Schreibt atomar (temp + rename) und setzt die Datei schreibgeschuetzt."""
+    target = os.path.join(folder, relative)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    temp = f"{target}.tmp"
+    with open(temp, "wb") as fh:
+        fh.write(data)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(temp, target)
+    os.chmod(target, 0o440)
+
+
+def write_segments(folder: str, kind: str, tenant_id, rows: Iterable[dict],
+                   encryption: EncryptionService, resource_column: str,
+                   max_rows: int = SEGMENT_MAX_ROWS) -> list[dict]:
+    """
+    Schreibt Zeilen (aufsteigend nach created_at) in Segmente zu hoechstens
+    max_rows Zeilen.
+
+    Returns:
+        Werte fuer archive_segments, je Segment eine Zeile
+    """
+    key = segment_key(encryption, tenant_id)
+    iterator = iter(rows)
+    segments = []
+    while True:
+        chunk = [dict(row) for row in itertools.islice(iterator, max_rows)]
+        if not chunk:
+            return segments
+        segment_id = uuid.uuid4()
+        time_from = chunk[0]["created_at"]
+        seqs = [row["chain_seq"] for row in chunk if row.get("chain_seq") is not None]
+        relative = segment_path(kind, tenant_id, month_start(time_from), segment_id)
+        data = encode_segment(chunk, key, segment_id)
+        _write_immutable(folder, relative, data)
+        segments.append({
+            "id": segment_id,
+            "kind": kind,
+            "tenant_id": tenant_id,
+            "time_from": time_from,
+            "time_to": chunk[-1]["created_at"],
+            "resource_ids": sorted({
+                str(row[resource_column]) for row in chunk if row.get(resource_column)
+            }),
+            "seq_from": min(seqs, default=None),
+            "seq_to": max(seqs, default=None),
+            "path": relative,
+            "row_count": len(chunk),
+            "size_bytes": len(data),
+            "sha256": hashlib.sha256(data).hexdigest(),
+        })
+
+
+# ----------------------------------------------------------
+# Archivierung
+# ----------------------------------------------------------
+
+def cold_cutoff(now: datetime, after_months: int = COLD_ARCHIVE_AFTER_MONTHS) -> datetime:
+    """Erster Zeitpunkt, der noch in der Datenbank bleibt (Monatsanfang, UTC)."""
+    month = add_months(month_start(now), -after_months)
+    return datetime(month.year, month.month, 1, tzinfo=timezone.utc)
+
+
+def _month_bounds(month: date) -> tuple[datetime, datetime]:
+    end = add_months(month, 1)
+    return (
+        datetime(month.year, month.month, 1, tzinfo=timezone.utc),
+        datetime(end.year, end.month, 1, tzinfo=timezone.utc),
+    )
+
+
+def archive_audit_month(engine, folder: str, encryption: EncryptionService, month: date,
+                        partition: str, schema: Optional[str] = None) -> Optional[list[dict]]:
+    """
+    Archiviert eine Monats-Partition und entfernt sie aus der Datenbank.
+
+    Returns:
+        Segmente, oder None wenn der Monat noch unversiegelte Eintraege hat
+    """
+    start, end = _month_bounds(month)
+    in_month = (AuditLog.created_at >= start, AuditLog.created_at < end)
+    table = AuditLog.__table__
+
+    with engine.connect() as conn:
+        unsealed = conn.execute(
+            select(table.c.id).where(*in_month, table.c.chain_hash.is_(None)).limit(1)
+        ).first()
+        if unsealed is not None:
+            log.warning("cold_archive_month_unsealed", partition=partition)
+            return None
+        tenants = conn.execute(
+            select(table.c.tenant_id).where(*in_month).distinct()
+        ).scalars().all()
+
+        segments = []
+        for tenant_id in tenants:
+            tenant_clause = (
+                table.c.tenant_id.is_(None) if tenant_id is None
+                else table.c.tenant_id == tenant_id
+            )
+            rows = conn.execute(
+                select(table)
+                .where(*in_month, tenant_clause)
+                .order_by(table.c.created_at, table.c.id)
+                .execution_options(yield_per=SEGMENT_MAX_ROWS)
+            ).mappings()
+            segments += write_segments(folder, AUDIT_KIND, tenant_id, rows, encryption, "resource_id")
+
+    with engine.begin() as conn:
+        if segments:
+            conn.execute(insert(ArchiveSegment.__table__), segments)
+        retire_partition(conn, partition, schema, mode="drop")
+    log.info(
+        "cold_archive_audit_month", partition=partition, segments=len(segments),
+        rows=sum(s["row_count"] for s in segments),
+    )
+    return segments
+
+
+def archive_audit_logs(engine, folder: str, encryption: EncryptionService,
+                       now: Optional[datetime] = None, schema: Optional[str] = None) -> list[str]:
+    """
+    Archiviert alle Monats-Partitionen vor cold_cutoff, aeltester Monat zuerst.
+
+    Returns:
+        Namen der archivierten Partitionen
+    """
+    cutoff = month_start(cold_cutoff(now or datetime.now(timezone.utc)))
+    with engine.connect() as conn:
+        partitions = existing_partitions(conn, schema)
+
+    archived = []
+    for month in sorted(partitions):
+        if add_months(month, 1) > cutoff:
+            break
+        if archive_audit_month(engine, folder, encryption, month, partitions[month], schema) is None:
+            break
+        archived.append(partitions[month])
+    return archived
+
+
+def _tracking(rows, ids: list):
+    """Reicht Zeilen durch und merkt sich ihre IDs (fuer das spaetere DELETE)."""
+    for row in rows:
+        ids.append(row["id"])
+        yield row
+
+
+def archive_case_events(engine, folder: str, encryption: EncryptionService,
+                        now: Optional[datetime] = None) -> int:
+    """
+    Archiviert die Ereignisse von Faellen, die vor cold_cutoff abgeschlossen
+    oder eingestellt wurden.
+
+    Returns:
+        Anzahl archivierter Ereignisse
+    """
+    cutoff = cold_cutoff(now or datetime.now(timezone.utc))
+    table = CaseEvent.__table__
+    closed = (Case.closed_at < cutoff, Case.status.in_(CLOSED_CASE_STATUSES))
+
+    with engine.connect() as conn:
+        tenants = conn.execute(
+            select(Case.tenant_id).join(table, table.c.case_id == Case.id).where(*closed).distinct()
+        ).scalars().all()
+
+    total = 0
+    for tenant_id in tenants:
+        with engine.connect() as conn:
+            rows = conn.execute(
+                select(table)
+                .join(Case, table.c.case_id == Case.id)
+                .where(*closed, Case.tenant_id == tenant_id)
+                .order_by(table.c.created_at, table.c.id)
+                .execution_options(yield_per=SEGMENT_MAX_ROWS)
+            ).mappings()
+            event_ids = []
+            segments = write_segments(
+                folder, CASE_EVENTS_KIND, tenant_id, _tracking(rows, event_ids),
+                encryption, "case_id",
+            )
+
+        with engine.begin() as conn:
+            conn.execute(insert(ArchiveSegment.__table__), segments)
+            for i in range(0, len(event_ids), DELETE_BATCH_SIZE):
+                conn.execute(delete(table).where(table.c.id.in_(event_ids[i:i + DELETE_BATCH_SIZE])))
+        total += len(event_ids)
+        log.info(
+            "cold_archive_case_events", tenant_id=str(tenant_id),
+            segments=len(segments), rows=len(event_ids),
+        )
+    return total
+
+
+def prune_segments(engine, folder: str, now: Optional[datetime] = None,
+                   retention_months: int = AUDIT_RETENTION_MONTHS) -> int:
+    """
+    Loescht Segmente, die vollstaendig vor dem Aufbewahrungszeitraum liegen.
+
+    Returns:
+        Anzahl geloeschter Segmente
+    """
+    if retention_months <= 0:
+        return 0
+    cutoff = cold_cutoff(now or datetime.now(timezone.utc), retention_months)
+    with engine.begin() as conn:
+        expired = conn.execute(
+            delete(ArchiveSegment.__table__)
+            .where(ArchiveSegment.time_to < cutoff)
+            .returning(ArchiveSegment.path)
+        ).scalars().all()
+    for relative in expired:
+        try:
+            os.remove(os.path.join(folder, relative))
+        except FileNotFoundError:
+            pass
+    if expired:
+        log.info("cold_archive_segments_pruned", count=len(expired))
+    return len(expired)
+
+
+# ----------------------------------------------------------
+# Lesen
+# ----------------------------------------------------------
+
+def matching_segments(session, kind: str, tenant_id, start: datetime, end: datetime,
+                      resource_id: Optional[str] = None) -> list[ArchiveSegment]:
+    """Segmente, die den Zeitraum ueberlappen (und die Ressource enthalten)."""
+    query = session.query(ArchiveSegment).filter(
+        ArchiveSegment.kind == kind,
+        ArchiveSegment.tenant_id == tenant_id,
+        ArchiveSegment.time_from <= end,
+        ArchiveSegment.time_to >= start,
+    )
+    if resource_id:
+        query = query.filter(ArchiveSegment.resource_ids.contains([str(resource_id)]))
+    return query.order_by(ArchiveSegment.time_from).all()
+
+
+def count_archived(session, kind: str, tenant_id, start: datetime,
+                   end: datetime) -> tuple[int, bool]:
+    """
+    Archivierte Zeilen im Zeitraum laut Index, ohne Segmente zu oeffnen.
+
+    Returns:
+        (Anzahl, exakt) - nicht exakt, wenn ein Segment ueber eine Grenze
+        des Zeitraums reicht (die Anzahl ist dann eine Obergrenze)
+    """
+    count, partial = session.execute(
+        select(
+            func.coalesce(func.sum(ArchiveSegment.row_count), 0),
+            func.count().filter(
+                or_(ArchiveSegment.time_from < start, ArchiveSegment.time_to > end)
+            ),
+        ).where(
+            ArchiveSegment.kind == kind,
+            ArchiveSegment.tenant_id == tenant_id,
+            ArchiveSegment.time_from <= end,
+            ArchiveSegment.time_to >= start,
+        )
+    ).one()
+    return int(count), partial == 0
+
+
+def read_segment(segment, folder: str, encryption: EncryptionService) -> list[dict]:
+    """
+    Liest und entschluesselt ein Segment.
+
+    Raises:
+        ValueError: Wenn die Datei nicht zur Pruefsumme im Index passt
+    """
+    with open(os.path.join(folder, segment.path), "rb") as fh:
+        data = fh.read()
+    if hashlib.sha256(data).hexdigest() != segment.sha256:
+        log.critical("cold_archive_segment_tampered", segment_id=str(segment.id), path=segment.path)
+        raise ValueError(f"Archiv-Segment {segment.id} wurde veraendert")
+    return decode_segment(data, segment_key(encryption, segment.tenant_id), segment.id)
+
+
+def filter_rows(rows: Iterable[dict], start: datetime, end: datetime,
+                predicate: Optional[Callable[[dict], bool]] = None) -> list[dict]:
+    """Zeilen im Zeitraum [start, end], neueste zuerst (naive Grenzen gelten als UTC)."""
+    start = start if start.tzinfo else start.replace(tzinfo=timezone.utc)
+    end = end if end.tzinfo else end.replace(tzinfo=timezone.utc)
+    matched = []
+    for row in rows:
+        created_at = datetime.fromisoformat(row["created_at"])
+        if start <= created_at <= end and (predicate is None or predicate(row)):
+            matched.append(row)
+    matched.sort(key=lambda row: (row["created_at"], row["id"]), reverse=True)
+    return matched
+
+
+def read_archived(session, kind: str, tenant_id, start: datetime, end: datetime,
+                  resource_id: Optional[str] = None,
+                  predicate: Optional[Callable[[dict], bool]] = None) -> list[dict]:
+    """Archivierte Zeilen eines Mandanten im Zeitraum, neueste zuerst."""
+    segments = matching_segments(session, kind, tenant_id, start, end, resource_id)
+    if not segments:
+        return []
+    folder = current_app.config["ARCHIVE_FOLDER"]
+    encryption = EncryptionService(current_app.config["ENCRYPTION_MASTER_KEY"])
+    rows = []
+    for segment in segments:
+        rows += read_segment(segment, folder, encryption)
+    return filter_rows(rows, start, end, predicate)
+
+
+def read_archived_case_events(session, case: Case) -> list[dict]:
+    """Archivierte Ereignisse eines Falls, neueste zuerst."""
+    start = datetime.min.replace(tzinfo=timezone.utc)
+    end = datetime.max.replace(tzinfo=timezone.utc)
+    case_id = str(case.id)
+    return read_archived(
+        session, CASE_EVENTS_KIND, case.tenant_id, start, end,
+        resource_id=case_id, predicate=lambda row: row["case_id"] == case_id,
+    )
+
+
+def merge_chain_rows(segments: Iterable, read: Callable[[object], list[dict]],
+                     seq_lo: int, seq_hi: int) -> Iterator[dict]:
+    """
+    Glieder aus Segmenten (aufsteigend nach seq_from) in chain_seq-Reihenfolge.
+
+    Segmente sind nach created_at geschnitten, ihre chain_seq-Bereiche koennen
+    sich an den Raendern ueberlappen. Dekodiert wird ein Segment nach dem
+    anderen; gepuffert wird nur, was das naechste Segment noch ueberholen kann.
+    """
+    heap: list = []
+    counter = itertools.count()
+    for segment in segments:
+        while heap and heap[0][0] < segment.seq_from:
+            yield heapq.heappop(heap)[2]
+        for row in read(segment):
+            seq = row.get("chain_seq")
+            if seq is not None and seq_lo <= seq <= seq_hi:
+                heapq.heappush(heap, (seq, next(counter), row))
+    while heap:
+        yield heapq.heappop(heap)[2]
+
+
+class ArchivedChain:
+    """
+    Archivierte Glieder der Audit-Hashketten fuer verify_chain().
+
+    Segmentzeilen enthalten dieselben Werte wie canonical_entry() (UUID/Enum
+    als String, Zeit in UTC), die gespeicherten chain_hash bleiben also
+    pruefbar. Ein Segment, das nicht gelesen werden kann, wird uebersprungen:
+    seine Glieder meldet die Pruefung als fehlend.
+    """
+
+    def __init__(self, conn, folder: str, encryption: EncryptionService):
+        self.conn = conn
+        self.folder = folder
+        self.encryption = encryption
+
+    @staticmethod
+    def _in_chain(key: str):
+        table = ArchiveSegment.__table__
+        tenant_clause = (
+            table.c.tenant_id.is_(None) if key == GLOBAL_CHAIN
+            else table.c.tenant_id == uuid.UUID(key)
+        )
+        return table.c.kind == AUDIT_KIND, tenant_clause, table.c.seq_from.isnot(None)
+
+    def seq_bounds(self, key: str, start: Optional[datetime], end: Optional[datetime]):
+        """Kleinste und groesste archivierte chain_seq der Segmente im Zeitraum."""
+        table = ArchiveSegment.__table__
+        stmt = select(func.min(table.c.seq_from), func.max(table.c.seq_to)).where(
+            *self._in_chain(key),
+        )
+        if start is not None:
+            stmt = stmt.where(table.c.time_to >= start)
+        if end is not None:
+            stmt = stmt.where(table.c.time_from <= end)
+        return self.conn.execute(stmt).one()
+
+    def rows(self, key: str, seq_lo: int, seq_hi: int) -> Iterator[dict]:
+        """Archivierte Glieder mit seq_lo <= chain_seq <= seq_hi, aufsteigend."""
+        table = ArchiveSegment.__table__
+        segments = self.conn.execute(
+            select(table)
+            .where(*self._in_chain(key), table.c.seq_to >= seq_lo, table.c.seq_from <= seq_hi)
+            .order_by(table.c.seq_from)
+        ).all()
+        return merge_chain_rows(segments, self._read, seq_lo, seq_hi)
+
+    def _read(self, segment) -> list[dict]:
+        try:
+            return read_segment(segment, self.folder, self.encryption)
+        except (OSError, ValueError, InvalidTag) as e:
+            log.critical("cold_archive_segment_unreadable", segment_id=str(segment.id),
+                         error=str(e)[:200])
+            return []
+
+
+# ----------------------------------------------------------
+# Celery
+# ----------------------------------------------------------
+
+@shared_task(name="app.services.cold_archive.archive_cold_data")
+def archive_cold_data():
+    """Celery-Task: Alte Audit-Eintraege und Fallereignisse archivieren."""
+    folder = current_app.config["ARCHIVE_FOLDER"]
+    encryption = EncryptionService(current_app.config["ENCRYPTION_MASTER_KEY"])
+    session = current_app.Session()
+    try:
+        targets = maintenance_targets(current_app, session)
+    finally:
+        session.close()
+
+    summary = {}
+    for name, engine, schema in targets:
+        try:
+            summary[name] = {
+                "audit_partitions": archive_audit_logs(engine, folder, encryption, schema=schema),
+                "case_events": archive_case_events(engine, folder, encryption),
+                "pruned": (
+                    prune_segments(engine, folder) if AUDIT_RETENTION_MODE == "drop" else 0
+                ),
+            }
+        except (SQLAlchemyError, OSError) as e:
+            log.error("cold_archive_failed", target=name, error=str(e)[:200])
+            summary[name] = {"error": str(e)[:200]}
+    return summary
@@ -0,0 +1,328 @@
+"""
+aitema|Hinweis - Fristen-Scheduler
+Ereignisgesteuerte Fristenueberwachung ueber ein Redis Sorted Set.
+
+Statt stuendlich alle offenen Meldungen zu laden, wird beim Anlegen oder
+Aendern einer Meldung / eines Falls fuer jede kommende Schwellwert-
+Ueberschreitung (warnung, kritisch, ueberfaellig) ein Eintrag mit dem
+Zeitpunkt der Ueberschreitung als Score abgelegt. Der Dispatcher-Task holt
+pro Tick nur die faelligen Eintraege ab.
+
+Eintrag (Member): "<kind>:<id>:<deadline_type>:<warnstufe>"
+    kind:          'hinweis' | 'case'
+    deadline_type: 'ack' | 'resolve'
+    warnstufe:     'warnung' | 'kritisch' | 'ueberfaellig'
+"""
+
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from flask import current_app
+from celery import shared_task
+from sqlalchemy import update
+import structlog
+
+from app.services.deadline_service import WARNING_DAYS
+from app.services.hinschg_compliance import HinSchGComplianceService
+
+log = structlog.get_logger()
+
+SCHEDULE_KEY = "deadline_schedule"
+DEADLINE_TYPES = ("ack", "resolve")
+WARNSTUFEN = ("warnung", "kritisch", "ueberfaellig")
+WARNSTUFE_RANG = {w: i for i, w in enumerate(WARNSTUFEN)}
+
+# Max. Eintraege pro Abholung; der Dispatcher holt so lange, bis weniger kommen
+DISPATCH_BATCH_SIZE = 500
+
+# Atomares "ZPOPBYSCORE": mehrere Dispatcher koennen parallel laufen
+_POP_DUE_SCRIPT = """
+local items = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+if #items > 0 then
+    redis.call('ZREM', KEYS[1], unpack(items))
+end
+return items
+"""
+
+
+def hinweis_thresholds(frist: datetime) -> list[tuple[str, datetime]]:
+    """
+    Zeitpunkte, zu denen eine Meldungsfrist die Warnstufen erreicht.
+    Entspricht HinSchGComplianceService.pruefe_frist_status() (ganze Tage, abgerundet).
+    """
+    return [
+        ("warnung", frist - timedelta(days=HinSchGComplianceService.WARNUNG_TAGE + 1)),
+        ("kritisch", frist - timedelta(days=HinSchGComplianceService.KRITISCH_TAGE + 1)),
+        ("ueberfaellig", frist),
+    ]
+
+
+def case_thresholds(frist: datetime) -> list[tuple[str, datetime]]:
+    """
+    Zeitpunkte, zu denen eine Fallfrist gelb bzw. rot wird.
+    Entspricht deadline_service.get_case_deadline_status().
+    """
+    return [
+        ("warnung", frist - timedelta(days=WARNING_DAYS + 1)),
+        ("ueberfaellig", frist),
+    ]
+
+
+def notified_warnstufe(obj, deadline_type: Optional[str]) -> Optional[str]:
+    """Bereits benachrichtigte Warnstufe eines Objekts fuer die angegebene Frist."""
+    if deadline_type is None or obj.notified_deadline_type != deadline_type:
+        return None
+    return obj.notified_warnstufe
+
+
+def is_escalation(warnstufe: str, bisher: Optional[str]) -> bool:
+    """True wenn warnstufe hoeher ist als die bereits benachrichtigte Stufe."""
+    return WARNSTUFE_RANG[warnstufe] > WARNSTUFE_RANG.get(bisher, -1)
+
+
+class DeadlineScheduler:
+    """Plant Schwellwert-Ueberschreitungen in Redis und gibt faellige heraus."""
+
+    def __init__(self, redis_client):
+        self.redis = redis_client
+        self._pop_due = redis_client.register_script(_POP_DUE_SCRIPT)
+
+    @staticmethod
+    def _member(kind: str, object_id, deadline_type: str, warnstufe: str) -> str:
+        return f"{kind}:{object_id}:{deadline_type}:{warnstufe}"
+
+    def schedule(
+        self,
+        kind: str,
+        object_id,
+        deadline_type: Optional[str],
+        frist: Optional[datetime],
+        include_reached: bool = True,
+        notified: Optional[str] = None,
+        now: Optional[datetime] = None,
+    ) -> None:
+        """
+        Ersetzt alle geplanten Eintraege eines Objekts.
+
+        Args:
+            kind: 'hinweis' oder 'case'
+            object_id: ID des Objekts
+            deadline_type: Naechste offene Frist ('ack'/'resolve') oder None
+            frist: Fristdatum (next_deadline_at) oder None wenn erledigt
+            include_reached: Bereits erreichte Warnstufe sofort faellig stellen
+                (nur die hoechste, nicht alle bereits ueberschrittenen)
+            notified: Bereits benachrichtigte Warnstufe dieser Frist; erreichte
+                Stufen bis einschliesslich dieser werden nicht erneut geplant
+            now: Referenzzeitpunkt (Default: jetzt, UTC)
+        """
+        now = now or datetime.now(timezone.utc)
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.zrem(SCHEDULE_KEY, *[
+            self._member(kind, object_id, t, w)
+            for t in DEADLINE_TYPES for w in WARNSTUFEN
+        ])
+
+        if frist is not None and deadline_type is not None:
+            thresholds = hinweis_thresholds(frist) if kind == "hinweis" else case_thresholds(frist)
+            entries = {}
+            reached = None
+            for warnstufe, crossing in thresholds:
+                if crossing > now:
+                    entries[self._member(kind, object_id, deadline_type, warnstufe)] = (
+                        crossing.timestamp()
+                    )
+                else:
+                    reached = warnstufe
+            if include_reached and reached and is_escalation(reached, notified):
+                entries[self._member(kind, object_id, deadline_type, reached)] = now.timestamp()
+            if entries:
+                pipe.zadd(SCHEDULE_KEY, entries)
+
+        pipe.execute()
+
+    def schedule_hinweis(self, hinweis, include_reached: bool = True) -> None:
+        """Plant die Warnstufen der naechsten offenen Frist einer Meldung."""
+        self.schedule(
+            "hinweis", hinweis.id, hinweis.next_deadline_type, hinweis.next_deadline_at,
+            include_reached=include_reached,
+            notified=notified_warnstufe(hinweis, hinweis.next_deadline_type),
+        )
+
+    def schedule_case(self, case, include_reached: bool = True) -> None:
+        """Plant die Warnstufen der naechsten offenen Frist eines Falls."""
+        self.schedule(
+            "case", case.id, case.next_deadline_type, case.next_deadline_at,
+            include_reached=include_reached,
+            notified=notified_warnstufe(case, case.next_deadline_type),
+        )
+
+    def pop_due(self, now: Optional[datetime] = None, limit: int = DISPATCH_BATCH_SIZE) -> list[tuple]:
+        """
+        Entnimmt faellige Eintraege atomar.
+
+        Returns:
+            Liste von (kind, uuid, deadline_type, warnstufe)
+        """
+        now = now or datetime.now(timezone.utc)
+        members = self._pop_due(keys=[SCHEDULE_KEY], args=[now.timestamp(), limit])
+        result = []
+        for member in members:
+            if isinstance(member, bytes):
+                member = member.decode()
+            kind, object_id, deadline_type, warnstufe = member.split(":")
+            result.append((kind, uuid.UUID(object_id), deadline_type, warnstufe))
+        return result
+
+    def requeue(self, due: list[tuple], now: Optional[datetime] = None) -> None:
+        """
+        Stellt entnommene Eintraege wieder ein (sofort faellig), z.B. wenn die
+        Verarbeitung vor dem Commit scheitert. Inzwischen neu geplante Eintraege
+        bleiben unveraendert; veraltete verwirft der naechste Dispatch.
+        """
+        if not due:
+            return
+        score = (now or datetime.now(timezone.utc)).timestamp()
+        self.redis.zadd(
+            SCHEDULE_KEY, {self._member(*entry): score for entry in due}, nx=True,
+        )
+
+
+def schedule_deadlines(hinweis=None, case=None) -> None:
+    """
+    Plant Fristen nach einer Aenderung (aus Request-Handlern, nach dem Commit).
+    Redis-Fehler werden nur geloggt; der taegliche Abgleich stellt den Plan wieder her.
+    """
+    try:
+        scheduler = DeadlineScheduler(current_app.redis)
+        if hinweis is not None:
+            scheduler.schedule_hinweis(hinweis)
+        if case is not None:
+            scheduler.schedule_case(case)
+    except Exception as e:
+        log.warning("deadline_schedule_failed", error=str(e))
+
+
+@shared_task(name="app.services.deadline_scheduler.dispatch_due_deadlines")
+def dispatch_due_deadlines():
+    """
+    Celery-Task: Verarbeitet faellige Schwellwert-Ueberschreitungen.
+    Wird minuetlich ausgefuehrt; Aufwand pro Tick ~ Anzahl faelliger Eintraege.
+    Benachrichtigt nur, wenn die Warnstufe ueber der zuletzt gemeldeten liegt
+    (notified_deadline_type/notified_warnstufe). Scheitert ein Batch vor dem
+    Commit, wird er wieder eingeplant und im naechsten Tick erneut versucht.
+    """
+    from sqlalchemy.orm import selectinload
+
+    from app.models.case import Case
+    from app.models.hinweis import Hinweis
+    from app.services.deadline_service import get_case_deadline_status
+    from app.services.notification import NotificationService
+
+    scheduler = DeadlineScheduler(current_app.redis)
+    notification = NotificationService()
+    session = current_app.Session()
+    dispatched = 0
+    stale = 0
+    duplicate = 0
+    due: list[tuple] = []
+
+    try:
+        while True:
+            due = scheduler.pop_due()
+            if not due:
+                break
+
+            hinweis_ids = {d[1] for d in due if d[0] == "hinweis"}
+            case_ids = {d[1] for d in due if d[0] == "case"}
+            # Empfaenger mitladen (sonst eine Abfrage pro Objekt)
+            hinweise = {
+                h.id: h for h in session.query(Hinweis)
+                .options(selectinload(Hinweis.tenant))
+                .filter(Hinweis.id.in_(hinweis_ids))
+            } if hinweis_ids else {}
+            cases = {
+                c.id: c for c in session.query(Case)
+                .options(selectinload(Case.assignee), selectinload(Case.created_by))
+                .filter(Case.id.in_(case_ids))
+            } if case_ids else {}
+
+            # Hoechste Stufe zuerst: mehrere gleichzeitig faellige Stufen eines
+            # Objekts ergeben nur eine Benachrichtigung
+            due.sort(key=lambda d: WARNSTUFE_RANG[d[3]], reverse=True)
+            benachrichtigt: dict[tuple, str] = {}
+
+            for kind, object_id, deadline_type, warnstufe in due:
+                obj = hinweise.get(object_id) if kind == "hinweis" else cases.get(object_id)
+                # Veraltete Eintraege (Frist inzwischen erledigt/geaendert) verwerfen
+                if obj is None or obj.next_deadline_type != deadline_type:
+                    stale += 1
+                    continue
+
+                # Nur Stufenwechsel melden (gleiche oder niedrigere Stufe bereits versendet)
+                bisher = benachrichtigt.get((kind, object_id)) or notified_warnstufe(obj, deadline_type)
+                if not is_escalation(warnstufe, bisher):
+                    duplicate += 1
+                    continue
+
+                if kind == "hinweis":
+                    frist = HinSchGComplianceService.pruefe_frist_status(
+                        frist_name=(
+                            "Eingangsbestaetigung (7 Tage)" if deadline_type == "ack"
+                            else "Rueckmeldung (3 Monate)"
+                        ),
+                        frist_datum=obj.next_deadline_at,
+                    )
+                    notification.send_frist_warnung(
+                        hinweis=obj, frist=frist, warnstufe=warnstufe, session=session,
+                    )
+                else:
+                    notification.send_case_frist_warnung(
+                        case=obj,
+                        deadline_status=get_case_deadline_status(obj),
+                        warnstufe=warnstufe,
+                        session=session,
+                    )
+                benachrichtigt[(kind, object_id)] = warnstufe
+                dispatched += 1
+
+            # Neue Warnstufen gesammelt schreiben (ein UPDATE-executemany pro Tabelle)
+            for kind, model in (("hinweis", Hinweis), ("case", Case)):
+                rows = [
+                    {
+                        "id": object_id,
+                        "notified_deadline_type": (
+                            hinweise if kind == "hinweis" else cases
+                        )[object_id].next_deadline_type,
+                        "notified_warnstufe": warnstufe,
+                    }
+                    for (k, object_id), warnstufe in benachrichtigt.items() if k == kind
+                ]
+                if rows:
+                    session.execute(update(model), rows)
+
+            # Warn-E-Mails (Outbox) und Warnstufen in einer Transaktion
+            session.commit()
+            batch_len, due = len(due), []
+
+            if batch_len < DISPATCH_BATCH_SIZE:
+                break
+
+        if dispatched or stale or duplicate:
+            log.info(
+                "deadline_dispatch_completed",
+                dispatched=dispatched, stale=stale, duplicate=duplicate,
+            )
+
+    except Exception as e:
+        session.rollback()
+        log.error("deadline_dispatch_failed", error=str(e), requeued=len(due))
+        try:
+            scheduler.requeue(due)
+        except Exception as requeue_error:
+            # Der taegliche Abgleich (check_fristen_task) plant die Eintraege neu
+            log.error("deadline_requeue_failed", error=str(requeue_error), count=len(due))
+    finally:
+        session.close()
+
+    return {"dispatched": dispatched, "stale": stale, "duplicate": duplicate}
@@ -11,12 +11,19 @@ Ampel:
   - gelb   (yellow): 0-14 Tage verbleibend
   - rot    (red):    ueberfaellig
   - done:            Fall abgeschlossen (resolved_at gesetzt)
+
+Die Ampel wird in zwei Varianten berechnet:
+  - get_case_deadline_status(): Python, pro Case-Objekt (Detail-Responses)
+  - deadline_status_expression(): SQL CASE-Ausdruck fuer Aggregationen,
+    z.B. get_deadline_summary_sql() als ein einziges GROUP BY
 """
 
+import uuid
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 from dataclasses import dataclass, field
 
+from sqlalchemy import case as sql_case, func, literal
 import structlog
 
 log = structlog.get_logger()
@@ -42,6 +49,30 @@ class DeadlineStatus:
     resolve_deadline: str              # ISO-Datum Abschluss-Frist
 
 
+def compute_next_deadline(
+    created_at: Optional[datetime],
+    acknowledged_at: Optional[datetime],
+    resolved_at: Optional[datetime],
+) -> tuple[Optional[datetime], Optional[str]]:
+    """
+    Bestimmt die naechste offene Frist eines Falls.
+
+    Grundlage fuer die materialisierten Spalten Case.next_deadline_at /
+    Case.next_deadline_type (gleiche Regeln wie der DB-Trigger
+    cases_set_next_deadline, siehe Migration b7e1c9d2a4f3).
+
+    Returns:
+        (Fristdatum, 'ack' | 'resolve') oder (None, None) wenn abgeschlossen
+    """
+    if resolved_at is not None or created_at is None:
+        return None, None
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    if acknowledged_at is None:
+        return created_at + timedelta(days=ACK_DAYS), "ack"
+    return created_at + timedelta(days=RESOLVE_DAYS), "resolve"
+
+
 def get_case_deadline_status(case) -> DeadlineStatus:
     """
     Berechnet den Ampel-Status einer HinSchG-Frist fuer einen Fall.
@@ -124,7 +155,8 @@ def get_case_deadline_status(case) -> DeadlineStatus:
 def get_deadline_summary(cases) -> dict:
     """
     Berechnet eine Zusammenfassung der Fristenstatus fuer alle Faelle.
-    Fuer das Dashboard-Widget.
+    Python-Variante fuer bereits geladene Faelle; Endpunkte nutzen
+    get_deadline_summary_sql().
 
     Returns:
         {'green': int, 'yellow': int, 'red': int, 'done': int, 'total': int}
@@ -137,6 +169,78 @@ def get_deadline_summary(cases) -> dict:
     return summary
 
 
+def deadline_status_expression(now: Optional[datetime] = None):
+    """
+    SQL-Ausdruck fuer den Ampel-Status eines Falls ('green'|'yellow'|'red'|'done').
+
+    Entspricht get_case_deadline_status(): days_remaining = floor((frist - now) / 1 Tag),
+    also rot bei frist < now und gelb bei frist < now + (WARNING_DAYS + 1) Tage.
+    Die Schwellwerte werden in Python auf created_at zurueckgerechnet, damit
+    der Ausdruck nur Vergleiche gegen gebundene Parameter enthaelt.
+
+    Args:
+        now: Referenzzeitpunkt (Default: jetzt, UTC)
+    """
+    from app.models.case import Case
+
+    if now is None:
+        now = datetime.now(timezone.utc)
+    yellow_until = now + timedelta(days=WARNING_DAYS + 1)
+
+    return sql_case(
+        (Case.resolved_at.isnot(None), literal("done")),
+        (
+            Case.acknowledged_at.is_(None),
+            sql_case(
+                (Case.created_at < now - timedelta(days=ACK_DAYS), literal("red")),
+                (Case.created_at < yellow_until - timedelta(days=ACK_DAYS), literal("yellow")),
+                else_=literal("green"),
+            ),
+        ),
+        (Case.created_at < now - timedelta(days=RESOLVE_DAYS), literal("red")),
+        (Case.created_at < yellow_until - timedelta(days=RESOLVE_DAYS), literal("yellow")),
+        else_=literal("green"),
+    )
+
+
+def get_deadline_summary_sql(
+    session,
+    tenant_id: uuid.UUID,
+    *criteria,
+    now: Optional[datetime] = None,
+) -> dict:
+    """
+    Fristenampel-Zusammenfassung als eine einzige Aggregation in der Datenbank.
+
+    Ersetzt das Laden aller Faelle + get_deadline_summary(); Ergebnis ist
+    identisch (Paritaet siehe tests/test_deadline_service.py).
+
+    Args:
+        session: SQLAlchemy-Session
+        tenant_id: Mandanten-ID
+        *criteria: Zusaetzliche Filter auf Case (z.B. assignee_id)
+        now: Referenzzeitpunkt (Default: jetzt, UTC)
+
+    Returns:
+        {'green': int, 'yellow': int, 'red': int, 'done': int, 'total': int}
+    """
+    from app.models.case import Case
+
+    status_expr = deadline_status_expression(now).label("deadline_status")
+    rows = (
+        session.query(status_expr, func.count(Case.id))
+        .filter(Case.tenant_id == tenant_id, *criteria)
+        .group_by(status_expr)
+        .all()
+    )
+
+    summary = {"green": 0, "yellow": 0, "red": 0, "done": 0, "total": 0}
+    for status, count in rows:
+        summary[status] = count
+        summary["total"] += count
+    return summary
+
+
 def get_urgent_cases(cases, warning_days: int = WARNING_DAYS) -> list:
     """
     Filtert Faelle mit dringenden Fristen (gelb oder rot).
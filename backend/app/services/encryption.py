@@ -163,6 +163,17 @@ class EncryptionService:
         context = f"{record_id}:{field_name}"
         return self.decrypt(ciphertext, context)
 
+    def derive_search_key(self, context: str) -> bytes:
+        """
+        Leitet einen deterministischen HMAC-Schluessel fuer den Suchindex ab.
+
+        Anders als bei encrypt() ist der Salt fest, damit dieselben Tokens
+        immer denselben Hash ergeben. Der Kontext (z.B. Tenant-ID) trennt
+        die Indizes der Mandanten.
+        """
+        key, _ = self._derive_key(f"search-index:{context}", salt=b"aitema-search-v1")
+        return key
+
     @staticmethod
     def generate_key() -> str:
         """Generiert einen neuen zufaelligen Schluessel (fuer Konfiguration)."""
@@ -0,0 +1,489 @@
+"""
+aitema|Hinweis - Datenexport
+Streaming-Export von Faellen und Meldungen als CSV, XLSX oder NDJSON.
+
+Zeilen werden ueber einen serverseitigen Cursor (yield_per) in Batches gelesen,
+verschluesselte Inhalte pro Batch parallel entschluesselt und sofort in das
+Ausgabeformat geschrieben. Der Speicherbedarf ist unabhaengig von der
+Exportgroesse - auch XLSX wird zeilenweise in ein ZIP geschrieben
+(Inline-Strings, keine Shared-Strings-Tabelle).
+
+Grosse Exporte laufen als Celery-Job: die Datei landet in EXPORT_FOLDER,
+der Jobstatus in Redis (export_job:<id>); nach EXPORT_RETENTION_HOURS wird
+die Datei geloescht.
+"""
+
+import csv
+import enum
+import io
+import json
+import os
+import uuid
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone, timedelta
+from typing import Callable, Iterator, Optional
+from xml.sax.saxutils import escape
+
+from flask import current_app
+from celery import shared_task
+from sqlalchemy import func, select
+import structlog
+
+from app.models.audit_log import AuditLog, AuditAction
+from app.models.case import Case, CaseStatus
+from app.models.hinweis import Hinweis, HinweisStatus
+from app.services.encryption import EncryptionService
+
+log = structlog.get_logger()
+
+FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+}
+
+# Zeilen pro Cursor-Batch (und pro Entschluesselungs-Batch)
+EXPORT_BATCH_SIZE = 500
+EXPORT_DECRYPT_WORKERS = 4
+
+# Ab dieser Zeilenzahl wird der Export als Hintergrund-Job ausgefuehrt
+EXPORT_SYNC_MAX_ROWS = 50_000
+EXPORT_RETENTION_HOURS = 24
+EXPORT_JOB_KEY = "export_job:{}"
+
+
+@dataclass(frozen=True)
+class Column:
+    """Exportspalte: Ueberschrift, SQL-Ausdruck, optional verschluesselt."""
+    name: str
+    expr: object
+    encrypted: bool = False
+
+
+CASE_COLUMNS = (
+    Column("case_number", Case.case_number),
+    Column("hinweis_reference", Hinweis.reference_code),
+    Column("titel", Case.titel),
+    Column("kategorie", Hinweis.kategorie),
+    Column("status", Case.status),
+    Column("schweregrad", Case.schweregrad),
+    Column("begruendet", Case.begruendet),
+    Column("assignee_id", Case.assignee_id),
+    Column("opened_at", Case.opened_at),
+    Column("acknowledged_at", Case.acknowledged_at),
+    Column("resolved_at", Case.resolved_at),
+    Column("closed_at", Case.closed_at),
+    Column("eskaliert", Case.eskaliert),
+    Column("extern_gemeldet", Case.extern_gemeldet),
+)
+CASE_CONTENT_COLUMNS = (
+    Column("zusammenfassung", Case.zusammenfassung_encrypted, encrypted=True),
+    Column("ergebnis", Case.ergebnis_encrypted, encrypted=True),
+    Column("massnahmen", Case.massnahmen_encrypted, encrypted=True),
+)
+
+HINWEIS_COLUMNS = (
+    Column("reference_code", Hinweis.reference_code),
+    Column("titel", Hinweis.titel),
+    Column("kategorie", Hinweis.kategorie),
+    Column("prioritaet", Hinweis.prioritaet),
+    Column("status", Hinweis.status),
+    Column("is_anonymous", Hinweis.is_anonymous),
+    Column("betroffene_abteilung", Hinweis.betroffene_abteilung),
+    Column("quelle", Hinweis.quelle),
+    Column("eingegangen_am", Hinweis.eingegangen_am),
+    Column("eingangsbestaetigung_frist", Hinweis.eingangsbestaetigung_frist),
+    Column("eingangsbestaetigung_gesendet_am", Hinweis.eingangsbestaetigung_gesendet_am),
+    Column("rueckmeldung_frist", Hinweis.rueckmeldung_frist),
+    Column("rueckmeldung_gesendet_am", Hinweis.rueckmeldung_gesendet_am),
+)
+# Melder-Kontaktdaten werden nie exportiert
+HINWEIS_CONTENT_COLUMNS = (
+    Column("beschreibung", Hinweis.beschreibung_encrypted, encrypted=True),
+)
+
+
+@dataclass(frozen=True)
+class ExportSpec:
+    """Was exportiert wird (serialisierbar fuer Hintergrund-Jobs)."""
+    resource: str                       # "cases" | "hinweise"
+    tenant_id: str
+    fmt: str = "csv"
+    status: Optional[str] = None
+    date_from: Optional[str] = None     # ISO-Datum, inklusiv
+    date_to: Optional[str] = None       # ISO-Datum, exklusiv
+    include_content: bool = False
+
+    def columns(self) -> tuple[Column, ...]:
+        if self.resource == "cases":
+            return CASE_COLUMNS + (CASE_CONTENT_COLUMNS if self.include_content else ())
+        return HINWEIS_COLUMNS + (HINWEIS_CONTENT_COLUMNS if self.include_content else ())
+
+    def filename(self) -> str:
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
+        return f"{self.resource}-{stamp}.{FORMATS[self.fmt][1]}"
+
+
+def validate_spec(spec: ExportSpec) -> None:
+    """
+    Prueft Format, Ressource, Status und Datumsfilter.
+
+    Raises:
+        ValueError: Bei ungueltigen Angaben
+    """
+    if spec.fmt not in FORMATS:
+        raise ValueError(f"Ungueltiges Format: {spec.fmt}")
+    if spec.resource not in ("cases", "hinweise"):
+        raise ValueError(f"Ungueltige Ressource: {spec.resource}")
+    if spec.status:
+        (CaseStatus if spec.resource == "cases" else HinweisStatus)(spec.status)
+    for value in (spec.date_from, spec.date_to):
+        if value:
+            datetime.fromisoformat(value)
+
+
+def build_query(spec: ExportSpec):
+    """SELECT der Exportspalten mit Mandanten- und Filterbedingungen."""
+    columns = [c.expr for c in spec.columns()]
+    tenant_id = uuid.UUID(spec.tenant_id)
+    if spec.resource == "cases":
+        stmt = select(*columns).select_from(Case).outerjoin(
+            Hinweis, Hinweis.id == Case.hinweis_id
+        ).where(Case.tenant_id == tenant_id)
+        date_col, status_col, order = Case.opened_at, Case.status, Case.id
+        status_enum = CaseStatus
+    else:
+        stmt = select(*columns).where(Hinweis.tenant_id == tenant_id)
+        date_col, status_col, order = Hinweis.eingegangen_am, Hinweis.status, Hinweis.id
+        status_enum = HinweisStatus
+
+    if spec.status:
+        stmt = stmt.where(status_col == status_enum(spec.status))
+    if spec.date_from:
+        stmt = stmt.where(date_col >= datetime.fromisoformat(spec.date_from))
+    if spec.date_to:
+        stmt = stmt.where(date_col < datetime.fromisoformat(spec.date_to))
+    return stmt.order_by(order)
+
+
+def count_rows(session, spec: ExportSpec) -> int:
+    """Anzahl der zu exportierenden Zeilen (entscheidet ueber Hintergrund-Job)."""
+    return session.execute(
+        select(func.count()).select_from(build_query(spec).order_by(None).subquery())
+    ).scalar()
+
+
+def _plain(value):
+    """Python-Wert -> exportierbarer Skalar."""
+    if isinstance(value, enum.Enum):
+        return value.value
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _decrypt_cell(encryption: EncryptionService, value: Optional[str]) -> Optional[str]:
+    if not value:
+        return None
+    try:
+        return encryption.decrypt(value)
+    except ValueError:
+        return "[nicht entschluesselbar]"
+
+
+def iter_rows(session, spec: ExportSpec,
+              encryption: Optional[EncryptionService] = None) -> Iterator[list]:
+    """
+    Liefert die Exportzeilen als Listen von Skalaren.
+
+    Liest ueber einen serverseitigen Cursor in Batches von EXPORT_BATCH_SIZE;
+    verschluesselte Spalten werden pro Batch parallel entschluesselt.
+    """
+    columns = spec.columns()
+    encrypted = [i for i, c in enumerate(columns) if c.encrypted]
+    result = session.execute(
+        build_query(spec).execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+
+    executor = ThreadPoolExecutor(max_workers=EXPORT_DECRYPT_WORKERS) if encrypted else None
+    try:
+        for batch in result.partitions():
+            rows = [[_plain(v) for v in row] for row in batch]
+            if encrypted:
+                cells = [(row, i) for row in rows for i in encrypted]
+                texts = executor.map(lambda c: _decrypt_cell(encryption, c[0][c[1]]), cells)
+                for (row, i), text in zip(cells, texts):
+                    row[i] = text
+            yield from rows
+    finally:
+        if executor:
+            executor.shutdown(wait=False)
+        result.close()
+
+
+# ----------------------------------------------------------
+# Ausgabeformate (Generatoren von bytes)
+# ----------------------------------------------------------
+
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _csv_safe(value):
+    """Verhindert Formel-Injection beim Oeffnen in Tabellenkalkulationen."""
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def write_csv(header: list[str], rows: Iterator[list]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=";")
+    buffer.write("\ufeff")  # BOM fuer Excel
+    writer.writerow(header)
+    for n, row in enumerate(rows, 1):
+        writer.writerow([_csv_safe(v) for v in row])
+        if n % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode("utf-8")
+
+
+def write_ndjson(header: list[str], rows: Iterator[list]) -> Iterator[bytes]:
+    chunk = []
+    for row in rows:
+        chunk.append(json.dumps(dict(zip(header, row)), ensure_ascii=False))
+        if len(chunk) == EXPORT_BATCH_SIZE:
+            yield ("\n".join(chunk) + "\n").encode("utf-8")
+            chunk = []
+    if chunk:
+        yield ("\n".join(chunk) + "\n").encode("utf-8")
+
+
+class ChunkSink(io.RawIOBase):
+    """Nicht-seekbares Schreibziel fuer zipfile; sammelt Bytes bis zum Abholen."""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+        self._pos = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def flush(self) -> None:
+        pass
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+_XLSX_STATIC = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    "xl/workbook.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Export" sheetId="1" r:id="rId1"/></sheets></workbook>'
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+
+def _xlsx_cell(value) -> str:
+    if value is None:
+        return "<c/>"
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        return f"<c><v>{value}</v></c>"
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{escape(str(value))}</t></is></c>'
+
+
+def write_xlsx(header: list[str], rows: Iterator[list]) -> Iterator[bytes]:
+    """XLSX zeilenweise: Arbeitsblatt wird als Stream in das ZIP geschrieben."""
+    sink = ChunkSink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, content in _XLSX_STATIC.items():
+            zf.writestr(name, content)
+        yield sink.take()
+
+        with zf.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                b"<sheetData>"
+            )
+            sheet.write(("<row>" + "".join(_xlsx_cell(h) for h in header) + "</row>").encode("utf-8"))
+            for n, row in enumerate(rows, 1):
+                sheet.write(("<row>" + "".join(_xlsx_cell(v) for v in row) + "</row>").encode("utf-8"))
+                if n % EXPORT_BATCH_SIZE == 0:
+                    yield sink.take()
+            sheet.write(b"</sheetData></worksheet>")
+    yield sink.take()
+
+
+WRITERS: dict[str, Callable[[list[str], Iterator[list]], Iterator[bytes]]] = {
+    "csv": write_csv,
+    "ndjson": write_ndjson,
+    "xlsx": write_xlsx,
+}
+
+
+def stream_export(session, spec: ExportSpec,
+                  encryption: Optional[EncryptionService] = None) -> Iterator[bytes]:
+    """Exportdatei als Folge von Byte-Chunks."""
+    header = [c.name for c in spec.columns()]
+    return WRITERS[spec.fmt](header, iter_rows(session, spec, encryption))
+
+
+def audit_export(session, spec: ExportSpec, user_id, ip_address: Optional[str],
+                 rows: Optional[int] = None, job_id: Optional[str] = None) -> None:
+    """DATA_EXPORTED-Eintrag (ohne Commit)."""
+    session.add(AuditLog(
+        tenant_id=uuid.UUID(spec.tenant_id),
+        user_id=uuid.UUID(str(user_id)),
+        action=AuditAction.DATA_EXPORTED,
+        resource_type=spec.resource,
+        ip_address=ip_address,
+        description=f"Export {spec.resource} als {spec.fmt.upper()}",
+        details={
+            "format": spec.fmt,
+            "status": spec.status,
+            "date_from": spec.date_from,
+            "date_to": spec.date_to,
+            "include_content": spec.include_content,
+            "rows": rows,
+            "job_id": job_id,
+        },
+    ))
+
+
+# ----------------------------------------------------------
+# Hintergrund-Jobs
+# ----------------------------------------------------------
+
+def create_export_job(redis_client, spec: ExportSpec, user_id) -> str:
+    """Legt einen Export-Job an und stellt ihn in die Celery-Queue."""
+    job_id = uuid.uuid4().hex
+    key = EXPORT_JOB_KEY.format(job_id)
+    redis_client.hset(key, mapping={
+        "status": "pending",
+        "tenant_id": spec.tenant_id,
+        "user_id": str(user_id),
+        "spec": json.dumps(spec.__dict__),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    })
+    redis_client.expire(key, EXPORT_RETENTION_HOURS * 3600)
+    run_export_job.delay(job_id)
+    return job_id
+
+
+def get_export_job(redis_client, job_id: str) -> Optional[dict]:
+    """Jobstatus aus Redis (None wenn unbekannt oder abgelaufen)."""
+    job = redis_client.hgetall(EXPORT_JOB_KEY.format(job_id))
+    return job or None
+
+
+def export_path(job_id: str, filename: str) -> str:
+    return os.path.join(current_app.config["EXPORT_FOLDER"], f"{job_id}-{filename}")
+
+
+@shared_task(name="app.services.export.run_export_job")
+def run_export_job(job_id: str):
+    """Celery-Task: Schreibt einen Export in EXPORT_FOLDER."""
+    key = EXPORT_JOB_KEY.format(job_id)
+    redis_client = current_app.redis
+    job = redis_client.hgetall(key)
+    if not job:
+        return
+
+    spec = ExportSpec(**json.loads(job["spec"]))
+    filename = spec.filename()
+    path = export_path(job_id, filename)
+    session = current_app.Session()
+    encryption = EncryptionService(current_app.config["ENCRYPTION_MASTER_KEY"])
+    redis_client.hset(key, "status", "running")
+
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        rows = 0
+        header = [c.name for c in spec.columns()]
+
+        def counted():
+            nonlocal rows
+            for row in iter_rows(session, spec, encryption):
+                rows += 1
+                yield row
+
+        with os.fdopen(fd, "wb") as f:
+            for chunk in WRITERS[spec.fmt](header, counted()):
+                f.write(chunk)
+
+        audit_export(session, spec, job["user_id"], None, rows=rows, job_id=job_id)
+        session.commit()
+        redis_client.hset(key, mapping={
+            "status": "done",
+            "filename": filename,
+            "rows": rows,
+            "finished_at": datetime.now(timezone.utc).isoformat(),
+        })
+        log.info("export_job_done", job_id=job_id, resource=spec.resource, rows=rows)
+
+    except Exception as e:
+        session.rollback()
+        if os.path.exists(path):
+            os.remove(path)
+        redis_client.hset(key, mapping={"status": "failed", "error": "Export fehlgeschlagen"})
+        log.error("export_job_failed", job_id=job_id, error=str(e))
+    finally:
+        session.close()
+
+
+@shared_task(name="app.services.export.cleanup_exports")
+def cleanup_exports():
+    """Celery-Task: Loescht Exportdateien nach Ablauf der Aufbewahrung."""
+    folder = current_app.config["EXPORT_FOLDER"]
+    if not os.path.isdir(folder):
+        return
+    cutoff = (datetime.now(timezone.utc) - timedelta(hours=EXPORT_RETENTION_HOURS)).timestamp()
+    removed = 0
+    for entry in os.scandir(folder):
+        if entry.is_file() and entry.stat().st_mtime < cutoff:
+            os.remove(entry.path)
+            removed += 1
+    if removed:
+        log.info("exports_cleaned_up", removed=removed)
@@ -0,0 +1,195 @@
+"""
+aitema|Hinweis - Plattformweite Statistiken
+Fan-out derselben Aggregatabfrage ueber alle Tenant-Datenbanken bzw. -Schemas.
+
+Im row-Modus liegen alle Mandanten in einer Datenbank - dort genuegt eine
+Abfrage. Im database- und schema-Modus laeuft die Abfrage pro Tenant auf einem
+begrenzten Thread-Pool; jede Abfrage hat ein serverseitiges statement_timeout,
+der gesamte Lauf eine Obergrenze. Tenants, die fehlschlagen oder nicht
+rechtzeitig antworten, werden im Ergebnis aufgefuehrt (Teilergebnis), die
+uebrigen Ergebnisse werden summiert.
+"""
+
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from sqlalchemy import String, cast, func, literal, select, text, union_all
+from sqlalchemy.engine import Connection, Engine
+import structlog
+
+from app.models.case import Case
+from app.models.hinweis import Hinweis
+from app.models.tenant import Tenant
+from app.models.user import User
+from app.services.tenant_manager import TenantManager
+
+log = structlog.get_logger()
+
+FLEET_MAX_WORKERS = int(os.environ.get("FLEET_STATS_MAX_WORKERS", "32"))
+FLEET_TENANT_TIMEOUT = float(os.environ.get("FLEET_STATS_TENANT_TIMEOUT", "5"))
+FLEET_TOTAL_TIMEOUT = float(os.environ.get("FLEET_STATS_TOTAL_TIMEOUT", "30"))
+
+# Name des Ziels fuer Daten in der Master-Datenbank
+MASTER_TARGET = "master"
+
+
+@dataclass(frozen=True)
+class FleetTarget:
+    """Eine Datenbank bzw. ein Schema; tenant_ids filtert geteilte Tabellen."""
+    name: str
+    engine: Engine
+    tenant_ids: Optional[tuple] = None
+
+
+@dataclass
+class FleetResult:
+    """Zusammengefuehrtes Ergebnis mit Angaben zu fehlenden Tenants."""
+    totals: dict
+    targets: int
+    succeeded: int = 0
+    failed: list[dict] = field(default_factory=list)
+    duration_ms: int = 0
+
+    @property
+    def partial(self) -> bool:
+        return bool(self.failed)
+
+
+def merge_counts(into: dict, other: dict) -> dict:
+    """Summiert verschachtelte Zaehler-Dicts (in place)."""
+    for key, value in other.items():
+        if isinstance(value, dict):
+            merge_counts(into.setdefault(key, {}), value)
+        else:
+            into[key] = into.get(key, 0) + value
+    return into
+
+
+class FleetQueryExecutor:
+    """Fuehrt eine Abfrage auf mehreren Zielen parallel aus und fuehrt die Ergebnisse zusammen."""
+
+    def __init__(self, max_workers: int = FLEET_MAX_WORKERS,
+                 tenant_timeout: float = FLEET_TENANT_TIMEOUT,
+                 total_timeout: float = FLEET_TOTAL_TIMEOUT):
+        self.max_workers = max_workers
+        self.tenant_timeout = tenant_timeout
+        self.total_timeout = total_timeout
+
+    def _run_one(self, target: FleetTarget, query: Callable[[Connection, Optional[tuple]], dict]) -> dict:
+        with target.engine.connect() as conn:
+            with conn.begin():
+                # Abbruch serverseitig, damit keine Abfrage nach dem Timeout weiterlaeuft
+                conn.execute(text(
+                    f"SET LOCAL statement_timeout = {int(self.tenant_timeout * 1000)}"
+                ))
+                return query(conn, target.tenant_ids)
+
+    def run(self, targets: list[FleetTarget],
+            query: Callable[[Connection, Optional[tuple]], dict]) -> FleetResult:
+        started = time.monotonic()
+        result = FleetResult(totals={}, targets=len(targets))
+        if not targets:
+            return result
+
+        pool = ThreadPoolExecutor(max_workers=min(self.max_workers, len(targets)))
+        pending = {pool.submit(self._run_one, t, query): t for t in targets}
+        deadline = started + self.total_timeout
+        try:
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                for future in done:
+                    target = pending.pop(future)
+                    try:
+                        merge_counts(result.totals, future.result())
+                        result.succeeded += 1
+                    except Exception as e:
+                        result.failed.append({"target": target.name, "error": str(e)[:200]})
+            for future, target in pending.items():
+                future.cancel()
+                result.failed.append({"target": target.name, "error": "timeout"})
+        finally:
+            # Nicht auf haengende Verbindungen warten; statement_timeout beendet sie
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        result.duration_ms = int((time.monotonic() - started) * 1000)
+        if result.failed:
+            log.warning("fleet_query_partial", failed=len(result.failed), targets=result.targets)
+        return result
+
+
+def fleet_targets(app, session) -> list[FleetTarget]:
+    """
+    Ziele fuer den Fan-out je Isolationsmodus.
+
+    Tenants ohne eigene Datenbank bzw. eigenes Schema werden gemeinsam ueber
+    die Master-Datenbank abgefragt (gefiltert auf ihre tenant_ids).
+    """
+    manager = TenantManager(app)
+    if manager.isolation_mode == "row":
+        return [FleetTarget(MASTER_TARGET, app.engine)]
+
+    targets, shared = [], []
+    for tenant in session.query(Tenant).filter(Tenant.is_active.is_(True)):
+        engine = manager.get_engine(tenant)
+        if engine is None:
+            shared.append(tenant.id)
+        else:
+            targets.append(FleetTarget(tenant.slug, engine))
+    if shared:
+        targets.append(FleetTarget(MASTER_TARGET, app.engine, tuple(shared)))
+    return targets
+
+
+def _section(name: str):
+    return cast(literal(name), String).label("section")
+
+
+def platform_stats_query(conn: Connection, tenant_ids: Optional[tuple] = None) -> dict:
+    """
+    Kennzahlen eines Ziels in einer Abfrage (Zeilen section, key, count).
+    Ohne tenant_ids werden alle Zeilen der Datenbank bzw. des Schemas gezaehlt.
+    """
+    def scoped(stmt, model):
+        return stmt.where(model.tenant_id.in_(tenant_ids)) if tenant_ids else stmt
+
+    now = func.now()
+    stmt = union_all(
+        scoped(select(_section("hinweise"), cast(Hinweis.status, String), func.count())
+               .group_by(Hinweis.status), Hinweis),
+        scoped(select(_section("cases"), cast(Case.status, String), func.count())
+               .group_by(Case.status), Case),
+        scoped(select(_section("fristen"), Hinweis.next_deadline_type, func.count())
+               .where(Hinweis.next_deadline_at < now)
+               .group_by(Hinweis.next_deadline_type), Hinweis),
+        scoped(select(_section("users"), cast(literal("active_count"), String), func.count())
+               .where(User.is_active.is_(True)), User),
+    )
+
+    stats = {"hinweise": {}, "cases": {}, "fristen": {}, "users": {}}
+    for section, key, count in conn.execute(stmt):
+        if section == "fristen":
+            key = {"ack": "ueberfaellige_eingangsbestaetigung",
+                   "resolve": "ueberfaellige_rueckmeldung"}[key]
+        elif section in ("hinweise", "cases"):
+            # Enum-Spalten speichern die Member-Namen; Werte = Name kleingeschrieben
+            key = key.lower()
+        stats[section][key] = count
+    return stats
+
+
+def platform_stats(app, session, executor: Optional[FleetQueryExecutor] = None) -> FleetResult:
+    """Plattformweite Kennzahlen ueber alle aktiven Tenants."""
+    targets = fleet_targets(app, session)
+    if executor is None:
+        # Schemas teilen sich den Pool der Master-Engine
+        workers = FLEET_MAX_WORKERS
+        if TenantManager(app).isolation_mode == "schema":
+            workers = min(workers, app.config.get("DB_POOL_SIZE", 10))
+        executor = FleetQueryExecutor(max_workers=workers)
+    return executor.run(targets, platform_stats_query)
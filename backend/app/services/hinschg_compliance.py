@@ -212,54 +212,46 @@ class HinSchGComplianceService:
 @shared_task(name="app.services.hinschg_compliance.check_fristen_task")
 def check_fristen_task():
     """
-    Celery-Task: Prueft alle offenen Fristen und sendet Warnungen.
-    Wird stuendlich ausgefuehrt (siehe Celery-Beat Konfiguration).
+    Celery-Task: Taeglicher Abgleich des Fristen-Schedulers.
+
+    Warnungen werden ereignisgesteuert vom Dispatcher versendet
+    (app.services.deadline_scheduler.dispatch_due_deadlines). Dieser Task
+    plant die kommenden Schwellwerte aller offenen Meldungen und Faelle neu,
+    falls Eintraege in Redis verloren gegangen sind. Es werden nur die
+    Spalten id/next_deadline_*/notified_* gelesen; bereits erreichte,
+    aber noch nicht gemeldete Warnstufen werden sofort faellig gestellt.
     """
-    from app.models.hinweis import Hinweis, HinweisStatus
-    from app.services.notification import NotificationService
+    from app.models.case import Case
+    from app.models.hinweis import Hinweis
+    from app.services.deadline_scheduler import DeadlineScheduler, notified_warnstufe
 
     log.info("fristen_check_started")
 
     session = current_app.Session()
-    compliance = HinSchGComplianceService()
-    notification = NotificationService()
+    scheduler = DeadlineScheduler(current_app.redis)
 
     try:
-        # Alle offenen Meldungen laden
-        offene_hinweise = session.query(Hinweis).filter(
-            Hinweis.status.notin_([
-                HinweisStatus.ABGESCHLOSSEN,
-                HinweisStatus.ABGELEHNT,
-            ])
-        ).all()
-
-        warnungen = 0
-        ueberfaellig = 0
-
-        for hinweis in offene_hinweise:
-            fristen = compliance.pruefe_alle_fristen(hinweis)
-
-            for frist in fristen:
-                if frist.warnstufe == "ueberfaellig":
-                    ueberfaellig += 1
-                    notification.send_frist_warnung(
-                        hinweis=hinweis,
-                        frist=frist,
-                        warnstufe="ueberfaellig",
-                    )
-                elif frist.warnstufe in ("warnung", "kritisch"):
-                    warnungen += 1
-                    notification.send_frist_warnung(
-                        hinweis=hinweis,
-                        frist=frist,
-                        warnstufe=frist.warnstufe,
-                    )
+        geplant = {"hinweis": 0, "case": 0}
+        for kind, model in (("hinweis", Hinweis), ("case", Case)):
+            rows = session.query(
+                model.id, model.next_deadline_type, model.next_deadline_at,
+                model.notified_deadline_type, model.notified_warnstufe,
+            ).filter(
+                model.next_deadline_at.isnot(None)
+            ).yield_per(1000)
+
+            for row in rows:
+                # Erreichte, aber noch nicht gemeldete Stufen sofort nachholen
+                scheduler.schedule(
+                    kind, row.id, row.next_deadline_type, row.next_deadline_at,
+                    notified=notified_warnstufe(row, row.next_deadline_type),
+                )
+                geplant[kind] += 1
 
         log.info(
             "fristen_check_completed",
-            total_hinweise=len(offene_hinweise),
-            warnungen=warnungen,
-            ueberfaellig=ueberfaellig,
+            hinweise_geplant=geplant["hinweis"],
+            faelle_geplant=geplant["case"],
         )
 
     except Exception as e:
@@ -0,0 +1,175 @@
+"""
+aitema|Hinweis - k-Anonymitaet fuer Aggregationen
+Gruppierte Zaehlungen, in denen keine Zelle weniger als k Meldungen ausweist.
+
+k_anonymous() baut aus einer Basisabfrage (FROM/WHERE) und Dimensionen eine
+Abfrage, die die Unterdrueckung vollstaendig in SQL erledigt:
+
+    Primaer:       Zellen mit 0 < n < k werden verborgen.
+    Komplementaer: Ist die Summe der verborgenen Zellen einer Partition
+                   kleiner als k, werden weitere Zellen (aufsteigend nach n)
+                   verborgen, bis sie mindestens k betraegt. Aus Gesamtzahl
+                   minus sichtbaren Zellen laesst sich so keine kleine Zelle
+                   zurueckrechnen.
+
+Modi fuer verborgene Zellen:
+
+    suppress   Zeile entfaellt
+    mask       Zeile bleibt, n = NULL
+    bucket     verborgene Zellen einer Partition werden zu einer Zeile mit
+               NULL-Dimensionen zusammengefasst ("Weitere")
+
+Ergebnisspalten: <Dimensionen...>, n, suppressed.
+
+cached_rows() legt das Ergebnis einer solchen Abfrage pro Mandant in Redis ab.
+"""
+
+import enum
+import hashlib
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from redis import RedisError
+from sqlalchemy import and_, case, func, null, or_, select
+from sqlalchemy.dialects import postgresql
+import structlog
+
+log = structlog.get_logger()
+
+# Mindestgroesse einer ausgewiesenen Gruppe (HinSchG-Anonymisierungsschutz)
+MIN_GROUP_SIZE = 3
+
+MODES = ("suppress", "mask", "bucket")
+
+# Standard-Lebensdauer gecachter Aggregate
+AGGREGATE_CACHE_SECONDS = 300
+
+
+def k_anonymous(base, dimensions: dict, measure=None, k: int = MIN_GROUP_SIZE,
+                partition_by: tuple = (), mode: str = "suppress",
+                complementary: bool = True, name: str = "cells"):
+    """
+    k-anonyme Aggregation.
+
+    Args:
+        base:          Select mit FROM/WHERE (z.B. select().select_from(X).where(...))
+        dimensions:    {Spaltenname: SQL-Ausdruck}
+        measure:       Anzahl je Zelle (Standard count(*)), z.B. sum(rollup.count)
+        k:             Mindestgroesse
+        partition_by:  Dimensionen, deren Werte eigene Summen bilden (Komplementaer-
+                       unterdrueckung und Bucketing je Partition)
+        mode:          suppress | mask | bucket
+        complementary: Komplementaerunterdrueckung anwenden (nur abschalten, wenn
+                       keine Summe ueber die Zellen ausgewiesen wird)
+
+    Raises:
+        ValueError: Bei unbekanntem Modus oder Partition
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unbekannter Modus: {mode}")
+    if not set(partition_by) <= set(dimensions):
+        raise ValueError("partition_by muss aus den Dimensionen stammen")
+
+    measure = measure if measure is not None else func.count()
+    cells = base.with_only_columns(
+        *[expr.label(dim) for dim, expr in dimensions.items()],
+        measure.label("n"),
+        maintain_column_froms=True,
+    ).group_by(*dimensions.values()).having(measure > 0).subquery(name)
+
+    dims = [cells.c[dim] for dim in dimensions]
+    partition = [cells.c[dim] for dim in partition_by] or None
+    hidden = cells.c.n < k
+    if complementary:
+        smallest = func.min(cells.c.n).over(partition_by=partition)
+        hidden_before = func.coalesce(
+            func.sum(cells.c.n).over(
+                partition_by=partition, order_by=(cells.c.n, *dims), rows=(None, -1),
+            ),
+            0,
+        )
+        hidden = or_(hidden, and_(smallest < k, hidden_before < k))
+
+    flagged = select(*dims, cells.c.n, hidden.label("suppressed")).subquery(f"{name}_flagged")
+    columns = [flagged.c[dim] for dim in dimensions]
+
+    if mode == "suppress":
+        return select(*columns, flagged.c.n, flagged.c.suppressed).where(
+            flagged.c.suppressed.is_(False)
+        )
+    if mode == "mask":
+        return select(
+            *columns,
+            case((flagged.c.suppressed, null()), else_=flagged.c.n).label("n"),
+            flagged.c.suppressed,
+        )
+
+    bucketed = [
+        column if dim in partition_by
+        else case((flagged.c.suppressed, null()), else_=column).label(dim)
+        for dim, column in zip(dimensions, columns)
+    ]
+    total = func.sum(flagged.c.n)
+    return select(
+        *bucketed, total.label("n"), func.bool_or(flagged.c.suppressed).label("suppressed"),
+    ).group_by(*bucketed).having(or_(total >= k, func.bool_or(flagged.c.suppressed).is_(False)))
+
+
+def suppression_predicate(count, k: int = MIN_GROUP_SIZE):
+    """HAVING-Bedingung fuer reine Primaerunterdrueckung (z.B. bei Perzentilen)."""
+    return count >= k
+
+
+# ----------------------------------------------------------
+# Cache
+# ----------------------------------------------------------
+
+def _cache_key(tenant_id, stmt) -> str:
+    compiled = stmt.compile(dialect=postgresql.dialect())
+    digest = hashlib.sha256(
+        (str(compiled) + repr(sorted(compiled.params.items(), key=lambda p: p[0]))).encode()
+    ).hexdigest()[:32]
+    return f"k_anon:{tenant_id}:{digest}"
+
+
+def _json_value(value):
+    """Gleiche Werte bei Cache-Treffer und -Fehlschlag (JSON-Typen)."""
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def _fetch(session, stmt) -> list[dict]:
+    return [
+        {key: _json_value(value) for key, value in row._mapping.items()}
+        for row in session.execute(stmt)
+    ]
+
+
+def cached_rows(session, redis_client, tenant_id, stmt,
+                ttl: int = AGGREGATE_CACHE_SECONDS) -> list[dict]:
+    """
+    Ergebniszeilen als Dicts, pro Mandant und Abfrage in Redis gecacht.
+    Enums, Datumswerte und Decimals werden in JSON-Typen umgewandelt;
+    bei Redis-Fehlern wird direkt gelesen.
+    """
+    key = _cache_key(tenant_id, stmt)
+    try:
+        raw = redis_client.get(key)
+        if raw:
+            return json.loads(raw)
+    except RedisError as e:
+        log.warning("k_anon_cache_unavailable", error=str(e))
+        return _fetch(session, stmt)
+
+    rows = _fetch(session, stmt)
+    try:
+        redis_client.set(key, json.dumps(rows), ex=ttl)
+    except RedisError as e:
+        log.warning("k_anon_cache_unavailable", error=str(e))
+    return rows
@@ -3,8 +3,6 @@ aitema|Hinweis - Notification Service
 E-Mail und Secure-Messenger Benachrichtigungen.
 """
 
-import os
-import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from typing import Optional
@@ -13,8 +11,15 @@ from dataclasses import dataclass
 from flask import current_app
 import structlog
 
+from app.services.encryption import EncryptionService
+from app.services.outbox import enqueue_email
+from app.services.smtp_transport import AsyncSMTPTransport, SMTPSettings, get_pool
+
 log = structlog.get_logger()
 
+# Fallfristen: Warnstufen mit sofortiger E-Mail (alle anderen nur im Digest)
+CASE_FRIST_MAIL_WARNSTUFEN = ("ueberfaellig",)
+
 
 @dataclass
 class NotificationResult:
@@ -35,13 +40,29 @@ class NotificationService:
     - Webhook (fuer SIEM/Ticketsysteme)
     """
 
-    def __init__(self):
-        self.smtp_host = os.environ.get("SMTP_HOST", "")
-        self.smtp_port = int(os.environ.get("SMTP_PORT", "587"))
-        self.smtp_user = os.environ.get("SMTP_USER", "")
-        self.smtp_password = os.environ.get("SMTP_PASSWORD", "")
-        self.smtp_from = os.environ.get("SMTP_FROM", "noreply@hinweis.aitema.de")
-        self.smtp_tls = os.environ.get("SMTP_TLS", "true").lower() == "true"
+    def __init__(self, settings: Optional[SMTPSettings] = None):
+        self.smtp = settings or SMTPSettings.from_env()
+        self.smtp_host = self.smtp.host
+        self.smtp_from = self.smtp.from_addr
+
+    def _build_message(
+        self,
+        to: str,
+        subject: str,
+        body_text: str,
+        body_html: Optional[str] = None,
+    ) -> MIMEMultipart:
+        """Erstellt die MIME-Nachricht (Text + optional HTML)."""
+        msg = MIMEMultipart("alternative")
+        msg["From"] = self.smtp_from
+        msg["To"] = to
+        msg["Subject"] = subject
+        msg["X-Mailer"] = "aitema|Hinweis"
+
+        msg.attach(MIMEText(body_text, "plain", "utf-8"))
+        if body_html:
+            msg.attach(MIMEText(body_html, "html", "utf-8"))
+        return msg
 
     def send_email(
         self,
@@ -59,49 +80,122 @@ class NotificationService:
             body_text: Klartext-Inhalt
             body_html: Optional HTML-Inhalt
         """
-        if not self.smtp_host:
-            log.warning("smtp_not_configured", to=to)
-            return NotificationResult(
-                success=False, channel="email", recipient=to,
-                error="SMTP nicht konfiguriert",
-            )
+        return self.send_many([
+            {"to": to, "subject": subject, "body_text": body_text, "body_html": body_html},
+        ])[0]
 
-        try:
-            msg = MIMEMultipart("alternative")
-            msg["From"] = self.smtp_from
-            msg["To"] = to
-            msg["Subject"] = subject
-            msg["X-Mailer"] = "aitema|Hinweis"
-
-            msg.attach(MIMEText(body_text, "plain", "utf-8"))
-            if body_html:
-                msg.attach(MIMEText(body_html, "html", "utf-8"))
-
-            if self.smtp_tls:
-                server = smtplib.SMTP(self.smtp_host, self.smtp_port)
-                server.starttls()
-            else:
-                server = smtplib.SMTP_SSL(self.smtp_host, self.smtp_port)
+    def send_many(self, messages: list[dict]) -> list[NotificationResult]:
+        """
+        Sendet mehrere E-Mails ueber eine SMTP-Sitzung aus dem Verbindungspool.
 
-            if self.smtp_user and self.smtp_password:
-                server.login(self.smtp_user, self.smtp_password)
+        Verbindungsaufbau, STARTTLS und Login entfallen, solange eine Sitzung
+        im Pool frisch ist. Bei 421, Timeout oder Verbindungsabbruch wird fuer
+        die restlichen Nachrichten einmal neu verbunden (siehe smtp_transport).
 
-            server.sendmail(self.smtp_from, [to], msg.as_string())
-            server.quit()
+        Args:
+            messages: Liste von Dicts mit to, subject, body_text, body_html (optional)
 
-            log.info("email_sent", to=to, subject=subject)
-            return NotificationResult(success=True, channel="email", recipient=to)
+        Returns:
+            Ein NotificationResult pro Nachricht (gleiche Reihenfolge)
+        """
+        if not self.smtp_host:
+            for m in messages:
+                log.warning("smtp_not_configured", to=m["to"])
+            return [
+                NotificationResult(
+                    success=False, channel="email", recipient=m["to"],
+                    error="SMTP nicht konfiguriert",
+                )
+                for m in messages
+            ]
+
+        results: list[Optional[NotificationResult]] = []
+        envelopes = []
+        positions = []
+        for m in messages:
+            try:
+                msg = self._build_message(
+                    m["to"], m["subject"], m["body_text"], m.get("body_html"),
+                )
+            except Exception as e:
+                log.error("email_build_failed", to=m["to"], error=str(e))
+                results.append(NotificationResult(
+                    success=False, channel="email", recipient=m["to"], error=str(e)
+                ))
+                continue
+            positions.append(len(results))
+            results.append(None)
+            envelopes.append((m["to"], msg.as_string()))
+
+        if envelopes:
+            try:
+                errors = get_pool(self.smtp).send_many(envelopes)
+            except Exception as e:
+                # Verbindungsaufbau / Login fehlgeschlagen
+                errors = [str(e)] * len(envelopes)
+            self._collect(messages, positions, errors, results)
+
+        return results
+
+    async def send_many_async(
+        self,
+        messages: list[dict],
+        transport: Optional[AsyncSMTPTransport] = None,
+    ) -> list[NotificationResult]:
+        """
+        Asynchrone Variante von send_many() (aiosmtplib).
 
+        Args:
+            messages: Wie send_many()
+            transport: Geteilter Transport der aufrufenden Event-Loop;
+                       ohne Angabe wird eine eigene Sitzung geoeffnet und geschlossen
+        """
+        if not self.smtp_host:
+            return self.send_many(messages)
+
+        results: list[Optional[NotificationResult]] = []
+        envelopes = []
+        positions = []
+        for m in messages:
+            msg = self._build_message(m["to"], m["subject"], m["body_text"], m.get("body_html"))
+            positions.append(len(results))
+            results.append(None)
+            envelopes.append((m["to"], msg.as_string()))
+
+        own_transport = transport is None
+        transport = transport or AsyncSMTPTransport(self.smtp)
+        try:
+            errors = await transport.send_many(envelopes)
         except Exception as e:
-            log.error("email_send_failed", to=to, error=str(e))
-            return NotificationResult(
-                success=False, channel="email", recipient=to, error=str(e)
-            )
+            errors = [str(e)] * len(envelopes)
+        finally:
+            if own_transport:
+                await transport.close()
+
+        self._collect(messages, positions, errors, results)
+        return results
+
+    @staticmethod
+    def _collect(messages, positions, errors, results) -> None:
+        """Traegt die Transport-Ergebnisse an den Positionen der Nachrichten ein."""
+        for pos, error in zip(positions, errors):
+            m = messages[pos]
+            if error is None:
+                log.info("email_sent", to=m["to"], subject=m["subject"])
+                results[pos] = NotificationResult(success=True, channel="email", recipient=m["to"])
+            else:
+                log.error("email_send_failed", to=m["to"], error=error)
+                results[pos] = NotificationResult(
+                    success=False, channel="email", recipient=m["to"], error=error
+                )
 
-    def send_eingangsbestaetigung(self, hinweis, tenant) -> NotificationResult:
+    def send_eingangsbestaetigung(self, session, hinweis, tenant) -> NotificationResult:
         """
         Sendet die Eingangsbestaetigung an den Melder.
         HinSchG Paragraf 17 Abs. 1 S. 2.
+
+        E-Mails werden in der Outbox der uebergebenen Session abgelegt und
+        erst nach deren Commit versendet.
         """
         subject = f"Eingangsbestaetigung - Meldung {hinweis.reference_code}"
 
@@ -122,7 +216,7 @@ Ihre Identitaet wird gemaess Paragraf 8 HinSchG vertraulich behandelt.
 Sie sind durch das Repressalienverbot (Paragraf 36 HinSchG) geschuetzt.
 
 Mit freundlichen Gruessen
-{tenant.ombudsperson_name or Die Ombudsstelle}
+{tenant.ombudsperson_name or 'Die Ombudsstelle'}
 {tenant.name}
 
 ---
@@ -141,16 +235,13 @@ aitema|Hinweis - Hinweisgebersystem
                 recipient="anonym",
             )
 
-        # TODO: E-Mail-Adresse entschluesseln
-        return NotificationResult(
-            success=True,
-            channel="portal",
-            recipient="melder",
+        return self._queue_melder_email(
+            session, hinweis, subject, body_text, "eingangsbestaetigung",
         )
 
-    def send_rueckmeldung(self, hinweis, tenant, rueckmeldung_text: str) -> NotificationResult:
+    def send_rueckmeldung(self, session, hinweis, tenant, rueckmeldung_text: str) -> NotificationResult:
         """
-        Sendet die Rueckmeldung an den Melder.
+        Sendet die Rueckmeldung an den Melder (ueber die Outbox).
         HinSchG Paragraf 17 Abs. 2.
         """
         subject = f"Rueckmeldung - Meldung {hinweis.reference_code}"
@@ -167,7 +258,7 @@ Bei Fragen koennen Sie sich jederzeit ueber das Meldeportal an uns wenden.
 Ihre Identitaet bleibt weiterhin gemaess Paragraf 8 HinSchG geschuetzt.
 
 Mit freundlichen Gruessen
-{tenant.ombudsperson_name or Die Ombudsstelle}
+{tenant.ombudsperson_name or 'Die Ombudsstelle'}
 {tenant.name}
 """
 
@@ -176,26 +267,119 @@ Mit freundlichen Gruessen
                 success=True, channel="portal", recipient="anonym",
             )
 
-        return NotificationResult(
-            success=True, channel="portal", recipient="melder",
+        return self._queue_melder_email(
+            session, hinweis, subject, body_text, "rueckmeldung",
+        )
+
+    def _queue_melder_email(
+        self, session, hinweis, subject: str, body_text: str, event_type: str,
+    ) -> NotificationResult:
+        """Legt eine E-Mail an den (nicht anonymen) Melder in der Outbox ab."""
+        if not hinweis.melder_email_encrypted:
+            return NotificationResult(success=True, channel="portal", recipient="melder")
+
+        encryption = EncryptionService(current_app.config["ENCRYPTION_MASTER_KEY"])
+        enqueue_email(
+            session,
+            to=encryption.decrypt(hinweis.melder_email_encrypted),
+            subject=subject,
+            body_text=body_text,
+            event_type=event_type,
+            tenant_id=hinweis.tenant_id,
+            resource_type="hinweis",
+            resource_id=hinweis.id,
         )
+        return NotificationResult(success=True, channel="outbox", recipient="melder")
 
-    def send_frist_warnung(self, hinweis, frist, warnstufe: str) -> None:
-        """Sendet eine interne Warnung bei drohender Fristueberschreitung."""
+    def send_frist_warnung(self, hinweis, frist, warnstufe: str, session=None) -> None:
+        """
+        Sendet eine interne Warnung bei drohender Fristueberschreitung.
+        Mit Session wird zusaetzlich die Ombudsperson per E-Mail (Outbox) benachrichtigt.
+        """
         severity_map = {
             "warnung": "WARNUNG",
             "kritisch": "KRITISCH",
             "ueberfaellig": "UEBERFAELLIG",
         }
+        severity = severity_map.get(warnstufe, warnstufe)
 
         log.warning(
             "frist_warnung",
             reference_code=hinweis.reference_code,
             frist_name=frist.frist_name,
-            warnstufe=severity_map.get(warnstufe, warnstufe),
+            warnstufe=severity,
             tage_verbleibend=frist.tage_verbleibend,
             frist_datum=frist.frist_datum.isoformat(),
         )
 
-        # TODO: Ombudsperson per E-Mail benachrichtigen
-        # TODO: Dashboard-Alert erstellen
+        tenant = hinweis.tenant
+        if session is None or not tenant or not tenant.ombudsperson_email:
+            return
+
+        enqueue_email(
+            session,
+            to=tenant.ombudsperson_email,
+            subject=f"[AITEMA HINWEIS] {severity}: {frist.frist_name} - {hinweis.reference_code}",
+            body_text=f"""Guten Tag {tenant.ombudsperson_name or ''},
+
+fuer die Meldung {hinweis.reference_code} laeuft eine HinSchG-Frist ab:
+
+  Frist: {frist.frist_name}
+  Faellig am: {frist.frist_datum.strftime("%d.%m.%Y")}
+  Verbleibende Tage: {frist.tage_verbleibend}
+
+--
+aitema|Hinweis - HinSchG-konformes Meldesystem
+Diese Nachricht wurde automatisch generiert.
+""",
+            event_type="frist_warnung",
+            tenant_id=hinweis.tenant_id,
+            resource_type="hinweis",
+            resource_id=hinweis.id,
+        )
+
+    def send_case_frist_warnung(self, case, deadline_status, warnstufe: str, session=None) -> None:
+        """
+        Sendet eine interne Warnung bei drohender Fristueberschreitung eines Falls.
+
+        Warnungen vor Fristablauf stehen im taeglichen Fristen-Digest
+        (send_deadline_alerts) und werden nur geloggt. Per E-Mail (Outbox,
+        nur mit Session) geht an die/den Sachbearbeiter/in allein die
+        Ueberschreitung - einmal pro Frist, nicht einmal pro Warnstufe.
+        """
+        log.warning(
+            "case_frist_warnung",
+            case_number=case.case_number,
+            deadline_type=deadline_status.deadline_type,
+            warnstufe=warnstufe.upper(),
+            tage_verbleibend=deadline_status.days_remaining,
+            frist_datum=deadline_status.deadline,
+            assignee_id=str(case.assignee_id) if case.assignee_id else None,
+        )
+
+        if session is None or warnstufe not in CASE_FRIST_MAIL_WARNSTUFEN:
+            return
+        recipient = case.assignee or case.created_by
+        if recipient is None or not recipient.email:
+            return
+
+        enqueue_email(
+            session,
+            to=recipient.email,
+            subject=f"[AITEMA HINWEIS] {warnstufe.upper()}: Fall #{case.case_number}",
+            body_text=f"""Guten Tag {recipient.full_name},
+
+fuer Fall #{case.case_number} ({case.titel}) laeuft eine HinSchG-Frist ab:
+
+  Frist: {deadline_status.label} (bis {deadline_status.deadline})
+  Direktlink: /faelle/{case.id}
+
+--
+aitema|Hinweis - HinSchG-konformes Meldesystem
+Diese Nachricht wurde automatisch generiert.
+""",
+            event_type="case_frist_warnung",
+            tenant_id=case.tenant_id,
+            resource_type="case",
+            resource_id=case.id,
+        )
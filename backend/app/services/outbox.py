@@ -0,0 +1,226 @@
+"""
+aitema|Hinweis - Notification Outbox
+Transaktionaler Versand von Benachrichtigungen.
+
+Request-Handler und Tasks schreiben Benachrichtigungen mit enqueue_email()
+in dieselbe Transaktion wie die fachliche Aenderung. Der Drainer-Task
+beansprucht faellige Eintraege mit FOR UPDATE SKIP LOCKED (mehrere Drainer
+koennen parallel laufen), versendet sie mit begrenzter Parallelitaet und
+protokolliert Versuche mit exponentiellem Backoff.
+"""
+
+import os
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from flask import current_app
+from celery import shared_task
+from sqlalchemy import and_, or_
+import structlog
+
+from app.models.outbox import OutboxMessage, OutboxStatus
+from app.services.encryption import EncryptionService
+
+log = structlog.get_logger()
+
+OUTBOX_BATCH_SIZE = 100
+MAX_ATTEMPTS = 8
+BACKOFF_BASE = timedelta(seconds=30)
+BACKOFF_MAX = timedelta(hours=6)
+
+# Beanspruchte Eintraege eines abgestuerzten Drainers werden danach neu vergeben
+CLAIM_LEASE = timedelta(minutes=5)
+
+# Max. Batches pro Task-Lauf (begrenzt die Laufzeit unter task_time_limit)
+MAX_BATCHES_PER_RUN = 20
+
+_ENCRYPTION_CONTEXT = "outbox"
+
+
+def _encryption() -> EncryptionService:
+    return EncryptionService(current_app.config["ENCRYPTION_MASTER_KEY"])
+
+
+def backoff_delay(attempts: int) -> timedelta:
+    """Wartezeit nach dem n-ten fehlgeschlagenen Versuch (30s, 1min, 2min, ... max. 6h)."""
+    return min(BACKOFF_BASE * (2 ** max(attempts - 1, 0)), BACKOFF_MAX)
+
+
+def enqueue_email(
+    session,
+    to: str,
+    subject: str,
+    body_text: str,
+    event_type: str,
+    body_html: Optional[str] = None,
+    tenant_id=None,
+    resource_type: Optional[str] = None,
+    resource_id: Optional[str] = None,
+) -> OutboxMessage:
+    """
+    Legt eine E-Mail in der Outbox ab. Der Aufrufer committet die Session.
+
+    Args:
+        session: Session der fachlichen Transaktion
+        to: Empfaenger-Adresse
+        subject: Betreff
+        body_text: Klartext-Inhalt
+        event_type: Anlass (z.B. 'eingangsbestaetigung', 'frist_warnung')
+        body_html: Optional HTML-Inhalt
+        tenant_id: Mandant
+        resource_type / resource_id: Bezug (z.B. 'case', Fall-ID)
+    """
+    payload = json.dumps({
+        "to": to,
+        "subject": subject,
+        "body_text": body_text,
+        "body_html": body_html,
+    })
+    message = OutboxMessage(
+        tenant_id=tenant_id,
+        channel="email",
+        event_type=event_type,
+        resource_type=resource_type,
+        resource_id=str(resource_id) if resource_id else None,
+        payload_encrypted=_encryption().encrypt(payload, context=_ENCRYPTION_CONTEXT),
+        status=OutboxStatus.PENDING,
+        attempts=0,
+        next_attempt_at=datetime.now(timezone.utc),
+    )
+    session.add(message)
+    return message
+
+
+def claim_batch(session, limit: int = OUTBOX_BATCH_SIZE, now: Optional[datetime] = None) -> list:
+    """
+    Beansprucht faellige Eintraege und committet die Beanspruchung.
+
+    Gesperrte Zeilen anderer Drainer werden uebersprungen (SKIP LOCKED);
+    Eintraege mit abgelaufener Lease (Drainer abgestuerzt) werden erneut vergeben.
+    """
+    now = now or datetime.now(timezone.utc)
+    rows = session.query(OutboxMessage).filter(
+        or_(
+            and_(
+                OutboxMessage.status == OutboxStatus.PENDING,
+                OutboxMessage.next_attempt_at <= now,
+            ),
+            and_(
+                OutboxMessage.status == OutboxStatus.SENDING,
+                OutboxMessage.locked_until < now,
+            ),
+        )
+    ).order_by(
+        OutboxMessage.next_attempt_at
+    ).limit(limit).with_for_update(skip_locked=True).all()
+
+    for row in rows:
+        row.status = OutboxStatus.SENDING
+        row.locked_until = now + CLAIM_LEASE
+        row.attempts += 1
+    session.commit()
+    return rows
+
+
+def record_result(row: OutboxMessage, success: bool, error: Optional[str] = None,
+                  now: Optional[datetime] = None) -> None:
+    """Uebernimmt das Versandergebnis in den Eintrag (ohne Commit)."""
+    now = now or datetime.now(timezone.utc)
+    row.locked_until = None
+    if success:
+        row.status = OutboxStatus.SENT
+        row.sent_at = now
+        row.last_error = None
+        # Inhalt nach Versand nicht laenger vorhalten (Datensparsamkeit)
+        row.payload_encrypted = None
+    elif row.attempts >= MAX_ATTEMPTS:
+        row.status = OutboxStatus.FAILED
+        row.last_error = error
+    else:
+        row.status = OutboxStatus.PENDING
+        row.next_attempt_at = now + backoff_delay(row.attempts)
+        row.last_error = error
+
+
+def _send_rows(rows: list, concurrency: int) -> list[tuple[bool, Optional[str]]]:
+    """
+    Versendet beanspruchte Eintraege in bis zu `concurrency` parallelen
+    Teilbatches; jeder Teilbatch nutzt eine SMTP-Sitzung aus dem Pool.
+    """
+    from app.services.notification import NotificationService
+
+    encryption = _encryption()
+    outcomes: list[Optional[tuple[bool, Optional[str]]]] = [None] * len(rows)
+    messages = []
+    positions = []
+    for i, row in enumerate(rows):
+        try:
+            messages.append(json.loads(
+                encryption.decrypt(row.payload_encrypted, context=_ENCRYPTION_CONTEXT)
+            ))
+            positions.append(i)
+        except Exception as e:
+            outcomes[i] = (False, f"Entschluesselung fehlgeschlagen: {e}")
+
+    if messages:
+        notification = NotificationService()
+        chunk_size = -(-len(messages) // concurrency)
+        chunks = [messages[i:i + chunk_size] for i in range(0, len(messages), chunk_size)]
+        with ThreadPoolExecutor(max_workers=len(chunks)) as executor:
+            results = [r for chunk in executor.map(notification.send_many, chunks) for r in chunk]
+        for pos, result in zip(positions, results):
+            outcomes[pos] = (result.success, result.error)
+
+    return outcomes
+
+
+@shared_task(name="app.services.outbox.drain_outbox")
+def drain_outbox():
+    """
+    Celery-Task: Versendet faellige Outbox-Eintraege.
+    Laeuft alle paar Sekunden; mehrere Worker koennen parallel drainen.
+    """
+    concurrency = int(os.environ.get("OUTBOX_CONCURRENCY", "4"))
+    session = current_app.Session()
+    sent = 0
+    failed = 0
+
+    try:
+        for _ in range(MAX_BATCHES_PER_RUN):
+            rows = claim_batch(session)
+            if not rows:
+                break
+
+            outcomes = _send_rows(rows, concurrency)
+            now = datetime.now(timezone.utc)
+            for row, (success, error) in zip(rows, outcomes):
+                record_result(row, success, error, now=now)
+                if success:
+                    sent += 1
+                else:
+                    failed += 1
+                    log.warning(
+                        "outbox_send_failed",
+                        outbox_id=str(row.id),
+                        event_type=row.event_type,
+                        attempts=row.attempts,
+                        status=row.status.value,
+                        error=error,
+                    )
+            session.commit()
+
+            if len(rows) < OUTBOX_BATCH_SIZE:
+                break
+
+        if sent or failed:
+            log.info("outbox_drained", sent=sent, failed=failed)
+
+    except Exception as e:
+        session.rollback()
+        log.error("outbox_drain_failed", error=str(e))
+    finally:
+        session.close()
+
+    return {"sent": sent, "failed": failed}
@@ -0,0 +1,131 @@
+"""
+aitema|Hinweis - Bearbeitungszeiten
+Perzentile (p50/p90/p99) der Bearbeitungsdauer je Kategorie und Monat.
+
+    ack:      Meldung eingegangen_am -> eingangsbestaetigung_gesendet_am
+    resolve:  Fall created_at -> resolved_at
+
+Berechnung serverseitig mit percentile_cont ueber den angefragten Zeitraum;
+die partiellen Indizes ix_hinweise_tenant_eingegangen_ack und
+ix_cases_tenant_created_resolved liefern nur abgeschlossene Dauern.
+Gruppen mit weniger als MIN_GROUP_SIZE Werten werden unterdrueckt; das
+Ergebnis wird pro Mandant und Zeitraum kurz in Redis gecacht.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import Float, cast, func, select, tuple_
+from sqlalchemy.dialects.postgresql import array
+
+from app.models.case import Case
+from app.models.hinweis import Hinweis
+from app.services.analytics_rollup import ROLLUP_TIMEZONE
+from app.services.k_anonymity import cached_rows, suppression_predicate
+
+METRICS = ("ack", "resolve")
+PERCENTILES = (0.5, 0.9, 0.99)
+
+# Standardzeitraum ohne from/to
+DEFAULT_RANGE_DAYS = 365
+
+
+def parse_range(date_from: Optional[str], date_to: Optional[str],
+                now: Optional[datetime] = None) -> tuple[datetime, datetime]:
+    """
+    Zeitraum aus ISO-Datumsangaben (from inklusiv, to exklusiv, UTC).
+    Standard: die letzten DEFAULT_RANGE_DAYS Tage bis einschliesslich heute.
+
+    Raises:
+        ValueError: Bei ungueltigem Datum oder leerem Zeitraum
+    """
+    now = now or datetime.now(timezone.utc)
+
+    def parse(value: str) -> datetime:
+        parsed = datetime.fromisoformat(value)
+        return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+    # Ohne to: bis Ende des laufenden Tages, damit der Cache-Schluessel stabil bleibt
+    end = parse(date_to) if date_to else datetime.combine(
+        now.date() + timedelta(days=1), datetime.min.time(), tzinfo=timezone.utc,
+    )
+    start = parse(date_from) if date_from else end - timedelta(days=DEFAULT_RANGE_DAYS)
+    if start >= end:
+        raise ValueError("from muss vor to liegen")
+    return start, end
+
+
+def _hours(start, end):
+    return func.extract("epoch", end - start) / 3600.0
+
+
+def _month(column):
+    return func.to_char(func.timezone(ROLLUP_TIMEZONE, column), "YYYY-MM")
+
+
+def percentile_statement(tenant_id, metric: str, start: datetime, end: datetime):
+    """
+    Perzentile je (Kategorie, Monat) und je Kategorie ueber den ganzen Zeitraum
+    (GROUPING SETS, Monat = NULL). Der Monat richtet sich nach dem Startzeitpunkt.
+    """
+    if metric == "ack":
+        begin, finish = Hinweis.eingegangen_am, Hinweis.eingangsbestaetigung_gesendet_am
+        source = select(Hinweis.kategorie).where(
+            Hinweis.tenant_id == tenant_id,
+            finish.isnot(None),
+        )
+    else:
+        begin, finish = Case.created_at, Case.resolved_at
+        source = select(Hinweis.kategorie).join(
+            Hinweis, Hinweis.id == Case.hinweis_id,
+        ).where(
+            Case.tenant_id == tenant_id,
+            finish.isnot(None),
+        )
+    durations = source.add_columns(
+        _month(begin).label("month"),
+        cast(_hours(begin, finish), Float).label("hours"),
+    ).where(begin >= start, begin < end).subquery("durations")
+
+    return select(
+        durations.c.kategorie,
+        durations.c.month,
+        func.count().label("n"),
+        func.percentile_cont(array(PERCENTILES)).within_group(durations.c.hours)
+        .label("percentiles"),
+    ).group_by(
+        func.grouping_sets(
+            tuple_(durations.c.kategorie, durations.c.month),
+            tuple_(durations.c.kategorie),
+        )
+    ).having(suppression_predicate(func.count()))
+
+
+def processing_time_percentiles(session, redis_client, tenant_id, metric: str,
+                                start: datetime, end: datetime) -> dict:
+    """
+    Returns:
+        {"by_month": [...], "by_kategorie": [...]} mit Dauern in Stunden
+    """
+    if metric not in METRICS:
+        raise ValueError(f"Unbekannte Metrik: {metric}")
+
+    by_month, by_kategorie = [], []
+    stmt = percentile_statement(tenant_id, metric, start, end)
+    for row in cached_rows(session, redis_client, tenant_id, stmt):
+        entry = {
+            "kategorie": row["kategorie"],
+            "n": row["n"],
+            **{
+                f"p{round(p * 100)}": round(value, 1)
+                for p, value in zip(PERCENTILES, row["percentiles"])
+            },
+        }
+        if row["month"] is None:
+            by_kategorie.append(entry)
+        else:
+            by_month.append({"month": row["month"], **entry})
+
+    by_month.sort(key=lambda e: (e["month"], e["kategorie"]))
+    by_kategorie.sort(key=lambda e: e["kategorie"])
+    return {"by_month": by_month, "by_kategorie": by_kategorie}
@@ -0,0 +1,345 @@
+"""
+aitema|Hinweis - Verschluesselte Volltextsuche
+Invertierter Index ueber Meldungen und Faelle, ohne Klartext in der Datenbank.
+
+Beim Schreiben wird der entschluesselte Text in Woerter zerlegt, mit CISTEM
+(deutscher Stemmer) auf Stammformen reduziert und jedes Token mit einem
+mandantenspezifischen HMAC-Schluessel gehasht. Pro Token gibt es eine
+Posting-Liste (Tabelle search_postings). Fuer Praefixsuche werden zusaetzlich
+die Praefixe jedes Wortes (3 bis PREFIX_MAX_LEN Zeichen) als eigene Tokens
+abgelegt.
+
+Eine Suche hasht nur die Suchbegriffe und schneidet die Posting-Listen in
+SQL - der Korpus wird zur Suchzeit nie entschluesselt.
+
+Abfragesyntax:
+    korruption vergabe        UND (alle Begriffe)
+    betrug OR untreue         ODER (auch "ODER")
+    korrup*                   Praefix (mind. 3 Zeichen)
+"""
+
+import hashlib
+import hmac
+import re
+import uuid
+from typing import Optional
+
+from flask import current_app
+from celery import shared_task
+from sqlalchemy import and_, delete, func, insert, or_, select, union
+import structlog
+
+from app.models.case import Case
+from app.models.search_index import SearchPosting
+from app.services.encryption import EncryptionService
+
+log = structlog.get_logger()
+
+RESOURCE_TYPES = ("hinweis", "case")
+
+# Praefixe werden bis zu dieser Laenge indiziert; laengere Praefix-Suchen
+# werden auf diese Laenge gekuerzt (Treffermenge ist dann eine Obermenge)
+PREFIX_MIN_LEN = 3
+PREFIX_MAX_LEN = 10
+
+MAX_QUERY_TERMS = 10
+MAX_RESULTS = 200
+
+# Dokumente pro Batch bei der Neuindizierung
+REINDEX_BATCH_SIZE = 200
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+# Haeufige Funktionswoerter blaehen Posting-Listen auf, ohne zu unterscheiden
+# (in fold()-Form, Umlaute zusaetzlich in ae/oe/ue-Schreibweise)
+STOPWORDS = frozenset("""
+    aber alle als also am an auch auf aus bei bin bis bzw da damit dann das dass
+    dem den der des die dies diese dieser doch dort du durch ein eine einem einen
+    einer eines er es fuer fur hat hatte ich ihr im in ist ja kein man mit nach nicht
+    noch nur ob oder sich sie sind so ueber uber um und uns von vor war wie wir wird
+    wurde zu zum zur
+""".split())
+
+
+# ----------------------------------------------------------
+# Tokenisierung
+# ----------------------------------------------------------
+
+_STRIP_GE = re.compile(r"^ge(.{4,})")
+_REPL_XX = re.compile(r"(.)\1")
+_REPL_XX_BACK = re.compile(r"(.)\*")
+_STRIP_EMR = re.compile(r"e[mr]$")
+_STRIP_ND = re.compile(r"nd$")
+_STRIP_T = re.compile(r"t$")
+_STRIP_ESN = re.compile(r"[esn]$")
+
+
+def fold(word: str) -> str:
+    """Kleinschreibung und Umlaute ausschreiben (wie der Stemmer)."""
+    word = word.lower()
+    return (word.replace("ü", "u").replace("ö", "o")
+            .replace("ä", "a").replace("ß", "ss"))
+
+
+def stem(word: str) -> str:
+    """
+    CISTEM-Stemmer (Weissweiler/Fraser 2017), gross-/kleinschreibungsunabhaengig.
+
+    Erwartet ein mit fold() normalisiertes Wort.
+    """
+    word = _STRIP_GE.sub(r"\1", word)
+    word = word.replace("sch", "$").replace("ei", "%").replace("ie", "&")
+    word = _REPL_XX.sub(r"\1*", word)
+
+    while len(word) > 3:
+        if len(word) > 5:
+            word, n = _STRIP_EMR.subn("", word)
+            if n:
+                continue
+            word, n = _STRIP_ND.subn("", word)
+            if n:
+                continue
+        word, n = _STRIP_T.subn("", word)
+        if n:
+            continue
+        word, n = _STRIP_ESN.subn("", word)
+        if not n:
+            break
+
+    word = _REPL_XX_BACK.sub(r"\1\1", word)
+    return word.replace("%", "ei").replace("&", "ie").replace("$", "sch")
+
+
+def words(text: Optional[str]) -> list[str]:
+    """Normalisierte Woerter eines Textes ohne Stoppwoerter."""
+    if not text:
+        return []
+    return [w for w in (fold(m) for m in _WORD.findall(text))
+            if len(w) > 1 and w not in STOPWORDS]
+
+
+def document_tokens(*texts: Optional[str]) -> set[str]:
+    """Alle Index-Tokens eines Dokuments: Stammformen ("w:") und Praefixe ("p:")."""
+    tokens = set()
+    for text in texts:
+        for word in words(text):
+            tokens.add(f"w:{stem(word)}")
+            for n in range(PREFIX_MIN_LEN, min(len(word), PREFIX_MAX_LEN) + 1):
+                tokens.add(f"p:{word[:n]}")
+    return tokens
+
+
+def parse_query(query: str) -> list[list[str]]:
+    """
+    Zerlegt eine Suchanfrage in ODER-verknuepfte Gruppen von UND-Tokens.
+
+    Raises:
+        ValueError: Leere Anfrage, zu viele Begriffe oder zu kurzes Praefix
+    """
+    groups: list[list[str]] = [[]]
+    count = 0
+    for raw in query.split():
+        if raw.upper() in ("OR", "ODER"):
+            groups.append([])
+            continue
+        if raw.upper() in ("AND", "UND"):
+            continue
+        prefix = raw.endswith("*")
+        terms = words(raw.rstrip("*"))
+        for i, word in enumerate(terms):
+            if prefix and i == len(terms) - 1:
+                if len(word) < PREFIX_MIN_LEN:
+                    raise ValueError(f"Praefix muss mindestens {PREFIX_MIN_LEN} Zeichen haben")
+                groups[-1].append(f"p:{word[:PREFIX_MAX_LEN]}")
+            else:
+                groups[-1].append(f"w:{stem(word)}")
+            count += 1
+
+    groups = [sorted(set(g)) for g in groups if g]
+    if not groups:
+        raise ValueError("Suchanfrage enthaelt keine suchbaren Begriffe")
+    if count > MAX_QUERY_TERMS:
+        raise ValueError(f"Maximal {MAX_QUERY_TERMS} Suchbegriffe")
+    return groups
+
+
+# ----------------------------------------------------------
+# Hashing
+# ----------------------------------------------------------
+
+class TokenHasher:
+    """HMAC-SHA256 (auf 128 Bit gekuerzt) mit mandantenspezifischem Schluessel."""
+
+    def __init__(self, encryption: EncryptionService, tenant_id):
+        self._key = encryption.derive_search_key(str(tenant_id))
+
+    def __call__(self, token: str) -> str:
+        return hmac.new(self._key, token.encode("utf-8"), hashlib.sha256).hexdigest()[:32]
+
+
+def _hasher(tenant_id) -> TokenHasher:
+    return TokenHasher(EncryptionService(current_app.config["ENCRYPTION_MASTER_KEY"]), tenant_id)
+
+
+# ----------------------------------------------------------
+# Indizierung
+# ----------------------------------------------------------
+
+def index_document(session, tenant_id, resource_type: str, resource_id,
+                   *texts: Optional[str], hasher: Optional[TokenHasher] = None) -> int:
+    """
+    Ersetzt die Postings eines Dokuments (in der laufenden Transaktion).
+
+    Args:
+        texts: Entschluesselte Inhalte des Dokuments
+
+    Returns:
+        Anzahl der geschriebenen Tokens
+    """
+    hasher = hasher or _hasher(tenant_id)
+    session.execute(delete(SearchPosting).where(
+        SearchPosting.resource_type == resource_type,
+        SearchPosting.resource_id == resource_id,
+    ))
+    hashes = {hasher(t) for t in document_tokens(*texts)}
+    if hashes:
+        session.execute(insert(SearchPosting), [
+            {
+                "tenant_id": tenant_id,
+                "token_hash": h,
+                "resource_type": resource_type,
+                "resource_id": resource_id,
+            }
+            for h in hashes
+        ])
+    return len(hashes)
+
+
+def index_safely(session, tenant_id, resource_type: str, resource_id,
+                 *texts: Optional[str]) -> None:
+    """
+    index_document fuer Request-Handler: ein Indexfehler darf das Speichern
+    nicht verhindern (Savepoint; die Neuindizierung holt fehlende Eintraege nach).
+    """
+    try:
+        with session.begin_nested():
+            index_document(session, tenant_id, resource_type, resource_id, *texts)
+    except Exception as e:
+        log.warning("search_index_update_failed", resource_type=resource_type, error=str(e))
+
+
+def hinweis_texts(hinweis, encryption: EncryptionService) -> tuple:
+    """Indizierte Inhalte einer Meldung."""
+    return (
+        hinweis.titel,
+        encryption.decrypt(hinweis.beschreibung_encrypted),
+        hinweis.betroffene_abteilung,
+    )
+
+
+def case_texts(case, encryption: EncryptionService) -> tuple:
+    """Indizierte Inhalte eines Falls (Titel, Zusammenfassung, Ergebnis, Notizen)."""
+    return (
+        case.titel,
+        encryption.decrypt(case.zusammenfassung_encrypted),
+        encryption.decrypt(case.ergebnis_encrypted),
+        encryption.decrypt(case.massnahmen_encrypted),
+        encryption.decrypt(case.interne_notizen_encrypted),
+    )
+
+
+# ----------------------------------------------------------
+# Suche
+# ----------------------------------------------------------
+
+def _assigned_to(tenant_id, assignee_id):
+    """Nur Postings zu Faellen der Person und zu Meldungen dieser Faelle."""
+    own = (Case.tenant_id == tenant_id, Case.assignee_id == assignee_id)
+    return or_(
+        and_(SearchPosting.resource_type == "case",
+             SearchPosting.resource_id.in_(select(Case.id).where(*own))),
+        and_(SearchPosting.resource_type == "hinweis",
+             SearchPosting.resource_id.in_(select(Case.hinweis_id).where(*own))),
+    )
+
+
+def search(session, tenant_id, query: str, resource_type: Optional[str] = None,
+           limit: int = 50, hasher: Optional[TokenHasher] = None,
+           assignee_id: Optional[uuid.UUID] = None) -> list[tuple[str, uuid.UUID]]:
+    """
+    Beantwortet eine Suchanfrage ueber die Posting-Listen.
+
+    Jede UND-Gruppe ist ein GROUP BY ueber die Postings ihrer Token-Hashes mit
+    HAVING count = Anzahl Tokens (Schnittmenge); ODER-Gruppen werden per UNION
+    vereinigt. Mit assignee_id zaehlen nur Faelle dieser Person und deren
+    Meldungen (vor dem LIMIT).
+
+    Returns:
+        Liste von (resource_type, resource_id)
+
+    Raises:
+        ValueError: Bei ungueltiger Anfrage (siehe parse_query)
+    """
+    hasher = hasher or _hasher(tenant_id)
+    limit = max(1, min(limit, MAX_RESULTS))
+
+    selects = []
+    for group in parse_query(query):
+        hashes = [hasher(t) for t in group]
+        stmt = select(SearchPosting.resource_type, SearchPosting.resource_id).where(
+            SearchPosting.tenant_id == tenant_id,
+            SearchPosting.token_hash.in_(hashes),
+        )
+        if resource_type:
+            stmt = stmt.where(SearchPosting.resource_type == resource_type)
+        if assignee_id is not None:
+            stmt = stmt.where(_assigned_to(tenant_id, assignee_id))
+        if len(hashes) > 1:
+            stmt = stmt.group_by(
+                SearchPosting.resource_type, SearchPosting.resource_id
+            ).having(func.count() == len(hashes))
+        selects.append(stmt)
+
+    stmt = selects[0].distinct() if len(selects) == 1 else union(*selects)
+    return [tuple(row) for row in session.execute(stmt.limit(limit)).all()]
+
+
+# ----------------------------------------------------------
+# Neuindizierung
+# ----------------------------------------------------------
+
+def _reindex(session, tenant_id, model, resource_type: str, texts,
+             encryption: EncryptionService, hasher: TokenHasher) -> int:
+    count = 0
+    query = session.query(model).filter(model.tenant_id == tenant_id).order_by(model.id)
+    for obj in query.yield_per(REINDEX_BATCH_SIZE):
+        index_document(session, tenant_id, resource_type, obj.id,
+                       *texts(obj, encryption), hasher=hasher)
+        count += 1
+        if count % REINDEX_BATCH_SIZE == 0:
+            session.flush()
+    return count
+
+
+@shared_task(name="app.services.search_index.reindex_tenant")
+def reindex_tenant(tenant_id: str):
+    """Celery-Task: Baut den Suchindex eines Mandanten komplett neu auf."""
+    from app.models.case import Case
+    from app.models.hinweis import Hinweis
+
+    tenant_id = uuid.UUID(tenant_id)
+    session = current_app.Session()
+    encryption = EncryptionService(current_app.config["ENCRYPTION_MASTER_KEY"])
+    hasher = TokenHasher(encryption, tenant_id)
+    try:
+        session.execute(delete(SearchPosting).where(SearchPosting.tenant_id == tenant_id))
+        hinweise = _reindex(session, tenant_id, Hinweis, "hinweis", hinweis_texts, encryption, hasher)
+        cases = _reindex(session, tenant_id, Case, "case", case_texts, encryption, hasher)
+        session.commit()
+        log.info("search_index_rebuilt", tenant_id=str(tenant_id), hinweise=hinweise, cases=cases)
+    except Exception as e:
+        session.rollback()
+        log.error("search_index_rebuild_failed", tenant_id=str(tenant_id), error=str(e))
+    finally:
+        session.close()
+
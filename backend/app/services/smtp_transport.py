@@ -0,0 +1,300 @@
+"""
+aitema|Hinweis - SMTP Transport
+Wiederverwendbare SMTP-Verbindungen fuer den Notification Service.
+
+- SMTPConnectionPool: max. N Sitzungen pro Prozess, Leerlauf-Timeout,
+  Neuaufbau bei 421 / Verbindungsabbruch / Timeout
+- send_many(): Mehrere Nachrichten nacheinander ueber eine Sitzung
+  (ein TLS-Handshake + Login statt einem pro Nachricht)
+- AsyncSMTPTransport: Gleiches Verhalten auf Basis von aiosmtplib
+"""
+
+import os
+import time
+import smtplib
+import socket
+import asyncio
+import threading
+from contextlib import contextmanager, asynccontextmanager
+from dataclasses import dataclass
+from typing import Optional
+
+import aiosmtplib
+import structlog
+
+log = structlog.get_logger()
+
+# SMTP-Antwortcode "Service not available, closing transmission channel"
+SMTP_SERVICE_NOT_AVAILABLE = 421
+
+
+@dataclass(frozen=True)
+class SMTPSettings:
+    """Verbindungsparameter fuer den SMTP-Server."""
+    host: str
+    port: int = 587
+    user: str = ""
+    password: str = ""
+    from_addr: str = "noreply@hinweis.aitema.de"
+    security: str = "starttls"   # "starttls", "ssl" oder "none" (nur lokale Test-Sinks)
+    timeout: float = 30.0
+    pool_size: int = 4
+    idle_timeout: float = 60.0
+
+    @classmethod
+    def from_env(cls) -> "SMTPSettings":
+        """Liest die Einstellungen aus den SMTP_*-Umgebungsvariablen."""
+        security = os.environ.get("SMTP_SECURITY")
+        if not security:
+            # Abwaertskompatibel: SMTP_TLS=true -> STARTTLS, sonst SMTPS
+            security = (
+                "starttls" if os.environ.get("SMTP_TLS", "true").lower() == "true" else "ssl"
+            )
+        return cls(
+            host=os.environ.get("SMTP_HOST", ""),
+            port=int(os.environ.get("SMTP_PORT", "587")),
+            user=os.environ.get("SMTP_USER", ""),
+            password=os.environ.get("SMTP_PASSWORD", ""),
+            from_addr=os.environ.get("SMTP_FROM", "noreply@hinweis.aitema.de"),
+            security=security,
+            timeout=float(os.environ.get("SMTP_TIMEOUT", "30")),
+            pool_size=int(os.environ.get("SMTP_POOL_SIZE", "4")),
+            idle_timeout=float(os.environ.get("SMTP_IDLE_TIMEOUT", "60")),
+        )
+
+
+def _is_reconnectable(exc: Exception) -> bool:
+    """Fehler, nach denen eine neue Sitzung den Versand retten kann."""
+    if isinstance(exc, (smtplib.SMTPServerDisconnected, socket.timeout, ConnectionError)):
+        return True
+    if isinstance(exc, smtplib.SMTPResponseException):
+        return exc.smtp_code == SMTP_SERVICE_NOT_AVAILABLE
+    return False
+
+
+def _is_async_reconnectable(exc: Exception) -> bool:
+    """Wie _is_reconnectable(), fuer die Ausnahmen von aiosmtplib."""
+    if isinstance(exc, (
+        aiosmtplib.SMTPServerDisconnected, aiosmtplib.SMTPTimeoutError, aiosmtplib.SMTPConnectError,
+    )):
+        return True
+    if isinstance(exc, aiosmtplib.SMTPResponseException):
+        return exc.code == SMTP_SERVICE_NOT_AVAILABLE
+    return False
+
+
+class SMTPConnectionPool:
+    """
+    Thread-sicherer Pool von SMTP-Sitzungen.
+
+    Sitzungen werden nach Gebrauch zurueckgelegt und bei der naechsten
+    Anfrage wiederverwendet, solange sie nicht laenger als idle_timeout
+    ungenutzt waren. Sind alle pool_size Sitzungen in Benutzung, wartet
+    acquire() auf eine freie.
+    """
+
+    def __init__(self, settings: SMTPSettings):
+        self.settings = settings
+        self._idle: list[tuple[smtplib.SMTP, float]] = []
+        self._in_use = 0
+        self._cond = threading.Condition()
+
+    def _connect(self) -> smtplib.SMTP:
+        """Oeffnet eine neue Sitzung (STARTTLS/SMTPS/Klartext) inkl. Login."""
+        s = self.settings
+        if s.security == "ssl":
+            server = smtplib.SMTP_SSL(s.host, s.port, timeout=s.timeout)
+        else:
+            server = smtplib.SMTP(s.host, s.port, timeout=s.timeout)
+            if s.security == "starttls":
+                server.starttls()
+
+        if s.user and s.password:
+            server.login(s.user, s.password)
+        log.debug("smtp_session_opened", host=s.host)
+        return server
+
+    @staticmethod
+    def _close(server: smtplib.SMTP) -> None:
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+    def _take(self) -> Optional[smtplib.SMTP]:
+        """Nimmt eine noch frische Leerlauf-Sitzung (unter Lock aufrufen)."""
+        now = time.monotonic()
+        while self._idle:
+            server, released_at = self._idle.pop()
+            if now - released_at <= self.settings.idle_timeout:
+                return server
+            self._close(server)
+        return None
+
+    @contextmanager
+    def acquire(self):
+        """Stellt eine Sitzung exklusiv fuer die Dauer des with-Blocks bereit."""
+        with self._cond:
+            while not self._idle and self._in_use >= self.settings.pool_size:
+                self._cond.wait()
+            server = self._take()
+            self._in_use += 1
+
+        holder = {"server": server}
+        try:
+            if holder["server"] is None:
+                holder["server"] = self._connect()
+            yield holder
+        except Exception:
+            if holder["server"] is not None:
+                self._close(holder["server"])
+                holder["server"] = None
+            raise
+        finally:
+            with self._cond:
+                self._in_use -= 1
+                if holder["server"] is not None:
+                    self._idle.append((holder["server"], time.monotonic()))
+                self._cond.notify()
+
+    def send_many(self, envelopes: list[tuple[str, str]]) -> list[Optional[str]]:
+        """
+        Versendet mehrere Nachrichten ueber eine Sitzung.
+
+        Args:
+            envelopes: Liste von (Empfaenger, fertige Nachricht als String)
+
+        Returns:
+            Pro Nachricht None (Erfolg) oder die Fehlermeldung
+        """
+        errors: list[Optional[str]] = []
+        with self.acquire() as holder:
+            for to, message in envelopes:
+                try:
+                    try:
+                        holder["server"].sendmail(self.settings.from_addr, [to], message)
+                    except Exception as e:
+                        if not _is_reconnectable(e):
+                            raise
+                        # Sitzung verworfen (421, Timeout, Abbruch): einmal neu verbinden
+                        log.info("smtp_session_reconnect", error=str(e))
+                        self._close(holder["server"])
+                        holder["server"] = None
+                        holder["server"] = self._connect()
+                        holder["server"].sendmail(self.settings.from_addr, [to], message)
+                    errors.append(None)
+                except Exception as e:
+                    if holder["server"] is None:
+                        # Neuaufbau fehlgeschlagen: restliche Nachrichten nicht versuchen
+                        errors.extend([str(e)] * (len(envelopes) - len(errors)))
+                        break
+                    errors.append(str(e))
+        return errors
+
+    def close(self) -> None:
+        """Schliesst alle Leerlauf-Sitzungen."""
+        with self._cond:
+            while self._idle:
+                server, _ = self._idle.pop()
+                self._close(server)
+
+
+class AsyncSMTPTransport:
+    """
+    Asynchrone Variante des Pools auf Basis von aiosmtplib.
+    Muss innerhalb einer Event-Loop verwendet werden.
+    """
+
+    def __init__(self, settings: SMTPSettings):
+        self.settings = settings
+        self._idle: list[tuple[aiosmtplib.SMTP, float]] = []
+        self._slots = asyncio.Semaphore(settings.pool_size)
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        s = self.settings
+        client = aiosmtplib.SMTP(
+            hostname=s.host,
+            port=s.port,
+            timeout=s.timeout,
+            use_tls=s.security == "ssl",
+            start_tls=s.security == "starttls",
+        )
+        await client.connect()
+        if s.user and s.password:
+            await client.login(s.user, s.password)
+        return client
+
+    @staticmethod
+    async def _close(client: aiosmtplib.SMTP) -> None:
+        try:
+            await client.quit()
+        except Exception:
+            client.close()
+
+    @asynccontextmanager
+    async def acquire(self):
+        """Stellt eine Sitzung exklusiv fuer die Dauer des async-with-Blocks bereit."""
+        async with self._slots:
+            client = None
+            now = time.monotonic()
+            while self._idle:
+                candidate, released_at = self._idle.pop()
+                if now - released_at <= self.settings.idle_timeout and candidate.is_connected:
+                    client = candidate
+                    break
+                await self._close(candidate)
+
+            holder = {"client": client or await self._connect()}
+            try:
+                yield holder
+            except Exception:
+                await self._close(holder["client"])
+                holder["client"] = None
+                raise
+            finally:
+                if holder["client"] is not None:
+                    self._idle.append((holder["client"], time.monotonic()))
+
+    async def send_many(self, envelopes: list[tuple[str, str]]) -> list[Optional[str]]:
+        """Wie SMTPConnectionPool.send_many(), aber asynchron."""
+        errors: list[Optional[str]] = []
+        async with self.acquire() as holder:
+            for to, message in envelopes:
+                try:
+                    try:
+                        await holder["client"].sendmail(self.settings.from_addr, [to], message)
+                    except Exception as e:
+                        if not _is_async_reconnectable(e):
+                            raise
+                        log.info("smtp_session_reconnect", error=str(e))
+                        await self._close(holder["client"])
+                        holder["client"] = None
+                        holder["client"] = await self._connect()
+                        await holder["client"].sendmail(self.settings.from_addr, [to], message)
+                    errors.append(None)
+                except Exception as e:
+                    if holder["client"] is None:
+                        errors.extend([str(e)] * (len(envelopes) - len(errors)))
+                        break
+                    errors.append(str(e))
+        return errors
+
+    async def close(self) -> None:
+        """Schliesst alle Leerlauf-Sitzungen."""
+        while self._idle:
+            client, _ = self._idle.pop()
+            await self._close(client)
+
+
+# Ein Pool pro Prozess und Einstellungssatz (Gunicorn-Worker / Celery-Worker)
+_pools: dict[SMTPSettings, SMTPConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(settings: SMTPSettings) -> SMTPConnectionPool:
+    """Gibt den prozessweiten Pool fuer die Einstellungen zurueck."""
+    with _pools_lock:
+        pool = _pools.get(settings)
+        if pool is None:
+            pool = _pools[settings] = SMTPConnectionPool(settings)
+        return pool
@@ -4,9 +4,11 @@ DB-per-Tenant Logik fuer Multi-Mandanten-Betrieb.
 """
 
 import os
+import threading
 from typing import Optional
 
 from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, scoped_session
 from flask import Flask
 import structlog
@@ -15,6 +17,10 @@ from app.models import Base
 
 log = structlog.get_logger()
 
+# Verbindungspool je Tenant-Datenbank (database-Modus); klein, da viele Tenants
+TENANT_POOL_SIZE = int(os.environ.get("TENANT_DB_POOL_SIZE", "2"))
+TENANT_CONNECT_TIMEOUT = int(os.environ.get("TENANT_DB_CONNECT_TIMEOUT", "5"))
+
 
 class TenantManager:
     """
@@ -26,6 +32,10 @@ class TenantManager:
     3. row: Zeilenbasierte Isolation mit tenant_id (geringste Isolation)
     """
 
+    # Engines werden prozessweit geteilt (TenantManager wird pro Request erzeugt)
+    _engine_cache: dict[str, Engine] = {}
+    _engine_lock = threading.Lock()
+
     def __init__(self, app: Flask):
         self.app = app
         self.isolation_mode = os.environ.get("TENANT_ISOLATION_MODE", "row")
@@ -126,16 +136,8 @@ class TenantManager:
         tenant = session.query(Tenant).filter(Tenant.slug == tenant_id).first()
         session.close()
 
-        if not tenant:
-            return self.app.Session
-
-        if self.isolation_mode == "database" and tenant.database_url:
-            engine = create_engine(tenant.database_url)
-        elif self.isolation_mode == "schema" and tenant.database_schema:
-            engine = self.app.engine.execution_options(
-                schema_translate_map={None: tenant.database_schema}
-            )
-        else:
+        engine = self.get_engine(tenant) if tenant else None
+        if engine is None:
             return self.app.Session
 
         factory = sessionmaker(bind=engine, expire_on_commit=False)
@@ -143,6 +145,33 @@ class TenantManager:
         self._tenant_sessions[tenant_id] = tenant_session
         return tenant_session
 
+    def get_engine(self, tenant) -> Optional[Engine]:
+        """
+        Engine fuer die eigene Datenbank bzw. das eigene Schema des Tenants.
+
+        Returns:
+            None, wenn der Tenant keine eigene Ablage hat (Daten in der Master-DB)
+        """
+        if self.isolation_mode == "database" and tenant.database_url:
+            with self._engine_lock:
+                engine = self._engine_cache.get(tenant.database_url)
+                if engine is None:
+                    engine = create_engine(
+                        tenant.database_url,
+                        pool_size=TENANT_POOL_SIZE,
+                        max_overflow=TENANT_POOL_SIZE,
+                        pool_recycle=3600,
+                        pool_pre_ping=True,
+                        connect_args={"connect_timeout": TENANT_CONNECT_TIMEOUT},
+                    )
+                    self._engine_cache[tenant.database_url] = engine
+            return engine
+        if self.isolation_mode == "schema" and tenant.database_schema:
+            return self.app.engine.execution_options(
+                schema_translate_map={None: tenant.database_schema}
+            )
+        return None
+
     def cleanup(self) -> None:
         """Bereinigt alle Tenant-Sessions."""
         for session in self._tenant_sessions.values():
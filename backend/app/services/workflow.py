@@ -0,0 +1,191 @@
+"""
+aitema|Hinweis - Fall-Workflow
+Mandantenspezifische Status-Workflows fuer Faelle.
+
+Ein Workflow wird als JSON in Tenant.config["workflow"] abgelegt:
+
+    {
+        "transitions": {"offen": ["zugewiesen", "eingestellt"], ...},
+        "required_fields": {"eingestellt": ["kommentar"]},
+        "side_effects": {"abgeschlossen": ["set_closed_at"]}
+    }
+
+Zustaende sind die Werte von CaseStatus. Die Definition wird einmal in
+unveraenderliche Tabellen uebersetzt (pro Zustand eine Bitmaske der erlaubten
+Zielzustaende) und pro Mandant zwischengespeichert; eine Uebergangspruefung
+ist danach ein Bit-Test.
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from types import MappingProxyType
+from typing import Mapping
+
+import structlog
+
+from app.models.case import CaseStatus
+
+log = structlog.get_logger()
+
+STATES = tuple(s.value for s in CaseStatus)
+_BIT = {state: i for i, state in enumerate(STATES)}
+
+# Cache-Lebensdauer; andere Prozesse sehen Konfigurationsaenderungen spaetestens danach
+WORKFLOW_CACHE_TTL = 60.0
+
+
+def _set_closed_at(case, now: datetime) -> None:
+    case.closed_at = now
+
+
+def _set_eskaliert(case, now: datetime) -> None:
+    case.eskaliert = True
+    case.eskaliert_am = now
+
+
+# Erlaubte Nebenwirkungen (Name in der Konfiguration -> Funktion)
+SIDE_EFFECTS = {
+    "set_closed_at": _set_closed_at,
+    "set_eskaliert": _set_eskaliert,
+}
+
+# Bisher fest verdrahteter Workflow (Standard fuer alle Mandanten ohne Konfiguration)
+DEFAULT_WORKFLOW = {
+    "transitions": {
+        "offen": ["zugewiesen", "eingestellt"],
+        "zugewiesen": ["in_ermittlung", "eingestellt", "offen"],
+        "in_ermittlung": [
+            "stellungnahme", "massnahmen", "abgeschlossen", "eingestellt", "eskaliert",
+        ],
+        "stellungnahme": ["in_ermittlung", "massnahmen", "abgeschlossen", "eskaliert"],
+        "massnahmen": ["umsetzung", "abgeschlossen", "eskaliert"],
+        "umsetzung": ["abgeschlossen", "massnahmen"],
+        "abgeschlossen": [],                 # Endstatus
+        "eingestellt": ["offen"],            # Kann wiedereroeffnet werden
+        "eskaliert": ["in_ermittlung", "abgeschlossen"],
+    },
+    "required_fields": {},
+    "side_effects": {
+        "abgeschlossen": ["set_closed_at"],
+        "eskaliert": ["set_eskaliert"],
+    },
+}
+
+
+@dataclass(frozen=True)
+class CompiledWorkflow:
+    """Uebersetzter Workflow: Bitmasken pro Zustand, unveraenderlich."""
+    allowed: tuple[int, ...]                        # Index = Bitposition des Ausgangszustands
+    required_fields: Mapping[str, tuple[str, ...]]
+    side_effects: Mapping[str, tuple[str, ...]]
+
+    def can_transition(self, from_state: str, to_state: str) -> bool:
+        """Prueft einen Statusuebergang (Bit-Test)."""
+        return bool(self.allowed[_BIT[from_state]] >> _BIT[to_state] & 1)
+
+    def targets(self, from_state: str) -> list[str]:
+        """Alle erlaubten Zielzustaende (fuer UI-Auswahllisten)."""
+        mask = self.allowed[_BIT[from_state]]
+        return [s for s in STATES if mask >> _BIT[s] & 1]
+
+    def missing_fields(self, to_state: str, data: dict) -> list[str]:
+        """Pflichtfelder des Zielzustands, die in data fehlen oder leer sind."""
+        return [f for f in self.required_fields.get(to_state, ()) if not data.get(f)]
+
+    def apply_side_effects(self, case, to_state: str, now: datetime) -> None:
+        """Fuehrt die konfigurierten Nebenwirkungen des Zielzustands aus."""
+        for name in self.side_effects.get(to_state, ()):
+            SIDE_EFFECTS[name](case, now)
+
+
+def _lists_by_state(definition: dict, key: str) -> dict:
+    """definition[key] als {Status: [str, ...]}; fehlend oder null -> {}."""
+    section = definition.get(key)
+    if section is None:
+        return {}
+    if not isinstance(section, dict):
+        raise ValueError(f"{key} muss ein Objekt sein")
+    for state, values in section.items():
+        if state not in _BIT:
+            raise ValueError(f"Unbekannter Status: {state}")
+        if not isinstance(values, list) or not all(isinstance(v, str) for v in values):
+            raise ValueError(f"{key}.{state} muss eine Liste von Zeichenketten sein")
+    return section
+
+
+def compile_workflow(definition: dict) -> CompiledWorkflow:
+    """
+    Validiert eine Workflow-Definition und uebersetzt sie.
+
+    Raises:
+        ValueError: Bei falschen Typen, unbekannten Zustaenden, Feldern oder
+            Nebenwirkungen
+    """
+    if not isinstance(definition, dict):
+        raise ValueError("Workflow muss ein Objekt sein")
+
+    allowed = [0] * len(STATES)
+    for from_state, targets in _lists_by_state(definition, "transitions").items():
+        for to_state in targets:
+            if to_state not in _BIT:
+                raise ValueError(f"Unbekannter Status: {to_state}")
+            allowed[_BIT[from_state]] |= 1 << _BIT[to_state]
+
+    required = {
+        state: tuple(fields)
+        for state, fields in _lists_by_state(definition, "required_fields").items()
+    }
+
+    effects = {}
+    for state, names in _lists_by_state(definition, "side_effects").items():
+        for name in names:
+            if name not in SIDE_EFFECTS:
+                raise ValueError(f"Unbekannte Nebenwirkung: {name}")
+        effects[state] = tuple(names)
+
+    return CompiledWorkflow(
+        allowed=tuple(allowed),
+        required_fields=MappingProxyType(required),
+        side_effects=MappingProxyType(effects),
+    )
+
+
+DEFAULT_COMPILED = compile_workflow(DEFAULT_WORKFLOW)
+
+_cache: dict = {}
+_cache_lock = threading.Lock()
+
+
+def get_workflow(session, tenant_id) -> CompiledWorkflow:
+    """
+    Liefert den uebersetzten Workflow eines Mandanten (zwischengespeichert).
+    Ungueltige gespeicherte Definitionen fallen auf den Standard zurueck.
+    """
+    from app.models.tenant import Tenant
+
+    now = time.monotonic()
+    with _cache_lock:
+        hit = _cache.get(tenant_id)
+    if hit and now - hit[1] < WORKFLOW_CACHE_TTL:
+        return hit[0]
+
+    config = session.query(Tenant.config).filter(Tenant.id == tenant_id).scalar() or {}
+    definition = config.get("workflow")
+    workflow = DEFAULT_COMPILED
+    if definition:
+        try:
+            workflow = compile_workflow(definition)
+        except ValueError as e:
+            log.error("workflow_invalid", tenant_id=str(tenant_id), error=str(e))
+
+    with _cache_lock:
+        _cache[tenant_id] = (workflow, now)
+    return workflow
+
+
+def invalidate_workflow(tenant_id) -> None:
+    """Verwirft den zwischengespeicherten Workflow (nach Konfigurationsaenderung)."""
+    with _cache_lock:
+        _cache.pop(tenant_id, None)
@@ -1,8 +1,9 @@
 """
 aitema|Hinweis - D3: Celery-Task fuer HinSchG-Fristenalarme
-Taeglich um 08:00 Uhr: E-Mail an Sachbearbeiter bei gelben/roten Fristen.
+Taeglich um 08:00 Uhr: Eine Sammel-E-Mail pro Sachbearbeiter/in mit allen
+gelben/roten Fristen.
 
-Celery-Beat Konfiguration (in config oder celeryconfig.py):
+Celery-Beat Konfiguration (siehe configure_celery in app/__init__.py):
     beat_schedule = {
         'daily-deadline-alerts': {
             'task': 'app.tasks.deadline_alerts.send_deadline_alerts',
@@ -11,7 +12,7 @@ Celery-Beat Konfiguration (in config oder celeryconfig.py):
     }
 """
 
-from datetime import datetime, timezone
+from datetime import datetime, timezone, timedelta
 
 from celery import shared_task
 import structlog
@@ -19,6 +20,69 @@ import structlog
 log = structlog.get_logger()
 
 
+def _recipient_for(case):
+    """Empfaenger eines Fristenalarms: Sachbearbeiter/in, sonst Ersteller/in."""
+    if case.assignee and case.assignee.email:
+        return case.assignee
+    if case.created_by and case.created_by.email:
+        return case.created_by
+    return None
+
+
+def render_digest(recipient_name: str, items: list) -> tuple[str, str]:
+    """
+    Erstellt Betreff und Text einer Sammel-E-Mail.
+
+    Args:
+        recipient_name: Anzeigename des Empfaengers
+        items: Nach Dringlichkeit sortierte Liste von
+               {'case': Case, 'deadline_info': DeadlineStatus}
+
+    Returns:
+        (Betreff, Klartext)
+    """
+    red = [i for i in items if i["deadline_info"].status == "red"]
+    yellow = [i for i in items if i["deadline_info"].status == "yellow"]
+
+    if red:
+        subject = (
+            f"[AITEMA HINWEIS] UEBERFAELLIG: {len(red)} Fall/Faelle, "
+            f"{len(yellow)} Fristenwarnung(en)"
+        )
+    else:
+        subject = f"[AITEMA HINWEIS] Fristenwarnung: {len(yellow)} Fall/Faelle"
+
+    lines = []
+    for label, group in (
+        ("DRINGEND - SOFORTIGER HANDLUNGSBEDARF", red),
+        ("Warnung", yellow),
+    ):
+        if not group:
+            continue
+        lines.append(f"{label} ({len(group)}):")
+        lines.append("")
+        for item in group:
+            case = item["case"]
+            ds = item["deadline_info"]
+            lines.append(f"  Fall #{case.case_number}: {case.titel}")
+            lines.append(f"    Frist: {ds.label} (bis {ds.deadline})")
+            lines.append(f"    Direktlink: /faelle/{case.id}")
+        lines.append("")
+
+    body = f"""Guten Morgen {recipient_name},
+
+folgende Faelle erfordern Ihre Aufmerksamkeit:
+
+{chr(10).join(lines)}
+Bitte handeln Sie umgehend, um die Einhaltung des HinSchG §17 sicherzustellen.
+
+--
+aitema|Hinweis - HinSchG-konformes Meldesystem
+Diese Nachricht wurde automatisch generiert.
+"""
+    return subject, body
+
+
 @shared_task(
     name="app.tasks.deadline_alerts.send_deadline_alerts",
     bind=True,
@@ -29,123 +93,78 @@ def send_deadline_alerts(self):
     """
     Taeglich 08:00 Uhr: Sendet Fristenalarme fuer gelbe und rote Faelle.
 
-    Verarbeitet alle nicht-abgeschlossenen Faelle des Systems
-    und sendet E-Mails an die zugewiesenen Sachbearbeiter.
+    Laedt nur Faelle, deren naechste Frist in der Warnstufe liegt, samt
+    Sachbearbeiter/in und Ersteller/in in einer Abfrage. Pro Empfaenger
+    wird eine Sammel-E-Mail erstellt und in der Outbox abgelegt; der
+    Outbox-Drainer versendet sie gebuendelt.
     """
     from flask import current_app
+    from sqlalchemy.orm import joinedload
     from app.models.case import Case, CaseStatus
-    from app.services.deadline_service import get_urgent_cases
-    from app.services.notification import NotificationService
+    from app.services.deadline_service import get_urgent_cases, WARNING_DAYS
+    from app.services.outbox import enqueue_email
 
-    log.info("deadline_alerts_task_started", timestamp=datetime.now(timezone.utc).isoformat())
+    now = datetime.now(timezone.utc)
+    log.info("deadline_alerts_task_started", timestamp=now.isoformat())
 
     session = current_app.Session()
-    notification = NotificationService()
 
     try:
-        # Alle offenen Faelle laden (nicht ABGESCHLOSSEN, nicht EINGESTELLT)
-        offene_cases = session.query(Case).filter(
+        # Offene Faelle mit gelber/roter Frist inkl. Empfaenger (ein JOIN)
+        kandidaten = session.query(Case).options(
+            joinedload(Case.assignee),
+            joinedload(Case.created_by),
+        ).filter(
             Case.status.notin_([CaseStatus.ABGESCHLOSSEN, CaseStatus.EINGESTELLT]),
             Case.resolved_at.is_(None),
+            Case.next_deadline_at < now + timedelta(days=WARNING_DAYS + 1),
         ).all()
 
-        urgent_items = get_urgent_cases(offene_cases)
-
-        sent_count = 0
-        error_count = 0
+        urgent_items = get_urgent_cases(kandidaten)
 
+        # Nach Empfaenger gruppieren (Reihenfolge = Dringlichkeit bleibt erhalten)
+        digests: dict[str, dict] = {}
+        no_recipient = 0
         for item in urgent_items:
-            case = item["case"]
-            ds = item["deadline_info"]
-
-            # Empfaenger bestimmen: Sachbearbeiter oder erstellt-von
-            recipient_email = None
-            recipient_name = "Sachbearbeiter/in"
-            if case.assignee:
-                recipient_email = case.assignee.email
-                recipient_name = case.assignee.full_name
-            elif case.created_by:
-                recipient_email = case.created_by.email
-                recipient_name = case.created_by.full_name
-
-            if not recipient_email:
+            recipient = _recipient_for(item["case"])
+            if recipient is None:
+                no_recipient += 1
                 log.warning(
                     "deadline_alert_no_recipient",
-                    case_number=case.case_number,
+                    case_number=item["case"].case_number,
                 )
                 continue
+            digest = digests.setdefault(
+                recipient.email, {"name": recipient.full_name, "items": []}
+            )
+            digest["items"].append(item)
 
-            # Betreff und Body
-            if ds.status == "red":
-                subject = f"[AITEMA HINWEIS] UEBERFAELLIG: Fall #{case.case_number}"
-                urgency = "DRINGEND - SOFORTIGER HANDLUNGSBEDARF"
-            else:
-                subject = f"[AITEMA HINWEIS] Fristenwarnung: Fall #{case.case_number}"
-                urgency = "Warnung"
-
-            body = f"""Guten Morgen {recipient_name},
-
-{urgency}
-
-Fall #{case.case_number}: {case.titel}
-Frist: {ds.label}
-Status: {ds.status.upper()}
-Verbleibende Tage: {ds.days_remaining if ds.days_remaining is not None else 'N/A'}
-
-Eingangsbestaetigung erledigt: {'Ja' if ds.ack_done else 'Nein'}
-  -> Frist: {ds.ack_deadline}
-
-Abschluss-Rueckmeldung erledigt: {'Ja' if ds.resolve_done else 'Nein'}
-  -> Frist: {ds.resolve_deadline}
-
-Bitte handeln Sie umgehend, um die Einhaltung des HinSchG §17 sicherzustellen.
-
-Direktlink: /faelle/{case.id}
-
---
-aitema|Hinweis - HinSchG-konformes Meldesystem
-Diese Nachricht wurde automatisch generiert.
-"""
-
-            result = notification.send_email(
-                to=recipient_email,
+        for email, digest in digests.items():
+            subject, body = render_digest(digest["name"], digest["items"])
+            enqueue_email(
+                session,
+                to=email,
                 subject=subject,
                 body_text=body,
+                event_type="deadline_digest",
+                tenant_id=digest["items"][0]["case"].tenant_id,
             )
-
-            if result.success:
-                sent_count += 1
-                log.info(
-                    "deadline_alert_sent",
-                    case_number=case.case_number,
-                    status=ds.status,
-                    recipient=recipient_email,
-                    days_remaining=ds.days_remaining,
-                )
-            else:
-                error_count += 1
-                log.error(
-                    "deadline_alert_failed",
-                    case_number=case.case_number,
-                    recipient=recipient_email,
-                    error=result.error,
-                )
+        session.commit()
 
         log.info(
             "deadline_alerts_task_completed",
             total_urgent=len(urgent_items),
-            sent=sent_count,
-            errors=error_count,
+            recipients=len(digests),
+            no_recipient=no_recipient,
         )
 
         return {
-            "total_open_cases": len(offene_cases),
             "urgent_cases": len(urgent_items),
-            "emails_sent": sent_count,
-            "errors": error_count,
+            "recipients": len(digests),
         }
 
     except Exception as exc:
+        session.rollback()
         log.error("deadline_alerts_task_failed", error=str(exc))
         raise self.retry(exc=exc)
     finally:
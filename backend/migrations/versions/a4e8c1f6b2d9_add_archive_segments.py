@@ -0,0 +1,51 @@
+"""add_archive_segments
+
+Revision ID: a4e8c1f6b2d9
+Revises: f7c2e9b4a6d1
+Create Date: 2026-10-20 01:15:00.000000
+
+Index des Cold Archive: ausgelagerte audit_logs- und case_events-Zeilen
+liegen als verschluesselte NDJSON-Segmente in ARCHIVE_FOLDER.
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = 'a4e8c1f6b2d9'
+down_revision: Union[str, None] = 'f7c2e9b4a6d1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'archive_segments',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('kind', sa.String(length=30), nullable=False),
+        sa.Column('tenant_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('time_from', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('time_to', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('resource_ids', postgresql.ARRAY(sa.String(length=36)), nullable=False),
+        sa.Column('path', sa.String(length=500), nullable=False),
+        sa.Column('row_count', sa.Integer(), nullable=False),
+        sa.Column('size_bytes', sa.BigInteger(), nullable=False),
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True),
+                  server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('id', name='pk_archive_segments'),
+    )
+    op.create_index(
+        'ix_archive_segments_lookup', 'archive_segments',
+        ['kind', 'tenant_id', 'time_from', 'time_to'],
+    )
+    op.create_index(
+        'ix_archive_segments_resources', 'archive_segments', ['resource_ids'],
+        postgresql_using='gin',
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_archive_segments_resources', table_name='archive_segments')
+    op.drop_index('ix_archive_segments_lookup', table_name='archive_segments')
+    op.drop_table('archive_segments')
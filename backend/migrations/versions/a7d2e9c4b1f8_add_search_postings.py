@@ -0,0 +1,45 @@
+"""add_search_postings
+
+Revision ID: a7d2e9c4b1f8
+Revises: f5c1a8d3e7b2
+Create Date: 2026-10-19 17:00:00.000000
+
+Verschluesselte Volltextsuche: invertierter Index aus HMAC-Token-Hashes.
+Bestehende Daten werden mit dem Task search_index.reindex_tenant
+(POST /api/v1/search/reindex) indiziert.
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = 'a7d2e9c4b1f8'
+down_revision: Union[str, None] = 'f5c1a8d3e7b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'search_postings',
+        sa.Column('tenant_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('token_hash', sa.String(length=32), nullable=False),
+        sa.Column('resource_type', sa.String(length=20), nullable=False),
+        sa.Column('resource_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.ForeignKeyConstraint(
+            ['tenant_id'], ['tenants.id'],
+            name='fk_search_postings_tenant_id_tenants', ondelete='CASCADE',
+        ),
+        sa.PrimaryKeyConstraint(
+            'tenant_id', 'token_hash', 'resource_type', 'resource_id',
+            name='pk_search_postings',
+        ),
+    )
+    op.create_index(
+        'ix_search_postings_resource', 'search_postings', ['resource_type', 'resource_id'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_search_postings_resource', table_name='search_postings')
+    op.drop_table('search_postings')
@@ -0,0 +1,31 @@
+"""cases_tenant_forwarded_index
+
+Revision ID: b3f8d1e6a9c2
+Revises: a7d2e9c4b1f8
+Create Date: 2026-10-19 18:00:00.000000
+
+Ombudsperson-Liste: Partieller Index (tenant_id, forwarded_to_ombudsperson_at DESC)
+nur ueber weitergeleitete Faelle; ersetzt den einspaltigen Index.
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = 'b3f8d1e6a9c2'
+down_revision: Union[str, None] = 'a7d2e9c4b1f8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_cases_tenant_forwarded', 'cases',
+        ['tenant_id', sa.text('forwarded_to_ombudsperson_at DESC')],
+        postgresql_where=sa.text('forwarded_to_ombudsperson_at IS NOT NULL'),
+    )
+    op.drop_index('ix_cases_forwarded_ombudsperson', table_name='cases')
+
+
+def downgrade() -> None:
+    op.create_index('ix_cases_forwarded_ombudsperson', 'cases', ['forwarded_to_ombudsperson_at'])
+    op.drop_index('ix_cases_tenant_forwarded', table_name='cases')
@@ -0,0 +1,120 @@
+"""add_next_deadline_columns
+
+Revision ID: b7e1c9d2a4f3
+Revises: a1b2c3d4e5f6
+Create Date: 2026-10-19 09:00:00.000000
+
+D3: Materialisierte naechste Frist auf cases und hinweise
+    (next_deadline_at, next_deadline_type) + Trigger + partielle Indizes.
+    Regeln entsprechen deadline_service.compute_next_deadline() bzw.
+    Hinweis.refresh_next_deadline() (ACK_DAYS=7, RESOLVE_DAYS=90).
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = 'b7e1c9d2a4f3'
+down_revision: Union[str, None] = 'a1b2c3d4e5f6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+CASES_TRIGGER_FUNCTION = """
+CREATE OR REPLACE FUNCTION cases_set_next_deadline() RETURNS trigger AS $$
+BEGIN
+    IF NEW.resolved_at IS NOT NULL THEN
+        NEW.next_deadline_at := NULL;
+        NEW.next_deadline_type := NULL;
+    ELSIF NEW.acknowledged_at IS NULL THEN
+        NEW.next_deadline_at := COALESCE(NEW.created_at, now()) + interval '7 days';
+        NEW.next_deadline_type := 'ack';
+    ELSE
+        NEW.next_deadline_at := COALESCE(NEW.created_at, now()) + interval '90 days';
+        NEW.next_deadline_type := 'resolve';
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+HINWEISE_TRIGGER_FUNCTION = """
+CREATE OR REPLACE FUNCTION hinweise_set_next_deadline() RETURNS trigger AS $$
+BEGIN
+    IF NEW.status::text IN ('ABGESCHLOSSEN', 'ABGELEHNT') THEN
+        NEW.next_deadline_at := NULL;
+        NEW.next_deadline_type := NULL;
+    ELSIF NEW.eingangsbestaetigung_gesendet_am IS NULL THEN
+        NEW.next_deadline_at := NEW.eingangsbestaetigung_frist;
+        NEW.next_deadline_type := 'ack';
+    ELSIF NEW.rueckmeldung_gesendet_am IS NULL THEN
+        NEW.next_deadline_at := NEW.rueckmeldung_frist;
+        NEW.next_deadline_type := 'resolve';
+    ELSE
+        NEW.next_deadline_at := NULL;
+        NEW.next_deadline_type := NULL;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def upgrade() -> None:
+    op.add_column('cases',
+        sa.Column('next_deadline_at', sa.DateTime(timezone=True), nullable=True)
+    )
+    op.add_column('cases',
+        sa.Column('next_deadline_type', sa.String(10), nullable=True)
+    )
+    op.add_column('hinweise',
+        sa.Column('next_deadline_at', sa.DateTime(timezone=True), nullable=True)
+    )
+    op.add_column('hinweise',
+        sa.Column('next_deadline_type', sa.String(10), nullable=True)
+    )
+
+    # Trigger: haelt die Spalten auch bei Schreibzugriffen ausserhalb der API aktuell
+    op.execute(CASES_TRIGGER_FUNCTION)
+    op.execute("""
+        CREATE TRIGGER trg_cases_next_deadline
+        BEFORE INSERT OR UPDATE OF created_at, acknowledged_at, resolved_at ON cases
+        FOR EACH ROW EXECUTE FUNCTION cases_set_next_deadline()
+    """)
+    op.execute(HINWEISE_TRIGGER_FUNCTION)
+    op.execute("""
+        CREATE TRIGGER trg_hinweise_next_deadline
+        BEFORE INSERT OR UPDATE OF status, eingangsbestaetigung_frist,
+            eingangsbestaetigung_gesendet_am, rueckmeldung_frist, rueckmeldung_gesendet_am
+        ON hinweise
+        FOR EACH ROW EXECUTE FUNCTION hinweise_set_next_deadline()
+    """)
+
+    # Backfill (No-Op-Update feuert die Trigger)
+    op.execute("UPDATE cases SET created_at = created_at")
+    op.execute("UPDATE hinweise SET status = status")
+
+    op.create_index(
+        'ix_cases_tenant_next_deadline_open', 'cases',
+        ['tenant_id', 'next_deadline_at'],
+        postgresql_where=sa.text('resolved_at IS NULL'),
+    )
+    op.create_index(
+        'ix_hinweise_tenant_next_deadline_open', 'hinweise',
+        ['tenant_id', 'next_deadline_at'],
+        postgresql_where=sa.text('next_deadline_at IS NOT NULL'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_hinweise_tenant_next_deadline_open', table_name='hinweise')
+    op.drop_index('ix_cases_tenant_next_deadline_open', table_name='cases')
+
+    op.execute("DROP TRIGGER IF EXISTS trg_hinweise_next_deadline ON hinweise")
+    op.execute("DROP FUNCTION IF EXISTS hinweise_set_next_deadline()")
+    op.execute("DROP TRIGGER IF EXISTS trg_cases_next_deadline ON cases")
+    op.execute("DROP FUNCTION IF EXISTS cases_set_next_deadline()")
+
+    op.drop_column('hinweise', 'next_deadline_type')
+    op.drop_column('hinweise', 'next_deadline_at')
+    op.drop_column('cases', 'next_deadline_type')
+    op.drop_column('cases', 'next_deadline_at')
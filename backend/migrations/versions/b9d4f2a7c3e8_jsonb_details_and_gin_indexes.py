@@ -0,0 +1,55 @@
+"""jsonb_details_and_gin_indexes
+
+Revision ID: b9d4f2a7c3e8
+Revises: a4e8c1f6b2d9
+Create Date: 2026-10-20 02:00:00.000000
+
+audit_logs.details/changes, case_events.metadata_json und tenants.config
+von JSON auf JSONB; GIN-Indizes (jsonb_path_ops) fuer Containment-Filter
+auf audit_logs.details und case_events.metadata_json.
+
+Die Hashkette bleibt gueltig: canonical_entry serialisiert mit sortierten
+Schluesseln, die Umstellung aendert also keine Hashes.
+"""
+from typing import Sequence, Union
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision: str = 'b9d4f2a7c3e8'
+down_revision: Union[str, None] = 'a4e8c1f6b2d9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = (
+    ('audit_logs', 'details'),
+    ('audit_logs', 'changes'),
+    ('case_events', 'metadata_json'),
+    ('tenants', 'config'),
+)
+
+
+def upgrade() -> None:
+    # Bei audit_logs (partitioniert) wirkt ALTER auf alle Partitionen
+    for table, column in COLUMNS:
+        op.alter_column(
+            table, column, type_=postgresql.JSONB(),
+            postgresql_using=f'{column}::jsonb',
+        )
+    op.create_index(
+        'ix_audit_logs_details', 'audit_logs', ['details'],
+        postgresql_using='gin', postgresql_ops={'details': 'jsonb_path_ops'},
+    )
+    op.create_index(
+        'ix_case_events_metadata', 'case_events', ['metadata_json'],
+        postgresql_using='gin', postgresql_ops={'metadata_json': 'jsonb_path_ops'},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_case_events_metadata', table_name='case_events')
+    op.drop_index('ix_audit_logs_details', table_name='audit_logs')
+    for table, column in COLUMNS:
+        op.alter_column(
+            table, column, type_=postgresql.JSON(),
+            postgresql_using=f'{column}::json',
+        )
@@ -0,0 +1,33 @@
+"""archive_segment_chain_range
+
+Revision ID: c3a7e5d1f9b4
+Revises: b9d4f2a7c3e8
+Create Date: 2026-10-20 03:00:00.000000
+
+archive_segments.seq_from/seq_to: chain_seq-Bereich der Audit-Segmente,
+damit verify_chain() archivierte Kettenglieder aus den Segmenten prueft.
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = 'c3a7e5d1f9b4'
+down_revision: Union[str, None] = 'b9d4f2a7c3e8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('archive_segments', sa.Column('seq_from', sa.BigInteger(), nullable=True))
+    op.add_column('archive_segments', sa.Column('seq_to', sa.BigInteger(), nullable=True))
+    op.create_index(
+        'ix_archive_segments_chain', 'archive_segments',
+        ['tenant_id', 'seq_from', 'seq_to'],
+        postgresql_where=sa.text("kind = 'audit_logs'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_archive_segments_chain', table_name='archive_segments')
+    op.drop_column('archive_segments', 'seq_to')
+    op.drop_column('archive_segments', 'seq_from')
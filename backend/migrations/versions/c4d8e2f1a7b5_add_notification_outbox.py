@@ -0,0 +1,59 @@
+"""add_notification_outbox
+
+Revision ID: c4d8e2f1a7b5
+Revises: b7e1c9d2a4f3
+Create Date: 2026-10-19 12:00:00.000000
+
+Transaktionale Outbox fuer ausgehende Benachrichtigungen
+(siehe app/services/outbox.py).
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = 'c4d8e2f1a7b5'
+down_revision: Union[str, None] = 'b7e1c9d2a4f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'notification_outbox',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('tenant_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('channel', sa.String(20), nullable=False),
+        sa.Column('event_type', sa.String(50), nullable=False),
+        sa.Column('resource_type', sa.String(50), nullable=True),
+        sa.Column('resource_id', sa.String(255), nullable=True),
+        sa.Column('payload_encrypted', sa.Text(), nullable=True),
+        sa.Column(
+            'status',
+            sa.Enum('PENDING', 'SENDING', 'SENT', 'FAILED', name='outboxstatus'),
+            nullable=False,
+        ),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('next_attempt_at', sa.DateTime(timezone=True),
+                  server_default=sa.text('now()'), nullable=False),
+        sa.Column('locked_until', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True),
+                  server_default=sa.text('now()'), nullable=True),
+        sa.Column('sent_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(
+            ['tenant_id'], ['tenants.id'],
+            name='fk_notification_outbox_tenant_id_tenants',
+        ),
+        sa.PrimaryKeyConstraint('id', name='pk_notification_outbox'),
+    )
+    op.create_index(
+        'ix_outbox_due', 'notification_outbox', ['next_attempt_at'],
+        postgresql_where=sa.text("status IN ('PENDING', 'SENDING')"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_outbox_due', table_name='notification_outbox')
+    op.drop_table('notification_outbox')
+    sa.Enum(name='outboxstatus').drop(op.get_bind(), checkfirst=True)
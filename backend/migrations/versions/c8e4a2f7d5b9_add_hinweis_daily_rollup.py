@@ -0,0 +1,54 @@
+"""add_hinweis_daily_rollup
+
+Revision ID: c8e4a2f7d5b9
+Revises: b3f8d1e6a9c2
+Create Date: 2026-10-19 19:00:00.000000
+
+Analytics: Tagesaggregate Mandant x Eingangstag (UTC) x Kategorie x Status,
+inkl. Erstbefuellung aus hinweise.
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = 'c8e4a2f7d5b9'
+down_revision: Union[str, None] = 'b3f8d1e6a9c2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'hinweis_daily_rollup',
+        sa.Column('tenant_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('kategorie', sa.String(length=50), nullable=False),
+        sa.Column('status', sa.String(length=50), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ['tenant_id'], ['tenants.id'],
+            name='fk_hinweis_daily_rollup_tenant_id_tenants', ondelete='CASCADE',
+        ),
+        sa.PrimaryKeyConstraint(
+            'tenant_id', 'day', 'kategorie', 'status', name='pk_hinweis_daily_rollup',
+        ),
+    )
+    op.create_index('ix_hinweis_daily_rollup_day', 'hinweis_daily_rollup', ['day'])
+
+    # Enum-Spalten speichern die Member-Namen; die Aggregate die (kleingeschriebenen) Werte
+    op.execute("""
+        INSERT INTO hinweis_daily_rollup (tenant_id, day, kategorie, status, count)
+        SELECT tenant_id,
+               date(timezone('UTC', eingegangen_am)),
+               lower(kategorie::text),
+               lower(status::text),
+               count(*)
+        FROM hinweise
+        GROUP BY 1, 2, 3, 4
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_hinweis_daily_rollup_day', table_name='hinweis_daily_rollup')
+    op.drop_table('hinweis_daily_rollup')
@@ -0,0 +1,35 @@
+"""processing_time_indexes
+
+Revision ID: d2a7f4c9e1b6
+Revises: c8e4a2f7d5b9
+Create Date: 2026-10-19 20:00:00.000000
+
+Bearbeitungszeit-Perzentile: Partielle Covering-Indizes ueber bestaetigte
+Meldungen und abgeschlossene Faelle.
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = 'd2a7f4c9e1b6'
+down_revision: Union[str, None] = 'c8e4a2f7d5b9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_hinweise_tenant_eingegangen_ack', 'hinweise', ['tenant_id', 'eingegangen_am'],
+        postgresql_include=['eingangsbestaetigung_gesendet_am', 'kategorie'],
+        postgresql_where=sa.text('eingangsbestaetigung_gesendet_am IS NOT NULL'),
+    )
+    op.create_index(
+        'ix_cases_tenant_created_resolved', 'cases', ['tenant_id', 'created_at'],
+        postgresql_include=['resolved_at', 'hinweis_id'],
+        postgresql_where=sa.text('resolved_at IS NOT NULL'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_cases_tenant_created_resolved', table_name='cases')
+    op.drop_index('ix_hinweise_tenant_eingegangen_ack', table_name='hinweise')
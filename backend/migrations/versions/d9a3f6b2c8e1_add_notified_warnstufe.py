@@ -0,0 +1,57 @@
+"""add_notified_warnstufe
+
+Revision ID: d9a3f6b2c8e1
+Revises: c4d8e2f1a7b5
+Create Date: 2026-10-19 14:00:00.000000
+
+D3: Zuletzt benachrichtigte Warnstufe auf cases und hinweise.
+    Bestehende Datensaetze erhalten ihre aktuelle Stufe, damit nach dem
+    Update keine bereits versendeten Warnungen erneut rausgehen.
+    Schwellwerte wie deadline_scheduler.hinweis_thresholds()/case_thresholds().
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = 'd9a3f6b2c8e1'
+down_revision: Union[str, None] = 'c4d8e2f1a7b5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    for table in ('cases', 'hinweise'):
+        op.add_column(table,
+            sa.Column('notified_deadline_type', sa.String(10), nullable=True)
+        )
+        op.add_column(table,
+            sa.Column('notified_warnstufe', sa.String(20), nullable=True)
+        )
+
+    op.execute("""
+        UPDATE hinweise SET
+            notified_deadline_type = next_deadline_type,
+            notified_warnstufe = CASE
+                WHEN next_deadline_at <= now() THEN 'ueberfaellig'
+                WHEN next_deadline_at <= now() + interval '2 days' THEN 'kritisch'
+                ELSE 'warnung'
+            END
+        WHERE next_deadline_at IS NOT NULL
+          AND next_deadline_at <= now() + interval '4 days'
+    """)
+    op.execute("""
+        UPDATE cases SET
+            notified_deadline_type = next_deadline_type,
+            notified_warnstufe = CASE
+                WHEN next_deadline_at <= now() THEN 'ueberfaellig'
+                ELSE 'warnung'
+            END
+        WHERE next_deadline_at IS NOT NULL
+          AND next_deadline_at <= now() + interval '15 days'
+    """)
+
+
+def downgrade() -> None:
+    for table in ('hinweise', 'cases'):
+        op.drop_column(table, 'notified_warnstufe')
+        op.drop_column(table, 'notified_deadline_type')
@@ -0,0 +1,29 @@
+"""case_events_timeline_index
+
+Revision ID: e2b7c5a9d4f6
+Revises: d9a3f6b2c8e1
+Create Date: 2026-10-19 15:00:00.000000
+
+Fall-Timeline: Zusammengesetzter Index (case_id, created_at, id) fuer die
+Keyset-Paginierung; ersetzt den einspaltigen Index auf case_id.
+"""
+from typing import Sequence, Union
+from alembic import op
+
+revision: str = 'e2b7c5a9d4f6'
+down_revision: Union[str, None] = 'd9a3f6b2c8e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_case_events_case_created_id', 'case_events',
+        ['case_id', 'created_at', 'id'],
+    )
+    op.drop_index('ix_case_events_case_id', table_name='case_events', if_exists=True)
+
+
+def downgrade() -> None:
+    op.create_index('ix_case_events_case_id', 'case_events', ['case_id'])
+    op.drop_index('ix_case_events_case_created_id', table_name='case_events')
@@ -0,0 +1,88 @@
+"""partition_audit_logs
+
+Revision ID: e6b3d8a1f4c7
+Revises: d2a7f4c9e1b6
+Create Date: 2026-10-19 23:00:00.000000
+
+audit_logs wird in eine nach created_at monatlich partitionierte Tabelle
+umgebaut (Partitionen audit_logs_pYYYY_MM, UTC-Monate). Bestehende Eintraege
+werden kopiert; die Tabelle ist waehrend der Migration gesperrt
+(Wartungsfenster einplanen). Der Primaerschluessel wird (id, created_at).
+"""
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = 'e6b3d8a1f4c7'
+down_revision: Union[str, None] = 'd2a7f4c9e1b6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Partitionen im Voraus (wie AUDIT_PARTITIONS_AHEAD)
+MONTHS_AHEAD = 3
+
+INDEXES = (
+    ('ix_audit_logs_tenant_action', ['tenant_id', 'action']),
+    ('ix_audit_logs_user', ['user_id']),
+    ('ix_audit_logs_resource', ['resource_type', 'resource_id']),
+    ('ix_audit_logs_created', ['created_at']),
+    ('ix_audit_logs_tenant_created', ['tenant_id', 'created_at']),
+)
+
+
+def _add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _add_constraints(primary_key: list) -> None:
+    op.create_primary_key('pk_audit_logs', 'audit_logs', primary_key)
+    op.create_foreign_key(
+        'fk_audit_logs_tenant_id_tenants', 'audit_logs', 'tenants',
+        ['tenant_id'], ['id'], ondelete='SET NULL',
+    )
+    op.create_foreign_key(
+        'fk_audit_logs_user_id_users', 'audit_logs', 'users',
+        ['user_id'], ['id'], ondelete='SET NULL',
+    )
+    for name, columns in INDEXES:
+        op.create_index(name, 'audit_logs', columns)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    op.execute(
+        "CREATE TABLE audit_logs_partitioned (LIKE audit_logs INCLUDING DEFAULTS) "
+        "PARTITION BY RANGE (created_at)"
+    )
+
+    now = datetime.now(timezone.utc)
+    oldest = bind.execute(sa.text(
+        "SELECT min(created_at AT TIME ZONE 'UTC') FROM audit_logs"
+    )).scalar() or now
+    month = date(oldest.year, oldest.month, 1)
+    last = _add_months(date(now.year, now.month, 1), MONTHS_AHEAD)
+    while month <= last:
+        following = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE audit_logs_p{month.year:04d}_{month.month:02d} "
+            f"PARTITION OF audit_logs_partitioned "
+            f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') "
+            f"TO ('{following.isoformat()} 00:00:00+00')"
+        )
+        month = following
+
+    op.execute("INSERT INTO audit_logs_partitioned SELECT * FROM audit_logs")
+    op.execute("DROP TABLE audit_logs")
+    op.execute("ALTER TABLE audit_logs_partitioned RENAME TO audit_logs")
+    _add_constraints(['id', 'created_at'])
+
+
+def downgrade() -> None:
+    op.execute("CREATE TABLE audit_logs_plain (LIKE audit_logs INCLUDING DEFAULTS)")
+    op.execute("INSERT INTO audit_logs_plain SELECT * FROM audit_logs")
+    # Entfernt auch alle angehaengten Partitionen (archivierte bleiben erhalten)
+    op.execute("DROP TABLE audit_logs")
+    op.execute("ALTER TABLE audit_logs_plain RENAME TO audit_logs")
+    _add_constraints(['id'])
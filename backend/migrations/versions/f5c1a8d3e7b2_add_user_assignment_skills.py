@@ -0,0 +1,25 @@
+"""add_user_assignment_skills
+
+Revision ID: f5c1a8d3e7b2
+Revises: e2b7c5a9d4f6
+Create Date: 2026-10-19 16:00:00.000000
+
+Automatische Fallzuweisung: Kategorie-Kompetenzen der Fallbearbeiter/innen.
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = 'f5c1a8d3e7b2'
+down_revision: Union[str, None] = 'e2b7c5a9d4f6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('assignment_skills', postgresql.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'assignment_skills')
@@ -0,0 +1,66 @@
+"""audit_hash_chain
+
+Revision ID: f7c2e9b4a6d1
+Revises: e6b3d8a1f4c7
+Create Date: 2026-10-20 00:30:00.000000
+
+Manipulationserkennung: Hashkette je Mandant auf audit_logs
+(chain_seq, chain_hash), Kettenkoepfe und signierte Merkle-Checkpoints.
+Bestehende Eintraege werden vom Task seal_audit_chains versiegelt.
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = 'f7c2e9b4a6d1'
+down_revision: Union[str, None] = 'e6b3d8a1f4c7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('audit_logs', sa.Column('chain_seq', sa.BigInteger(), nullable=True))
+    op.add_column('audit_logs', sa.Column('chain_hash', sa.String(length=64), nullable=True))
+    op.create_index('ix_audit_logs_tenant_chain', 'audit_logs', ['tenant_id', 'chain_seq'])
+    op.create_index(
+        'ix_audit_logs_unsealed', 'audit_logs', ['tenant_id', 'created_at'],
+        postgresql_where=sa.text('chain_hash IS NULL'),
+    )
+
+    op.create_table(
+        'audit_chain_heads',
+        sa.Column('chain_key', sa.String(length=36), nullable=False),
+        sa.Column('last_seq', sa.BigInteger(), nullable=False),
+        sa.Column('last_hash', sa.String(length=64), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True),
+                  server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('chain_key', name='pk_audit_chain_heads'),
+    )
+    op.create_table(
+        'audit_checkpoints',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('chain_key', sa.String(length=36), nullable=False),
+        sa.Column('seq_from', sa.BigInteger(), nullable=False),
+        sa.Column('seq_to', sa.BigInteger(), nullable=False),
+        sa.Column('last_hash', sa.String(length=64), nullable=False),
+        sa.Column('merkle_root', sa.String(length=64), nullable=False),
+        sa.Column('signature', sa.String(length=64), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True),
+                  server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('id', name='pk_audit_checkpoints'),
+    )
+    op.create_index(
+        'ix_audit_checkpoints_chain_seq', 'audit_checkpoints', ['chain_key', 'seq_to'],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_audit_checkpoints_chain_seq', table_name='audit_checkpoints')
+    op.drop_table('audit_checkpoints')
+    op.drop_table('audit_chain_heads')
+    op.drop_index('ix_audit_logs_unsealed', table_name='audit_logs')
+    op.drop_index('ix_audit_logs_tenant_chain', table_name='audit_logs')
+    op.drop_column('audit_logs', 'chain_hash')
+    op.drop_column('audit_logs', 'chain_seq')
@@ -0,0 +1,118 @@
+"""
+aitema|Hinweis - Analytics Dashboard Tests
+Monatsreihe und Redis-Cache (Stale-While-Revalidate, Single-Flight).
+"""
+
+import json
+import time
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, func, insert, select
+
+from app.services import analytics_dashboard
+from app.services.analytics_dashboard import get_dashboard, month_starts, monthly_cells
+from app.services.k_anonymity import MIN_GROUP_SIZE
+
+
+class _CacheRedis:
+    """Minimaler Redis-Ersatz mit den vom Dashboard-Cache genutzten Befehlen."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+class TestMonatsreihe:
+    """Tests fuer month_starts."""
+
+    def test_jahreswechsel(self):
+        """12 Monate inkl. laufendem Monat, ueber den Jahreswechsel."""
+        assert month_starts(datetime(2026, 1, 15)) == (datetime(2025, 2, 1), datetime(2026, 1, 1))
+
+
+    def test_einzelner_maskierter_monat_nicht_rueckrechenbar(self):
+        """Ein Monat mit einer Meldung wird mit einem weiteren Monat maskiert."""
+        metadata = MetaData()
+        rollup = Table("rollup", metadata, Column("month", String), Column("count", Integer))
+        engine = create_engine("sqlite://")
+        metadata.create_all(engine)
+        with engine.begin() as conn:
+            conn.execute(insert(rollup), [
+                {"month": "2026-01", "count": 10},
+                {"month": "2026-02", "count": 1},
+                {"month": "2026-03", "count": 5},
+                {"month": "2026-04", "count": 7},
+            ])
+            rows = conn.execute(monthly_cells(
+                select().select_from(rollup), rollup.c.month, func.sum(rollup.c.count),
+            )).all()
+
+        total = 23  # wie total_cases: alle Meldungen liegen im Zeitraum
+        masked = sorted(r.month for r in rows if r.n is None)
+        assert masked == ["2026-02", "2026-03"]
+        assert total - sum(r.n for r in rows if r.n is not None) >= MIN_GROUP_SIZE
+
+
+class TestDashboardCache:
+    """Tests fuer get_dashboard."""
+
+    def _count_computes(self, monkeypatch):
+        calls = []
+        monkeypatch.setattr(
+            analytics_dashboard, "compute_dashboard",
+            lambda session, tenant_id, now=None: calls.append(tenant_id) or {"total_cases": len(calls)},
+        )
+        return calls
+
+    def test_frischer_eintrag_ohne_berechnung(self, monkeypatch):
+        """Zweiter Abruf kommt aus dem Cache."""
+        calls = self._count_computes(monkeypatch)
+        redis = _CacheRedis()
+        assert get_dashboard(None, redis, "t1") == {"total_cases": 1}
+        assert get_dashboard(None, redis, "t1") == {"total_cases": 1}
+        assert len(calls) == 1
+        assert "analytics_dashboard:t1:lock" not in redis.data
+
+    def test_veralteter_eintrag_wird_ausgeliefert(self, monkeypatch):
+        """Veralteter Stand wird sofort geliefert, Neuberechnung genau einmal angestossen."""
+        self._count_computes(monkeypatch)
+        enqueued = []
+        monkeypatch.setattr(
+            analytics_dashboard, "_revalidate",
+            lambda session, redis_client, tenant_id, token: enqueued.append(token),
+        )
+        redis = _CacheRedis()
+        redis.data["analytics_dashboard:t1"] = json.dumps({
+            "computed_at": time.time() - analytics_dashboard.DASHBOARD_FRESH_SECONDS - 1,
+            "data": {"total_cases": 7},
+        })
+
+        assert get_dashboard(None, redis, "t1") == {"total_cases": 7}
+        assert get_dashboard(None, redis, "t1") == {"total_cases": 7}
+        assert len(enqueued) == 1
+
+    def test_laufende_berechnung_wird_abgewartet(self, monkeypatch):
+        """Ohne Sperre wird auf das Ergebnis der anderen Instanz gewartet."""
+        calls = self._count_computes(monkeypatch)
+        redis = _CacheRedis()
+        redis.data["analytics_dashboard:t1:lock"] = "fremd"
+
+        def sleep(_):
+            redis.data["analytics_dashboard:t1"] = json.dumps(
+                {"computed_at": time.time(), "data": {"total_cases": 3}}
+            )
+
+        monkeypatch.setattr(analytics_dashboard.time, "sleep", sleep)
+        assert get_dashboard(None, redis, "t1") == {"total_cases": 3}
+        assert calls == []
@@ -0,0 +1,38 @@
+"""
+aitema|Hinweis - Analytics Rollup Tests
+Tagesgrenzen und Dashboard auf Basis der Tagesaggregate.
+"""
+
+from datetime import date, datetime, timedelta, timezone
+
+from app.services.analytics_rollup import rollup_day
+
+
+class TestRollupDay:
+    """Tests fuer die Zuordnung zum Eingangstag."""
+
+    def test_utc_tagesgrenze(self):
+        """Eingang kurz nach Mitternacht MEZ zaehlt zum UTC-Vortag."""
+        mez = timezone(timedelta(hours=1))
+        assert rollup_day(datetime(2026, 3, 2, 0, 30, tzinfo=mez)) == date(2026, 3, 1)
+
+    def test_naive_zeit_gilt_als_utc(self):
+        """Zeitstempel ohne Zeitzone werden als UTC behandelt."""
+        assert rollup_day(datetime(2026, 3, 2, 23, 59)) == date(2026, 3, 2)
+
+
+class TestDashboard:
+    """Tests fuer GET /analytics/dashboard."""
+
+    def test_dashboard_aus_rollups(self, client, auth_headers, db_session, sample_hinweis):
+        """Eine neue Meldung erscheint in Gesamtzahl und Statusverteilung."""
+        from app.services.analytics_rollup import reconcile_tenant
+
+        reconcile_tenant(db_session, sample_hinweis.tenant_id)
+        db_session.flush()
+
+        response = client.get("/api/v1/analytics/dashboard", headers=auth_headers)
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data["total_cases"] >= 1
+        assert sum(s["count"] for s in data["statuses"]) == data["total_cases"]
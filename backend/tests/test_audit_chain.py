@@ -0,0 +1,214 @@
+"""
+aitema|Hinweis - Audit-Hashkette Tests
+Kanonische Darstellung, Merkle-Wurzel, Checkpoint-Signatur und Kettenpruefung.
+"""
+
+import heapq
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from app.models.audit_log import AuditAction
+from app.services.audit_chain import (
+    GENESIS_HASH,
+    ChainVerification,
+    CheckpointSigner,
+    canonical_entry,
+    check_links,
+    entry_hash,
+    merkle_root,
+)
+from app.services.cold_archive import (
+    AUDIT_KIND,
+    ArchivedChain,
+    merge_chain_rows,
+    read_segment,
+    write_segments,
+)
+from app.services.encryption import EncryptionService
+
+ENCRYPTION = EncryptionService("test-encryption-master-key-32chars!")
+SIGNER = CheckpointSigner(ENCRYPTION)
+TENANT = uuid.uuid4()
+START = datetime(2026, 10, 1, 8, 0, tzinfo=timezone.utc)
+
+
+def _entry(i: int) -> dict:
+    return {
+        "id": uuid.UUID(int=i),
+        "tenant_id": TENANT,
+        "user_id": None,
+        "action": AuditAction.SUBMISSION_VIEWED,
+        "resource_type": "hinweis",
+        "resource_id": str(uuid.UUID(int=1000 + i)),
+        "description": None,
+        "details": {"b": 1, "a": [1, 2]},
+        "changes": None,
+        "ip_address": "10.0.0.1",
+        "user_agent": "pytest",
+        "request_method": "GET",
+        "request_path": "/api/v1/submissions/x",
+        "request_id": None,
+        "success": True,
+        "error_message": None,
+        "created_at": START + timedelta(minutes=i),
+    }
+
+
+def _chain(count: int) -> list[dict]:
+    rows, prev = [], GENESIS_HASH
+    for seq in range(1, count + 1):
+        prev = entry_hash(prev, _entry(seq), seq)
+        rows.append({**_entry(seq), "chain_seq": seq, "chain_hash": prev})
+    return rows
+
+
+def _checkpoint(rows: list[dict], seq_from: int, seq_to: int) -> dict:
+    window = [r["chain_hash"] for r in rows if seq_from <= r["chain_seq"] <= seq_to]
+    checkpoint = {
+        "chain_key": str(TENANT),
+        "seq_from": seq_from,
+        "seq_to": seq_to,
+        "last_hash": window[-1],
+        "merkle_root": merkle_root(window),
+    }
+    checkpoint["signature"] = SIGNER.sign(
+        checkpoint["chain_key"], seq_from, seq_to, checkpoint["last_hash"],
+        checkpoint["merkle_root"],
+    )
+    return checkpoint
+
+
+def _verify(rows, checkpoints=(), seq_hi=None) -> ChainVerification:
+    result = ChainVerification(chain_key=str(TENANT))
+    check_links(result, SIGNER, rows, GENESIS_HASH, 1, seq_hi or 6, checkpoints)
+    return result
+
+
+class TestKanonisch:
+    """Tests fuer canonical_entry und entry_hash."""
+
+    def test_unabhaengig_von_zeitzone_und_schluesselreihenfolge(self):
+        """Gleicher Zeitpunkt in anderer Zeitzone und andere Key-Reihenfolge ergeben denselben Hash."""
+        entry = _entry(1)
+        other = {
+            **entry,
+            "details": {"a": [1, 2], "b": 1},
+            "created_at": entry["created_at"].astimezone(timezone(timedelta(hours=2))),
+        }
+        assert canonical_entry(entry, 1) == canonical_entry(other, 1)
+
+    def test_nummer_geht_in_hash_ein(self):
+        """Ein verschobenes Glied hat einen anderen Hash."""
+        assert entry_hash(GENESIS_HASH, _entry(1), 1) != entry_hash(GENESIS_HASH, _entry(1), 2)
+
+
+class TestMerkle:
+    """Tests fuer merkle_root und CheckpointSigner."""
+
+    def test_ungerade_anzahl(self):
+        """Drei Blaetter: letzter Knoten wird gedoppelt."""
+        hashes = [r["chain_hash"] for r in _chain(3)]
+        assert merkle_root(hashes) == merkle_root(hashes + hashes[-1:])
+        assert merkle_root(hashes) != merkle_root(hashes[:2])
+
+    def test_signatur(self):
+        """Geaenderte Checkpoint-Felder machen die Signatur ungueltig."""
+        checkpoint = _checkpoint(_chain(3), 1, 3)
+        assert SIGNER.verify(checkpoint)
+        assert not SIGNER.verify({**checkpoint, "seq_to": 2})
+
+
+class TestKettenpruefung:
+    """Tests fuer check_links."""
+
+    def test_intakte_kette(self):
+        """Unveraenderte Kette mit Checkpoints ist gueltig."""
+        rows = _chain(6)
+        result = _verify(rows, [_checkpoint(rows, 1, 3), _checkpoint(rows, 4, 6)])
+        assert result.ok
+        assert result.checked == 6
+        assert result.checkpoints == 2
+
+    def test_geaenderter_eintrag(self):
+        """Eine Aenderung faellt genau an diesem Glied auf."""
+        rows = _chain(6)
+        rows[2] = {**rows[2], "description": "nachtraeglich geaendert"}
+        result = _verify(rows)
+        assert [(e["reason"], e["seq"]) for e in result.errors] == [("hash_mismatch", 3)]
+
+    def test_geloeschter_eintrag(self):
+        """Ein entferntes Glied ist eine Luecke; der Checkpoint stimmt nicht mehr."""
+        rows = _chain(6)
+        checkpoints = [_checkpoint(rows, 1, 3), _checkpoint(rows, 4, 6)]
+        del rows[4]
+        reasons = [e["reason"] for e in _verify(rows, checkpoints).errors]
+        assert reasons == ["missing", "hash_mismatch", "checkpoint_merkle_root"]
+
+    def test_abgeschnittenes_ende(self):
+        """Fehlende Glieder bis zum Kettenkopf werden erkannt."""
+        rows = _chain(6)
+        result = _verify(rows[:4], seq_hi=6)
+        assert [(e["reason"], e["seq"]) for e in result.errors] == [("missing", 5), ("missing", 6)]
+
+    def test_neu_berechnete_kette(self):
+        """Eine komplett neu berechnete Kette besteht die Hashpruefung, nicht die Checkpoints."""
+        original = _chain(3)
+        checkpoint = _checkpoint(original, 1, 3)
+        forged, prev = [], GENESIS_HASH
+        for row in original:
+            entry = {**row, "success": False}
+            prev = entry_hash(prev, entry, row["chain_seq"])
+            forged.append({**entry, "chain_hash": prev})
+
+        result = _verify(forged, [checkpoint], seq_hi=3)
+        assert [e["reason"] for e in result.errors] == ["checkpoint_last_hash"]
+
+
+class TestArchivierteGlieder:
+    """Tests fuer die Pruefung von Gliedern aus dem Cold Archive."""
+
+    def test_segmente_bleiben_pruefbar(self, tmp_path):
+        """Aus Segmenten gelesene Glieder haben dieselben Hashes wie in der Datenbank."""
+        pytest.importorskip("zstandard")
+        rows = _chain(6)
+        # Segmentgrenzen nach created_at: chain_seq 2 wurde spaeter versiegelt
+        archived = [rows[0], rows[2], rows[1]]
+        segments = [
+            SimpleNamespace(**segment) for segment in write_segments(
+                str(tmp_path), AUDIT_KIND, TENANT, archived, ENCRYPTION, "resource_id",
+                max_rows=2,
+            )
+        ]
+        assert [(s.seq_from, s.seq_to) for s in segments] == [(1, 3), (2, 2)]
+
+        read = lambda segment: read_segment(segment, str(tmp_path), ENCRYPTION)  # noqa: E731
+        links = heapq.merge(
+            merge_chain_rows(segments, read, 1, 6), rows[3:], key=lambda row: row["chain_seq"],
+        )
+        result = _verify(links, [_checkpoint(rows, 1, 4)])
+        assert result.ok, result.errors
+        assert result.checked == 6
+
+    def test_bereich(self):
+        """Nur Glieder im angefragten Bereich, aufsteigend ueber ueberlappende Segmente."""
+        segments = [SimpleNamespace(seq_from=1, seq_to=4), SimpleNamespace(seq_from=3, seq_to=5)]
+        content = {1: [{"chain_seq": 1}, {"chain_seq": 4}, {"chain_seq": 2}],
+                   3: [{"chain_seq": 5}, {"chain_seq": 3}]}
+        merged = merge_chain_rows(segments, lambda s: content[s.seq_from], 2, 4)
+        assert [row["chain_seq"] for row in merged] == [2, 3, 4]
+
+    def test_unlesbares_segment(self, tmp_path):
+        """Ein fehlendes Segment liefert keine Glieder; die Pruefung meldet sie als fehlend."""
+        archive = ArchivedChain(None, str(tmp_path), ENCRYPTION)
+        segment = SimpleNamespace(id=uuid.uuid4(), path="fehlt.ndjson.zst.enc", seq_from=1)
+        links = heapq.merge(
+            merge_chain_rows([segment], archive._read, 1, 6), _chain(6)[3:],
+            key=lambda row: row["chain_seq"],
+        )
+        result = _verify(links)
+        assert [(e["reason"], e["seq"]) for e in result.errors] == [
+            ("missing", 1), ("missing", 2), ("missing", 3), ("hash_mismatch", 4),
+        ]
@@ -0,0 +1,58 @@
+"""
+aitema|Hinweis - Audit-Detailfilter Tests
+JSONB-Spalten, GIN-Indizes und Containment-Filter auf details.
+"""
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex
+
+from app.models.audit_log import AuditLog
+from app.models.case import CaseEvent
+from app.services.audit import _archive_predicate, _json_contains
+
+
+def _index(table, name: str) -> str:
+    (index,) = [i for i in table.indexes if i.name == name]
+    return str(CreateIndex(index).compile(dialect=postgresql.dialect()))
+
+
+class TestIndizes:
+    """Tests fuer die GIN-Indizes."""
+
+    def test_audit_details(self):
+        """details ist JSONB mit GIN-Index (jsonb_path_ops)."""
+        assert isinstance(AuditLog.__table__.c.details.type, postgresql.JSONB)
+        assert "USING gin (details jsonb_path_ops)" in _index(
+            AuditLog.__table__, "ix_audit_logs_details",
+        )
+
+    def test_case_event_metadata(self):
+        """metadata_json ist JSONB mit GIN-Index (jsonb_path_ops)."""
+        assert "USING gin (metadata_json jsonb_path_ops)" in _index(
+            CaseEvent.__table__, "ix_case_events_metadata",
+        )
+
+    def test_filter_nutzt_containment(self):
+        """Der Detailfilter wird zu details @> ... (indexfaehig)."""
+        stmt = select(AuditLog.id).where(AuditLog.details.contains({"reason": "wrong_password"}))
+        assert "audit_logs.details @>" in str(stmt.compile(dialect=postgresql.dialect()))
+
+
+class TestContainment:
+    """Tests fuer _json_contains und den Detailfilter archivierter Zeilen."""
+
+    def test_objekte_und_listen(self):
+        """Teilobjekte und Teilmengen von Listen sind enthalten, wie bei @>."""
+        document = {"reason": "wrong_password", "tags": ["a", "b"], "meta": {"x": 1, "y": 2}}
+        assert _json_contains(document, {"reason": "wrong_password"})
+        assert _json_contains(document, {"tags": ["b"], "meta": {"y": 2}})
+        assert not _json_contains(document, {"tags": ["c"]})
+        assert not _json_contains(document, {"reason": "account_locked"})
+        assert not _json_contains(None, {"reason": "wrong_password"})
+
+    def test_archivierte_zeilen(self):
+        """Archivierte Zeilen werden mit derselben Semantik gefiltert."""
+        row = {"details": {"reason": "wrong_password", "email": "x@example.org"}}
+        assert _archive_predicate(None, None, None, None, {"reason": "wrong_password"})(row)
+        assert not _archive_predicate(None, None, None, None, {"reason": "invalid_mfa"})(row)
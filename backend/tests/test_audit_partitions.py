@@ -0,0 +1,118 @@
+"""
+aitema|Hinweis - Audit-Partitionen Tests
+Monatsgrenzen, DDL und Aufbewahrung der audit_logs-Partitionen.
+"""
+
+from datetime import date, datetime, timezone
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateTable
+
+from app.models.audit_log import AuditLog
+from app.services.audit_partitions import (
+    add_months,
+    apply_retention,
+    ensure_partitions,
+    expired_months,
+    partition_ddl,
+    partition_month,
+    partition_name,
+)
+
+
+class _Result(list):
+    pass
+
+
+class _RecordingConn:
+    """Verbindungs-Ersatz: liefert vorhandene Partitionen, sammelt DDL."""
+
+    dialect = postgresql.dialect()
+
+    def __init__(self, partitions=()):
+        self.partitions = list(partitions)
+        self.statements = []
+
+    def execute(self, stmt, params=None):
+        sql = str(stmt)
+        if "pg_inherits" in sql:
+            return _Result((name,) for name in self.partitions)
+        self.statements.append(sql)
+        return _Result()
+
+
+NOW = datetime(2026, 10, 19, 12, 0, tzinfo=timezone.utc)
+
+
+class TestMonate:
+    """Tests fuer Monatsrechnung und Partitionsnamen."""
+
+    def test_jahreswechsel(self):
+        """add_months rechnet ueber Jahresgrenzen."""
+        assert add_months(date(2026, 11, 1), 3) == date(2027, 2, 1)
+        assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+
+    def test_name_roundtrip(self):
+        """Partitionsname und Monat sind umkehrbar; fremde Tabellen werden ignoriert."""
+        assert partition_name(date(2026, 3, 1)) == "audit_logs_p2026_03"
+        assert partition_month("audit_logs_p2026_03") == date(2026, 3, 1)
+        assert partition_month("audit_logs_default") is None
+
+
+class TestDDL:
+    """Tests fuer Tabellen- und Partitions-DDL."""
+
+    def test_tabelle_partitioniert(self):
+        """audit_logs ist nach created_at partitioniert, created_at im Primaerschluessel."""
+        ddl = str(CreateTable(AuditLog.__table__).compile(dialect=postgresql.dialect()))
+        assert "PARTITION BY RANGE (created_at)" in ddl
+        assert {c.name for c in AuditLog.__table__.primary_key} == {"id", "created_at"}
+
+    def test_partition_mit_schema(self):
+        """Monatsgrenzen in UTC, Tenant-Schema wird qualifiziert."""
+        ddl = partition_ddl(_RecordingConn(), date(2026, 12, 1), schema="tenant_a")
+        assert ddl == (
+            "CREATE TABLE IF NOT EXISTS tenant_a.audit_logs_p2026_12 "
+            "PARTITION OF tenant_a.audit_logs "
+            "FOR VALUES FROM ('2026-12-01 00:00:00+00') TO ('2027-01-01 00:00:00+00')"
+        )
+
+    def test_nur_fehlende_partitionen(self):
+        """Vorhandene Monate werden nicht erneut angelegt."""
+        conn = _RecordingConn(["audit_logs_p2026_10", "audit_logs_p2026_11"])
+        created = ensure_partitions(conn, now=NOW, ahead=3)
+        assert created == ["audit_logs_p2026_12", "audit_logs_p2027_01"]
+        assert len(conn.statements) == 2
+
+
+class TestAufbewahrung:
+    """Tests fuer expired_months und apply_retention."""
+
+    def test_nur_vollstaendig_abgelaufene_monate(self):
+        """Ein Monat laeuft erst ab, wenn er ganz vor der Grenze liegt."""
+        months = [date(2023, 9, 1), date(2023, 10, 1), date(2023, 11, 1)]
+        assert expired_months(months, NOW, 36) == [date(2023, 9, 1)]
+        assert expired_months(months, NOW, 0) == []
+
+    def test_archivieren(self):
+        """Abgelaufene Partitionen werden abgehaengt und ins Archiv-Schema verschoben."""
+        conn = _RecordingConn(["audit_logs_p2023_08", "audit_logs_p2026_10"])
+        removed = apply_retention(conn, now=NOW, retention_months=36, mode="archive")
+        assert removed == ["audit_logs_p2023_08"]
+        assert conn.statements == [
+            "ALTER TABLE audit_logs DETACH PARTITION audit_logs_p2023_08",
+            "CREATE SCHEMA IF NOT EXISTS audit_archive",
+            "ALTER TABLE audit_logs_p2023_08 SET SCHEMA audit_archive",
+        ]
+
+    def test_loeschen(self):
+        """Im drop-Modus wird die abgehaengte Partition geloescht."""
+        conn = _RecordingConn(["audit_logs_p2023_08"])
+        apply_retention(conn, now=NOW, retention_months=36, mode="drop")
+        assert conn.statements[-1] == "DROP TABLE audit_logs_p2023_08"
+
+    def test_unbekannter_modus(self):
+        """Unbekannte Modi werden abgelehnt."""
+        with pytest.raises(ValueError):
+            apply_retention(_RecordingConn(), now=NOW, mode="truncate")
@@ -0,0 +1,224 @@
+"""
+aitema|Hinweis - Audit-Writer Tests
+Puffer, Redis-Fallback und Nachschreiben ausgelagerter Eintraege.
+"""
+
+import json
+import time
+import uuid
+from contextlib import contextmanager
+
+from redis import RedisError
+from sqlalchemy.exc import DataError, OperationalError
+
+from app.models.audit_log import AuditAction
+from app.services import audit_writer
+from app.services.audit_writer import (
+    AUDIT_DEAD_LETTER_KEY,
+    AUDIT_FALLBACK_KEY,
+    AuditBuffer,
+    audit_row,
+    deserialize_row,
+    drain_audit_fallback,
+    serialize_row,
+)
+
+
+class _FakeEngine:
+    """Engine-Ersatz, der geschriebene Zeilen sammelt oder ausfaellt."""
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.batches = []
+
+    @contextmanager
+    def begin(self):
+        if self.fail:
+            raise OperationalError("INSERT", {}, Exception("connection refused"))
+        yield self
+
+    def execute(self, stmt, rows):
+        # Wie Postgres: eine zu lange request_id laesst das ganze Statement scheitern
+        if any(len(r["request_id"] or "") > 36 for r in rows):
+            raise DataError("INSERT", {}, Exception("value too long for type character varying(36)"))
+        self.batches.append(list(rows))
+
+
+class _ListRedis:
+    """Minimaler Redis-Ersatz mit Listen- und Lock-Befehlen."""
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.lists = {}
+        self.data = {}
+
+    def rpush(self, key, *values):
+        if self.fail:
+            raise RedisError("connection refused")
+        self.lists.setdefault(key, []).extend(values)
+
+    def lrange(self, key, start, end):
+        return self.lists.get(key, [])[start:end + 1]
+
+    def ltrim(self, key, start, end):
+        self.lists[key] = self.lists.get(key, [])[start:]
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+def _row(**fields):
+    return audit_row(AuditAction.LOGIN_FAILED, **fields)
+
+
+class TestAuditRow:
+    """Tests fuer audit_row und die Serialisierung."""
+
+    def test_ohne_request_kontext(self):
+        """Ausserhalb eines Requests bleiben die Request-Felder leer."""
+        row = _row(details={"reason": "user_not_found"})
+        assert isinstance(row["id"], uuid.UUID)
+        assert row["created_at"].tzinfo is not None
+        assert row["ip_address"] is None
+        assert row["details"] == {"reason": "user_not_found"}
+
+    def test_request_kontext_gekuerzt(self, app):
+        """Client-Header werden auf die Spaltenbreite gekuerzt."""
+        with app.test_request_context("/", headers={"X-Request-ID": "x" * 100}):
+            row = _row()
+        assert row["request_id"] == "x" * 36
+
+    def test_serialisierung_roundtrip(self):
+        """Redis-Format liefert dieselben Spaltenwerte zurueck."""
+        row = _row(tenant_id=uuid.uuid4(), user_id=uuid.uuid4(), ip_address="10.0.0.1")
+        restored = deserialize_row(serialize_row(row))
+        assert restored == row
+        assert restored["action"] is AuditAction.LOGIN_FAILED
+
+
+class TestAuditBuffer:
+    """Tests fuer AuditBuffer."""
+
+    def test_flush_ein_insert(self):
+        """Alle gepufferten Eintraege gehen in einem Statement raus."""
+        engine = _FakeEngine()
+        buffer = AuditBuffer(engine, _ListRedis(), max_seconds=60, seal=False)
+        for _ in range(3):
+            buffer.add(_row())
+
+        assert buffer.flush() == 3
+        assert len(engine.batches) == 1
+        assert len(engine.batches[0]) == 3
+        assert len(buffer) == 0
+        buffer.close()
+
+    def test_groessenschwelle_weckt_flusher(self):
+        """Bei max_rows schreibt der Hintergrund-Thread ohne Wartezeit."""
+        engine = _FakeEngine()
+        buffer = AuditBuffer(engine, _ListRedis(), max_rows=2, max_seconds=60, seal=False)
+        buffer.add(_row())
+        buffer.add(_row())
+
+        deadline = time.monotonic() + 5
+        while not engine.batches and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert sum(len(b) for b in engine.batches) == 2
+        buffer.close()
+
+    def test_datenbank_ausfall_nach_redis(self):
+        """Ohne Datenbank landen die Eintraege in der Redis-Liste."""
+        redis = _ListRedis()
+        buffer = AuditBuffer(_FakeEngine(fail=True), redis, max_seconds=60)
+        row = _row()
+        buffer.add(row)
+
+        assert buffer.flush() == 1
+        pending = redis.lists[AUDIT_FALLBACK_KEY]
+        assert json.loads(pending[0])["id"] == str(row["id"])
+        buffer.close()
+
+    def test_fehlerhafte_zeile_blockiert_batch_nicht(self):
+        """Eine nicht schreibbare Zeile landet in der Dead-Letter-Liste, der Rest in der DB."""
+        redis, engine = _ListRedis(), _FakeEngine()
+        buffer = AuditBuffer(engine, redis, max_seconds=60, seal=False)
+        rows = [_row() for _ in range(5)]
+        rows[3]["request_id"] = "y" * 80
+        for row in rows:
+            buffer.add(row)
+
+        assert buffer.flush() == 4
+        written = [r["id"] for batch in engine.batches for r in batch]
+        assert sorted(written) == sorted(r["id"] for i, r in enumerate(rows) if i != 3)
+        assert AUDIT_FALLBACK_KEY not in redis.lists
+        (dead,) = redis.lists[AUDIT_DEAD_LETTER_KEY]
+        assert json.loads(dead)["id"] == str(rows[3]["id"])
+        buffer.close()
+
+    def test_doppelter_ausfall_behaelt_eintraege(self):
+        """Ohne Datenbank und Redis bleiben die Eintraege (begrenzt) im Puffer."""
+        buffer = AuditBuffer(
+            _FakeEngine(fail=True), _ListRedis(fail=True), max_seconds=60, max_pending=2,
+        )
+        rows = [_row() for _ in range(3)]
+        for row in rows:
+            buffer.add(row)
+
+        assert buffer.flush() == 0
+        assert buffer._rows == rows[1:]
+        buffer.close()
+
+
+class TestDrainAuditFallback:
+    """Tests fuer drain_audit_fallback."""
+
+    def test_schreibt_und_leert_liste(self, app, monkeypatch):
+        """Eintraege werden geschrieben und erst danach aus der Liste entfernt."""
+        redis, engine = _ListRedis(), _FakeEngine()
+        rows = [_row() for _ in range(3)]
+        redis.rpush(AUDIT_FALLBACK_KEY, *[serialize_row(r) for r in rows])
+        monkeypatch.setattr(app, "redis", redis)
+        monkeypatch.setattr(app, "engine", engine)
+        monkeypatch.setattr(audit_writer, "AUDIT_BUFFER_MAX_ROWS", 2)
+
+        with app.app_context():
+            assert drain_audit_fallback.run() == {"drained": 3, "skipped": False}
+        assert [len(b) for b in engine.batches] == [2, 1]
+        assert engine.batches[0][0]["id"] == rows[0]["id"]
+        assert redis.lists[AUDIT_FALLBACK_KEY] == []
+        assert not redis.data
+
+    def test_datenbank_ausfall_behaelt_liste(self, app, monkeypatch):
+        """Schlaegt das Schreiben fehl, bleibt die Liste unveraendert."""
+        redis = _ListRedis()
+        redis.rpush(AUDIT_FALLBACK_KEY, serialize_row(_row()))
+        monkeypatch.setattr(app, "redis", redis)
+        monkeypatch.setattr(app, "engine", _FakeEngine(fail=True))
+
+        with app.app_context():
+            assert drain_audit_fallback.run() == {"drained": 0, "skipped": False}
+        assert len(redis.lists[AUDIT_FALLBACK_KEY]) == 1
+
+    def test_fehlerhafte_zeile_blockiert_liste_nicht(self, app, monkeypatch):
+        """Kaputte Eintraege am Listenkopf wandern in die Dead-Letter-Liste."""
+        redis, engine = _ListRedis(), _FakeEngine()
+        bad = _row()
+        bad["request_id"] = "z" * 80
+        rows = [_row(), bad, _row()]
+        redis.rpush(AUDIT_FALLBACK_KEY, *[serialize_row(r) for r in rows], "{kein json")
+        monkeypatch.setattr(app, "redis", redis)
+        monkeypatch.setattr(app, "engine", engine)
+
+        with app.app_context():
+            assert drain_audit_fallback.run() == {"drained": 2, "skipped": False}
+        assert redis.lists[AUDIT_FALLBACK_KEY] == []
+        assert len(redis.lists[AUDIT_DEAD_LETTER_KEY]) == 2
+        assert sum(len(b) for b in engine.batches) == 2
@@ -0,0 +1,82 @@
+"""
+aitema|Hinweis - BI-Export Tests
+Pseudonymisierung, Wasserzeichen und Spaltenformate.
+"""
+
+import io
+import uuid
+from datetime import date, datetime, timezone
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.services.bi_export import (
+    FACT_WATERMARK_OVERLAP,
+    FactPseudonymizer,
+    build_fact_query,
+    parse_since,
+)
+from app.services.encryption import EncryptionService
+
+ROWS = [
+    ("a" * 32, "korruption", "eingegangen", None, date(2026, 3, 2), 12.5, None, True),
+    ("b" * 32, "betrug", "abgeschlossen", "abgeschlossen", date(2026, 3, 9), 30.0, 800.25, False),
+]
+
+
+class TestPseudonymisierung:
+    """Tests fuer FactPseudonymizer."""
+
+    def test_stabil_und_mandantengetrennt(self):
+        """Gleiche Meldung ergibt dieselbe fact_id, anderer Mandant eine andere."""
+        encryption = EncryptionService(EncryptionService.generate_key())
+        a = FactPseudonymizer(encryption, "tenant-a")
+        b = FactPseudonymizer(encryption, "tenant-b")
+        assert a("hinweis-1") == a("hinweis-1")
+        assert a("hinweis-1") != b("hinweis-1")
+        assert "hinweis-1" not in a("hinweis-1")
+
+
+class TestWasserzeichen:
+    """Tests fuer parse_since und die Ueberlappung inkrementeller Exporte."""
+
+    def test_ohne_zeitzone_gilt_als_utc(self):
+        assert parse_since("2026-10-01T12:00:00") == datetime(2026, 10, 1, 12, tzinfo=timezone.utc)
+
+    def test_leer(self):
+        assert parse_since(None) is None
+
+    def test_ueberlappung(self):
+        """Spaet committete Transaktionen (updated_at vor dem Wasserzeichen) werden erfasst."""
+        since = datetime(2026, 10, 1, 12, tzinfo=timezone.utc)
+        params = build_fact_query(uuid.uuid4(), since).compile(
+            dialect=postgresql.dialect(),
+        ).params
+        assert since - FACT_WATERMARK_OVERLAP in params.values()
+        assert since not in params.values()
+
+
+class TestSpaltenformate:
+    """Tests fuer Parquet und Arrow IPC."""
+
+    def test_parquet_row_groups(self):
+        """Eine Row Group pro Batch, Wasserzeichen in den Metadaten."""
+        pq = pytest.importorskip("pyarrow.parquet")
+        from app.services.bi_export import fact_schema, write_parquet
+
+        watermark = datetime(2026, 10, 19, tzinfo=timezone.utc)
+        data = b"".join(write_parquet(fact_schema(watermark), iter([ROWS[:1], ROWS[1:]])))
+        parquet = pq.ParquetFile(io.BytesIO(data))
+        assert parquet.num_row_groups == 2
+        assert parquet.schema_arrow.metadata[b"watermark"] == watermark.isoformat().encode()
+        assert parquet.read().column("kategorie").to_pylist() == ["korruption", "betrug"]
+
+    def test_arrow_stream(self):
+        """Arrow IPC Stream ist lesbar."""
+        pa = pytest.importorskip("pyarrow")
+        from app.services.bi_export import fact_schema, write_arrow
+
+        data = b"".join(write_arrow(fact_schema(), iter([ROWS])))
+        table = pa.ipc.open_stream(data).read_all()
+        assert table.num_rows == 2
+        assert table.column("resolve_hours").to_pylist() == [None, 800.25]
@@ -0,0 +1,68 @@
+"""
+aitema|Hinweis - Automatische Fallzuweisung Tests
+Auswahl der/des am geringsten ausgelasteten Fallbearbeiter/in.
+"""
+
+import json
+
+from app.models.case import CaseStatus
+from app.services.case_assignment import CaseAssignmentEngine, is_open
+
+
+class _PoolRedis:
+    """Minimaler Redis-Ersatz mit den von pick() genutzten Befehlen."""
+
+    def __init__(self, pools: dict, meta: dict):
+        self.pools = pools
+        self.meta = {uid: json.dumps(m) for uid, m in meta.items()}
+
+    def exists(self, key):
+        return key.endswith(":meta") or key.split(":", 2)[2] in self.pools
+
+    def zrange(self, key, start, end):
+        members = sorted(self.pools.get(key.split(":", 2)[2], {}).items(), key=lambda m: m[1])
+        return [uid for uid, _ in members][start:end + 1]
+
+    def hmget(self, key, uids):
+        return [self.meta.get(uid) for uid in uids]
+
+
+def _engine():
+    return CaseAssignmentEngine(_PoolRedis(
+        pools={
+            "all": {"a": 0, "b": 2, "c": 5},
+            "kategorie:korruption": {"b": 2, "c": 5},
+        },
+        meta={
+            "a": {"department": "Einkauf", "pools": ["all"]},
+            "b": {"department": "Recht", "pools": ["all", "kategorie:korruption"]},
+            "c": {"department": "Compliance", "pools": ["all", "kategorie:korruption"]},
+        },
+    ))
+
+
+class TestPick:
+    """Tests fuer CaseAssignmentEngine.pick."""
+
+    def test_geringste_auslastung(self):
+        """Ohne Filter gewinnt die geringste Auslastung."""
+        assert _engine().pick(None, "t") == "a"
+
+    def test_kategorie_kompetenz(self):
+        """Mit Kategorie wird nur der Kompetenzpool betrachtet."""
+        assert _engine().pick(None, "t", kategorie="korruption") == "b"
+        # Kategorie ohne Kompetenzpool faellt auf alle zurueck
+        assert _engine().pick(None, "t", kategorie="betrug") == "a"
+
+    def test_interessenkonflikt(self):
+        """Mitarbeitende der betroffenen Abteilung werden uebergangen."""
+        engine = _engine()
+        assert engine.pick(None, "t", kategorie="korruption", exclude_department=" recht") == "c"
+        assert engine.pick(None, "t", department="compliance") == "c"
+        assert engine.pick(None, "t", department="Vertrieb") is None
+
+    def test_offene_faelle(self):
+        """Abgeschlossene und eingestellte Faelle zaehlen nicht zur Auslastung."""
+        assert is_open(CaseStatus.IN_ERMITTLUNG)
+        assert not is_open(CaseStatus.ABGESCHLOSSEN)
+        assert not is_open(CaseStatus.EINGESTELLT)
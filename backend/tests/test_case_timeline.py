@@ -0,0 +1,116 @@
+"""
+aitema|Hinweis - Fall-Timeline Tests
+Keyset-Paginierung und SQL-Filter der Fall-Ereignisse.
+"""
+
+import uuid
+from types import SimpleNamespace
+from datetime import datetime, timezone, timedelta
+
+import pytest
+
+from app.models.case import CaseEvent
+from app.services.case_timeline import (
+    archived_events, decode_cursor, encode_cursor, get_case_timeline,
+)
+
+
+class TestCursor:
+    """Tests fuer die Cursor-Kodierung."""
+
+    def test_roundtrip(self):
+        """Cursor enthaelt created_at und id des letzten Ereignisses."""
+        event = SimpleNamespace(id=uuid.uuid4(), created_at=datetime.now(timezone.utc))
+        assert decode_cursor(encode_cursor(event)) == (event.created_at, event.id)
+
+    def test_ungueltig(self):
+        """Manipulierte Cursor werden abgelehnt."""
+        with pytest.raises(ValueError):
+            decode_cursor("kein-cursor")
+
+
+def _archived_row(case_id, i: int, **kwargs) -> dict:
+    """Ereignis, wie es aus einem Archiv-Segment gelesen wird (JSON-Werte)."""
+    return {
+        "id": str(uuid.UUID(int=i)),
+        "case_id": str(case_id),
+        "user_id": None,
+        "event_type": "note_added",
+        "metadata_json": {},
+        "is_internal": True,
+        "is_visible_to_melder": False,
+        "created_at": (datetime(2024, 5, 1, tzinfo=timezone.utc) + timedelta(hours=i)).isoformat(),
+        **kwargs,
+    }
+
+
+class TestArchivierteEreignisse:
+    """Tests fuer archived_events."""
+
+    def test_filter_und_reihenfolge(self):
+        """Archivierte Ereignisse werden wie in SQL gefiltert, neueste zuerst."""
+        case_id = uuid.uuid4()
+        rows = [
+            _archived_row(case_id, 1),
+            _archived_row(case_id, 2, event_type="status_change", is_internal=False),
+            _archived_row(case_id, 3, is_visible_to_melder=True),
+        ]
+        alle = archived_events(rows)
+        assert [e.id.int for e in alle] == [3, 2, 1]
+        assert all(e.archived for e in alle)
+        assert alle[0].created_at.tzinfo is not None
+
+        assert [e.id.int for e in archived_events(rows, event_types=["status_change"])] == [2]
+        assert [e.id.int for e in archived_events(rows, visibility="external")] == [2]
+        assert [e.id.int for e in archived_events(rows, visibility="melder")] == [3]
+        assert [e.id.int for e in archived_events(
+            rows, before=(alle[1].created_at, alle[1].id),
+        )] == [1]
+
+
+class TestTimeline:
+    """Tests fuer get_case_timeline."""
+
+    def test_paginierung_und_filter(self, db_session, sample_case):
+        """Seiten schliessen lueckenlos aneinander an; Filter laufen in SQL."""
+        start = datetime.now(timezone.utc) - timedelta(days=1)
+        for i in range(5):
+            db_session.add(CaseEvent(
+                case_id=sample_case.id,
+                event_type="status_change" if i % 2 else "note_added",
+                is_internal=i % 2 == 0,
+                created_at=start + timedelta(minutes=i),
+            ))
+        db_session.flush()
+
+        seite1, cursor = get_case_timeline(db_session, sample_case.id, limit=3)
+        seite2, ende = get_case_timeline(db_session, sample_case.id, cursor=cursor, limit=3)
+        assert len(seite1) == 3 and len(seite2) == 2 and ende is None
+        assert [e.created_at for e in seite1 + seite2] == sorted(
+            (e.created_at for e in seite1 + seite2), reverse=True
+        )
+
+        extern, _ = get_case_timeline(db_session, sample_case.id, visibility="external")
+        assert {e.event_type for e in extern} == {"status_change"}
+
+    def test_archiv_nach_datenbank(self, db_session, sample_case):
+        """Archivierte Ereignisse folgen nach denen der Datenbank, ueber Seiten hinweg."""
+        db_session.add(CaseEvent(
+            case_id=sample_case.id, event_type="status_change",
+            created_at=datetime.now(timezone.utc),
+        ))
+        db_session.flush()
+        rows = [_archived_row(sample_case.id, i) for i in range(1, 4)]
+
+        def read_archived():
+            return rows
+
+        seite1, cursor = get_case_timeline(
+            db_session, sample_case.id, limit=2, read_archived=read_archived,
+        )
+        seite2, ende = get_case_timeline(
+            db_session, sample_case.id, cursor=cursor, limit=2, read_archived=read_archived,
+        )
+        assert [getattr(e, "archived", False) for e in seite1] == [False, True]
+        assert [e.id.int for e in seite1[1:] + seite2] == [3, 2, 1]
+        assert ende is None
@@ -0,0 +1,42 @@
+"""
+aitema|Hinweis - Sammelbearbeitung Tests
+Tests fuer POST /cases/bulk.
+"""
+
+import uuid
+
+
+class TestBulkOperations:
+    """Tests fuer die Sammelbearbeitung von Faellen."""
+
+    def test_ergebnis_pro_operation(self, client, auth_headers, sample_case, sample_admin):
+        """Gueltige Operationen werden ausgefuehrt, ungueltige einzeln gemeldet."""
+        response = client.post("/api/v1/cases/bulk", headers=auth_headers, json={
+            "operations": [
+                {"case_id": str(sample_case.id), "action": "assign",
+                 "assignee_id": str(sample_admin.id)},
+                {"case_id": str(sample_case.id), "action": "status", "status": "abgeschlossen"},
+                {"case_id": str(uuid.uuid4()), "action": "acknowledge"},
+            ],
+        })
+        assert response.status_code == 200
+        data = response.get_json()
+        assert [r["success"] for r in data["results"]] == [True, False, False]
+        assert data["results"][2]["error"] == "Fall nicht gefunden"
+
+    def test_leere_anfrage(self, client, auth_headers):
+        """Ohne Operationen: 400."""
+        response = client.post("/api/v1/cases/bulk", headers=auth_headers, json={})
+        assert response.status_code == 400
+
+    def test_bestaetigung_schliesst_frist_der_meldung(
+        self, client, auth_headers, db_session, sample_case, sample_hinweis,
+    ):
+        """Eine bestaetigte Meldung hat keine offene ack-Frist mehr."""
+        response = client.post("/api/v1/cases/bulk", headers=auth_headers, json={
+            "operations": [{"case_id": str(sample_case.id), "action": "acknowledge"}],
+        })
+        assert response.status_code == 200
+        db_session.refresh(sample_hinweis)
+        assert sample_hinweis.eingangsbestaetigung_gesendet_am is not None
+        assert sample_hinweis.next_deadline_type == "resolve"
@@ -0,0 +1,238 @@
+"""
+aitema|Hinweis - Cold Archive Tests
+Segmentformat, Segment-Dateien, Zeitfilter und Filter des Audit-Trails.
+"""
+
+import os
+import stat
+import uuid
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from cryptography.exceptions import InvalidTag
+
+from app.models.audit_log import AuditAction
+from app.services import audit
+from app.services.audit import AuditService, _archive_predicate
+from app.services.cold_archive import (
+    AUDIT_KIND,
+    cold_cutoff,
+    decode_segment,
+    encode_segment,
+    filter_rows,
+    read_segment,
+    segment_key,
+    segment_path,
+    write_segments,
+)
+from app.services.encryption import EncryptionService
+
+ENCRYPTION = EncryptionService("test-encryption-master-key-32chars!")
+TENANT = uuid.uuid4()
+START = datetime(2025, 3, 1, 8, 0, tzinfo=timezone.utc)
+
+
+def _row(i: int, resource_id=None) -> dict:
+    return {
+        "id": uuid.UUID(int=i),
+        "tenant_id": TENANT,
+        "action": AuditAction.SUBMISSION_VIEWED,
+        "resource_id": resource_id or str(uuid.UUID(int=1000 + i)),
+        "details": {"a": 1},
+        "success": True,
+        "created_at": START + timedelta(hours=i),
+    }
+
+
+class _Segment:
+    """Indexzeile wie aus archive_segments gelesen."""
+
+    def __init__(self, values: dict):
+        self.__dict__.update(values)
+
+
+class TestSegmentformat:
+    """Tests fuer encode_segment/decode_segment."""
+
+    def test_round_trip(self):
+        """Zeilen kommen als JSON-Werte zurueck (UUID/Enum als String, Zeit in UTC)."""
+        pytest.importorskip("zstandard")
+        key = segment_key(ENCRYPTION, TENANT)
+        segment_id = uuid.uuid4()
+        rows = decode_segment(encode_segment([_row(1), _row(2)], key, segment_id), key, segment_id)
+
+        assert [r["id"] for r in rows] == [str(uuid.UUID(int=1)), str(uuid.UUID(int=2))]
+        assert rows[0]["action"] == AuditAction.SUBMISSION_VIEWED.value
+        assert rows[0]["created_at"] == "2025-03-01T09:00:00+00:00"
+        assert rows[0]["details"] == {"a": 1}
+
+    def test_segment_id_ist_gebunden(self):
+        """Ein Segment laesst sich nicht unter anderer ID (oder anderem Mandanten) lesen."""
+        pytest.importorskip("zstandard")
+        key = segment_key(ENCRYPTION, TENANT)
+        segment_id = uuid.uuid4()
+        data = encode_segment([_row(1)], key, segment_id)
+
+        with pytest.raises(InvalidTag):
+            decode_segment(data, key, uuid.uuid4())
+        with pytest.raises(InvalidTag):
+            decode_segment(data, segment_key(ENCRYPTION, uuid.uuid4()), segment_id)
+
+    def test_fremdes_format(self):
+        """Dateien ohne Magic werden abgelehnt."""
+        with pytest.raises(ValueError):
+            decode_segment(b"{}\n", segment_key(ENCRYPTION, TENANT), uuid.uuid4())
+
+
+class TestSegmentDateien:
+    """Tests fuer write_segments und read_segment."""
+
+    def test_aufteilung_und_index(self, tmp_path):
+        """Segmente haben hoechstens max_rows Zeilen, Zeitraum und Ressourcen im Index."""
+        pytest.importorskip("zstandard")
+        rows = [_row(i, resource_id="r-even" if i % 2 else "r-odd") for i in range(1, 6)]
+        segments = write_segments(
+            str(tmp_path), AUDIT_KIND, TENANT, iter(rows), ENCRYPTION, "resource_id", max_rows=2,
+        )
+
+        assert [s["row_count"] for s in segments] == [2, 2, 1]
+        assert segments[0]["time_from"] == rows[0]["created_at"]
+        assert segments[0]["time_to"] == rows[1]["created_at"]
+        assert segments[0]["resource_ids"] == ["r-even", "r-odd"]
+        assert segments[2]["resource_ids"] == ["r-even"]
+
+        path = os.path.join(str(tmp_path), segments[0]["path"])
+        assert not os.stat(path).st_mode & (stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH)
+        assert len(read_segment(_Segment(segments[0]), str(tmp_path), ENCRYPTION)) == 2
+
+    def test_veraenderte_datei(self, tmp_path):
+        """Eine Datei, die nicht zur Pruefsumme passt, wird nicht gelesen."""
+        pytest.importorskip("zstandard")
+        (segment,) = write_segments(
+            str(tmp_path), AUDIT_KIND, TENANT, [_row(1)], ENCRYPTION, "resource_id",
+        )
+        path = os.path.join(str(tmp_path), segment["path"])
+        os.chmod(path, 0o640)
+        with open(path, "ab") as fh:
+            fh.write(b"x")
+
+        with pytest.raises(ValueError):
+            read_segment(_Segment(segment), str(tmp_path), ENCRYPTION)
+
+    def test_pfad(self):
+        """Ablage nach Art, Mandant und Monat."""
+        segment_id = uuid.UUID(int=7)
+        assert segment_path(AUDIT_KIND, None, date(2025, 3, 1), segment_id) == os.path.join(
+            "audit_logs", "global", "2025-03", f"{segment_id}.ndjson.zst.enc",
+        )
+
+
+class TestLesen:
+    """Tests fuer cold_cutoff, filter_rows und die Filter des Audit-Trails."""
+
+    def test_grenze_ist_monatsanfang(self):
+        """Zwoelf Monate vor dem laufenden Monat, unabhaengig vom Tag."""
+        assert cold_cutoff(datetime(2026, 10, 19, 15, 0, tzinfo=timezone.utc)) == datetime(
+            2025, 10, 1, tzinfo=timezone.utc,
+        )
+
+    def test_zeitraum_und_reihenfolge(self):
+        """Nur Zeilen im Zeitraum, neueste zuerst; naive Grenzen gelten als UTC."""
+        rows = [
+            {"id": str(i), "created_at": (START + timedelta(days=i)).isoformat()}
+            for i in range(5)
+        ]
+        matched = filter_rows(rows, datetime(2025, 3, 2), datetime(2025, 3, 4, 8, 0))
+        assert [r["id"] for r in matched] == ["3", "2", "1"]
+
+    def test_filter_des_audit_trails(self):
+        """Gesetzte Filter muessen alle passen, leere werden ignoriert."""
+        user_id = uuid.uuid4()
+        row = {
+            "action": AuditAction.SUBMISSION_VIEWED.value,
+            "resource_type": "hinweis",
+            "resource_id": "r-1",
+            "user_id": str(user_id),
+        }
+        assert _archive_predicate(None, None, None, None)(row)
+        assert _archive_predicate("hinweis", "r-1", user_id, AuditAction.SUBMISSION_VIEWED)(row)
+        assert not _archive_predicate("case", None, None, None)(row)
+        assert not _archive_predicate(None, None, uuid.uuid4(), None)(row)
+
+
+class _TrailSession:
+    """Session-Ersatz: hot_total Eintraege in der Datenbank, Segment-Index wie angegeben."""
+
+    def __init__(self, hot_total: int, archived_total: int, partial: int = 0):
+        self.hot_total = hot_total
+        self.index = (archived_total, partial)
+        self._limit = 0
+
+    def query(self, *args):
+        return self
+
+    def filter(self, *args):
+        return self
+
+    def order_by(self, *args):
+        return self
+
+    def count(self):
+        return self.hot_total
+
+    def offset(self, offset):
+        self._limit = max(self.hot_total - offset, 0)
+        return self
+
+    def limit(self, limit):
+        self._limit = min(self._limit, limit)
+        return self
+
+    def all(self):
+        entry = _Segment({
+            "id": uuid.uuid4(), "action": AuditAction.SUBMISSION_VIEWED, "resource_type": None,
+            "resource_id": None, "user_id": None, "description": None, "success": True,
+            "ip_address": None, "created_at": START,
+        })
+        return [entry] * self._limit
+
+    def execute(self, stmt):
+        return _Segment({"one": lambda: self.index})
+
+    def close(self):
+        pass
+
+
+class TestAuditTrailArchiv:
+    """Segmente werden nur gelesen, wenn die Seite ins Archiv reicht."""
+
+    def _trail(self, app, monkeypatch, session, page, **filters):
+        read = []
+        monkeypatch.setattr(app, "Session", lambda: session)
+        monkeypatch.setattr(audit, "read_archived", lambda *a, **kw: read.append(1) or [])
+        with app.app_context():
+            result = AuditService.get_audit_trail(TENANT, page=page, per_page=10, **filters)
+        return result["pagination"], bool(read)
+
+    def test_seite_aus_der_datenbank(self, app, monkeypatch):
+        """Volle Seite aus der Datenbank: total aus dem Segment-Index, kein Segment gelesen."""
+        pagination, read = self._trail(app, monkeypatch, _TrailSession(25, 1000), page=2)
+        assert not read
+        assert (pagination["total"], pagination["total_exact"]) == (1025, True)
+
+        pagination, _ = self._trail(app, monkeypatch, _TrailSession(25, 1000, partial=1), page=2)
+        assert (pagination["total"], pagination["total_exact"]) == (1025, False)
+
+    def test_mit_filter_untergrenze(self, app, monkeypatch):
+        """Mit Filtern ist die Trefferzahl im Archiv unbekannt: total ist eine Untergrenze."""
+        pagination, read = self._trail(
+            app, monkeypatch, _TrailSession(25, 1000), page=1, resource_type="hinweis",
+        )
+        assert not read
+        assert (pagination["total"], pagination["total_exact"]) == (25, False)
+
+    def test_seite_reicht_ins_archiv(self, app, monkeypatch):
+        """Erst die Seite, die ueber die Datenbank hinausgeht, liest Segmente."""
+        pagination, read = self._trail(app, monkeypatch, _TrailSession(25, 1000), page=3)
+        assert read
+        assert pagination["total_exact"]
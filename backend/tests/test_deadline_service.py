@@ -0,0 +1,310 @@
+"""
+aitema|Hinweis - Fristenampel Tests
+Tests fuer die Ampel-Berechnung (Python) und deren SQL-Aggregat.
+"""
+
+import uuid
+from types import SimpleNamespace
+from datetime import datetime, timezone, timedelta
+
+from sqlalchemy.exc import OperationalError
+
+from app.models.hinweis import Hinweis, HinweisStatus
+from app.services.deadline_scheduler import (
+    DISPATCH_BATCH_SIZE,
+    SCHEDULE_KEY,
+    dispatch_due_deadlines,
+    hinweis_thresholds,
+    is_escalation,
+    notified_warnstufe,
+)
+from app.services.hinschg_compliance import HinSchGComplianceService
+from app.services.deadline_service import (
+    compute_next_deadline,
+    get_case_deadline_status,
+    get_deadline_summary,
+    get_deadline_summary_sql,
+)
+
+
+def _case(created_days_ago: float, acknowledged: bool = False, resolved: bool = False):
+    """Minimaler Case-Ersatz mit den fuer die Ampel relevanten Feldern."""
+    now = datetime.now(timezone.utc)
+    return SimpleNamespace(
+        created_at=now - timedelta(days=created_days_ago),
+        acknowledged_at=now if acknowledged else None,
+        resolved_at=now if resolved else None,
+    )
+
+
+class TestDeadlineStatus:
+    """Tests fuer get_case_deadline_status."""
+
+    def test_neuer_fall_ack_gelb(self):
+        """Frische Faelle stehen innerhalb der 14-Tage-Warnstufe der Eingangsbestaetigung."""
+        ds = get_case_deadline_status(_case(0))
+        assert ds.deadline_type == "ack"
+        assert ds.status == "yellow"
+
+    def test_ack_ueberfaellig_rot(self):
+        """Ohne Eingangsbestaetigung nach 8 Tagen: rot."""
+        ds = get_case_deadline_status(_case(8))
+        assert ds.status == "red"
+
+    def test_resolve_gruen(self):
+        """Bestaetigt, Rueckmeldung in ~80 Tagen: gruen."""
+        ds = get_case_deadline_status(_case(10, acknowledged=True))
+        assert ds.deadline_type == "resolve"
+        assert ds.status == "green"
+
+    def test_resolved_done(self):
+        """Abgeschlossene Faelle sind done."""
+        assert get_case_deadline_status(_case(200, resolved=True)).status == "done"
+
+    def test_summary(self):
+        """Zusammenfassung zaehlt jede Ampelfarbe."""
+        summary = get_deadline_summary([
+            _case(0), _case(8), _case(10, acknowledged=True), _case(1, resolved=True),
+        ])
+        assert summary == {"green": 1, "yellow": 1, "red": 1, "done": 1, "total": 4}
+
+
+class TestNextDeadline:
+    """Tests fuer die materialisierte naechste Frist."""
+
+    def test_case_next_deadline(self):
+        """Naechste Frist folgt Eingangsbestaetigung -> Abschluss -> keine."""
+        created = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        assert compute_next_deadline(created, None, None) == (
+            created + timedelta(days=7), "ack",
+        )
+        assert compute_next_deadline(created, created, None) == (
+            created + timedelta(days=90), "resolve",
+        )
+        assert compute_next_deadline(created, created, created) == (None, None)
+
+    def test_hinweis_next_deadline(self):
+        """Hinweis nutzt seine gespeicherten Fristen; abgeschlossene haben keine."""
+        now = datetime.now(timezone.utc)
+        hinweis = Hinweis(
+            status=HinweisStatus.EINGEGANGEN,
+            eingangsbestaetigung_frist=now + timedelta(days=7),
+            rueckmeldung_frist=now + timedelta(days=90),
+        )
+        hinweis.refresh_next_deadline()
+        assert hinweis.next_deadline_type == "ack"
+
+        hinweis.eingangsbestaetigung_gesendet_am = now
+        hinweis.refresh_next_deadline()
+        assert hinweis.next_deadline_at == hinweis.rueckmeldung_frist
+
+        hinweis.status = HinweisStatus.ABGESCHLOSSEN
+        hinweis.refresh_next_deadline()
+        assert hinweis.next_deadline_at is None
+
+    def test_eingangsbestaetigung_schliesst_ack_frist(self):
+        """Nach der Eingangsbestaetigung ist die Meldung keine offene ack-Frist mehr."""
+        now = datetime.now(timezone.utc)
+        hinweis = Hinweis(
+            status=HinweisStatus.EINGEGANGEN,
+            eingangsbestaetigung_frist=now - timedelta(days=1),
+            rueckmeldung_frist=now + timedelta(days=90),
+            notified_deadline_type="ack",
+            notified_warnstufe="ueberfaellig",
+        )
+        hinweis.refresh_next_deadline()
+        assert hinweis.next_deadline_type == "ack"
+
+        hinweis.mark_eingangsbestaetigung_gesendet(now)
+        assert hinweis.eingangsbestaetigung_gesendet_am == now
+        assert hinweis.next_deadline_type == "resolve"
+        assert hinweis.notified_warnstufe is None
+
+        hinweis.mark_rueckmeldung_gesendet(now + timedelta(days=30))
+        assert hinweis.eingangsbestaetigung_gesendet_am == now
+        assert hinweis.next_deadline_type is None
+
+
+class TestSchedulerThresholds:
+    """Geplante Schwellwerte stimmen mit der Warnstufen-Berechnung ueberein."""
+
+    def test_hinweis_thresholds_match_warnstufe(self):
+        """Kurz nach jedem geplanten Zeitpunkt gilt genau die geplante Warnstufe."""
+        now = datetime.now(timezone.utc)
+        for warnstufe, crossing in hinweis_thresholds(now + timedelta(days=10)):
+            # Frist so verschieben, dass der Schwellwert vor einer Minute erreicht wurde
+            frist = now + timedelta(days=10) - (crossing - now) - timedelta(minutes=1)
+            status = HinSchGComplianceService.pruefe_frist_status("Test", frist)
+            assert status.warnstufe == warnstufe
+
+
+class _ScheduleRedis:
+    """Sorted-Set-Ersatz: register_script liefert das Entnahme-Skript als Python."""
+
+    def __init__(self):
+        self.scores = {}
+
+    def register_script(self, script):
+        def pop_due(keys, args):
+            due = sorted(
+                (score, member) for member, score in self.scores.items() if score <= args[0]
+            )[:args[1]]
+            for _, member in due:
+                del self.scores[member]
+            return [member for _, member in due]
+        return pop_due
+
+    def zadd(self, key, mapping, nx=False):
+        assert key == SCHEDULE_KEY
+        for member, score in mapping.items():
+            if not (nx and member in self.scores):
+                self.scores[member] = score
+
+
+class _FailingSession:
+    def query(self, *args):
+        raise OperationalError("SELECT", {}, Exception("connection refused"))
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class _EmptySession:
+    """Session ohne passende Objekte: alle entnommenen Eintraege sind veraltet."""
+
+    def __init__(self):
+        self.commits = 0
+
+    def query(self, *args):
+        return self
+
+    def options(self, *args):
+        return self
+
+    def filter(self, *args):
+        return iter(())
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class TestDispatch:
+    """Tests fuer dispatch_due_deadlines."""
+
+    def test_fehlgeschlagener_batch_wird_neu_eingeplant(self, app, monkeypatch):
+        """Scheitert die Verarbeitung, gehen die entnommenen Eintraege nicht verloren."""
+        redis = _ScheduleRedis()
+        member = f"hinweis:{uuid.uuid4()}:ack:warnung"
+        redis.scores[member] = datetime.now(timezone.utc).timestamp() - 60
+        monkeypatch.setattr(app, "redis", redis)
+        monkeypatch.setattr(app, "Session", _FailingSession)
+
+        with app.app_context():
+            assert dispatch_due_deadlines.run()["dispatched"] == 0
+        assert list(redis.scores) == [member]
+
+    def test_mehrere_batches_in_einem_lauf(self, app, monkeypatch):
+        """Mehr als DISPATCH_BATCH_SIZE faellige Eintraege werden in einem Lauf abgearbeitet."""
+        redis = _ScheduleRedis()
+        due_at = datetime.now(timezone.utc).timestamp() - 60
+        count = DISPATCH_BATCH_SIZE * 2 + 1
+        for _ in range(count):
+            redis.scores[f"hinweis:{uuid.uuid4()}:ack:warnung"] = due_at
+        session = _EmptySession()
+        monkeypatch.setattr(app, "redis", redis)
+        monkeypatch.setattr(app, "Session", lambda: session)
+
+        with app.app_context():
+            assert dispatch_due_deadlines.run()["stale"] == count
+        assert redis.scores == {}
+        assert session.commits == 3
+
+
+class TestCaseFristWarnung:
+    """Tests fuer NotificationService.send_case_frist_warnung."""
+
+    def test_mail_nur_bei_ueberschreitung(self, monkeypatch):
+        """Warnungen vor Fristablauf kommen ueber den Digest, nur die Ueberschreitung per Mail."""
+        from app.services import notification
+        from app.services.notification import NotificationService
+
+        sent = []
+        monkeypatch.setattr(notification, "enqueue_email", lambda session, **kw: sent.append(kw))
+        assignee = SimpleNamespace(email="sb@test.de", full_name="Sachbearbeitung")
+        case = SimpleNamespace(
+            id=uuid.uuid4(), tenant_id=uuid.uuid4(), case_number="F-1", titel="Test",
+            assignee_id=uuid.uuid4(), assignee=assignee, created_by=None,
+        )
+        status = get_case_deadline_status(_case(8))
+        service = NotificationService()
+
+        service.send_case_frist_warnung(case, status, "warnung", session=object())
+        assert sent == []
+        service.send_case_frist_warnung(case, status, "ueberfaellig", session=object())
+        assert [m["to"] for m in sent] == ["sb@test.de"]
+
+
+class TestDeadlineSummarySql:
+    """Paritaet zwischen SQL-Aggregat und Python-Berechnung."""
+
+    def test_summary_sql_matches_python(self, db_session, sample_case):
+        """Das GROUP-BY-Aggregat liefert dieselben Zahlen wie die Python-Variante."""
+        from app.models.case import Case
+
+        for days_ago, ack, resolved in [
+            (0, False, False), (6, False, False), (8, False, False),
+            (10, True, False), (80, True, False), (95, True, False),
+            (30, True, True),
+        ]:
+            sample_case.created_at = datetime.now(timezone.utc) - timedelta(days=days_ago)
+            sample_case.acknowledged_at = datetime.now(timezone.utc) if ack else None
+            sample_case.resolved_at = datetime.now(timezone.utc) if resolved else None
+            db_session.flush()
+
+            cases = db_session.query(Case).filter(
+                Case.tenant_id == sample_case.tenant_id
+            ).all()
+            assert get_deadline_summary_sql(
+                db_session, sample_case.tenant_id
+            ) == get_deadline_summary(cases)
+
+
+class TestWarnstufenWechsel:
+    """Nur Stufenwechsel werden benachrichtigt."""
+
+    def test_nur_hoehere_stufe(self):
+        """Gleiche oder niedrigere Stufe gilt als bereits gemeldet."""
+        assert is_escalation("warnung", None)
+        assert is_escalation("kritisch", "warnung")
+        assert not is_escalation("warnung", "warnung")
+        assert not is_escalation("kritisch", "ueberfaellig")
+
+    def test_andere_frist_setzt_zurueck(self):
+        """Eine Warnstufe der Eingangsbestaetigung gilt nicht fuer die Rueckmeldung."""
+        obj = SimpleNamespace(notified_deadline_type="ack", notified_warnstufe="ueberfaellig")
+        assert notified_warnstufe(obj, "ack") == "ueberfaellig"
+        assert notified_warnstufe(obj, "resolve") is None
+
+    def test_neue_frist_setzt_stufe_zurueck(self):
+        """Wechselt die naechste Frist, wird die gemeldete Stufe geloescht."""
+        now = datetime.now(timezone.utc)
+        hinweis = Hinweis(
+            status=HinweisStatus.EINGEGANGEN,
+            eingangsbestaetigung_frist=now + timedelta(days=1),
+            rueckmeldung_frist=now + timedelta(days=90),
+        )
+        hinweis.refresh_next_deadline()
+        hinweis.notified_deadline_type, hinweis.notified_warnstufe = "ack", "kritisch"
+
+        hinweis.eingangsbestaetigung_gesendet_am = now
+        hinweis.refresh_next_deadline()
+        assert hinweis.notified_warnstufe is None
@@ -0,0 +1,51 @@
+"""
+aitema|Hinweis - Export Tests
+Ausgabeformate und Export-Endpunkte.
+"""
+
+import io
+import json
+import zipfile
+
+from app.services.export import write_csv, write_ndjson, write_xlsx
+
+HEADER = ["case_number", "titel", "eskaliert"]
+ROWS = [["HW-1", "=SUMME(A1)", True], ["HW-2", "Vergabe <Bau> & Co", None]]
+
+
+class TestFormate:
+    """Tests fuer die Streaming-Writer."""
+
+    def test_csv_formel_injection(self):
+        """Werte mit Formel-Praefix werden entschaerft."""
+        data = b"".join(write_csv(HEADER, iter(ROWS))).decode("utf-8-sig")
+        assert data.splitlines()[1] == "HW-1;'=SUMME(A1);True"
+
+    def test_ndjson(self):
+        """Eine JSON-Zeile pro Datensatz."""
+        lines = b"".join(write_ndjson(HEADER, iter(ROWS))).decode().splitlines()
+        assert [json.loads(line)["case_number"] for line in lines] == ["HW-1", "HW-2"]
+
+    def test_xlsx_gueltiges_archiv(self):
+        """XLSX ist ein gueltiges ZIP mit allen Zeilen im Arbeitsblatt."""
+        data = b"".join(write_xlsx(HEADER, iter(ROWS)))
+        with zipfile.ZipFile(io.BytesIO(data)) as zf:
+            assert zf.testzip() is None
+            sheet = zf.read("xl/worksheets/sheet1.xml").decode()
+        assert sheet.count("<row>") == 3
+        assert "Vergabe &lt;Bau&gt; &amp; Co" in sheet
+
+
+class TestExportApi:
+    """Tests fuer die Export-Endpunkte."""
+
+    def test_csv_export(self, client, auth_headers, sample_case):
+        """Admin darf exportieren; der Export wird gestreamt."""
+        response = client.get("/api/v1/exports/cases?format=csv", headers=auth_headers)
+        assert response.status_code == 200
+        assert sample_case.case_number in response.get_data(as_text=True)
+
+    def test_ungueltiges_format(self, client, auth_headers):
+        """Unbekannte Formate werden abgelehnt."""
+        response = client.get("/api/v1/exports/cases?format=pdf", headers=auth_headers)
+        assert response.status_code == 400
@@ -0,0 +1,75 @@
+"""
+aitema|Hinweis - Plattformstatistik Tests
+Fan-out, Zusammenfuehrung und Teilergebnisse.
+"""
+
+import time
+
+from app.services.fleet_stats import FleetQueryExecutor, FleetTarget, merge_counts
+
+
+class _Connection:
+    def __init__(self, name):
+        self.name = name
+
+    def execute(self, statement):
+        pass
+
+    def begin(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _Engine:
+    """Engine-Ersatz: connect() liefert eine Verbindung mit dem Zielnamen."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def connect(self):
+        return _Connection(self.name)
+
+
+def _query(conn, tenant_ids):
+    if conn.name == "kaputt":
+        raise RuntimeError("connection refused")
+    if conn.name == "langsam":
+        time.sleep(0.5)
+    return {"hinweise": {"eingegangen": 2}, "users": {"active_count": 1}}
+
+
+def _targets(*names):
+    return [FleetTarget(name, _Engine(name)) for name in names]
+
+
+class TestMergeCounts:
+    """Tests fuer merge_counts."""
+
+    def test_verschachtelt(self):
+        totals = merge_counts({"a": {"x": 1}}, {"a": {"x": 2, "y": 3}, "b": {"z": 1}})
+        assert totals == {"a": {"x": 3, "y": 3}, "b": {"z": 1}}
+
+
+class TestFleetQueryExecutor:
+    """Tests fuer den Fan-out."""
+
+    def test_summe_ueber_alle_ziele(self):
+        """Ergebnisse aller Ziele werden summiert."""
+        result = FleetQueryExecutor(max_workers=4).run(_targets("a", "b", "c"), _query)
+        assert result.totals == {"hinweise": {"eingegangen": 6}, "users": {"active_count": 3}}
+        assert result.succeeded == 3 and not result.partial
+
+    def test_teilergebnis_bei_fehler_und_timeout(self):
+        """Fehlerhafte und zu langsame Ziele werden gemeldet, der Rest zaehlt."""
+        executor = FleetQueryExecutor(max_workers=4, total_timeout=0.2)
+        result = executor.run(_targets("a", "kaputt", "langsam"), _query)
+        assert result.totals["hinweise"]["eingegangen"] == 2
+        assert result.partial
+        assert {f["target"]: f["error"] for f in result.failed} == {
+            "kaputt": "connection refused", "langsam": "timeout",
+        }
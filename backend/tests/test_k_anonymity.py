@@ -0,0 +1,107 @@
+"""
+aitema|Hinweis - k-Anonymitaet Tests
+Primaer- und Komplementaerunterdrueckung, Cache.
+"""
+
+import enum
+
+import pytest
+from sqlalchemy import Column, MetaData, String, Table, create_engine, insert, select
+
+from app.services.k_anonymity import cached_rows, k_anonymous
+
+_metadata = MetaData()
+_meldungen = Table("meldungen", _metadata, Column("kategorie", String), Column("quartal", String))
+
+# Kategorie-Verteilung: x=10, y=4, w=5, v=2, z=1 (Q1: x, y, z; Q2: w, v)
+_ROWS = (
+    [("x", "q1")] * 10 + [("y", "q1")] * 4 + [("z", "q1")]
+    + [("w", "q2")] * 5 + [("v", "q2")] * 2
+)
+
+
+@pytest.fixture
+def conn():
+    """SQLite genuegt fuer suppress/mask (Fensterfunktionen, kein bool_or)."""
+    engine = create_engine("sqlite://")
+    _metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(_meldungen), [{"kategorie": k, "quartal": q} for k, q in _ROWS])
+        yield connection
+
+
+def _base():
+    return select().select_from(_meldungen)
+
+
+class TestUnterdrueckung:
+    """Tests fuer k_anonymous."""
+
+    def test_primaer_und_komplementaer(self, conn):
+        """z (1) und v (2) sind verborgen; ihre Summe 3 erreicht k, y bleibt sichtbar."""
+        rows = conn.execute(k_anonymous(_base(), {"kategorie": _meldungen.c.kategorie})).all()
+        assert sorted((r.kategorie, r.n) for r in rows) == [("w", 5), ("x", 10), ("y", 4)]
+
+    def test_komplementaer_je_partition(self, conn):
+        """Q2: v (2) allein waere aus der Quartalssumme ableitbar - w wird mitverborgen."""
+        rows = conn.execute(k_anonymous(
+            _base(),
+            {"quartal": _meldungen.c.quartal, "kategorie": _meldungen.c.kategorie},
+            partition_by=("quartal",), mode="mask",
+        )).all()
+        visible = {(r.quartal, r.kategorie): r.n for r in rows}
+        assert visible == {
+            ("q1", "x"): 10, ("q1", "y"): None, ("q1", "z"): None,
+            ("q2", "w"): None, ("q2", "v"): None,
+        }
+
+    def test_ohne_komplementaer(self, conn):
+        """Nur Primaerunterdrueckung, wenn keine Summe ausgewiesen wird."""
+        rows = conn.execute(k_anonymous(
+            _base(), {"kategorie": _meldungen.c.kategorie}, mode="mask", complementary=False,
+        )).all()
+        assert {r.kategorie for r in rows if r.suppressed} == {"v", "z"}
+
+    def test_unbekannter_modus(self):
+        with pytest.raises(ValueError):
+            k_anonymous(_base(), {"kategorie": _meldungen.c.kategorie}, mode="runden")
+
+
+class _Farbe(enum.Enum):
+    ROT = "rot"
+
+
+class _Session:
+    def __init__(self):
+        self.calls = 0
+
+    def execute(self, stmt):
+        self.calls += 1
+        row = type("Row", (), {"_mapping": {"farbe": _Farbe.ROT, "n": 3}})
+        return [row]
+
+
+class _Redis:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+
+class TestCache:
+    """Tests fuer cached_rows."""
+
+    def test_zweiter_abruf_aus_cache(self):
+        """Gleiche Abfrage und Mandant: eine Datenbankabfrage, gleiche Werte."""
+        session, redis = _Session(), _Redis()
+        stmt = k_anonymous(_base(), {"kategorie": _meldungen.c.kategorie})
+        first = cached_rows(session, redis, "t1", stmt)
+        second = cached_rows(session, redis, "t1", stmt)
+        assert first == second == [{"farbe": "rot", "n": 3}]
+        assert session.calls == 1
+        cached_rows(session, redis, "t2", stmt)
+        assert session.calls == 2
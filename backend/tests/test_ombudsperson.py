@@ -0,0 +1,27 @@
+"""
+aitema|Hinweis - Ombudsperson API Tests
+Fallliste mit maskierten Meldungsdaten und pending_review.
+"""
+
+from datetime import datetime, timezone
+
+
+class TestOmbudspersonListe:
+    """Tests fuer GET /ombudsperson/cases."""
+
+    def test_liste_und_pending_review(self, client, auth_headers, db_session, sample_case):
+        """pending_review zaehlt unabhaengig vom reviewed-Filter; Meldung ist maskiert."""
+        sample_case.forwarded_to_ombudsperson_at = datetime.now(timezone.utc)
+        db_session.flush()
+
+        response = client.get("/api/v1/ombudsperson/cases", headers=auth_headers)
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data["pagination"]["total"] == 1
+        assert data["pending_review"] == 1
+        assert data["items"][0]["hinweis"]["melder_email"] == "[vertraulich]"
+
+        response = client.get("/api/v1/ombudsperson/cases?reviewed=true", headers=auth_headers)
+        data = response.get_json()
+        assert data["items"] == [] and data["pagination"]["total"] == 0
+        assert data["pending_review"] == 1
@@ -0,0 +1,58 @@
+"""
+aitema|Hinweis - Notification Outbox Tests
+Tests fuer Versuchszaehlung und Backoff.
+"""
+
+from datetime import datetime, timezone, timedelta
+
+from app.models.outbox import OutboxMessage, OutboxStatus
+from app.services.outbox import (
+    BACKOFF_MAX,
+    MAX_ATTEMPTS,
+    backoff_delay,
+    record_result,
+)
+
+
+def _row(attempts: int) -> OutboxMessage:
+    return OutboxMessage(
+        event_type="test",
+        payload_encrypted="x",
+        status=OutboxStatus.SENDING,
+        attempts=attempts,
+        next_attempt_at=datetime.now(timezone.utc),
+    )
+
+
+class TestOutboxBackoff:
+    """Tests fuer das Ergebnis-Handling."""
+
+    def test_backoff_exponentiell_begrenzt(self):
+        """Wartezeit verdoppelt sich pro Versuch, max. BACKOFF_MAX."""
+        assert backoff_delay(1) == timedelta(seconds=30)
+        assert backoff_delay(2) == timedelta(seconds=60)
+        assert backoff_delay(30) == BACKOFF_MAX
+
+    def test_erfolg_entfernt_inhalt(self):
+        """Versendete Eintraege behalten keine Nutzdaten."""
+        row = _row(1)
+        record_result(row, success=True)
+        assert row.status == OutboxStatus.SENT
+        assert row.payload_encrypted is None
+        assert row.sent_at is not None
+
+    def test_fehler_plant_neuen_versuch(self):
+        """Fehlschlag: zurueck auf PENDING mit Backoff."""
+        now = datetime.now(timezone.utc)
+        row = _row(2)
+        record_result(row, success=False, error="421", now=now)
+        assert row.status == OutboxStatus.PENDING
+        assert row.next_attempt_at == now + backoff_delay(2)
+        assert row.last_error == "421"
+
+    def test_max_versuche_failed(self):
+        """Nach MAX_ATTEMPTS wird nicht mehr versucht."""
+        row = _row(MAX_ATTEMPTS)
+        record_result(row, success=False, error="550")
+        assert row.status == OutboxStatus.FAILED
+
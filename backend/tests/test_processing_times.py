@@ -0,0 +1,48 @@
+"""
+aitema|Hinweis - Bearbeitungszeiten Tests
+Zeitraum-Parsing und Perzentil-Endpunkt.
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+
+from app.services.processing_times import parse_range
+
+
+class TestZeitraum:
+    """Tests fuer parse_range."""
+
+    def test_standard_letzte_365_tage(self):
+        """Ohne Angaben: 365 Tage bis einschliesslich heute (stabil ueber den Tag)."""
+        now = datetime(2026, 10, 19, 15, 30, tzinfo=timezone.utc)
+        start, end = parse_range(None, None, now=now)
+        assert end == datetime(2026, 10, 20, tzinfo=timezone.utc)
+        assert (end - start).days == 365
+
+    def test_datum_ohne_zeitzone_gilt_als_utc(self):
+        """ISO-Datum ohne Zeitzone wird als UTC interpretiert."""
+        start, end = parse_range("2026-01-01", "2026-02-01")
+        assert start == datetime(2026, 1, 1, tzinfo=timezone.utc)
+        assert end == datetime(2026, 2, 1, tzinfo=timezone.utc)
+
+    def test_leerer_zeitraum(self):
+        """from muss vor to liegen."""
+        with pytest.raises(ValueError):
+            parse_range("2026-02-01", "2026-01-01")
+
+
+class TestProcessingTimesApi:
+    """Tests fuer GET /analytics/processing-times."""
+
+    def test_ungueltige_metrik(self, client, auth_headers):
+        """Unbekannte Metriken werden abgelehnt."""
+        response = client.get(
+            "/api/v1/analytics/processing-times?metric=foo", headers=auth_headers,
+        )
+        assert response.status_code == 400
+
+    def test_ohne_anmeldung(self, client):
+        """Endpunkt erfordert Anmeldung."""
+        response = client.get("/api/v1/analytics/processing-times")
+        assert response.status_code == 401
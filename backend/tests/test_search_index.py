@@ -0,0 +1,97 @@
+"""
+aitema|Hinweis - Suchindex Tests
+Tokenisierung, Abfragesyntax und Posting-Listen der verschluesselten Suche.
+"""
+
+import uuid
+
+import pytest
+
+from app.services.encryption import EncryptionService
+from app.services.search_index import (
+    TokenHasher, document_tokens, index_document, parse_query, search, stem, words,
+)
+
+MASTER_KEY = "a" * 64
+
+
+class TestTokenisierung:
+    """Tests fuer Normalisierung und Stemming."""
+
+    def test_flexionsformen(self):
+        """Flexionsformen ergeben dieselbe Stammform."""
+        assert stem("vorwurf") == stem("vorwurfe")
+        assert stem("bestechung") == stem("bestechungen")
+        assert words("Die Überweisung für Müller") == ["uberweisung", "muller"]
+
+    def test_praefixe(self):
+        """Praefixe werden ab 3 Zeichen als eigene Tokens indiziert."""
+        tokens = document_tokens("Korruption")
+        assert {"p:kor", "p:korrup"} <= tokens
+        assert "p:ko" not in tokens
+
+
+class TestAbfrage:
+    """Tests fuer parse_query."""
+
+    def test_und_oder_praefix(self):
+        """Leerzeichen = UND, OR/ODER trennt Gruppen, * = Praefix."""
+        groups = parse_query("Vergabe korrup* ODER Betrug")
+        assert groups == [sorted([f"w:{stem('vergabe')}", "p:korrup"]), [f"w:{stem('betrug')}"]]
+
+    @pytest.mark.parametrize("query", ["der die das", "ko*", " ".join(["wort"] * 11)])
+    def test_ungueltig(self, query):
+        """Nur Stoppwoerter, zu kurze Praefixe oder zu viele Begriffe."""
+        with pytest.raises(ValueError):
+            parse_query(query)
+
+    def test_mandantenschluessel(self):
+        """Gleiche Tokens ergeben je Mandant verschiedene Hashes."""
+        encryption = EncryptionService(MASTER_KEY)
+        assert TokenHasher(encryption, "t1")("w:betrug") != TokenHasher(encryption, "t2")("w:betrug")
+        assert TokenHasher(encryption, "t1")("w:betrug") == TokenHasher(encryption, "t1")("w:betrug")
+
+
+class TestSuche:
+    """Tests fuer Indizierung und Suche gegen die Datenbank."""
+
+    def test_schnittmenge(self, db_session, sample_case):
+        """UND schneidet, ODER vereinigt die Posting-Listen."""
+        hasher = TokenHasher(EncryptionService(MASTER_KEY), sample_case.tenant_id)
+        tenant_id = sample_case.tenant_id
+        index_document(db_session, tenant_id, "case", sample_case.id,
+                       "Verdacht auf Bestechung im Einkauf", hasher=hasher)
+        index_document(db_session, tenant_id, "hinweis", sample_case.hinweis_id,
+                       "Bestechungen bei der Vergabe", hasher=hasher)
+
+        def ids(q):
+            return {rid for _, rid in search(db_session, tenant_id, q, hasher=hasher)}
+
+        assert ids("bestechung") == {sample_case.id, sample_case.hinweis_id}
+        assert ids("bestechung einkauf") == {sample_case.id}
+        assert ids("einkauf OR vergab*") == {sample_case.id, sample_case.hinweis_id}
+
+    def test_nur_zugewiesene_faelle(self, db_session, sample_case, sample_ombudsperson):
+        """Mit assignee_id greift die Einschraenkung vor dem LIMIT."""
+        hasher = TokenHasher(EncryptionService(MASTER_KEY), sample_case.tenant_id)
+        tenant_id = sample_case.tenant_id
+        index_document(db_session, tenant_id, "case", sample_case.id,
+                       "Bestechung im Einkauf", hasher=hasher)
+        index_document(db_session, tenant_id, "hinweis", sample_case.hinweis_id,
+                       "Bestechung bei der Vergabe", hasher=hasher)
+        for _ in range(3):
+            index_document(db_session, tenant_id, "case", uuid.uuid4(),
+                           "Bestechung im Bauamt", hasher=hasher)
+
+        def ids(**kwargs):
+            return {
+                rid for _, rid in search(db_session, tenant_id, "bestechung", hasher=hasher,
+                                         **kwargs)
+            }
+
+        assert ids(assignee_id=sample_ombudsperson.id) == set()
+        sample_case.assignee_id = sample_ombudsperson.id
+        db_session.flush()
+        assert ids(assignee_id=sample_ombudsperson.id, limit=2) == {
+            sample_case.id, sample_case.hinweis_id,
+        }
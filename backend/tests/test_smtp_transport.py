@@ -0,0 +1,152 @@
+"""
+aitema|Hinweis - SMTP Transport Tests
+Pool und Batch-Versand gegen einen lokalen aiosmtpd-Sink.
+"""
+
+import socket
+
+import pytest
+from aiosmtpd.controller import Controller
+
+from app.services.notification import NotificationService
+from app.services.smtp_transport import (
+    AsyncSMTPTransport, SMTPSettings, SMTPConnectionPool, get_pool,
+)
+
+
+class SinkHandler:
+    """Zaehlt Sitzungen (EHLO) und sammelt empfangene Nachrichten."""
+
+    def __init__(self):
+        self.sessions = 0
+        self.messages = []
+        self.fail_next_with_421 = False
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        self.sessions += 1
+        session.host_name = hostname
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.fail_next_with_421:
+            self.fail_next_with_421 = False
+            return "421 Service not available"
+        self.messages.append((envelope.rcpt_tos, envelope.content))
+        return "250 OK"
+
+
+@pytest.fixture
+def smtp_sink():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    handler = SinkHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+    yield handler, port
+    controller.stop()
+
+
+def _settings(port, **kwargs):
+    return SMTPSettings(host="127.0.0.1", port=port, security="none", timeout=5, **kwargs)
+
+
+def _messages(n):
+    return [
+        {"to": f"empfaenger{i}@example.org", "subject": f"Test {i}", "body_text": "Hallo"}
+        for i in range(n)
+    ]
+
+
+class TestSMTPConnectionPool:
+    """Tests fuer Sitzungswiederverwendung und Neuaufbau."""
+
+    def test_send_many_eine_sitzung(self, smtp_sink):
+        """Mehrere Nachrichten gehen ueber eine einzige Sitzung."""
+        handler, port = smtp_sink
+        service = NotificationService(settings=_settings(port))
+
+        results = service.send_many(_messages(5))
+        get_pool(service.smtp).close()
+
+        assert all(r.success for r in results)
+        assert len(handler.messages) == 5
+        assert handler.sessions == 1
+
+    def test_pool_wiederverwendung(self, smtp_sink):
+        """Aufeinanderfolgende Aufrufe nutzen die Sitzung aus dem Pool."""
+        handler, port = smtp_sink
+        pool = SMTPConnectionPool(_settings(port))
+        try:
+            for _ in range(3):
+                assert pool.send_many([("a@example.org", "Subject: x\r\n\r\nHallo")]) == [None]
+        finally:
+            pool.close()
+        assert handler.sessions == 1
+
+    def test_idle_timeout_neue_sitzung(self, smtp_sink):
+        """Abgelaufene Leerlauf-Sitzungen werden nicht wiederverwendet."""
+        handler, port = smtp_sink
+        pool = SMTPConnectionPool(_settings(port, idle_timeout=0))
+        try:
+            pool.send_many([("a@example.org", "Subject: x\r\n\r\nHallo")])
+            pool.send_many([("b@example.org", "Subject: y\r\n\r\nHallo")])
+        finally:
+            pool.close()
+        assert handler.sessions == 2
+
+    def test_421_neu_verbinden(self, smtp_sink):
+        """Nach 421 wird neu verbunden und die Nachricht erneut gesendet."""
+        handler, port = smtp_sink
+        handler.fail_next_with_421 = True
+        pool = SMTPConnectionPool(_settings(port))
+        try:
+            errors = pool.send_many([
+                ("a@example.org", "Subject: x\r\n\r\nHallo"),
+                ("b@example.org", "Subject: y\r\n\r\nHallo"),
+            ])
+        finally:
+            pool.close()
+        assert errors == [None, None]
+        assert len(handler.messages) == 2
+        assert handler.sessions == 2
+
+    def test_nicht_konfiguriert(self):
+        """Ohne SMTP_HOST wird nichts versendet."""
+        service = NotificationService(settings=SMTPSettings(host=""))
+        result = service.send_email("a@example.org", "Test", "Hallo")
+        assert not result.success
+        assert result.error == "SMTP nicht konfiguriert"
+
+
+class TestAsyncSMTPTransport:
+    """Tests fuer die aiosmtplib-Variante."""
+
+    @pytest.mark.asyncio
+    async def test_send_many_async(self, smtp_sink):
+        """Asynchroner Batch-Versand ueber eine Sitzung."""
+        handler, port = smtp_sink
+        service = NotificationService(settings=_settings(port))
+
+        results = await service.send_many_async(_messages(3))
+
+        assert all(r.success for r in results)
+        assert len(handler.messages) == 3
+        assert handler.sessions == 1
+
+    @pytest.mark.asyncio
+    async def test_421_neu_verbinden_async(self, smtp_sink):
+        """Auch asynchron wird nach 421 neu verbunden und erneut gesendet."""
+        handler, port = smtp_sink
+        handler.fail_next_with_421 = True
+        transport = AsyncSMTPTransport(_settings(port))
+        try:
+            errors = await transport.send_many([
+                ("a@example.org", "Subject: x\r\n\r\nHallo"),
+                ("b@example.org", "Subject: y\r\n\r\nHallo"),
+            ])
+        finally:
+            await transport.close()
+        assert errors == [None, None]
+        assert len(handler.messages) == 2
+        assert handler.sessions == 2
@@ -0,0 +1,69 @@
+"""
+aitema|Hinweis - Fall-Workflow Tests
+Tests fuer die Uebersetzung und Pruefung mandantenspezifischer Workflows.
+"""
+
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from app.models.case import Case, CaseStatus
+from app.services.workflow import DEFAULT_COMPILED, compile_workflow
+
+
+class TestDefaultWorkflow:
+    """Der Standard-Workflow entspricht dem bisherigen Verhalten."""
+
+    def test_erlaubte_uebergaenge(self):
+        """Stichproben aus der bisherigen Uebergangstabelle."""
+        assert DEFAULT_COMPILED.can_transition("offen", "zugewiesen")
+        assert DEFAULT_COMPILED.can_transition("eingestellt", "offen")
+        assert not DEFAULT_COMPILED.can_transition("offen", "abgeschlossen")
+        assert DEFAULT_COMPILED.targets("abgeschlossen") == []
+
+    def test_case_nutzt_standard(self):
+        """Case.can_transition_to ohne Workflow nutzt den Standard."""
+        case = Case(status=CaseStatus.ZUGEWIESEN)
+        assert case.can_transition_to(CaseStatus.IN_ERMITTLUNG)
+        assert not case.can_transition_to(CaseStatus.ABGESCHLOSSEN)
+
+    def test_nebenwirkungen(self):
+        """Abschluss setzt closed_at, Eskalation setzt eskaliert_am."""
+        now = datetime.now(timezone.utc)
+        case = SimpleNamespace(closed_at=None, eskaliert=False, eskaliert_am=None)
+        DEFAULT_COMPILED.apply_side_effects(case, "abgeschlossen", now)
+        DEFAULT_COMPILED.apply_side_effects(case, "eskaliert", now)
+        assert case.closed_at == now and case.eskaliert and case.eskaliert_am == now
+
+
+class TestCustomWorkflow:
+    """Mandantenspezifische Workflows."""
+
+    def test_eigener_workflow(self):
+        """Eigene Uebergaenge und Pflichtfelder werden beachtet."""
+        workflow = compile_workflow({
+            "transitions": {"offen": ["abgeschlossen"]},
+            "required_fields": {"abgeschlossen": ["kommentar"]},
+        })
+        assert workflow.can_transition("offen", "abgeschlossen")
+        assert not workflow.can_transition("offen", "zugewiesen")
+        assert workflow.missing_fields("abgeschlossen", {}) == ["kommentar"]
+        assert workflow.missing_fields("abgeschlossen", {"kommentar": "erledigt"}) == []
+
+    @pytest.mark.parametrize("definition", [
+        {"transitions": {"offen": ["unbekannt"]}},
+        {"side_effects": {"abgeschlossen": ["loesche_alles"]}},
+        ["offen"],
+        {"transitions": []},
+        {"transitions": "x"},
+        {"transitions": {"neu": 5}},
+        {"transitions": {"offen": [["zugewiesen"]]}},
+        {"transitions": {"offen": "zugewiesen"}},
+        {"required_fields": {"eingestellt": "kommentar"}},
+        {"side_effects": {"abgeschlossen": [None]}},
+    ])
+    def test_ungueltig(self, definition):
+        """Unbekannte Zustaende, Nebenwirkungen oder falsche Typen werden abgelehnt."""
+        with pytest.raises(ValueError):
+            compile_workflow(definition)